@@ -243,11 +243,11 @@ async def list_screenshots_for_invoice(
             raise HTTPException(status_code=404, detail="Invoice not found")
 
         # Additional validation: verify merchant owns this invoice
-        from src.db.postgres import get_db_session
+        from src.db.postgres import get_async_db_session
         from sqlalchemy import text
 
-        with get_db_session() as db:
-            invoice_check = db.execute(
+        async with get_async_db_session() as db:
+            invoice_check = (await db.execute(
                 text("""
                     SELECT i.id FROM invoice.invoice i
                     WHERE i.id = :invoice_id
@@ -257,7 +257,7 @@ async def list_screenshots_for_invoice(
                     "invoice_id": invoice_id,
                     "tenant_id": tenant_id
                 }
-            ).fetchone()
+            )).fetchone()
 
             if not invoice_check:
                 logger.warning(f"Invoice access denied: {invoice_id} for tenant {tenant_id}")
@@ -1048,11 +1048,11 @@ async def notify_merchant_payment(
             return
 
         # Look up merchant's telegram chat ID
-        from src.db.postgres import get_db_session
+        from src.db.postgres import get_async_db_session
         from sqlalchemy import text
 
-        with get_db_session() as db:
-            result = db.execute(
+        async with get_async_db_session() as db:
+            result = await db.execute(
                 text("""
                     SELECT telegram_user_id FROM public.user
                     WHERE id = :merchant_id AND telegram_user_id IS NOT NULL
@@ -1541,11 +1541,11 @@ async def handle_manual_reject(callback: types.CallbackQuery):
 async def verify_merchant_permission(merchant_telegram_id: str, invoice_id: str) -> bool:
     """Verify merchant has permission to verify this invoice."""
     try:
-        from src.db.postgres import get_db_session
+        from src.db.postgres import get_async_db_session
         from sqlalchemy import text
 
-        with get_db_session() as db:
-            result = db.execute(
+        async with get_async_db_session() as db:
+            result = (await db.execute(
                 text("""
                     SELECT i.id FROM invoice.invoice i
                     JOIN public.user u ON i.merchant_id = u.id
@@ -1557,7 +1557,7 @@ async def verify_merchant_permission(merchant_telegram_id: str, invoice_id: str)
                     "invoice_id": invoice_id,
                     "telegram_id": merchant_telegram_id
                 }
-            ).fetchone()
+            )).fetchone()
 
             return result is not None
 
@@ -1576,11 +1576,11 @@ async def notify_customer_verification_result(
     """Notify customer of verification result."""
     try:
         # Get customer and invoice info
-        from src.db.postgres import get_db_session
+        from src.db.postgres import get_async_db_session
         from sqlalchemy import text
 
-        with get_db_session() as db:
-            result = db.execute(
+        async with get_async_db_session() as db:
+            result = (await db.execute(
                 text("""
                     SELECT
                         c.name as customer_name,
@@ -1597,7 +1597,7 @@ async def notify_customer_verification_result(
                     "invoice_id": invoice_id,
                     "tenant_id": tenant_id
                 }
-            ).fetchone()
+            )).fetchone()
 
             if not result or not result.telegram_chat_id:
                 logger.warning(f"Customer not found or no Telegram chat for invoice: {invoice_id}")
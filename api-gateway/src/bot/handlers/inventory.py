@@ -10,15 +10,15 @@ from aiogram.filters.command import Command
 from sqlalchemy import text, and_
 from typing import List, Dict, Any
 
-from src.db.postgres import get_db_session
+from src.db.postgres import get_async_db_session
 
 router = Router()
 
 
 async def get_user_by_telegram_id(telegram_id: str) -> Dict[str, Any] | None:
     """Get user by telegram ID with tenant info"""
-    with get_db_session() as db:
-        result = db.execute(
+    async with get_async_db_session() as db:
+        result = await db.execute(
             text("""
                 SELECT u.id, u.tenant_id, u.role, t.name as tenant_name
                 FROM public.user u
@@ -40,8 +40,8 @@ async def get_user_by_telegram_id(telegram_id: str) -> Dict[str, Any] | None:
 
 async def get_products_with_stock(tenant_id: str) -> List[Dict[str, Any]]:
     """Get products with current stock levels"""
-    with get_db_session() as db:
-        result = db.execute(
+    async with get_async_db_session() as db:
+        result = await db.execute(
             text("""
                 SELECT id, name, sku, current_stock, low_stock_threshold,
                        unit_price, currency, track_stock
@@ -70,8 +70,8 @@ async def get_products_with_stock(tenant_id: str) -> List[Dict[str, Any]]:
 
 async def get_low_stock_products(tenant_id: str) -> List[Dict[str, Any]]:
     """Get products below low stock threshold"""
-    with get_db_session() as db:
-        result = db.execute(
+    async with get_async_db_session() as db:
+        result = await db.execute(
             text("""
                 SELECT id, name, sku, current_stock, low_stock_threshold,
                        unit_price, currency
@@ -260,8 +260,8 @@ async def send_low_stock_alert(tenant_id: str, product_name: str, current_stock:
     """
     try:
         # Get all tenant users with Telegram
-        with get_db_session() as db:
-            result = db.execute(
+        async with get_async_db_session() as db:
+            result = await db.execute(
                 text("""
                     SELECT DISTINCT u.telegram_user_id, t.name as tenant_name
                     FROM public.user u
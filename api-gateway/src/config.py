@@ -21,6 +21,8 @@ class Settings(BaseSettings):
 
     # PostgreSQL (required for all operations)
     DATABASE_URL: str = Field(default="", description="PostgreSQL connection string")
+    DB_MAX_CONCURRENCY: int = Field(default=10, description="Maximum concurrent async DB sessions (protects bot polling from DB stalls)", ge=1)
+    DB_ACQUIRE_TIMEOUT: float = Field(default=30.0, description="Seconds to wait for a DB session slot before failing", gt=0)
 
     # Core API URL (for Telegram linking - calls main backend)
     CORE_API_URL: str = Field(
@@ -1,11 +1,22 @@
 # api-gateway/src/db/__init__.py
 """Database connections for API Gateway."""
 
-from .postgres import get_db_session, get_db, init_postgres, close_postgres
+from .postgres import (
+    get_db_session,
+    get_async_db_session,
+    get_db,
+    get_db_gate_stats,
+    init_postgres,
+    close_postgres,
+    close_async_postgres,
+)
 
 __all__ = [
     "get_db_session",
+    "get_async_db_session",
     "get_db",
+    "get_db_gate_stats",
     "init_postgres",
     "close_postgres",
+    "close_async_postgres",
 ]
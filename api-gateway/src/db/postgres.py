@@ -1,12 +1,17 @@
 # api-gateway/src/db/postgres.py
 """PostgreSQL database connection for API Gateway."""
 
+import asyncio
 import logging
 import os
-from contextlib import contextmanager
-from typing import Generator
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager, asynccontextmanager
+from typing import AsyncGenerator, Generator
 
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import Session, sessionmaker
 from sqlalchemy.pool import NullPool
 
@@ -18,6 +23,10 @@ logger = logging.getLogger(__name__)
 engine = None
 SessionLocal = None
 
+# Async engine - used by the services so queries don't block aiogram polling
+async_engine = None
+AsyncSessionLocal = None
+
 
 def _get_psycopg3_url(url: str) -> str:
     """
@@ -35,9 +44,120 @@ def _get_psycopg3_url(url: str) -> str:
     return url
 
 
+def _connect_args(application_name: str) -> dict:
+    """psycopg3 connect args for pgbouncer Transaction mode (shared by sync/async engines)."""
+    return {
+        "connect_timeout": 15,
+        "options": "-c timezone=utc -c default_transaction_isolation=read_committed",
+        "application_name": application_name,
+        "client_encoding": "utf8",
+        "autocommit": True,
+        # CRITICAL: Disable prepared statements for pgbouncer Transaction mode
+        # prepare_threshold=None DISABLES prepared statements entirely
+        # prepare_threshold=0 means "prepare immediately" (WRONG - still creates prepared statements!)
+        "prepare_threshold": None,
+    }
+
+
+class DBConcurrencyGate:
+    """
+    Bounds how many async DB sessions run at once and measures queue wait.
+
+    The bot and the API share one event loop. Capping concurrent sessions keeps
+    a burst of slow queries from opening unbounded pgbouncer connections, and the
+    wait metrics show when callers are queuing for a slot.
+
+    Slots are reentrant per task: a service that opens a session while its
+    caller already holds one (e.g. consume_link_code -> register_customer_in_ads_alert)
+    reuses the caller's slot instead of deadlocking when the gate is saturated.
+    Holders are tracked by asyncio task, not context, so tasks spawned inside a
+    gated block (gather/create_task) still queue for their own slot.
+    """
+
+    def __init__(self, limit: int, acquire_timeout: float, sample_size: int = 1000):
+        self.limit = limit
+        self.acquire_timeout = acquire_timeout
+        self._semaphore = asyncio.Semaphore(limit)
+        self._lock = threading.Lock()
+        self._wait_samples: deque = deque(maxlen=sample_size)
+        self.waiting = 0
+        self.in_flight = 0
+        self.acquired = 0
+        self.timeouts = 0
+        self.total_wait_ms = 0.0
+        self.max_wait_ms = 0.0
+        self._holders: set = set()
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncGenerator[None, None]:
+        task = asyncio.current_task()
+        if task in self._holders:
+            yield
+            return
+
+        start = time.perf_counter()
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout=self.acquire_timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise RuntimeError(
+                f"Timed out after {self.acquire_timeout}s waiting for a database slot "
+                f"({self.in_flight}/{self.limit} in use)"
+            )
+        finally:
+            self.waiting -= 1
+
+        wait_ms = (time.perf_counter() - start) * 1000
+        with self._lock:
+            self.acquired += 1
+            self.total_wait_ms += wait_ms
+            self.max_wait_ms = max(self.max_wait_ms, wait_ms)
+            self._wait_samples.append(wait_ms)
+
+        self.in_flight += 1
+        self._holders.add(task)
+        try:
+            yield
+        finally:
+            self._holders.discard(task)
+            self.in_flight -= 1
+            self._semaphore.release()
+
+    def stats(self) -> dict:
+        with self._lock:
+            samples = sorted(self._wait_samples)
+            acquired = self.acquired
+            total_wait_ms = self.total_wait_ms
+            max_wait_ms = self.max_wait_ms
+
+        def percentile(p: float) -> float:
+            if not samples:
+                return 0.0
+            return round(samples[min(len(samples) - 1, int(p * len(samples)))], 2)
+
+        return {
+            "limit": self.limit,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "acquired": acquired,
+            "timeouts": self.timeouts,
+            "avg_wait_ms": round(total_wait_ms / acquired, 2) if acquired else 0.0,
+            "p50_wait_ms": percentile(0.50),
+            "p95_wait_ms": percentile(0.95),
+            "max_wait_ms": round(max_wait_ms, 2),
+        }
+
+
+db_gate = DBConcurrencyGate(
+    limit=settings.DB_MAX_CONCURRENCY,
+    acquire_timeout=settings.DB_ACQUIRE_TIMEOUT,
+)
+
+
 def init_postgres():
     """Initialize PostgreSQL connection with NullPool for pgbouncer Transaction mode."""
-    global engine, SessionLocal
+    global engine, SessionLocal, async_engine, AsyncSessionLocal
 
     if not settings.DATABASE_URL:
         logger.warning("DATABASE_URL not set - PostgreSQL disabled")
@@ -61,29 +181,42 @@ def init_postgres():
         # Transaction mode isolation
         isolation_level="AUTOCOMMIT",
 
-        connect_args={
-            "connect_timeout": 15,
-            "options": "-c timezone=utc -c default_transaction_isolation=read_committed",
-            "application_name": f"api_gateway_{os.getpid()}",
-            "client_encoding": "utf8",
-            "autocommit": True,
-            # CRITICAL: Disable prepared statements for pgbouncer Transaction mode
-            # prepare_threshold=None DISABLES prepared statements entirely
-            # prepare_threshold=0 means "prepare immediately" (WRONG - still creates prepared statements!)
-            "prepare_threshold": None,
-        },
+        connect_args=_connect_args(f"api_gateway_{os.getpid()}"),
     )
     SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-    logger.info(f"PostgreSQL initialized with NullPool (PID: {os.getpid()})")
+
+    # Same pgbouncer settings on psycopg3's AsyncConnection. Services use this
+    # so a slow query yields to the event loop instead of freezing the bot.
+    async_engine = create_async_engine(
+        _get_psycopg3_url(settings.DATABASE_URL),
+        poolclass=NullPool,
+        isolation_level="AUTOCOMMIT",
+        connect_args=_connect_args(f"api_gateway_async_{os.getpid()}"),
+    )
+    AsyncSessionLocal = async_sessionmaker(
+        bind=async_engine,
+        autoflush=False,
+        expire_on_commit=False,
+    )
+    logger.info(
+        f"PostgreSQL initialized with NullPool (PID: {os.getpid()}, "
+        f"max concurrent async sessions: {db_gate.limit})"
+    )
 
 
 def close_postgres():
-    """Close PostgreSQL connection."""
+    """Close sync PostgreSQL connections."""
     global engine
     if engine:
         engine.dispose()
 
 
+async def close_async_postgres():
+    """Close async PostgreSQL connections."""
+    if async_engine:
+        await async_engine.dispose()
+
+
 @contextmanager
 def get_db_session() -> Generator[Session, None, None]:
     """
@@ -110,6 +243,39 @@ def get_db_session() -> Generator[Session, None, None]:
         session.close()
 
 
+@asynccontextmanager
+async def get_async_db_session() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Get an async database session context manager.
+
+    Waits for a slot in the bounded DB concurrency gate first, so the number
+    of concurrent sessions never exceeds DB_MAX_CONCURRENCY.
+
+    Usage:
+        async with get_async_db_session() as db:
+            result = await db.execute(text("SELECT ..."), {...})
+    """
+    if AsyncSessionLocal is None:
+        init_postgres()
+
+    if AsyncSessionLocal is None:
+        raise RuntimeError("Database not configured - DATABASE_URL not set")
+
+    async with db_gate.slot():
+        async with AsyncSessionLocal() as session:
+            try:
+                yield session
+                await session.commit()
+            except Exception:
+                await session.rollback()
+                raise
+
+
+def get_db_gate_stats() -> dict:
+    """Concurrency limit, in-flight sessions and queue-wait metrics."""
+    return db_gate.stats()
+
+
 def get_db() -> Generator[Session, None, None]:
     """
     FastAPI dependency for database sessions.
@@ -9,7 +9,7 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from src.config import settings
-from src.db import init_postgres, close_postgres
+from src.db import init_postgres, close_postgres, close_async_postgres, get_db_gate_stats
 from src.bot import create_bot, run_bot
 from src.api import invoice, scriptclient, audit_sales, ads_alert, ocr, internal, auto_learning
 
@@ -73,6 +73,7 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.error(f"Auto-Learning OCR shutdown error: {e}")
 
+    await close_async_postgres()
     close_postgres()
     logger.info("API Gateway shutdown complete")
 
@@ -135,20 +136,20 @@ async def health():
 @app.get("/health/detailed", tags=["system"])
 async def health_detailed():
     """Detailed health check with database status."""
-    from src.db.postgres import get_db_session
+    from src.db.postgres import get_async_db_session
     from sqlalchemy import text
 
     postgres_ok = False
     schemas_ok = {}
 
     try:
-        with get_db_session() as db:
+        async with get_async_db_session() as db:
             # Check if schemas exist
             for schema in ["invoice", "scriptclient", "audit_sales", "ads_alert"]:
-                result = db.execute(
+                result = (await db.execute(
                     text(f"SELECT schema_name FROM information_schema.schemata WHERE schema_name = :schema"),
                     {"schema": schema}
-                ).fetchone()
+                )).fetchone()
                 schemas_ok[schema] = result is not None
             postgres_ok = True
     except Exception as e:
@@ -160,6 +161,7 @@ async def health_detailed():
         "databases": {
             "postgresql": postgres_ok,
             "schemas": schemas_ok,
+            "concurrency": get_db_gate_stats(),
         }
     }
 
@@ -8,7 +8,7 @@ from datetime import datetime
 
 from sqlalchemy import text
 
-from src.db.postgres import get_db_session
+from src.db.postgres import get_async_db_session
 from src.config import settings
 
 logger = logging.getLogger(__name__)
@@ -41,8 +41,8 @@ class ClientLinkingService:
             Created customer dict or None on error
         """
         try:
-            with get_db_session() as db:
-                result = db.execute(
+            async with get_async_db_session() as db:
+                result = await db.execute(
                     text("""
                         INSERT INTO invoice.customer (tenant_id, merchant_id, name, email, phone, address)
                         VALUES (:tenant_id, :merchant_id, :name, :email, :phone, :address)
@@ -57,7 +57,7 @@ class ClientLinkingService:
                         "address": address
                     }
                 )
-                db.commit()
+                await db.commit()
                 row = result.fetchone()
                 if row:
                     return {
@@ -96,8 +96,8 @@ class ClientLinkingService:
             # Generate cryptographically secure token (64 chars)
             code = secrets.token_urlsafe(32)
 
-            with get_db_session() as db:
-                result = db.execute(
+            async with get_async_db_session() as db:
+                result = await db.execute(
                     text("""
                         INSERT INTO invoice.client_link_code
                             (tenant_id, merchant_id, customer_id, code)
@@ -111,7 +111,7 @@ class ClientLinkingService:
                         "code": code
                     }
                 )
-                db.commit()
+                await db.commit()
                 row = result.fetchone()
                 if row:
                     bot_username = settings.TELEGRAM_BOT_USERNAME or "KS_automations_bot"
@@ -138,8 +138,8 @@ class ClientLinkingService:
             or None if not found or already used
         """
         try:
-            with get_db_session() as db:
-                result = db.execute(
+            async with get_async_db_session() as db:
+                result = await db.execute(
                     text("""
                         SELECT
                             lc.id as link_id,
@@ -205,8 +205,8 @@ class ClientLinkingService:
 
             # SECURITY: Check if this telegram_chat_id is already registered IN THIS TENANT
             # (Same Telegram ID can be registered in different tenants - that's allowed)
-            with get_db_session() as db:
-                existing = db.execute(
+            async with get_async_db_session() as db:
+                existing = (await db.execute(
                     text("""
                         SELECT id, name FROM invoice.customer
                         WHERE telegram_chat_id = :telegram_chat_id
@@ -216,7 +216,7 @@ class ClientLinkingService:
                         "telegram_chat_id": telegram_chat_id,
                         "tenant_id": link_data["tenant_id"]
                     }
-                ).fetchone()
+                )).fetchone()
 
                 if existing:
                     return {
@@ -226,9 +226,9 @@ class ClientLinkingService:
                     }
 
             # Update customer with Telegram info and mark code as used
-            with get_db_session() as db:
+            async with get_async_db_session() as db:
                 # Update customer
-                db.execute(
+                await db.execute(
                     text("""
                         UPDATE invoice.customer
                         SET telegram_chat_id = :telegram_chat_id,
@@ -245,7 +245,7 @@ class ClientLinkingService:
                 )
 
                 # Mark link code as used
-                db.execute(
+                await db.execute(
                     text("""
                         UPDATE invoice.client_link_code
                         SET used_at = NOW()
@@ -254,7 +254,7 @@ class ClientLinkingService:
                     {"link_id": link_data["link_id"]}
                 )
 
-                db.commit()
+                await db.commit()
 
                 # Auto-register customer in ads_alert system for promotional broadcasts
                 await self.register_customer_in_ads_alert(
@@ -299,8 +299,8 @@ class ClientLinkingService:
             List of customer dicts
         """
         try:
-            with get_db_session() as db:
-                result = db.execute(
+            async with get_async_db_session() as db:
+                result = await db.execute(
                     text("""
                         SELECT
                             id, tenant_id, merchant_id, name, email, phone, address,
@@ -355,8 +355,8 @@ class ClientLinkingService:
             Customer dict or None if not found
         """
         try:
-            with get_db_session() as db:
-                result = db.execute(
+            async with get_async_db_session() as db:
+                result = await db.execute(
                     text("""
                         SELECT
                             c.id, c.tenant_id, c.merchant_id, c.name, c.email, c.phone,
@@ -406,8 +406,8 @@ class ClientLinkingService:
             List of pending invoices for the specified tenant only
         """
         try:
-            with get_db_session() as db:
-                result = db.execute(
+            async with get_async_db_session() as db:
+                result = await db.execute(
                     text("""
                         SELECT
                             id, tenant_id, customer_id, invoice_number,
@@ -470,8 +470,8 @@ class ClientLinkingService:
         try:
             code = secrets.token_urlsafe(32)
 
-            with get_db_session() as db:
-                result = db.execute(
+            async with get_async_db_session() as db:
+                result = await db.execute(
                     text("""
                         INSERT INTO invoice.client_link_code
                             (tenant_id, merchant_id, customer_id, code, is_batch, batch_name, max_uses, expires_at)
@@ -491,7 +491,7 @@ class ClientLinkingService:
                         "expires_days": expires_days
                     }
                 )
-                db.commit()
+                await db.commit()
                 row = result.fetchone()
                 if row:
                     bot_username = settings.TELEGRAM_BOT_USERNAME or "KS_automations_bot"
@@ -527,8 +527,8 @@ class ClientLinkingService:
             Next sequence number (1-indexed)
         """
         try:
-            with get_db_session() as db:
-                result = db.execute(
+            async with get_async_db_session() as db:
+                result = await db.execute(
                     text("""
                         INSERT INTO invoice.tenant_client_sequence (tenant_id, merchant_id, current_sequence)
                         VALUES (:tenant_id, :merchant_id, 1)
@@ -540,7 +540,7 @@ class ClientLinkingService:
                     """),
                     {"tenant_id": tenant_id, "merchant_id": merchant_id}
                 )
-                db.commit()
+                await db.commit()
                 return result.scalar()
         except Exception as e:
             logger.error(f"Error getting next client sequence: {e}")
@@ -558,8 +558,8 @@ class ClientLinkingService:
             Dict with batch code details or None if not found/expired/maxed
         """
         try:
-            with get_db_session() as db:
-                result = db.execute(
+            async with get_async_db_session() as db:
+                result = await db.execute(
                     text("""
                         SELECT
                             lc.id as link_id,
@@ -619,8 +619,8 @@ class ClientLinkingService:
             Created customer dict or None on error
         """
         try:
-            with get_db_session() as db:
-                result = db.execute(
+            async with get_async_db_session() as db:
+                result = await db.execute(
                     text("""
                         INSERT INTO invoice.customer
                             (tenant_id, merchant_id, name, telegram_chat_id, telegram_username, telegram_linked_at)
@@ -635,7 +635,7 @@ class ClientLinkingService:
                         "telegram_username": telegram_username
                     }
                 )
-                db.commit()
+                await db.commit()
                 row = result.fetchone()
                 if row:
                     return {
@@ -735,8 +735,8 @@ class ClientLinkingService:
             )
 
             # Increment batch use_count
-            with get_db_session() as db:
-                db.execute(
+            async with get_async_db_session() as db:
+                await db.execute(
                     text("""
                         UPDATE invoice.client_link_code
                         SET use_count = use_count + 1
@@ -744,7 +744,7 @@ class ClientLinkingService:
                     """),
                     {"link_id": batch["link_id"]}
                 )
-                db.commit()
+                await db.commit()
 
             return {
                 "success": True,
@@ -780,8 +780,8 @@ class ClientLinkingService:
             List of batch code dicts
         """
         try:
-            with get_db_session() as db:
-                result = db.execute(
+            async with get_async_db_session() as db:
+                result = await db.execute(
                     text("""
                         SELECT
                             id, code, batch_name, max_uses, use_count,
@@ -833,8 +833,8 @@ class ClientLinkingService:
             True if deleted, False otherwise
         """
         try:
-            with get_db_session() as db:
-                result = db.execute(
+            async with get_async_db_session() as db:
+                result = await db.execute(
                     text("""
                         DELETE FROM invoice.client_link_code
                         WHERE id = :code_id
@@ -845,7 +845,7 @@ class ClientLinkingService:
                     """),
                     {"code_id": code_id, "tenant_id": tenant_id, "merchant_id": merchant_id}
                 )
-                db.commit()
+                await db.commit()
                 return result.fetchone() is not None
         except Exception as e:
             logger.error(f"Error deleting batch code: {e}")
@@ -880,9 +880,9 @@ class ClientLinkingService:
             Created ads_alert.chat dict or None on error
         """
         try:
-            with get_db_session() as db:
+            async with get_async_db_session() as db:
                 # Check if already registered in ads_alert (by customer_id or chat_id)
-                existing = db.execute(
+                existing = (await db.execute(
                     text("""
                         SELECT id FROM ads_alert.chat
                         WHERE tenant_id = :tenant_id
@@ -893,14 +893,14 @@ class ClientLinkingService:
                         "customer_id": customer_id,
                         "chat_id": telegram_chat_id
                     }
-                ).fetchone()
+                )).fetchone()
 
                 if existing:
                     logger.info(f"Customer {customer_id} already registered in ads_alert")
                     return {"id": str(existing.id), "already_exists": True}
 
                 # Create new ads_alert.chat record linked to invoice.customer
-                result = db.execute(
+                result = await db.execute(
                     text("""
                         INSERT INTO ads_alert.chat
                             (tenant_id, customer_id, platform, chat_id, chat_name, customer_name, subscribed, is_active)
@@ -916,7 +916,7 @@ class ClientLinkingService:
                         "customer_name": customer_name
                     }
                 )
-                db.commit()
+                await db.commit()
                 row = result.fetchone()
                 if row:
                     logger.info(f"Auto-registered customer {customer_id} in ads_alert.chat")
@@ -955,8 +955,8 @@ class ClientLinkingService:
             True if updated, False if not found or error
         """
         try:
-            with get_db_session() as db:
-                result = db.execute(
+            async with get_async_db_session() as db:
+                result = await db.execute(
                     text("""
                         UPDATE ads_alert.chat
                         SET subscribed = :subscribed,
@@ -969,7 +969,7 @@ class ClientLinkingService:
                         "subscribed": subscribed
                     }
                 )
-                db.commit()
+                await db.commit()
                 row = result.fetchone()
                 if row:
                     logger.info(f"Updated ads_alert subscription for {telegram_chat_id}: subscribed={subscribed}")
@@ -993,8 +993,8 @@ class ClientLinkingService:
             Dict with subscription info or None if not found
         """
         try:
-            with get_db_session() as db:
-                result = db.execute(
+            async with get_async_db_session() as db:
+                result = await db.execute(
                     text("""
                         SELECT id, subscribed, customer_name, is_active
                         FROM ads_alert.chat
@@ -8,7 +8,7 @@ from decimal import Decimal
 
 from sqlalchemy import text
 
-from src.db.postgres import get_db_session
+from src.db.postgres import get_async_db_session
 
 logger = logging.getLogger(__name__)
 
@@ -19,16 +19,16 @@ class InvoiceService:
     async def get_stats(self, tenant_id: str) -> Dict[str, Any]:
         """Get invoice service statistics for a specific tenant."""
         try:
-            with get_db_session() as db:
-                customers = db.execute(
+            async with get_async_db_session() as db:
+                customers = (await db.execute(
                     text("SELECT COUNT(*) FROM invoice.customer WHERE tenant_id = :tenant_id"),
                     {"tenant_id": tenant_id}
-                ).scalar() or 0
+                )).scalar() or 0
 
-                invoices = db.execute(
+                invoices = (await db.execute(
                     text("SELECT COUNT(*) FROM invoice.invoice WHERE tenant_id = :tenant_id"),
                     {"tenant_id": tenant_id}
-                ).scalar() or 0
+                )).scalar() or 0
 
                 return {
                     "status": "connected",
@@ -42,8 +42,8 @@ class InvoiceService:
     async def get_customers(self, tenant_id: str, limit: int = 50) -> List[Dict[str, Any]]:
         """Get list of customers for a specific tenant."""
         try:
-            with get_db_session() as db:
-                result = db.execute(
+            async with get_async_db_session() as db:
+                result = await db.execute(
                     text("""
                         SELECT id, tenant_id, name, email, phone, address, meta, created_at, updated_at
                         FROM invoice.customer
@@ -80,9 +80,9 @@ class InvoiceService:
     ) -> List[Dict[str, Any]]:
         """Get list of invoices for a specific tenant."""
         try:
-            with get_db_session() as db:
+            async with get_async_db_session() as db:
                 if customer_id:
-                    result = db.execute(
+                    result = await db.execute(
                         text("""
                             SELECT id, tenant_id, customer_id, invoice_number, amount, status, items, meta, created_at, updated_at
                             FROM invoice.invoice
@@ -93,7 +93,7 @@ class InvoiceService:
                         {"tenant_id": tenant_id, "customer_id": customer_id, "limit": limit}
                     )
                 else:
-                    result = db.execute(
+                    result = await db.execute(
                         text("""
                             SELECT id, tenant_id, customer_id, invoice_number, amount, status, items, meta, created_at, updated_at
                             FROM invoice.invoice
@@ -132,8 +132,8 @@ class InvoiceService:
     ) -> List[Dict[str, Any]]:
         """Search customers by name within a specific tenant."""
         try:
-            with get_db_session() as db:
-                result = db.execute(
+            async with get_async_db_session() as db:
+                result = await db.execute(
                     text("""
                         SELECT id, tenant_id, name, email, phone, address, meta, created_at, updated_at
                         FROM invoice.customer
@@ -170,7 +170,7 @@ class InvoiceService:
             tenant_id: Tenant ID - REQUIRED for security (prevents cross-tenant data access)
         """
         try:
-            with get_db_session() as db:
+            async with get_async_db_session() as db:
                 # SECURITY: Always enforce tenant isolation - no unfiltered access
                 query = """
                     SELECT i.id, i.tenant_id, i.customer_id, i.invoice_number,
@@ -187,7 +187,7 @@ class InvoiceService:
                     WHERE i.id = :invoice_id AND i.tenant_id = :tenant_id
                 """
                 params = {"invoice_id": invoice_id, "tenant_id": tenant_id}
-                result = db.execute(text(query), params)
+                result = await db.execute(text(query), params)
                 row = result.fetchone()
                 if not row:
                     return None
@@ -233,7 +233,7 @@ class InvoiceService:
             tenant_id: Tenant ID - REQUIRED for security (prevents cross-tenant data access)
         """
         try:
-            with get_db_session() as db:
+            async with get_async_db_session() as db:
                 # SECURITY: Always enforce tenant isolation - no unfiltered access
                 query = """
                     SELECT i.id, i.tenant_id, i.customer_id, i.invoice_number,
@@ -248,7 +248,7 @@ class InvoiceService:
                 """
                 params = {"invoice_number": invoice_number, "tenant_id": tenant_id}
 
-                result = db.execute(text(query), params)
+                result = await db.execute(text(query), params)
                 row = result.fetchone()
                 if not row:
                     return None
@@ -309,7 +309,7 @@ class InvoiceService:
             screenshot_id: Associated screenshot ID for audit trail (NEW)
         """
         try:
-            with get_db_session() as db:
+            async with get_async_db_session() as db:
                 verified_at = datetime.utcnow() if verification_status == "verified" else None
 
                 # Build metadata to include screenshot reference
@@ -320,7 +320,7 @@ class InvoiceService:
                     metadata_update["verification_with_screenshot"] = True
 
                 # SECURITY: Always include tenant_id in WHERE clause to prevent cross-tenant updates
-                result = db.execute(
+                result = await db.execute(
                     text("""
                         UPDATE invoice.invoice
                         SET verification_status = :verification_status,
@@ -340,7 +340,7 @@ class InvoiceService:
                         "verification_note": verification_note
                     }
                 )
-                db.commit()
+                await db.commit()
                 return True
         except Exception as e:
             logger.error(f"Error updating invoice verification: {e}")
@@ -365,9 +365,9 @@ class InvoiceService:
             Dict with invoice data and screenshots list
         """
         try:
-            with get_db_session() as db:
+            async with get_async_db_session() as db:
                 # Get invoice details
-                invoice_result = db.execute(
+                invoice_result = (await db.execute(
                     text("""
                         SELECT
                             i.id, i.tenant_id, i.customer_id, i.merchant_id,
@@ -380,13 +380,13 @@ class InvoiceService:
                         WHERE i.id = :invoice_id AND i.tenant_id = :tenant_id
                     """),
                     {"invoice_id": invoice_id, "tenant_id": tenant_id}
-                ).fetchone()
+                )).fetchone()
 
                 if not invoice_result:
                     return None
 
                 # Get associated screenshots
-                screenshots_result = db.execute(
+                screenshots_result = (await db.execute(
                     text("""
                         SELECT
                             s.id, s.file_path as gridfs_file_id, s.file_url,
@@ -398,7 +398,7 @@ class InvoiceService:
                         ORDER BY s.created_at DESC
                     """),
                     {"tenant_id": tenant_id, "invoice_id": invoice_id}
-                ).fetchall()
+                )).fetchall()
 
                 # Build response
                 invoice_data = {
@@ -471,8 +471,8 @@ class InvoiceService:
             List of invoices with screenshot data requiring manual verification
         """
         try:
-            with get_db_session() as db:
-                result = db.execute(
+            async with get_async_db_session() as db:
+                result = (await db.execute(
                     text("""
                         SELECT DISTINCT
                             i.id, i.invoice_number, i.amount, i.currency,
@@ -496,7 +496,7 @@ class InvoiceService:
                         LIMIT :limit
                     """),
                     {"tenant_id": tenant_id, "limit": limit}
-                ).fetchall()
+                )).fetchall()
 
                 pending_verifications = []
                 for row in result:
@@ -624,8 +624,8 @@ class InvoiceService:
             )
 
             # Update invoice with discount (SECURITY: Include tenant_id for isolation)
-            with get_db_session() as db:
-                result = db.execute(
+            async with get_async_db_session() as db:
+                result = await db.execute(
                     text("""
                         UPDATE invoice.invoice
                         SET discount_amount = :discount_amount,
@@ -642,7 +642,7 @@ class InvoiceService:
                         "final_amount": discount_info["final_amount"]
                     }
                 )
-                db.commit()
+                await db.commit()
 
             return {
                 "success": True,
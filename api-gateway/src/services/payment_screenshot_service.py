@@ -13,7 +13,7 @@ from typing import Dict, Any, Optional, List, Tuple
 from uuid import UUID
 
 # Database imports
-from src.db.postgres import get_db_session
+from src.db.postgres import get_async_db_session
 from sqlalchemy import text
 
 # Reuse existing GridFS storage service
@@ -131,8 +131,8 @@ class PaymentScreenshotService:
         """Create record in scriptclient.screenshot table"""
 
         try:
-            with get_db_session() as db:
-                result = db.execute(
+            async with get_async_db_session() as db:
+                result = await db.execute(
                     text("""
                         INSERT INTO scriptclient.screenshot
                         (tenant_id, file_path, file_url, verified, meta, created_at, updated_at)
@@ -157,7 +157,7 @@ class PaymentScreenshotService:
                 )
 
                 screenshot_id = result.fetchone()[0]
-                db.commit()
+                await db.commit()
 
                 logger.info(f"Created screenshot record: {screenshot_id}")
                 return str(screenshot_id)
@@ -186,12 +186,12 @@ class PaymentScreenshotService:
             True if updated successfully
         """
         try:
-            with get_db_session() as db:
+            async with get_async_db_session() as db:
                 # Get current metadata
-                current_result = db.execute(
+                current_result = (await db.execute(
                     text("SELECT meta FROM scriptclient.screenshot WHERE id = :id"),
                     {"id": screenshot_id}
-                ).fetchone()
+                )).fetchone()
 
                 if not current_result:
                     logger.error(f"Screenshot not found: {screenshot_id}")
@@ -213,7 +213,7 @@ class PaymentScreenshotService:
                     updated_meta["ocr_extracted"] = self._sanitize_ocr_data(ocr_data)
 
                 # Update database record
-                db.execute(
+                await db.execute(
                     text("""
                         UPDATE scriptclient.screenshot
                         SET meta = :meta, updated_at = NOW()
@@ -225,7 +225,7 @@ class PaymentScreenshotService:
                     }
                 )
 
-                db.commit()
+                await db.commit()
                 logger.info(f"Updated screenshot OCR results: {screenshot_id}")
                 return True
 
@@ -277,7 +277,7 @@ class PaymentScreenshotService:
             Screenshot metadata dict or None if not found
         """
         try:
-            with get_db_session() as db:
+            async with get_async_db_session() as db:
                 query = """
                     SELECT id, tenant_id, file_path, file_url, verified,
                            verified_at, verified_by, meta, created_at, updated_at
@@ -292,7 +292,7 @@ class PaymentScreenshotService:
                     query += " AND tenant_id = :tenant_id"
                     params["tenant_id"] = tenant_id
 
-                result = db.execute(text(query), params).fetchone()
+                result = (await db.execute(text(query), params)).fetchone()
 
                 if result:
                     return {
@@ -374,12 +374,12 @@ class PaymentScreenshotService:
             True if updated successfully
         """
         try:
-            with get_db_session() as db:
+            async with get_async_db_session() as db:
                 # Get current metadata
-                current_result = db.execute(
+                current_result = (await db.execute(
                     text("SELECT meta FROM scriptclient.screenshot WHERE id = :id"),
                     {"id": screenshot_id}
-                ).fetchone()
+                )).fetchone()
 
                 if not current_result:
                     return False
@@ -395,7 +395,7 @@ class PaymentScreenshotService:
                 }
 
                 # Update database record
-                db.execute(
+                await db.execute(
                     text("""
                         UPDATE scriptclient.screenshot
                         SET verified = true,
@@ -412,7 +412,7 @@ class PaymentScreenshotService:
                     }
                 )
 
-                db.commit()
+                await db.commit()
                 logger.info(f"Marked screenshot as verified: {screenshot_id} by {verified_by}")
                 return True
 
@@ -436,8 +436,8 @@ class PaymentScreenshotService:
             List of screenshot metadata dictionaries
         """
         try:
-            with get_db_session() as db:
-                result = db.execute(
+            async with get_async_db_session() as db:
+                result = (await db.execute(
                     text("""
                         SELECT id, file_path, file_url, verified, verified_at,
                                verified_by, meta, created_at
@@ -450,7 +450,7 @@ class PaymentScreenshotService:
                         "tenant_id": tenant_id,
                         "invoice_id": invoice_id
                     }
-                ).fetchall()
+                )).fetchall()
 
                 screenshots = []
                 for row in result:
@@ -485,9 +485,9 @@ class PaymentScreenshotService:
             cutoff_date = datetime.now(timezone.utc) - timedelta(days=days_old)
             deleted_count = 0
 
-            with get_db_session() as db:
+            async with get_async_db_session() as db:
                 # Get old screenshots
-                old_screenshots = db.execute(
+                old_screenshots = (await db.execute(
                     text("""
                         SELECT id, file_path, tenant_id
                         FROM scriptclient.screenshot
@@ -496,27 +496,30 @@ class PaymentScreenshotService:
                         LIMIT 100
                     """),
                     {"cutoff_date": cutoff_date}
-                ).fetchall()
-
-                for screenshot in old_screenshots:
-                    try:
-                        # Delete from GridFS
-                        if self._is_storage_available():
-                            await self._storage.delete_file(screenshot.file_path)
-
-                        # Delete database record
-                        db.execute(
+                )).fetchall()
+
+            # Delete from GridFS outside the session so the DB slot isn't held
+            # across storage network I/O
+            removed_ids = []
+            for screenshot in old_screenshots:
+                try:
+                    if self._is_storage_available():
+                        await self._storage.delete_file(screenshot.file_path)
+                    removed_ids.append(screenshot.id)
+                except Exception as e:
+                    logger.error(f"Error deleting screenshot {screenshot.id}: {e}")
+
+            if removed_ids:
+                async with get_async_db_session() as db:
+                    for screenshot_id in removed_ids:
+                        await db.execute(
                             text("DELETE FROM scriptclient.screenshot WHERE id = :id"),
-                            {"id": screenshot.id}
+                            {"id": screenshot_id}
                         )
-
                         deleted_count += 1
-                        logger.info(f"Deleted old screenshot: {screenshot.id}")
-
-                    except Exception as e:
-                        logger.error(f"Error deleting screenshot {screenshot.id}: {e}")
+                        logger.info(f"Deleted old screenshot: {screenshot_id}")
 
-                db.commit()
+                    await db.commit()
 
             logger.info(f"Cleanup completed: deleted {deleted_count} screenshots")
             return deleted_count
@@ -8,7 +8,7 @@ from decimal import Decimal
 
 from sqlalchemy import text
 
-from src.db.postgres import get_db_session
+from src.db.postgres import get_async_db_session
 
 logger = logging.getLogger(__name__)
 
@@ -24,9 +24,9 @@ class ProRewardService:
     ) -> Dict[str, Any]:
         """Grant 1 month of free Pro subscription for early payment."""
         try:
-            with get_db_session() as db:
+            async with get_async_db_session() as db:
                 # Check if user already has a subscription
-                result = db.execute(
+                result = await db.execute(
                     text("""
                         SELECT id, tier, status, current_period_end, is_trial, trial_ends_at
                         FROM public.subscription
@@ -47,7 +47,7 @@ class ProRewardService:
 
                 if subscription:
                     # Update existing subscription
-                    db.execute(
+                    await db.execute(
                         text("""
                             UPDATE public.subscription
                             SET tier = 'pro',
@@ -64,7 +64,7 @@ class ProRewardService:
                     action = "extended"
                 else:
                     # Create new Pro subscription
-                    db.execute(
+                    await db.execute(
                         text("""
                             INSERT INTO public.subscription (
                                 user_id, tenant_id, tier, status,
@@ -84,7 +84,7 @@ class ProRewardService:
                     action = "granted"
 
                 # Mark the Pro reward as granted in the invoice
-                db.execute(
+                await db.execute(
                     text("""
                         UPDATE invoice.invoice
                         SET pro_reward_granted = TRUE,
@@ -95,7 +95,7 @@ class ProRewardService:
                     {"invoice_id": invoice_id}
                 )
 
-                db.commit()
+                await db.commit()
 
                 return {
                     "success": True,
@@ -128,8 +128,8 @@ class ProRewardService:
     ) -> Dict[str, Any]:
         """Check if invoice is eligible for Pro reward (not already granted)."""
         try:
-            with get_db_session() as db:
-                result = db.execute(
+            async with get_async_db_session() as db:
+                result = await db.execute(
                     text("""
                         SELECT pro_reward_granted, pro_reward_granted_at,
                                early_payment_enabled, customer_id, tenant_id
@@ -172,9 +172,9 @@ class ProRewardService:
     ) -> Optional[str]:
         """Get user ID associated with customer for Pro reward."""
         try:
-            with get_db_session() as db:
+            async with get_async_db_session() as db:
                 # Try to find user through customer metadata or linked accounts
-                result = db.execute(
+                result = await db.execute(
                     text("""
                         SELECT meta
                         FROM invoice.customer
@@ -191,7 +191,7 @@ class ProRewardService:
                         return meta["user_id"]
 
                 # Fallback: look for linked Telegram users (if available)
-                result = db.execute(
+                result = await db.execute(
                     text("""
                         SELECT user_id
                         FROM public.telegram_user_link tul
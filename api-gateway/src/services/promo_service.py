@@ -6,7 +6,7 @@ from typing import Dict, Any, List, Optional
 
 from sqlalchemy import text
 
-from src.db.postgres import get_db_session
+from src.db.postgres import get_async_db_session
 
 logger = logging.getLogger(__name__)
 
@@ -17,16 +17,16 @@ class PromoService:
     async def get_stats(self, tenant_id: str) -> Dict[str, Any]:
         """Get promo service statistics for a specific tenant."""
         try:
-            with get_db_session() as db:
-                chats = db.execute(
+            async with get_async_db_session() as db:
+                chats = (await db.execute(
                     text("SELECT COUNT(*) FROM ads_alert.chat WHERE tenant_id = :tenant_id"),
                     {"tenant_id": tenant_id}
-                ).scalar() or 0
+                )).scalar() or 0
 
-                promos = db.execute(
+                promos = (await db.execute(
                     text("SELECT COUNT(*) FROM ads_alert.promotion WHERE tenant_id = :tenant_id"),
                     {"tenant_id": tenant_id}
-                ).scalar() or 0
+                )).scalar() or 0
 
                 return {
                     "status": "connected",
@@ -40,8 +40,8 @@ class PromoService:
     async def get_registered_chats(self, tenant_id: str, limit: int = 50) -> List[Dict[str, Any]]:
         """Get list of registered chats for a specific tenant."""
         try:
-            with get_db_session() as db:
-                result = db.execute(
+            async with get_async_db_session() as db:
+                result = await db.execute(
                     text("""
                         SELECT id, tenant_id, platform, chat_id, chat_name, is_active, meta, created_at, updated_at
                         FROM ads_alert.chat
@@ -73,8 +73,8 @@ class PromoService:
     async def get_current_status(self, tenant_id: str) -> Optional[Dict[str, Any]]:
         """Get current promotion status for a specific tenant."""
         try:
-            with get_db_session() as db:
-                result = db.execute(
+            async with get_async_db_session() as db:
+                result = await db.execute(
                     text("""
                         SELECT id, tenant_id, active, last_sent, next_scheduled, meta, updated_at
                         FROM ads_alert.promo_status
@@ -103,8 +103,8 @@ class PromoService:
     async def get_promotions(self, tenant_id: str, limit: int = 50) -> List[Dict[str, Any]]:
         """Get list of promotions for a specific tenant."""
         try:
-            with get_db_session() as db:
-                result = db.execute(
+            async with get_async_db_session() as db:
+                result = await db.execute(
                     text("""
                         SELECT id, tenant_id, title, content, status, sent_at, meta, created_at, updated_at
                         FROM ads_alert.promotion
@@ -7,7 +7,7 @@ from typing import Dict, Any, List, Optional
 
 from sqlalchemy import text
 
-from src.db.postgres import get_db_session
+from src.db.postgres import get_async_db_session
 
 logger = logging.getLogger(__name__)
 
@@ -18,18 +18,18 @@ class SalesService:
     async def get_stats(self) -> Dict[str, Any]:
         """Get sales service statistics."""
         try:
-            with get_db_session() as db:
-                total_records = db.execute(
+            async with get_async_db_session() as db:
+                total_records = (await db.execute(
                     text("SELECT COUNT(*) FROM audit_sales.sale")
-                ).scalar() or 0
+                )).scalar() or 0
 
                 # Get this month's count
-                this_month = db.execute(
+                this_month = (await db.execute(
                     text("""
                         SELECT COUNT(*) FROM audit_sales.sale
                         WHERE date >= date_trunc('month', CURRENT_DATE)
                     """)
-                ).scalar() or 0
+                )).scalar() or 0
 
                 return {
                     "status": "connected",
@@ -43,8 +43,8 @@ class SalesService:
     async def get_daily_summary(self, date_str: str) -> Optional[Dict[str, Any]]:
         """Get daily sales summary."""
         try:
-            with get_db_session() as db:
-                result = db.execute(
+            async with get_async_db_session() as db:
+                result = await db.execute(
                     text("""
                         SELECT
                             COALESCE(SUM(amount), 0) as total,
@@ -70,8 +70,8 @@ class SalesService:
     async def get_sales(self, limit: int = 50) -> List[Dict[str, Any]]:
         """Get list of sales records."""
         try:
-            with get_db_session() as db:
-                result = db.execute(
+            async with get_async_db_session() as db:
+                result = await db.execute(
                     text("""
                         SELECT id, tenant_id, date, amount, description, category, meta, created_at, updated_at
                         FROM audit_sales.sale
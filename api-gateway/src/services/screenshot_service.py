@@ -6,7 +6,7 @@ from typing import Dict, Any, List
 
 from sqlalchemy import text
 
-from src.db.postgres import get_db_session
+from src.db.postgres import get_async_db_session
 
 logger = logging.getLogger(__name__)
 
@@ -17,18 +17,18 @@ class ScreenshotService:
     async def get_stats(self) -> Dict[str, Any]:
         """Get screenshot service statistics."""
         try:
-            with get_db_session() as db:
-                total = db.execute(
+            async with get_async_db_session() as db:
+                total = (await db.execute(
                     text("SELECT COUNT(*) FROM scriptclient.screenshot")
-                ).scalar() or 0
+                )).scalar() or 0
 
-                verified = db.execute(
+                verified = (await db.execute(
                     text("SELECT COUNT(*) FROM scriptclient.screenshot WHERE verified = true")
-                ).scalar() or 0
+                )).scalar() or 0
 
-                pending = db.execute(
+                pending = (await db.execute(
                     text("SELECT COUNT(*) FROM scriptclient.screenshot WHERE verified = false")
-                ).scalar() or 0
+                )).scalar() or 0
 
                 return {
                     "status": "connected",
@@ -43,8 +43,8 @@ class ScreenshotService:
     async def get_verified_screenshots(self, limit: int = 50) -> List[Dict[str, Any]]:
         """Get list of verified screenshots."""
         try:
-            with get_db_session() as db:
-                result = db.execute(
+            async with get_async_db_session() as db:
+                result = await db.execute(
                     text("""
                         SELECT id, tenant_id, file_path, file_url, verified, verified_at, verified_by, meta, created_at, updated_at
                         FROM scriptclient.screenshot
@@ -77,8 +77,8 @@ class ScreenshotService:
     async def get_pending_screenshots(self, limit: int = 50) -> List[Dict[str, Any]]:
         """Get list of pending (unverified) screenshots."""
         try:
-            with get_db_session() as db:
-                result = db.execute(
+            async with get_async_db_session() as db:
+                result = await db.execute(
                     text("""
                         SELECT id, tenant_id, file_path, file_url, verified, verified_at, verified_by, meta, created_at, updated_at
                         FROM scriptclient.screenshot
@@ -0,0 +1,81 @@
+"""
+API Gateway database concurrency gate tests
+
+Checks that async sessions are bounded, that nested sessions in the same task
+reuse their caller's slot, and that queue-wait metrics are recorded.
+"""
+
+import asyncio
+
+import pytest
+
+from src.db.postgres import DBConcurrencyGate
+
+
+@pytest.mark.asyncio
+async def test_limits_concurrent_slots():
+    gate = DBConcurrencyGate(limit=2, acquire_timeout=5)
+    peak = 0
+
+    async def worker():
+        nonlocal peak
+        async with gate.slot():
+            peak = max(peak, gate.in_flight)
+            await asyncio.sleep(0.01)
+
+    await asyncio.gather(*(worker() for _ in range(6)))
+
+    stats = gate.stats()
+    assert peak == 2
+    assert stats["acquired"] == 6
+    assert stats["in_flight"] == 0
+    assert stats["waiting"] == 0
+    assert stats["max_wait_ms"] > 0
+
+
+@pytest.mark.asyncio
+async def test_nested_slot_reuses_callers_slot():
+    gate = DBConcurrencyGate(limit=1, acquire_timeout=0.1)
+    async with gate.slot():
+        async with gate.slot():
+            assert gate.in_flight == 1
+    assert gate.stats()["acquired"] == 1
+
+
+@pytest.mark.asyncio
+async def test_times_out_when_saturated():
+    gate = DBConcurrencyGate(limit=1, acquire_timeout=0.05)
+    release = asyncio.Event()
+
+    async def holder():
+        async with gate.slot():
+            await release.wait()
+
+    task = asyncio.create_task(holder())
+    await asyncio.sleep(0)
+
+    with pytest.raises(RuntimeError, match="waiting for a database slot"):
+        async with gate.slot():
+            pass
+
+    release.set()
+    await task
+    assert gate.stats()["timeouts"] == 1
+
+
+@pytest.mark.asyncio
+async def test_spawned_tasks_do_not_inherit_callers_slot():
+    gate = DBConcurrencyGate(limit=2, acquire_timeout=5)
+    peak = 0
+
+    async def child():
+        nonlocal peak
+        async with gate.slot():
+            peak = max(peak, gate.in_flight)
+            await asyncio.sleep(0.01)
+
+    async with gate.slot():
+        await asyncio.gather(*(child() for _ in range(3)))
+
+    assert peak == 2
+    assert gate.stats()["acquired"] == 4
@@ -6,7 +6,9 @@ from functools import wraps
 from typing import Callable, List, Optional
 from fastapi import HTTPException, status, Depends
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.config import get_settings
 from app.core.db import get_db
 from app.core.models import User, UserRole
 from app.core.dependencies import get_current_user
@@ -30,6 +32,15 @@ class TenantOwnerRequired(HTTPException):
         )
 
 
+class PlatformAdminRequired(HTTPException):
+    """Raised when operation affects every tenant and requires a platform operator"""
+    def __init__(self):
+        super().__init__(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="This operation is restricted to platform administrators"
+        )
+
+
 def require_role(*allowed_roles: UserRole):
     """
     Decorator to enforce role-based access control.
@@ -121,6 +132,41 @@ async def get_current_owner(
     return current_user
 
 
+def is_platform_admin(user: User) -> bool:
+    """
+    True if the user is a tenant owner whose verified email is listed in
+    PLATFORM_ADMIN_EMAILS. Tenant owners alone are not enough: endpoints
+    guarded by this see or change state shared by every tenant.
+    """
+    allowed = {
+        email.strip().lower()
+        for email in get_settings().PLATFORM_ADMIN_EMAILS.split(",")
+        if email.strip()
+    }
+    return (
+        user.role == UserRole.admin
+        and bool(user.email_verified)
+        and bool(user.email)
+        and user.email.lower() in allowed
+    )
+
+
+async def get_platform_admin(
+    current_user: User = Depends(get_current_user)
+) -> User:
+    """
+    Dependency to get current user and enforce platform administrator access.
+
+    Usage:
+        async def fleet_endpoint(admin: User = Depends(get_platform_admin)):
+            # admin is listed in PLATFORM_ADMIN_EMAILS
+    """
+    if not is_platform_admin(current_user):
+        raise PlatformAdminRequired()
+
+    return current_user
+
+
 async def get_current_member_or_owner(
     current_user: User = Depends(get_current_user)
 ) -> User:
@@ -245,7 +291,14 @@ def require_subscription_feature(feature_name: str):
                     detail="Missing user or database context for subscription check"
                 )
 
-            if not check_subscription_feature(feature_name, current_user, db):
+            if isinstance(db, AsyncSession):
+                allowed = await db.run_sync(
+                    lambda sync_db: check_subscription_feature(feature_name, current_user, sync_db)
+                )
+            else:
+                allowed = check_subscription_feature(feature_name, current_user, db)
+
+            if not allowed:
                 raise HTTPException(
                     status_code=status.HTTP_402_PAYMENT_REQUIRED,
                     detail=f"Feature '{feature_name}' requires Pro subscription. Upgrade your plan to continue."
@@ -9,26 +9,81 @@ This is particularly effective for:
 - Frequently accessed lookups
 - Stats and aggregations
 """
+import asyncio
+import heapq
+import json
+import sys
+import uuid
 import time
 import threading
-from typing import Any, Dict, Optional, TypeVar, Callable, Union
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple, TypeVar, Callable, Union
 from functools import wraps
-from dataclasses import dataclass
 from datetime import datetime, timedelta
 import logging
 
+from sqlalchemy.util import await_only
+from sqlalchemy.util.concurrency import in_greenlet
+
+from app.core.cache_codec import CacheSerializer, CodecError, get_cache_serializer
+from app.core.single_flight import AsyncSingleFlight, SingleFlight, Stamped, should_refresh_early
+
 logger = logging.getLogger(__name__)
 
 T = TypeVar('T')
 
-@dataclass
+# Recursion depth for value size estimation; deeper structures are counted shallowly
+_SIZE_DEPTH = 4
+
+
+def estimate_size(value: Any, _depth: int = 0, _seen: Optional[set] = None) -> int:
+    """
+    Approximate retained size of a cached value in bytes.
+
+    Walks containers and plain objects a few levels deep with sys.getsizeof.
+    SQLAlchemy instance state is skipped so a cached model is not charged for
+    its session and mapper.
+    """
+    if _seen is None:
+        _seen = set()
+    if id(value) in _seen:
+        return 0
+    _seen.add(id(value))
+
+    size = sys.getsizeof(value, 64)
+    if _depth >= _SIZE_DEPTH or isinstance(value, (str, bytes, bytearray, int, float, bool, type(None))):
+        return size
+
+    _depth += 1
+    if isinstance(value, dict):
+        for k, v in value.items():
+            size += estimate_size(k, _depth, _seen) + estimate_size(v, _depth, _seen)
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        for item in value:
+            size += estimate_size(item, _depth, _seen)
+    elif hasattr(value, '__slots__'):
+        for name in value.__slots__:
+            size += estimate_size(getattr(value, name, None), _depth, _seen)
+    elif hasattr(value, '__dict__'):
+        for k, v in vars(value).items():
+            if not k.startswith('_sa_'):
+                size += estimate_size(k, _depth, _seen) + estimate_size(v, _depth, _seen)
+    return size
+
+
 class CacheEntry:
     """Cache entry with TTL and metadata"""
-    value: Any
-    expires_at: float
-    created_at: float
-    hit_count: int = 0
-    key: str = ""
+    __slots__ = ("value", "expires_at", "created_at", "hit_count", "key", "size")
+
+    def __init__(self, value: Any, expires_at: float, created_at: float, key: str = "", size: int = 0):
+        self.value = value
+        self.expires_at = expires_at
+        self.created_at = created_at
+        self.hit_count = 0
+        self.key = key
+        self.size = size
+
 
 class TTLCache:
     """
@@ -36,16 +91,21 @@ class TTLCache:
 
     Features:
     - Configurable TTL per entry
-    - Automatic expired entry cleanup
+    - O(1) get/set/LRU eviction (OrderedDict in recency order)
+    - Expiry heap so cleanup only touches expired entries
     - Thread-safe operations
-    - Memory usage limits
+    - Entry-count and byte-size limits
     - Cache statistics
     """
 
-    def __init__(self, default_ttl: int = 300, max_size: int = 1000):
+    def __init__(self, default_ttl: int = 300, max_size: int = 1000, max_bytes: Optional[int] = None):
         self.default_ttl = default_ttl  # seconds
         self.max_size = max_size
-        self._cache: Dict[str, CacheEntry] = {}
+        self.max_bytes = max_bytes
+        self._cache: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        # (expires_at, key) min-heap; stale items are skipped lazily
+        self._expiry: List[Tuple[float, str]] = []
+        self._bytes = 0
         self._lock = threading.RLock()
         self._stats = {
             'hits': 0,
@@ -64,41 +124,60 @@ class TTLCache:
 
             if time.time() > entry.expires_at:
                 # Expired, remove it
-                del self._cache[key]
+                self._remove(key)
                 self._stats['misses'] += 1
                 return None
 
             # Cache hit
             entry.hit_count += 1
+            self._cache.move_to_end(key)
             self._stats['hits'] += 1
             return entry.value
 
     def set(self, key: str, value: Any, ttl: Optional[int] = None) -> None:
         """Set value in cache with TTL"""
         ttl = ttl or self.default_ttl
-        expires_at = time.time() + ttl
+        now = time.time()
+        expires_at = now + ttl
+        size = estimate_size(key) + estimate_size(value)
 
         with self._lock:
-            # Check if we need to evict entries
-            if len(self._cache) >= self.max_size and key not in self._cache:
+            if key in self._cache:
+                self._remove(key)
+
+            if self.max_bytes is not None and size > self.max_bytes:
+                logger.debug(f"Not caching {key}: {size} bytes exceeds cache limit")
+                return
+
+            # Evict least recently used entries until the new one fits
+            while self._cache and (
+                len(self._cache) >= self.max_size
+                or (self.max_bytes is not None and self._bytes + size > self.max_bytes)
+            ):
                 self._evict_lru()
 
             self._cache[key] = CacheEntry(
                 value=value,
                 expires_at=expires_at,
-                created_at=time.time(),
-                key=key
+                created_at=now,
+                key=key,
+                size=size
             )
+            self._bytes += size
+            heapq.heappush(self._expiry, (expires_at, key))
+            self._compact_expiry()
 
     def delete(self, key: str) -> bool:
         """Remove key from cache"""
         with self._lock:
-            return self._cache.pop(key, None) is not None
+            return self._remove(key) is not None
 
     def clear(self) -> None:
         """Clear all cache entries"""
         with self._lock:
             self._cache.clear()
+            self._expiry.clear()
+            self._bytes = 0
             logger.info("Cache cleared")
 
     def cleanup_expired(self) -> int:
@@ -107,14 +186,13 @@ class TTLCache:
         removed_count = 0
 
         with self._lock:
-            expired_keys = [
-                key for key, entry in self._cache.items()
-                if current_time > entry.expires_at
-            ]
-
-            for key in expired_keys:
-                del self._cache[key]
-                removed_count += 1
+            while self._expiry and self._expiry[0][0] < current_time:
+                expires_at, key = heapq.heappop(self._expiry)
+                entry = self._cache.get(key)
+                # Skip heap items left behind by overwrites and deletes
+                if entry is not None and entry.expires_at == expires_at:
+                    self._remove(key)
+                    removed_count += 1
 
             if removed_count > 0:
                 self._stats['cleanups'] += 1
@@ -122,18 +200,33 @@ class TTLCache:
 
         return removed_count
 
+    def delete_matching(self, substring: str) -> int:
+        """Remove every key containing substring"""
+        with self._lock:
+            keys = [key for key in self._cache if substring in key]
+            for key in keys:
+                self._remove(key)
+            return len(keys)
+
+    def _remove(self, key: str) -> Optional[CacheEntry]:
+        entry = self._cache.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry.size
+        return entry
+
+    def _compact_expiry(self) -> None:
+        """Rebuild the expiry heap once stale items outnumber live entries"""
+        if len(self._expiry) > 2 * len(self._cache) + 64:
+            self._expiry = [(entry.expires_at, key) for key, entry in self._cache.items()]
+            heapq.heapify(self._expiry)
+
     def _evict_lru(self) -> None:
         """Evict least recently used entry"""
         if not self._cache:
             return
 
-        # Find entry with lowest hit count and oldest creation time
-        lru_key = min(
-            self._cache.keys(),
-            key=lambda k: (self._cache[k].hit_count, self._cache[k].created_at)
-        )
-
-        del self._cache[lru_key]
+        _, entry = self._cache.popitem(last=False)
+        self._bytes -= entry.size
         self._stats['evictions'] += 1
 
     def stats(self) -> Dict[str, Any]:
@@ -147,13 +240,414 @@ class TTLCache:
                 'size': len(self._cache),
                 'max_size': self.max_size,
                 'hit_rate': round(hit_rate * 100, 2),
-                'memory_usage_estimate': len(self._cache) * 100  # rough estimate
+                'memory_bytes': self._bytes,
+                'max_bytes': self.max_bytes
             }
 
+
+INVALIDATION_CHANNEL = "cache:invalidate"
+
+# L2 writes and invalidations issued on the event loop thread run here, one at
+# a time in submission order: a delete is never overtaken by an older write,
+# and other workers are told to drop their L1 only once the L2 copy is gone.
+_l2_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="cache-l2")
+
+
+def _glob_escape(value: str) -> str:
+    return "".join(f"[{c}]" if c in "*?[]" else c for c in value)
+
+
+def _on_event_loop() -> bool:
+    """True on a thread running an asyncio loop, including inside AsyncSession.run_sync"""
+    try:
+        asyncio.get_running_loop()
+        return True
+    except RuntimeError:
+        return False
+
+
+def flush_l2_writes(timeout: float = 5.0) -> None:
+    """Wait for queued background L2 writes and invalidations (shutdown, tests)"""
+    _l2_writer.submit(lambda: None).result(timeout)
+
+
+class TieredCache:
+    """
+    Two-tier cache for one namespace: in-process TTLCache (L1) in front of
+    Redis (L2).
+
+    Without Redis attached this is a plain L1 cache. With Redis attached:
+    - reads fall through L1 -> L2 and L2 hits are promoted into L1
+    - writes go to both tiers; L1 keeps entries at most l1_max_ttl so a lost
+      invalidation message cannot serve stale data for the full TTL
+    - deletes are broadcast through the CacheInvalidationBus so every worker
+      drops its L1 copy
+    Redis errors are logged and counted; the cache degrades to L1 only.
+
+    The Redis tier never blocks the event loop:
+    - aget/aset read L1 inline and run the Redis round trip in a worker thread
+    - sync get() on the loop thread goes through SQLAlchemy's greenlet bridge
+      when called inside AsyncSession.run_sync (the sync repositories) and
+      skips L2 otherwise
+    - sync writes and invalidations on the loop thread are queued on one
+      background writer; L2 reads are skipped until queued invalidations have
+      run, so a value is not read back from L2 just after it was deleted
+    Called from plain threads, everything runs inline.
+    """
+
+    def __init__(self, namespace: str, l1: TTLCache, default_ttl: Optional[int] = None):
+        self.namespace = namespace
+        self.l1 = l1
+        self.default_ttl = default_ttl or l1.default_ttl
+        self.l1_max_ttl: Optional[int] = None
+        self.redis = None
+        self.bus: Optional["CacheInvalidationBus"] = None
+        self.serializer: Optional[CacheSerializer] = None
+        self._stats = {
+            'l1_hits': 0,
+            'l2_hits': 0,
+            'misses': 0,
+            'sets': 0,
+            'l2_errors': 0,
+            'l2_skipped': 0,
+            'l2_deferred': 0,
+            'l2_bypassed': 0,
+            'invalidations': 0
+        }
+        # Invalidations queued on the background writer and not yet applied to L2
+        self._pending_invalidations = 0
+        self._pending_lock = threading.Lock()
+
+    def attach(
+        self,
+        redis_client,
+        bus: Optional["CacheInvalidationBus"] = None,
+        l1_max_ttl: Optional[int] = None,
+        serializer: Optional[CacheSerializer] = None
+    ) -> None:
+        """Enable the Redis tier (None keeps L1 only) and cross-worker invalidation when bus is given"""
+        self.redis = redis_client
+        self.bus = bus
+        self.l1_max_ttl = l1_max_ttl
+        self.serializer = serializer or get_cache_serializer()
+        if bus:
+            bus.register(self)
+
+    def detach(self) -> None:
+        self.redis = None
+        self.bus = None
+        self.l1_max_ttl = None
+
+    def _l2_key(self, key: str) -> str:
+        return f"cache:{self.namespace}:{key}"
+
+    def _l1_ttl(self, ttl: int) -> int:
+        return min(ttl, self.l1_max_ttl) if self.l1_max_ttl else ttl
+
+    def _l2_error(self, action: str, error: Exception) -> None:
+        self._stats['l2_errors'] += 1
+        logger.warning(f"L2 cache {action} failed for namespace {self.namespace}: {error}")
+
+    def _l1_get(self, key: str) -> Optional[Any]:
+        value = self.l1.get(key)
+        if value is not None:
+            self._stats['l1_hits'] += 1
+        return value
+
+    def _promote(self, key: str, data: Optional[bytes]) -> Optional[Any]:
+        """Decode an L2 payload into L1; counts the lookup as an L2 hit or a miss"""
+        if data is None:
+            self._stats['misses'] += 1
+            return None
+        value = self.serializer.loads(data)
+        self.l1.set(key, value, self._l1_ttl(self.default_ttl))
+        self._stats['l2_hits'] += 1
+        return value
+
+    def _encode(self, key: str, value: Any) -> Optional[bytes]:
+        try:
+            return self.serializer.dumps(value)
+        except CodecError as e:
+            # e.g. ORM instances: keep them process-local
+            self._stats['l2_skipped'] += 1
+            logger.debug(f"Not sharing {key} through L2: {e}")
+            return None
+
+    def _l2_readable(self) -> bool:
+        return self.redis is not None and not self._pending_invalidations
+
+    def get(self, key: str) -> Optional[Any]:
+        value = self._l1_get(key)
+        if value is not None or not self._l2_readable():
+            if value is None:
+                self._stats['misses'] += 1
+            return value
+
+        try:
+            if not _on_event_loop():
+                data = self.redis.get(self._l2_key(key))
+            elif in_greenlet():
+                # Inside AsyncSession.run_sync: suspend this greenlet, not the loop
+                data = await_only(asyncio.to_thread(self.redis.get, self._l2_key(key)))
+            else:
+                # A plain sync call on the loop thread cannot wait for Redis
+                self._stats['l2_bypassed'] += 1
+                self._stats['misses'] += 1
+                return None
+            return self._promote(key, data)
+        except Exception as e:
+            self._l2_error("get", e)
+        self._stats['misses'] += 1
+        return None
+
+    async def aget(self, key: str) -> Optional[Any]:
+        value = self._l1_get(key)
+        if value is not None or not self._l2_readable():
+            if value is None:
+                self._stats['misses'] += 1
+            return value
+
+        try:
+            data = await asyncio.to_thread(self.redis.get, self._l2_key(key))
+            return self._promote(key, data)
+        except Exception as e:
+            self._l2_error("get", e)
+        self._stats['misses'] += 1
+        return None
+
+    def set(self, key: str, value: Any, ttl: Optional[int] = None) -> None:
+        ttl = ttl or self.default_ttl
+        self._stats['sets'] += 1
+        self.l1.set(key, value, self._l1_ttl(ttl))
+
+        if self.redis is not None:
+            data = self._encode(key, value)
+            if data is not None:
+                self._l2_write(self._l2_setex, self._l2_key(key), ttl, data)
+
+    def _l2_setex(self, l2_key: str, ttl: int, data: bytes) -> None:
+        try:
+            self.redis.setex(l2_key, ttl, data)
+        except Exception as e:
+            self._l2_error("set", e)
+
+    async def aset(self, key: str, value: Any, ttl: Optional[int] = None) -> None:
+        ttl = ttl or self.default_ttl
+        self._stats['sets'] += 1
+        self.l1.set(key, value, self._l1_ttl(ttl))
+
+        if self.redis is not None:
+            data = self._encode(key, value)
+            if data is None:
+                return
+            try:
+                await asyncio.to_thread(self.redis.setex, self._l2_key(key), ttl, data)
+            except Exception as e:
+                self._l2_error("set", e)
+
+    def delete(self, key: str) -> bool:
+        removed = self.l1.delete(key)
+        return bool(self._invalidate("key", key, self._delete_l2_key, self._l2_key(key))) or removed
+
+    def delete_matching(self, substring: str) -> int:
+        """Delete every key containing substring, in both tiers and on all workers"""
+        removed = self.l1.delete_matching(substring)
+        pattern = self._l2_key(f"*{_glob_escape(substring)}*")
+        return removed + (self._invalidate("match", substring, self._delete_l2_pattern, pattern) or 0)
+
+    def clear(self) -> None:
+        self.l1.clear()
+        self._invalidate("clear", None, self._delete_l2_pattern, self._l2_key("*"))
+
+    def cleanup_expired(self) -> int:
+        return self.l1.cleanup_expired()
+
+    def _delete_l2_key(self, l2_key: str) -> int:
+        try:
+            return self.redis.unlink(l2_key)
+        except Exception as e:
+            self._l2_error("delete", e)
+            return 0
+
+    def _delete_l2_pattern(self, pattern: str) -> int:
+        """Incremental SCAN + UNLINK; the keyspace walk is why this runs off the loop"""
+        count = 0
+        try:
+            batch = []
+            for key in self.redis.scan_iter(match=pattern, count=500):
+                batch.append(key)
+                if len(batch) >= 500:
+                    count += self.redis.unlink(*batch)
+                    batch = []
+            if batch:
+                count += self.redis.unlink(*batch)
+        except Exception as e:
+            self._l2_error("pattern delete", e)
+        return count
+
+    def _l2_write(self, fn: Callable[..., Any], *args, invalidation: bool = False) -> Optional[Any]:
+        """
+        Run a blocking Redis write inline, or queue it on the background
+        writer when on the event loop thread (returns None then).
+        """
+        if not _on_event_loop():
+            return fn(*args)
+
+        if invalidation:
+            with self._pending_lock:
+                self._pending_invalidations += 1
+
+        def run() -> None:
+            try:
+                fn(*args)
+            except Exception as e:
+                logger.warning(f"Background L2 write failed for namespace {self.namespace}: {e}")
+            finally:
+                if invalidation:
+                    with self._pending_lock:
+                        self._pending_invalidations -= 1
+
+        self._stats['l2_deferred'] += 1
+        _l2_writer.submit(run)
+        return None
+
+    def _invalidate(self, op: str, value: Optional[str], l2_delete: Callable[[str], int], target: str) -> Optional[int]:
+        """Delete from L2, then tell the other workers to drop their L1 copies"""
+        self._stats['invalidations'] += 1
+        redis, bus = self.redis, self.bus
+        if redis is None and bus is None:
+            return 0
+
+        def apply() -> int:
+            removed = l2_delete(target) if redis is not None else 0
+            if bus:
+                bus.publish(self.namespace, op, value)
+            return removed
+
+        return self._l2_write(apply, invalidation=redis is not None)
+
+    def apply_invalidation(self, op: str, value: Optional[str]) -> None:
+        """Apply an invalidation received from another worker (L1 only)"""
+        if op == "key":
+            self.l1.delete(value)
+        elif op == "match":
+            self.l1.delete_matching(value)
+        elif op == "clear":
+            self.l1.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        l1 = self.l1.stats()
+        lookups = self._stats['l1_hits'] + self._stats['l2_hits'] + self._stats['misses']
+        hits = self._stats['l1_hits'] + self._stats['l2_hits']
+        return {
+            'namespace': self.namespace,
+            'default_ttl': self.default_ttl,
+            'hit_rate': round(hits / lookups * 100, 2) if lookups else 0,
+            'sets': self._stats['sets'],
+            'invalidations': self._stats['invalidations'],
+            'l1': {
+                'hits': self._stats['l1_hits'],
+                'misses': lookups - self._stats['l1_hits'],
+                'size': l1['size'],
+                'max_size': l1['max_size'],
+                'evictions': l1['evictions'],
+                'memory_bytes': l1['memory_bytes'],
+                'max_ttl': self.l1_max_ttl
+            },
+            'l2': {
+                'enabled': self.redis is not None,
+                'hits': self._stats['l2_hits'],
+                'misses': self._stats['misses'] if self.redis is not None else 0,
+                'errors': self._stats['l2_errors'],
+                'skipped': self._stats['l2_skipped'],
+                'deferred': self._stats['l2_deferred'],
+                'bypassed': self._stats['l2_bypassed'],
+                'pending_invalidations': self._pending_invalidations,
+                'codec': self.serializer.codec.name if self.serializer else None
+            }
+        }
+
+
+class CacheInvalidationBus:
+    """
+    Fans cache invalidations out to every worker over Redis pub/sub.
+
+    Each process has its own node_id; messages it published itself are
+    ignored on receipt since the local L1 was already updated.
+    """
+
+    def __init__(self, redis_client, channel: str = INVALIDATION_CHANNEL):
+        self.redis = redis_client
+        self.channel = channel
+        self.node_id = uuid.uuid4().hex
+        self._tiers: Dict[str, TieredCache] = {}
+        self._pubsub = None
+        self._thread = None
+        self._stats = {'published': 0, 'received': 0, 'errors': 0}
+
+    def register(self, tier: TieredCache) -> None:
+        self._tiers[tier.namespace] = tier
+
+    def publish(self, namespace: str, op: str, value: Optional[str] = None) -> None:
+        message = json.dumps({'origin': self.node_id, 'ns': namespace, 'op': op, 'value': value})
+        try:
+            self.redis.publish(self.channel, message)
+            self._stats['published'] += 1
+        except Exception as e:
+            self._stats['errors'] += 1
+            logger.warning(f"Cache invalidation publish failed: {e}")
+
+    def handle_message(self, message: Dict[str, Any]) -> None:
+        """pub/sub callback"""
+        try:
+            payload = json.loads(message['data'])
+            if payload['origin'] == self.node_id:
+                return
+            tier = self._tiers.get(payload['ns'])
+            if tier:
+                tier.apply_invalidation(payload['op'], payload.get('value'))
+                self._stats['received'] += 1
+        except Exception as e:
+            self._stats['errors'] += 1
+            logger.warning(f"Bad cache invalidation message: {e}")
+
+    def start(self) -> None:
+        """Subscribe and listen on a daemon thread"""
+        if self._thread:
+            return
+        self._pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+        self._pubsub.subscribe(**{self.channel: self.handle_message})
+        self._thread = self._pubsub.run_in_thread(sleep_time=0.5, daemon=True)
+
+    def stop(self) -> None:
+        if self._thread:
+            self._thread.stop()
+            self._thread = None
+        if self._pubsub:
+            self._pubsub.close()
+            self._pubsub = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {'node_id': self.node_id, 'channel': self.channel, 'listening': self._thread is not None, **self._stats}
+
 # Global cache instances
-_app_cache = TTLCache(default_ttl=300, max_size=1000)  # 5 minutes, 1000 entries
-_user_cache = TTLCache(default_ttl=900, max_size=500)   # 15 minutes, 500 users
-_tenant_cache = TTLCache(default_ttl=1800, max_size=200) # 30 minutes, 200 tenants
+_single_flight = SingleFlight()
+_async_single_flight = AsyncSingleFlight()
+_app_cache = TTLCache(default_ttl=300, max_size=1000, max_bytes=64 * 1024 * 1024)  # 5 minutes, 1000 entries
+_user_cache = TTLCache(default_ttl=900, max_size=500, max_bytes=16 * 1024 * 1024)   # 15 minutes, 500 users
+_tenant_cache = TTLCache(default_ttl=1800, max_size=200, max_bytes=16 * 1024 * 1024) # 30 minutes, 200 tenants
+
+# Namespace -> TTL for the shared tiers; L1 above is the in-process tier of each
+NAMESPACE_TTLS = {'app': 300, 'user': 900, 'tenant': 1800}
+
+_app_tier = TieredCache('app', _app_cache, NAMESPACE_TTLS['app'])
+_user_tier = TieredCache('user', _user_cache, NAMESPACE_TTLS['user'])
+_tenant_tier = TieredCache('tenant', _tenant_cache, NAMESPACE_TTLS['tenant'])
+_tiers = (_app_tier, _user_tier, _tenant_tier)
+# L1 tiers whose L2 lives elsewhere (ServiceCache): they only share invalidations
+_bus_only_tiers: Dict[str, TieredCache] = {}
+_invalidation_bus: Optional[CacheInvalidationBus] = None
+_l1_max_ttl: Optional[int] = None
 
 def cache_key(prefix: str, *args, tenant_id: Optional[str] = None) -> str:
     """Generate consistent cache key with optional tenant isolation"""
@@ -164,26 +658,39 @@ def cache_key(prefix: str, *args, tenant_id: Optional[str] = None) -> str:
     return ":".join(key_parts)
 
 def cached(
-    ttl: int = 300,
-    cache_instance: TTLCache = None,
+    ttl: Optional[int] = 300,
+    cache_instance: Union[TTLCache, TieredCache] = None,
     key_prefix: str = "",
-    include_tenant: bool = True
+    include_tenant: bool = True,
+    stale_ttl: int = 0,
+    early_refresh: float = 0.0
 ) -> Callable:
     """
     Decorator for caching function results.
 
+    Concurrent misses for the same key are coalesced: one thread computes,
+    the others wait for its result (single-flight). Coroutine functions get
+    an async wrapper that coalesces per task and reads/writes the Redis tier
+    off the event loop.
+
     Args:
-        ttl: Time to live in seconds
-        cache_instance: Cache instance to use (defaults to app_cache)
+        ttl: Time to live in seconds (None uses the cache namespace TTL)
+        cache_instance: Cache instance to use (defaults to the app tier)
         key_prefix: Prefix for cache keys
         include_tenant: Whether to include tenant_id in cache key
+        stale_ttl: Seconds a value may be served stale after ttl while one
+            caller refreshes it (stale-while-revalidate); also served if the
+            refresh fails
+        early_refresh: XFetch beta; > 0 lets one caller refresh a hot key
+            before it expires (1.0 is typical)
     """
+    stamped = stale_ttl > 0 or early_refresh > 0
+
     def decorator(func: Callable[..., T]) -> Callable[..., T]:
-        cache = cache_instance or _app_cache
+        cache = cache_instance or _app_tier
         prefix = key_prefix or func.__name__
 
-        @wraps(func)
-        def wrapper(*args, **kwargs) -> T:
+        def make_key(args, kwargs) -> str:
             # Extract tenant_id if present for key generation
             tenant_id = None
             if include_tenant:
@@ -193,21 +700,94 @@ def cached(
 
             # Generate cache key
             key_args = args + tuple(f"{k}:{v}" for k, v in sorted(kwargs.items()))
-            key = cache_key(prefix, *key_args, tenant_id=tenant_id)
+            return cache_key(prefix, *key_args, tenant_id=tenant_id)
+
+        if asyncio.iscoroutinefunction(func):
+            async def cache_get(key: str):
+                if isinstance(cache, TieredCache):
+                    return await cache.aget(key)
+                return cache.get(key)
+
+            async def cache_set(key: str, value: Any, entry_ttl: Optional[int]) -> None:
+                if isinstance(cache, TieredCache):
+                    await cache.aset(key, value, entry_ttl)
+                else:
+                    cache.set(key, value, entry_ttl)
+
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs) -> T:
+                key = make_key(args, kwargs)
+
+                async def load() -> T:
+                    started = time.time()
+                    result = await func(*args, **kwargs)
+                    if result is not None:
+                        if stamped:
+                            now = time.time()
+                            fresh_ttl = ttl or cache.default_ttl
+                            await cache_set(key, Stamped(result, now + fresh_ttl, now - started), fresh_ttl + stale_ttl)
+                        else:
+                            await cache_set(key, result, ttl)
+                    return result
+
+                entry = await cache_get(key)
+                if entry is None:
+                    return (await _async_single_flight.do(key, load))[0]
+                if not isinstance(entry, Stamped):
+                    return entry
+
+                now = time.time()
+                if entry.is_fresh(now) and not should_refresh_early(entry, early_refresh, now):
+                    return entry.value
+                if _async_single_flight.in_flight(key):
+                    return entry.value
+                try:
+                    return (await _async_single_flight.do(key, load))[0]
+                except Exception as e:
+                    logger.warning(f"Refresh of {key} failed, serving cached value: {e}")
+                    return entry.value
+
+            async_wrapper.cache_clear = lambda: cache.clear()
+            async_wrapper.cache_stats = lambda: cache.stats()
+            return async_wrapper
 
-            # Try cache first
-            result = cache.get(key)
-            if result is not None:
+        @wraps(func)
+        def wrapper(*args, **kwargs) -> T:
+            key = make_key(args, kwargs)
+
+            def load() -> T:
+                started = time.time()
+                # Cache miss, execute function
+                result = func(*args, **kwargs)
+
+                # Cache result if not None
+                if result is not None:
+                    if stamped:
+                        now = time.time()
+                        fresh_ttl = ttl or cache.default_ttl
+                        cache.set(key, Stamped(result, now + fresh_ttl, now - started), fresh_ttl + stale_ttl)
+                    else:
+                        cache.set(key, result, ttl)
                 return result
 
-            # Cache miss, execute function
-            result = func(*args, **kwargs)
-
-            # Cache result if not None
-            if result is not None:
-                cache.set(key, result, ttl)
-
-            return result
+            # Try cache first
+            entry = cache.get(key)
+            if entry is None:
+                return _single_flight.do(key, load)[0]
+            if not isinstance(entry, Stamped):
+                return entry
+
+            now = time.time()
+            if entry.is_fresh(now) and not should_refresh_early(entry, early_refresh, now):
+                return entry.value
+            if _single_flight.in_flight(key):
+                # Someone is already refreshing; serve what we have
+                return entry.value
+            try:
+                return _single_flight.do(key, load)[0]
+            except Exception as e:
+                logger.warning(f"Refresh of {key} failed, serving cached value: {e}")
+                return entry.value
 
         # Add cache management methods
         wrapper.cache_clear = lambda: cache.clear()
@@ -219,58 +799,109 @@ def cached(
 
 def cache_tenant_data(func: Callable[..., T]) -> Callable[..., T]:
     """Decorator for caching tenant-specific data with longer TTL"""
-    return cached(ttl=1800, cache_instance=_tenant_cache, include_tenant=True)(func)
+    return cached(ttl=None, cache_instance=_tenant_tier, include_tenant=True)(func)
 
 def cache_user_data(func: Callable[..., T]) -> Callable[..., T]:
     """Decorator for caching user-specific data"""
-    return cached(ttl=900, cache_instance=_user_cache, include_tenant=True)(func)
+    return cached(ttl=None, cache_instance=_user_tier, include_tenant=True)(func)
 
 def cache_stats() -> Dict[str, Any]:
     """Get stats for all cache instances"""
-    return {
-        'app_cache': _app_cache.stats(),
-        'user_cache': _user_cache.stats(),
-        'tenant_cache': _tenant_cache.stats()
+    stats = {
+        'app_cache': _app_tier.stats(),
+        'user_cache': _user_tier.stats(),
+        'tenant_cache': _tenant_tier.stats()
     }
+    if _invalidation_bus:
+        stats['invalidation_bus'] = _invalidation_bus.stats()
+    stats['single_flight'] = dict(_single_flight.stats)
+    stats['async_single_flight'] = dict(_async_single_flight.stats)
+    return stats
 
 def cleanup_all_caches() -> Dict[str, int]:
     """Cleanup expired entries in all caches"""
     return {
-        'app_cache': _app_cache.cleanup_expired(),
-        'user_cache': _user_cache.cleanup_expired(),
-        'tenant_cache': _tenant_cache.cleanup_expired()
+        'app_cache': _app_tier.cleanup_expired(),
+        'user_cache': _user_tier.cleanup_expired(),
+        'tenant_cache': _tenant_tier.cleanup_expired()
     }
 
 def clear_all_caches() -> None:
     """Clear all cache instances"""
-    _app_cache.clear()
-    _user_cache.clear()
-    _tenant_cache.clear()
+    for tier in _tiers:
+        tier.clear()
     logger.info("All caches cleared")
 
-# Cache invalidation helpers
+# Shared (L2) tier setup
+def configure_cache_backend(redis_url: Optional[str] = None, redis_client=None, l1_max_ttl: int = 300) -> bool:
+    """
+    Attach Redis as the L2 tier of every cache namespace and start listening
+    for invalidations from other workers.
+
+    Pass either a URL or a ready client (tests use a fake Redis). Returns False
+    and keeps the caches process-local when Redis is unavailable.
+    """
+    global _invalidation_bus, _l1_max_ttl
+
+    if redis_client is None:
+        if not redis_url:
+            return False
+        try:
+            import redis
+            redis_client = redis.from_url(redis_url, socket_connect_timeout=5, socket_timeout=5)
+            redis_client.ping()
+        except Exception as e:
+            logger.warning(f"Redis unavailable, caches stay process-local: {e}")
+            return False
+
+    shutdown_cache_backend()
+    _invalidation_bus = CacheInvalidationBus(redis_client)
+    _l1_max_ttl = l1_max_ttl
+    for tier in _tiers:
+        tier.attach(redis_client, _invalidation_bus, l1_max_ttl=l1_max_ttl)
+    for tier in _bus_only_tiers.values():
+        tier.attach(None, _invalidation_bus, l1_max_ttl=l1_max_ttl)
+    _invalidation_bus.start()
+    logger.info("Two-tier cache enabled (L1 in-process, L2 Redis)")
+    return True
+
+def shutdown_cache_backend() -> None:
+    """Stop the invalidation listener and detach Redis from every namespace"""
+    global _invalidation_bus, _l1_max_ttl
+    try:
+        flush_l2_writes()
+    except Exception as e:
+        logger.warning(f"Queued L2 cache writes were not flushed: {e}")
+    if _invalidation_bus:
+        _invalidation_bus.stop()
+        _invalidation_bus = None
+    _l1_max_ttl = None
+    for tier in (*_tiers, *_bus_only_tiers.values()):
+        tier.detach()
+
+def register_bus_only_tier(tier: TieredCache) -> None:
+    """
+    Share invalidations of an L1-only tier across workers, now or once
+    configure_cache_backend() runs. For caches with their own L2 (ServiceCache).
+    """
+    _bus_only_tiers[tier.namespace] = tier
+    if _invalidation_bus:
+        tier.attach(None, _invalidation_bus, l1_max_ttl=_l1_max_ttl)
+
+# Cache invalidation helpers (broadcast to all workers when Redis is attached)
 def invalidate_user_cache(tenant_id: str, user_id: str = None) -> None:
     """Invalidate user-related cache entries"""
     if user_id:
         key = cache_key("user", user_id, tenant_id=tenant_id)
-        _user_cache.delete(key)
+        _user_tier.delete(key)
     else:
         # Clear all user cache for tenant (expensive but thorough)
-        keys_to_delete = [
-            key for key in _user_cache._cache.keys()
-            if f"tenant:{tenant_id}" in key
-        ]
-        for key in keys_to_delete:
-            _user_cache.delete(key)
+        _user_tier.delete_matching(f"tenant:{tenant_id}")
 
 def invalidate_tenant_cache(tenant_id: str) -> None:
     """Invalidate tenant-related cache entries"""
-    keys_to_delete = [
-        key for key in _tenant_cache._cache.keys()
-        if f"tenant:{tenant_id}" in key or tenant_id in key
-    ]
-    for key in keys_to_delete:
-        _tenant_cache.delete(key)
+    # Also matches "tenant:{tenant_id}"
+    _tenant_tier.delete_matching(tenant_id)
 
 # Background cleanup task
 def start_cache_cleanup_task():
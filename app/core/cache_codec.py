@@ -0,0 +1,337 @@
+# app/core/cache_codec.py
+"""
+Serialization for values stored in Redis (service cache and the L2 tier).
+
+Replaces bare pickle, which lets anyone who can write to Redis execute code
+in every worker and stores large dict/list payloads uncompressed.
+
+Wire format: one header byte followed by the payload.
+    low nibble  - codec (1 = JSON, 2 = msgpack, 3 = pickle)
+    high nibble - compression (0 = none, 1 = zstd, 2 = zlib)
+
+Codecs:
+- JsonCodec: orjson when installed, stdlib json otherwise (same bytes).
+  datetime/date/UUID/Decimal/set/bytes round-trip through
+  {"__t": ..., "v": ...} tags.
+- MsgpackCodec (needs msgpack): ext types round-trip datetime, date, UUID,
+  Decimal, set and bytes exactly; tuples come back as lists.
+- PickleCodec: legacy/opt-in only. Decoding pickle (including values written
+  before this module existed) is refused unless allow_pickle is set.
+
+Payloads of at least compress_min_bytes are compressed with zstd when the
+zstandard package is installed, zlib otherwise.
+"""
+import base64
+import json
+import pickle
+import zlib
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Dict, Optional
+from uuid import UUID
+import logging
+
+from app.core.single_flight import Stamped
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+CODEC_JSON = 0x01
+CODEC_MSGPACK = 0x02
+CODEC_PICKLE = 0x03
+
+COMPRESS_NONE = 0x00
+COMPRESS_ZSTD = 0x10
+COMPRESS_ZLIB = 0x20
+
+# First byte of pickle protocol 2+ streams (values written before the header existed)
+_PICKLE_PROTO = 0x80
+
+
+class CodecError(ValueError):
+    """Value cannot be encoded, or stored bytes cannot be decoded"""
+
+
+# ---------------------------------------------------------------------------
+# Typed values shared by the JSON and msgpack codecs
+# ---------------------------------------------------------------------------
+
+def _tag(obj: Any) -> Optional[Dict[str, Any]]:
+    if isinstance(obj, datetime):
+        return {"__t": "dt", "v": obj.isoformat()}
+    if isinstance(obj, date):
+        return {"__t": "d", "v": obj.isoformat()}
+    if isinstance(obj, UUID):
+        return {"__t": "uuid", "v": str(obj)}
+    if isinstance(obj, Decimal):
+        return {"__t": "dec", "v": str(obj)}
+    if isinstance(obj, (set, frozenset)):
+        return {"__t": "set", "v": list(obj)}
+    if isinstance(obj, bytes):
+        return {"__t": "b", "v": base64.b64encode(obj).decode()}
+    if isinstance(obj, Stamped):
+        return {"__t": "stamped", "v": [obj.value, obj.fresh_until, obj.compute_time]}
+    return None
+
+
+_UNTAG = {
+    "dt": datetime.fromisoformat,
+    "d": date.fromisoformat,
+    "uuid": UUID,
+    "dec": Decimal,
+    "set": set,
+    "b": base64.b64decode,
+}
+
+
+def _tag_uuids(obj: Any) -> Any:
+    """
+    Tag UUIDs ahead of orjson, which writes them as plain strings itself
+    (default is never called for them). Containers without UUIDs are
+    returned unchanged.
+    """
+    if isinstance(obj, UUID):
+        return _tag(obj)
+    if isinstance(obj, dict):
+        changed = None
+        for key, value in obj.items():
+            tagged = _tag_uuids(value)
+            if tagged is not value:
+                if changed is None:
+                    changed = dict(obj)
+                changed[key] = tagged
+        return obj if changed is None else changed
+    if isinstance(obj, (list, tuple, set, frozenset)):
+        items = [_tag_uuids(item) for item in obj]
+        if all(tagged is item for tagged, item in zip(items, obj)):
+            return obj
+        return {"__t": "set", "v": items} if isinstance(obj, (set, frozenset)) else items
+    if isinstance(obj, Stamped):
+        value = _tag_uuids(obj.value)
+        return obj if value is obj.value else Stamped(value, obj.fresh_until, obj.compute_time)
+    return obj
+
+
+def _untag(obj: Any) -> Any:
+    """Revive tagged values in place; returns the replacement for obj"""
+    if isinstance(obj, dict):
+        tag = obj.get("__t")
+        if tag is not None and len(obj) == 2 and "v" in obj:
+            if tag == "stamped":
+                value, fresh_until, compute_time = obj["v"]
+                return Stamped(_untag(value), fresh_until, compute_time)
+            if tag in _UNTAG:
+                return _UNTAG[tag](_untag(obj["v"]) if tag == "set" else obj["v"])
+        for key, value in obj.items():
+            if isinstance(value, (dict, list)):
+                obj[key] = _untag(value)
+    elif isinstance(obj, list):
+        for index, item in enumerate(obj):
+            if isinstance(item, (dict, list)):
+                obj[index] = _untag(item)
+    return obj
+
+
+class JsonCodec:
+    codec_id = CODEC_JSON
+    name = "json"
+
+    @staticmethod
+    def _default(obj: Any) -> Any:
+        tagged = _tag(obj)
+        if tagged is not None:
+            return tagged
+        raise TypeError(f"Type is not cacheable: {type(obj).__name__}")
+
+    def encode(self, value: Any) -> bytes:
+        try:
+            if ORJSON_AVAILABLE:
+                return orjson.dumps(_tag_uuids(value), default=self._default, option=orjson.OPT_PASSTHROUGH_DATETIME)
+            return json.dumps(value, default=self._default, separators=(",", ":")).encode()
+        except TypeError as e:
+            raise CodecError(str(e)) from e
+
+    def decode(self, data: bytes) -> Any:
+        value = orjson.loads(data) if ORJSON_AVAILABLE else json.loads(data)
+        # Only walk the structure when something was tagged
+        return _untag(value) if b'"__t"' in data else value
+
+
+class MsgpackCodec:
+    codec_id = CODEC_MSGPACK
+    name = "msgpack"
+
+    EXT_DATETIME = 1
+    EXT_DATE = 2
+    EXT_UUID = 3
+    EXT_DECIMAL = 4
+    EXT_SET = 5
+    EXT_STAMPED = 6
+
+    def __init__(self):
+        if not MSGPACK_AVAILABLE:
+            raise CodecError("msgpack is not installed")
+
+    def _default(self, obj: Any) -> Any:
+        if isinstance(obj, datetime):
+            return msgpack.ExtType(self.EXT_DATETIME, obj.isoformat().encode())
+        if isinstance(obj, date):
+            return msgpack.ExtType(self.EXT_DATE, obj.isoformat().encode())
+        if isinstance(obj, UUID):
+            return msgpack.ExtType(self.EXT_UUID, obj.bytes)
+        if isinstance(obj, Decimal):
+            return msgpack.ExtType(self.EXT_DECIMAL, str(obj).encode())
+        if isinstance(obj, (set, frozenset)):
+            return msgpack.ExtType(self.EXT_SET, self.encode(list(obj)))
+        if isinstance(obj, Stamped):
+            return msgpack.ExtType(self.EXT_STAMPED, self.encode([obj.value, obj.fresh_until, obj.compute_time]))
+        raise TypeError(f"Type is not cacheable: {type(obj).__name__}")
+
+    def _ext_hook(self, code: int, data: bytes) -> Any:
+        if code == self.EXT_DATETIME:
+            return datetime.fromisoformat(data.decode())
+        if code == self.EXT_DATE:
+            return date.fromisoformat(data.decode())
+        if code == self.EXT_UUID:
+            return UUID(bytes=data)
+        if code == self.EXT_DECIMAL:
+            return Decimal(data.decode())
+        if code == self.EXT_SET:
+            return set(self.decode(data))
+        if code == self.EXT_STAMPED:
+            return Stamped(*self.decode(data))
+        return msgpack.ExtType(code, data)
+
+    def encode(self, value: Any) -> bytes:
+        try:
+            return msgpack.packb(value, default=self._default, use_bin_type=True, datetime=False)
+        except (TypeError, ValueError) as e:
+            raise CodecError(str(e)) from e
+
+    def decode(self, data: bytes) -> Any:
+        return msgpack.unpackb(data, ext_hook=self._ext_hook, raw=False, strict_map_key=False)
+
+
+class PickleCodec:
+    codec_id = CODEC_PICKLE
+    name = "pickle"
+
+    def encode(self, value: Any) -> bytes:
+        try:
+            return pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception as e:
+            raise CodecError(str(e)) from e
+
+    def decode(self, data: bytes) -> Any:
+        return pickle.loads(data)
+
+
+CODECS = {"json": JsonCodec, "msgpack": MsgpackCodec, "pickle": PickleCodec}
+
+
+class CacheSerializer:
+    """
+    Encodes values with one codec and decodes anything carrying a known header.
+
+    Args:
+        codec: "json", "msgpack" or "pickle"
+        compress_min_bytes: compress payloads at least this large (0 disables)
+        allow_pickle: accept pickle payloads on decode (only for trusted Redis)
+    """
+
+    def __init__(self, codec: str = "json", compress_min_bytes: int = 1024, allow_pickle: bool = False):
+        if codec not in CODECS:
+            raise CodecError(f"Unknown cache codec: {codec}")
+        self.codec = CODECS[codec]()
+        self.compress_min_bytes = compress_min_bytes
+        self.allow_pickle = allow_pickle or codec == "pickle"
+        self._decoders = {CODEC_JSON: JsonCodec()}
+        if MSGPACK_AVAILABLE:
+            self._decoders[CODEC_MSGPACK] = MsgpackCodec()
+        if self.allow_pickle:
+            self._decoders[CODEC_PICKLE] = PickleCodec()
+        if ZSTD_AVAILABLE:
+            self._zstd_c = zstandard.ZstdCompressor(level=3)
+            self._zstd_d = zstandard.ZstdDecompressor()
+
+    def dumps(self, value: Any) -> bytes:
+        payload = self.codec.encode(value)
+        compression = COMPRESS_NONE
+        if self.compress_min_bytes and len(payload) >= self.compress_min_bytes:
+            if ZSTD_AVAILABLE:
+                payload, compression = self._zstd_c.compress(payload), COMPRESS_ZSTD
+            else:
+                payload, compression = zlib.compress(payload, 6), COMPRESS_ZLIB
+        return bytes((self.codec.codec_id | compression,)) + payload
+
+    def loads(self, data: bytes) -> Any:
+        if not data:
+            raise CodecError("Empty cache payload")
+
+        header = data[0]
+        if header == _PICKLE_PROTO:
+            # Written by the old pickle-only backend
+            if not self.allow_pickle:
+                raise CodecError("Refusing to unpickle untagged cache payload")
+            return pickle.loads(data)
+
+        decoder = self._decoders.get(header & 0x0F)
+        if decoder is None:
+            raise CodecError(f"No decoder for cache payload header {header:#04x}")
+
+        payload = data[1:]
+        compression = header & 0xF0
+        if compression == COMPRESS_ZSTD:
+            if not ZSTD_AVAILABLE:
+                raise CodecError("zstd payload but zstandard is not installed")
+            payload = self._zstd_d.decompress(payload)
+        elif compression == COMPRESS_ZLIB:
+            payload = zlib.decompress(payload)
+        elif compression != COMPRESS_NONE:
+            raise CodecError(f"Unknown compression in header {header:#04x}")
+
+        try:
+            return decoder.decode(payload)
+        except CodecError:
+            raise
+        except Exception as e:
+            raise CodecError(f"Corrupt {decoder.name} cache payload: {e}") from e
+
+
+_default_serializer: Optional[CacheSerializer] = None
+
+
+def get_cache_serializer() -> CacheSerializer:
+    """Process-wide serializer configured from CACHE_CODEC / CACHE_COMPRESS_MIN_BYTES"""
+    global _default_serializer
+    if _default_serializer is None:
+        codec, min_bytes = "json", 1024
+        try:
+            from app.core.config import get_settings
+            settings = get_settings()
+            codec = settings.CACHE_CODEC
+            min_bytes = settings.CACHE_COMPRESS_MIN_BYTES
+        except Exception as e:
+            logger.debug(f"Cache codec settings unavailable, using defaults: {e}")
+        if codec == "msgpack" and not MSGPACK_AVAILABLE:
+            logger.warning("CACHE_CODEC=msgpack but msgpack is not installed, using json")
+            codec = "json"
+        _default_serializer = CacheSerializer(codec, compress_min_bytes=min_bytes)
+    return _default_serializer
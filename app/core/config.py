@@ -34,10 +34,31 @@ class Settings(BaseSettings):
     # Database configuration
     DATABASE_URL: str = Field(..., description="PostgreSQL database connection string")
     REDIS_URL: str | None = Field(default=None, description="Redis connection string (optional)")
+    CACHE_L1_MAX_TTL: int = Field(default=300, description="Max seconds an entry stays in the in-process cache tier when Redis (L2) is enabled", ge=1)
+    CACHE_CODEC: Literal["json", "msgpack", "pickle"] = Field(default="json", description="Serializer for values stored in Redis; pickle only for a trusted, private Redis")
+    CACHE_COMPRESS_MIN_BYTES: int = Field(default=1024, description="Compress cached payloads at least this large (zstd if installed, else zlib); 0 disables", ge=0)
+
+    # SQLAlchemy client-side pooling (pgbouncer Transaction mode safe)
+    DB_POOL_MODE: Literal["null", "queue"] = Field(default="null", description="'null' opens a fresh connection per session (pgbouncer pools), 'queue' keeps warm connections per worker")
+    DB_POOL_SIZE: int = Field(default=5, description="Warm connections kept per engine per worker (queue mode)", ge=1, le=50)
+    DB_POOL_MAX_OVERFLOW: int = Field(default=5, description="Extra connections allowed above DB_POOL_SIZE during bursts (queue mode)", ge=0, le=50)
+    DB_POOL_TIMEOUT: int = Field(default=10, description="Seconds to wait for a pooled connection before failing (queue mode)", ge=1, le=120)
+    DB_POOL_RECYCLE: int = Field(default=1800, description="Maximum connection age in seconds before it is replaced (queue mode)", ge=60)
+    DB_POOL_IDLE_TIMEOUT: int = Field(default=300, description="Discard pooled connections idle longer than this many seconds (queue mode)", ge=10)
+
+    # Read replica for reporting/aggregation traffic (optional)
+    DATABASE_REPLICA_URL: str | None = Field(default=None, description="Read replica connection string; read_only sessions fall back to the primary when unset")
+    DB_REPLICA_MAX_LAG_SECONDS: float = Field(default=30.0, description="Route reads to the primary when replica lag exceeds this many seconds", ge=0)
+    DB_REPLICA_CHECK_INTERVAL: int = Field(default=15, description="Seconds between replica lag/health checks", ge=1)
+    QUERY_BUDGET_ENABLED: bool = Field(default=False, description="Count statements per request/job and flag N+1 patterns")
+    QUERY_BUDGET_MAX_STATEMENTS: int = Field(default=50, description="Statements allowed per request/job before the budget is exceeded", ge=1)
+    QUERY_BUDGET_MAX_REPEATS: int = Field(default=10, description="Executions of one statement fingerprint allowed per request/job (N+1 detection)", ge=1)
+    QUERY_BUDGET_RAISE: bool = Field(default=False, description="Raise QueryBudgetExceeded instead of logging (use in tests/CI)")
 
     # Security settings
     OAUTH_STATE_SECRET: SecretStr = Field(..., description="Secret key for OAuth state validation")
     MASTER_SECRET_KEY: SecretStr = Field(..., description="Master secret key for application security")
+    PLATFORM_ADMIN_EMAILS: str = Field(default="", description="Verified emails of platform operators allowed on fleet-wide admin endpoints such as /db/* (comma-separated; empty disables them)")
 
     # Facebook integration
     FB_APP_ID: str = Field(..., description="Facebook App ID")
@@ -149,6 +170,22 @@ class Settings(BaseSettings):
     TOKEN_REFRESH_INTERVAL: int = Field(default=3600, description="Token refresh check interval in seconds (default: 1 hour)", ge=60)
     AUTOMATION_CHECK_INTERVAL: int = Field(default=60, description="Automation scheduler check interval in seconds (default: 1 minute)", ge=10)
     CLEANUP_INTERVAL: int = Field(default=86400, description="Cleanup job interval in seconds (default: 24 hours)", ge=3600)
+    TASK_RESULT_TTL: int = Field(default=3600, description="Seconds a finished background task result is kept for status polling", ge=1)
+    TASK_RESULT_MAX_COUNT: int = Field(default=10000, description="Maximum finished task results retained; least recently used are evicted first", ge=1)
+    TASK_RESULT_CACHE_SIZE: int = Field(default=1000, description="Finished results kept in process in front of Redis for status polling (0 disables)", ge=0)
+    TASK_VISIBILITY_TIMEOUT: int = Field(default=300, description="Seconds a dequeued task may stay unacked before another worker reclaims it (keep above the longest task run time)", ge=1)
+    TASK_MAX_DELIVERIES: int = Field(default=5, description="Deliveries of one task without ack before it moves to the dead-letter stream", ge=1)
+    TASK_WORKERS_MIN: int = Field(default=1, description="Task workers the autoscaler always keeps running", ge=0)
+    TASK_WORKERS_MAX: int = Field(default=8, description="Upper bound on task workers started by the autoscaler", ge=1)
+    TASK_AUTOSCALE_INTERVAL: int = Field(default=5, description="Seconds between task worker autoscaling decisions", ge=1)
+    TASK_AUTOSCALE_TARGET_WAIT: float = Field(default=2.0, description="Target p95 seconds a task waits in the queue before a worker starts it", gt=0)
+    TASK_AUTOSCALE_BACKLOG_PER_WORKER: int = Field(default=5, description="Queued tasks per worker above which the autoscaler adds workers", ge=1)
+    TASK_AUTOSCALE_IDLE_INTERVALS: int = Field(default=6, description="Consecutive quiet decisions before the autoscaler removes a worker", ge=1)
+    TASK_WORKER_DRAIN_TIMEOUT: int = Field(default=60, description="Seconds a worker being scaled down may take to finish its current task", ge=1)
+    CPU_POOL_WORKERS: int = Field(default=2, description="Processes for CPU-bound work such as PDF and XLSX rendering (0 runs it in a thread)", ge=0, le=32)
+    CPU_POOL_MAX_QUEUE: int = Field(default=50, description="CPU-bound calls allowed to wait for a free process before new ones are rejected", ge=0)
+    CPU_POOL_TASK_TIMEOUT: int = Field(default=60, description="Seconds a CPU-bound call may run before its process is terminated", ge=1)
+    CPU_POOL_MAX_TASKS_PER_CHILD: int = Field(default=200, description="Calls a CPU pool process serves before it is replaced", ge=1)
 
     # Backup Configuration
     BACKUP_ENABLED: bool = Field(default=True, description="Enable automated daily backups to R2")
@@ -158,9 +195,13 @@ class Settings(BaseSettings):
     RATE_LIMIT_PER_MINUTE: int = Field(default=60, description="Maximum requests per minute per IP", ge=1)
     RATE_LIMIT_VIOLATION_THRESHOLD: int = Field(default=5, description="Violations before auto-ban", ge=1)
     RATE_LIMIT_AUTO_BAN_DURATION: int = Field(default=86400, description="Auto-ban duration in seconds (default: 24 hours)", ge=60)
+    RATE_LIMIT_VIOLATION_FLUSH_INTERVAL: int = Field(default=5, description="Seconds between batched writes of buffered rate limit violations and auto-bans", ge=1)
 
     # IP Blocking Configuration
     TRUST_PROXY_HEADERS: bool = Field(default=True, description="Trust X-Forwarded-For headers from proxies")
+    IP_RULES_REFRESH_INTERVAL: int = Field(default=15, description="Seconds between checks for changed IP access rules (in-memory snapshot)", ge=1)
+    IP_RULE_MIN_PREFIX_V4: int = Field(default=16, description="Broadest IPv4 CIDR block an IP rule may cover (/16 = 65,536 addresses)", ge=0, le=32)
+    IP_RULE_MIN_PREFIX_V6: int = Field(default=48, description="Broadest IPv6 CIDR block an IP rule may cover", ge=0, le=128)
 
     # Refresh Token Cookie Configuration
     REFRESH_TOKEN_COOKIE_NAME: str = Field(default="refresh_token", description="Name of the refresh token cookie")
@@ -182,6 +223,14 @@ class Settings(BaseSettings):
             raise ValueError(f'DATABASE_URL must start with one of: {", ".join(valid_prefixes)}')
         return v
 
+    @field_validator('DATABASE_REPLICA_URL')
+    @classmethod
+    def validate_database_replica_url(cls, v: str | None) -> str | None:
+        """Validate DATABASE_REPLICA_URL format (empty disables the replica)"""
+        if not v:
+            return None
+        return cls.validate_database_url(v)
+
     @field_validator('FB_SCOPES', 'TIKTOK_SCOPES')
     @classmethod
     def validate_scopes(cls, v: str) -> str:
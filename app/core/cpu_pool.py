@@ -0,0 +1,191 @@
+# app/core/cpu_pool.py
+"""
+Managed process pool for CPU-bound work (PDF rendering, XLSX exports).
+
+Running such work inline in an async route blocks the event loop, and with
+it every other request on that worker. CPUPool.run() ships the call to a
+ProcessPoolExecutor instead:
+
+- Bounded concurrency: at most max_workers calls run at once, at most
+  max_queue more wait for a slot; beyond that run() fails fast with
+  ServiceUnavailableError instead of queueing unbounded work.
+- Per-call timeouts: a process cannot be interrupted mid-call, so on a
+  timeout the whole pool is replaced and its processes are terminated.
+  Calls that were running alongside it are retried once on the new pool.
+- Recycling: each process exits after max_tasks_per_child calls (guards
+  against leaks in native libraries) and is replaced transparently.
+- Metrics: queue depth, running calls, wait times, timeouts and restarts
+  (get_stats()).
+
+Functions and arguments must be picklable, and functions must live in a
+module that imports cheaply (processes are spawned and import it on first
+use), e.g. app.core.invoice_documents. With max_workers=0 calls run in a
+thread instead, which keeps the loop free but shares the GIL.
+"""
+import asyncio
+import functools
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Deque, Dict, Optional
+import logging
+import multiprocessing
+
+from app.core.exceptions import ServiceUnavailableError
+
+logger = logging.getLogger(__name__)
+
+# Wait times kept for the percentile in get_stats()
+WAIT_SAMPLES = 512
+
+
+class CPUTaskTimeout(Exception):
+    """A pooled call ran past its timeout; its process was terminated"""
+
+    def __init__(self, func_name: str, timeout: float):
+        super().__init__(f"{func_name} exceeded {timeout:.0f}s in the CPU pool")
+        self.func_name = func_name
+        self.timeout = timeout
+
+
+class CPUPool:
+    """
+    Process pool with bounded concurrency, timeouts and worker recycling.
+
+    Args:
+        max_workers: processes (0 runs calls in a thread instead)
+        max_queue: calls allowed to wait for a free process
+        default_timeout: seconds per call unless run() gets a timeout
+        max_tasks_per_child: calls a process serves before it is replaced
+    """
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        max_queue: Optional[int] = None,
+        default_timeout: Optional[float] = None,
+        max_tasks_per_child: Optional[int] = None,
+    ):
+        if None in (max_workers, max_queue, default_timeout, max_tasks_per_child):
+            from app.core.config import get_settings
+            settings = get_settings()
+            max_workers = settings.CPU_POOL_WORKERS if max_workers is None else max_workers
+            max_queue = settings.CPU_POOL_MAX_QUEUE if max_queue is None else max_queue
+            default_timeout = default_timeout or settings.CPU_POOL_TASK_TIMEOUT
+            max_tasks_per_child = max_tasks_per_child or settings.CPU_POOL_MAX_TASKS_PER_CHILD
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.default_timeout = default_timeout
+        self.max_tasks_per_child = max_tasks_per_child
+
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._waiting = 0
+        self._running = 0
+        self._waits: Deque[float] = deque(maxlen=WAIT_SAMPLES)
+        self.stats = {
+            'submitted': 0, 'completed': 0, 'failed': 0, 'rejected': 0,
+            'timeouts': 0, 'retried': 0, 'pool_restarts': 0,
+        }
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn: fork would copy the event loop, DB pools and sockets of
+            # the parent; max_tasks_per_child requires a non-fork context
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                max_tasks_per_child=self.max_tasks_per_child,
+            )
+        return self._executor
+
+    def _discard_executor(self, executor: ProcessPoolExecutor, reason: str) -> None:
+        """Terminate an executor's processes; the next call starts a fresh pool"""
+        if self._executor is executor:
+            self._executor = None
+            self.stats['pool_restarts'] += 1
+            logger.warning(f"Restarting CPU pool: {reason}")
+        # ProcessPoolExecutor cannot cancel a running call, so stop its processes
+        # directly; the executor then fails its other calls with BrokenProcessPool
+        for process in list((getattr(executor, "_processes", None) or {}).values()):
+            process.terminate()
+        executor.shutdown(wait=False)
+
+    async def run(self, func: Callable, *args, timeout: Optional[float] = None, **kwargs) -> Any:
+        """Run func(*args, **kwargs) in the pool and return its result"""
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(max(self.max_workers, 1))
+        if self._slots.locked() and self._waiting >= self.max_queue:
+            self.stats['rejected'] += 1
+            raise ServiceUnavailableError("CPU pool", f"{self._waiting} calls already queued")
+
+        self.stats['submitted'] += 1
+        call = functools.partial(func, *args, **kwargs)
+        timeout = timeout or self.default_timeout
+        queued_at = time.monotonic()
+        self._waiting += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self._waiting -= 1
+        self._waits.append(time.monotonic() - queued_at)
+
+        self._running += 1
+        try:
+            result = await self._call(call, timeout)
+            self.stats['completed'] += 1
+            return result
+        except Exception:
+            self.stats['failed'] += 1
+            raise
+        finally:
+            self._running -= 1
+            self._slots.release()
+
+    async def _call(self, call: functools.partial, timeout: float) -> Any:
+        func_name = getattr(call.func, "__name__", repr(call.func))
+        if self.max_workers == 0:
+            try:
+                return await asyncio.wait_for(asyncio.to_thread(call), timeout)
+            except asyncio.TimeoutError:
+                self.stats['timeouts'] += 1
+                raise CPUTaskTimeout(func_name, timeout) from None
+
+        loop = asyncio.get_running_loop()
+        for attempt in range(2):
+            executor = self._get_executor()
+            try:
+                return await asyncio.wait_for(loop.run_in_executor(executor, call), timeout)
+            except asyncio.TimeoutError:
+                self.stats['timeouts'] += 1
+                self._discard_executor(executor, f"{func_name} timed out after {timeout:.0f}s")
+                raise CPUTaskTimeout(func_name, timeout) from None
+            except BrokenProcessPool:
+                # Killed alongside a timed-out call (or a process crashed): one more try
+                self._discard_executor(executor, "process pool broken")
+                if attempt:
+                    raise
+                self.stats['retried'] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Queue depth, concurrency and wait time metrics"""
+        waits = sorted(self._waits)
+        return {
+            **self.stats,
+            'max_workers': self.max_workers,
+            'max_queue': self.max_queue,
+            'running': self._running,
+            'queued': self._waiting,
+            'wait_p50_ms': round(waits[len(waits) // 2] * 1000, 2) if waits else 0.0,
+            'wait_p95_ms': round(waits[min(len(waits) - 1, int(len(waits) * 0.95))] * 1000, 2) if waits else 0.0,
+        }
+
+    def shutdown(self) -> None:
+        """Stop the pool processes (pending calls are cancelled)"""
+        if self._executor is not None:
+            executor, self._executor = self._executor, None
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+cpu_pool = CPUPool()
@@ -2,10 +2,13 @@
 import os
 import time
 import logging
-from contextlib import contextmanager
-from typing import Generator, Optional, Callable, TypeVar, Any
-from sqlalchemy import create_engine, text
+import threading
+from contextlib import contextmanager, asynccontextmanager
+from typing import Generator, AsyncGenerator, Optional, Callable, TypeVar, Any
+from sqlalchemy import create_engine, text, event
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.pool import NullPool
 from sqlalchemy.exc import OperationalError, DisconnectionError
 import psycopg.errors
@@ -33,14 +36,132 @@ def _get_psycopg3_url(url: str) -> str:
     return url
 
 
+def _pgbouncer_connect_args(application_name: str) -> dict:
+    """
+    psycopg3 connect args shared by the sync and async engines.
+
+    Both engines talk to the same pgbouncer Transaction pooler, so they need
+    the same guarantees: autocommit and NO prepared statements.
+    """
+    return {
+        "connect_timeout": 30,  # Increased from 15 to handle load spikes
+        "options": "-c timezone=utc -c default_transaction_isolation=read_committed",
+        "application_name": application_name,
+        "client_encoding": "utf8",
+        "autocommit": True,
+        # CRITICAL: Disable prepared statements for pgbouncer Transaction mode
+        # prepare_threshold=None DISABLES prepared statements entirely
+        # prepare_threshold=0 means "prepare immediately" (WRONG - still creates prepared statements!)
+        "prepare_threshold": None,
+    }
+
+
+class PoolMetrics:
+    """
+    Health accounting for a client-side connection pool.
+
+    Populated by pool event listeners (queue mode only). The listeners only
+    count and timestamp - they never run SQL on the connection, so they are
+    safe with pgbouncer Transaction mode.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self.connections_created = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.invalidated = 0
+        self.idle_discarded = 0
+        self.last_invalidation_error: Optional[str] = None
+
+    def incr(self, counter: str, amount: int = 1) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + amount)
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            return {
+                "connections_created": self.connections_created,
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "invalidated": self.invalidated,
+                "idle_discarded": self.idle_discarded,
+                "last_invalidation_error": self.last_invalidation_error,
+            }
+
+
+def _pool_kwargs() -> dict:
+    """
+    Engine pool arguments for the configured DB_POOL_MODE.
+
+    null  - NullPool, pgbouncer does all pooling (a new TCP+TLS connect per session)
+    queue - bounded QueuePool (AsyncAdaptedQueuePool for the async engine) that
+            keeps connections warm per worker
+    """
+    if _settings.DB_POOL_MODE == "queue":
+        return {
+            "pool_size": _settings.DB_POOL_SIZE,
+            "max_overflow": _settings.DB_POOL_MAX_OVERFLOW,
+            "pool_timeout": _settings.DB_POOL_TIMEOUT,
+            "pool_recycle": _settings.DB_POOL_RECYCLE,
+            # No pre-ping: stale connections are handled by idle/age recycling
+            # and invalidation on error instead of an extra round-trip per checkout.
+            "pool_pre_ping": False,
+        }
+    return {"poolclass": NullPool}
+
+
+def _instrument_pool(target: Engine, metrics: PoolMetrics) -> None:
+    """
+    Attach health accounting and idle recycling to a queue-mode engine.
+
+    Connections that sat idle in the pool longer than DB_POOL_IDLE_TIMEOUT are
+    discarded on checkout (raising DisconnectionError makes the pool transparently
+    retry with a fresh connection), so pgbouncer/Supabase never hands us a socket
+    it already closed on its side.
+    """
+    idle_timeout = _settings.DB_POOL_IDLE_TIMEOUT
+
+    @event.listens_for(target, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        connection_record.info["checked_in_at"] = time.monotonic()
+        metrics.incr("connections_created")
+
+    @event.listens_for(target, "checkout")
+    def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+        checked_in_at = connection_record.info.get("checked_in_at")
+        if checked_in_at is not None and time.monotonic() - checked_in_at > idle_timeout:
+            metrics.incr("idle_discarded")
+            raise DisconnectionError("Pooled connection exceeded idle timeout")
+        metrics.incr("checkouts")
+
+    @event.listens_for(target, "checkin")
+    def _on_checkin(dbapi_connection, connection_record):
+        connection_record.info["checked_in_at"] = time.monotonic()
+        metrics.incr("checkins")
+
+    @event.listens_for(target, "invalidate")
+    def _on_invalidate(dbapi_connection, connection_record, exception):
+        metrics.incr("invalidated")
+        if exception is not None:
+            metrics.last_invalidation_error = str(exception)[:200]
+
+
 # PRODUCTION PostgreSQL engine configuration for pgbouncer TRANSACTION MODE
 #
 # KEY INSIGHT: With pgbouncer Transaction mode, let pgbouncer handle ALL pooling.
-# Using NullPool means SQLAlchemy doesn't maintain its own connection pool.
-# This ELIMINATES the "DuplicatePreparedStatement" errors because:
-# - No SQLAlchemy-level connection reuse
-# - No pool_pre_ping (which uses prepared statements)
-# - Each request gets a fresh connection from pgbouncer
+# Using NullPool (DB_POOL_MODE=null, the default) means SQLAlchemy doesn't
+# maintain its own connection pool. Each request gets a fresh connection from
+# pgbouncer, at the cost of a TCP+TLS handshake per session.
+#
+# DB_POOL_MODE=queue keeps a small, bounded set of warm connections per worker.
+# This is still Transaction mode safe because:
+# - prepare_threshold=None: no prepared statements, so no "DuplicatePreparedStatement"
+#   when pgbouncer moves our client connection to another server backend
+# - AUTOCOMMIT: no session state or open transaction survives a checkin
+# - No pool_pre_ping and no per-connection SET statements (settings go via "options")
+# - Connections are recycled by age (DB_POOL_RECYCLE) and idle time (DB_POOL_IDLE_TIMEOUT)
 #
 # pgbouncer Transaction mode handles:
 # - Connection pooling (default_pool_size in pgbouncer config)
@@ -48,30 +169,19 @@ def _get_psycopg3_url(url: str) -> str:
 # - Connection limits and queuing
 #
 # Architecture:
-# - SQLAlchemy: NullPool (no application-level pooling)
-# - pgbouncer: Handles all connection pooling
+# - SQLAlchemy: NullPool (default) or bounded QueuePool (DB_POOL_MODE=queue)
+# - pgbouncer: Handles server-side connection pooling
 # - Supabase Transaction pooler: Port 6543
 engine = create_engine(
     _get_psycopg3_url(_settings.DATABASE_URL),
 
-    # CRITICAL: Use NullPool for pgbouncer Transaction mode
-    # This prevents "DuplicatePreparedStatement" errors
-    poolclass=NullPool,
+    # NullPool by default, bounded QueuePool in queue mode (see above)
+    **_pool_kwargs(),
 
     # Transaction mode isolation
     isolation_level="AUTOCOMMIT",
 
-    connect_args={
-        "connect_timeout": 30,  # Increased from 15 to handle load spikes
-        "options": "-c timezone=utc -c default_transaction_isolation=read_committed",
-        "application_name": f"fastapi_main_{os.getpid()}",
-        "client_encoding": "utf8",
-        "autocommit": True,
-        # CRITICAL: Disable prepared statements for pgbouncer Transaction mode
-        # prepare_threshold=None DISABLES prepared statements entirely
-        # prepare_threshold=0 means "prepare immediately" (WRONG - still creates prepared statements!)
-        "prepare_threshold": None,
-    },
+    connect_args=_pgbouncer_connect_args(f"fastapi_main_{os.getpid()}"),
 
     # Production settings
     future=True,
@@ -85,11 +195,211 @@ SessionLocal = sessionmaker(
     future=True,
 )
 
+pool_metrics = PoolMetrics("sync")
+
+if _settings.DB_POOL_MODE == "queue":
+    _instrument_pool(engine, pool_metrics)
+
+# ASYNC engine for `async def` routes
+#
+# The sync engine above blocks the event loop for the whole round-trip when it
+# is used from an `async def` endpoint, so one slow tenant query stalls every
+# other request on the worker. The async engine uses psycopg3's AsyncConnection
+# (same URL, dialect resolves to postgresql+psycopg_async) with the exact same
+# pgbouncer Transaction mode settings: same pool mode, AUTOCOMMIT, no prepared statements.
+async_engine = create_async_engine(
+    _get_psycopg3_url(_settings.DATABASE_URL),
+    **_pool_kwargs(),
+    isolation_level="AUTOCOMMIT",
+    connect_args=_pgbouncer_connect_args(f"fastapi_async_{os.getpid()}"),
+    echo=_settings.ENV == "dev",
+)
+
+async_pool_metrics = PoolMetrics("async")
+
+if _settings.DB_POOL_MODE == "queue":
+    _instrument_pool(async_engine.sync_engine, async_pool_metrics)
+
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    autoflush=False,
+    # Routes read attributes after commit; without this every access would
+    # trigger an implicit (and illegal under asyncio) lazy refresh.
+    expire_on_commit=False,
+)
+
 # NOTE: Event listeners removed for pgbouncer Transaction mode compatibility
 # Timezone is set via connect_args options: "-c timezone=utc"
 # Per-connection settings don't work reliably with pgbouncer (connections are pooled/shared)
 
 
+# READ REPLICA routing for reporting/aggregation traffic
+#
+# Dashboard stats, invoice stats/export, verification stats and inventory
+# summaries only read. When DATABASE_REPLICA_URL is set they run on the replica
+# so heavy reporting doesn't compete with writes on the primary. Routing falls
+# back to the primary whenever the replica is unset, unreachable, or lagging
+# more than DB_REPLICA_MAX_LAG_SECONDS.
+_REPLICA_LAG_SQL = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM (now() - pg_last_xact_replay_timestamp())), 0)
+    END AS lag_seconds
+""")
+
+
+class ReplicaRouter:
+    """
+    Tracks replica health and lag and decides where read-only sessions go.
+
+    Lag is re-measured at most once per check_interval; the first caller after
+    the interval claims the check so concurrent requests don't stampede the
+    replica with lag queries.
+    """
+
+    def __init__(self, max_lag_seconds: float, check_interval: float):
+        self.max_lag_seconds = max_lag_seconds
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self.lag_seconds: Optional[float] = None
+        self.healthy = False
+        self.last_error: Optional[str] = None
+        self._last_check = 0.0
+        self._checked_once = False
+        self.replica_reads = 0
+        self.primary_fallbacks = 0
+
+    def claim_check(self) -> bool:
+        """Return True if the caller should measure lag now."""
+        now = time.monotonic()
+        with self._lock:
+            if self._checked_once and now - self._last_check < self.check_interval:
+                return False
+            self._last_check = now
+            self._checked_once = True
+            return True
+
+    def record_lag(self, lag_seconds: float) -> None:
+        with self._lock:
+            self.lag_seconds = lag_seconds
+            self.healthy = True
+            self.last_error = None
+
+    def record_failure(self, error: Exception) -> None:
+        with self._lock:
+            self.healthy = False
+            self.last_error = str(error)[:200]
+            # Re-check on the next interval rather than immediately
+            self._last_check = time.monotonic()
+        logging.getLogger(__name__).warning(f"Read replica unavailable, using primary: {error}")
+
+    def choose_replica(self) -> bool:
+        """Decide (and count) whether this read goes to the replica."""
+        with self._lock:
+            use_replica = (
+                self.healthy
+                and self.lag_seconds is not None
+                and self.lag_seconds <= self.max_lag_seconds
+            )
+            if use_replica:
+                self.replica_reads += 1
+            else:
+                self.primary_fallbacks += 1
+            return use_replica
+
+    def status(self) -> dict:
+        with self._lock:
+            return {
+                "configured": True,
+                "healthy": self.healthy,
+                "lag_seconds": self.lag_seconds,
+                "max_lag_seconds": self.max_lag_seconds,
+                "routing_to": "replica" if (
+                    self.healthy
+                    and self.lag_seconds is not None
+                    and self.lag_seconds <= self.max_lag_seconds
+                ) else "primary",
+                "replica_reads": self.replica_reads,
+                "primary_fallbacks": self.primary_fallbacks,
+                "last_error": self.last_error,
+            }
+
+
+replica_engine: Optional[Engine] = None
+async_replica_engine = None
+ReplicaSessionLocal: Optional[sessionmaker] = None
+AsyncReplicaSessionLocal: Optional[async_sessionmaker] = None
+replica_router: Optional[ReplicaRouter] = None
+
+if _settings.DATABASE_REPLICA_URL:
+    replica_engine = create_engine(
+        _get_psycopg3_url(_settings.DATABASE_REPLICA_URL),
+        **_pool_kwargs(),
+        isolation_level="AUTOCOMMIT",
+        connect_args=_pgbouncer_connect_args(f"fastapi_replica_{os.getpid()}"),
+        future=True,
+        echo=_settings.ENV == "dev",
+    )
+    async_replica_engine = create_async_engine(
+        _get_psycopg3_url(_settings.DATABASE_REPLICA_URL),
+        **_pool_kwargs(),
+        isolation_level="AUTOCOMMIT",
+        connect_args=_pgbouncer_connect_args(f"fastapi_replica_async_{os.getpid()}"),
+        echo=_settings.ENV == "dev",
+    )
+    ReplicaSessionLocal = sessionmaker(
+        bind=replica_engine,
+        autocommit=False,
+        autoflush=False,
+        future=True,
+    )
+    AsyncReplicaSessionLocal = async_sessionmaker(
+        bind=async_replica_engine,
+        autoflush=False,
+        expire_on_commit=False,
+    )
+    replica_router = ReplicaRouter(
+        max_lag_seconds=_settings.DB_REPLICA_MAX_LAG_SECONDS,
+        check_interval=_settings.DB_REPLICA_CHECK_INTERVAL,
+    )
+
+
+def _use_replica() -> bool:
+    """Refresh replica lag if due and decide whether to route to it (sync)."""
+    if replica_router is None:
+        return False
+    if replica_router.claim_check():
+        try:
+            with replica_engine.connect() as conn:
+                lag = conn.execute(_REPLICA_LAG_SQL).scalar()
+            replica_router.record_lag(float(lag or 0))
+        except Exception as e:
+            replica_router.record_failure(e)
+    return replica_router.choose_replica()
+
+
+async def _use_replica_async() -> bool:
+    """Refresh replica lag if due and decide whether to route to it (async)."""
+    if replica_router is None:
+        return False
+    if replica_router.claim_check():
+        try:
+            async with async_replica_engine.connect() as conn:
+                lag = (await conn.execute(_REPLICA_LAG_SQL)).scalar()
+            replica_router.record_lag(float(lag or 0))
+        except Exception as e:
+            replica_router.record_failure(e)
+    return replica_router.choose_replica()
+
+
+def get_replica_status() -> dict:
+    """Replica health, lag metric and routing counters for monitoring."""
+    if replica_router is None:
+        return {"configured": False, "routing_to": "primary"}
+    return replica_router.status()
+
+
 def is_connection_error(error: Exception) -> bool:
     """Check if an exception represents a connection-related error"""
     # SQLAlchemy connection errors
@@ -273,6 +583,99 @@ def get_db_sync() -> Generator[Session, None, None]:
     finally:
         db.close()
 
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Async database session dependency for FastAPI endpoints.
+
+    Use this in `async def` routes so queries are awaited instead of blocking
+    the event loop. Sync-only helpers (repositories, services) can still be
+    reused through `await db.run_sync(lambda s: helper(s, ...))`.
+    """
+    async with AsyncSessionLocal() as db:
+        try:
+            yield db
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            raise
+
+
+@asynccontextmanager
+async def get_async_db_session() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Async context manager for database sessions in non-FastAPI contexts.
+
+    Usage:
+        async with get_async_db_session() as db:
+            result = await db.execute(text("SELECT 1"))
+    """
+    async with AsyncSessionLocal() as db:
+        try:
+            yield db
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            raise
+
+
+def get_read_db() -> Generator[Session, None, None]:
+    """
+    Read-only database session dependency.
+
+    Uses the read replica when it is configured, healthy and within the lag
+    budget, otherwise the primary. Nothing is committed - don't write through it.
+    """
+    use_replica = _use_replica()
+    db = ReplicaSessionLocal() if use_replica else SessionLocal()
+    try:
+        yield db
+    except Exception as e:
+        if use_replica and is_connection_error(e):
+            replica_router.record_failure(e)
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+async def get_async_read_db() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Async read-only database session dependency.
+
+    Same routing rules as get_read_db.
+    """
+    use_replica = await _use_replica_async()
+    session_factory = AsyncReplicaSessionLocal if use_replica else AsyncSessionLocal
+    async with session_factory() as db:
+        try:
+            yield db
+        except Exception as e:
+            if use_replica and is_connection_error(e):
+                replica_router.record_failure(e)
+            await db.rollback()
+            raise
+
+
+def db_dependency(read_only: bool = False) -> Callable[..., Generator[Session, None, None]]:
+    """
+    Pick the sync session dependency.
+
+    Usage:
+        db: Session = Depends(db_dependency(read_only=True))
+    """
+    return get_read_db if read_only else get_db
+
+
+def async_db_dependency(read_only: bool = False) -> Callable[..., AsyncGenerator[AsyncSession, None]]:
+    """
+    Pick the async session dependency.
+
+    Usage:
+        db: AsyncSession = Depends(async_db_dependency(read_only=True))
+    """
+    return get_async_read_db if read_only else get_async_db
+
+
 def get_tenant_by_id(db: Session, tenant_id: str) -> Optional[Tenant]:
     """Get a tenant by ID with proper validation"""
     return db.query(Tenant).filter(
@@ -291,7 +694,7 @@ def init_db() -> None:
     """
     Initialize database connection and validate schema.
 
-    Production-grade initialization with NullPool for pgbouncer Transaction mode.
+    Production-grade initialization for pgbouncer Transaction mode.
     """
     import time
     import logging
@@ -304,7 +707,14 @@ def init_db() -> None:
     mode = "Transaction" if is_transaction_mode else "Session"
 
     print(f"[INIT] PostgreSQL Connection - Mode: {mode}, Host: {db_host}")
-    print(f"[INIT] Pool: NullPool (pgbouncer handles pooling)")
+    if _settings.DB_POOL_MODE == "queue":
+        print(
+            f"[INIT] Pool: QueuePool (size={_settings.DB_POOL_SIZE}, "
+            f"overflow={_settings.DB_POOL_MAX_OVERFLOW}, recycle={_settings.DB_POOL_RECYCLE}s, "
+            f"idle_timeout={_settings.DB_POOL_IDLE_TIMEOUT}s)"
+        )
+    else:
+        print(f"[INIT] Pool: NullPool (pgbouncer handles pooling)")
     print(f"[INIT] Process PID: {os.getpid()}, App Name: fastapi_main_{os.getpid()}")
 
     start_time = time.time()
@@ -390,6 +800,32 @@ def dispose_engine() -> None:
     """Clean shutdown of database connections"""
     print(f"[SHUTDOWN] Disposing database engine (PID: {os.getpid()})")
     engine.dispose()
+    if replica_engine is not None:
+        replica_engine.dispose()
+
+
+async def dispose_async_engine() -> None:
+    """Clean shutdown of async database connections"""
+    print(f"[SHUTDOWN] Disposing async database engine (PID: {os.getpid()})")
+    await async_engine.dispose()
+    if async_replica_engine is not None:
+        await async_replica_engine.dispose()
+
+
+def _describe_pool(target: Engine, metrics: PoolMetrics) -> dict:
+    pool = target.pool
+    if isinstance(pool, NullPool):
+        return {"pool_type": "NullPool"}
+
+    return {
+        "pool_type": type(pool).__name__,
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": pool.overflow(),
+        "max_connections": _settings.DB_POOL_SIZE + _settings.DB_POOL_MAX_OVERFLOW,
+        "health": metrics.to_dict(),
+    }
 
 
 def get_pool_status() -> dict:
@@ -397,19 +833,35 @@ def get_pool_status() -> dict:
     Get current connection pool status for monitoring.
 
     With NullPool, there's no application-level pooling - pgbouncer handles it.
+    In queue mode, reports occupancy and health counters for both engines.
     """
+    if _settings.DB_POOL_MODE != "queue":
+        return {
+            "pool_type": "NullPool",
+            "pool_mode": "null",
+            "note": "pgbouncer handles connection pooling",
+            "status": "active",
+            "replica": get_replica_status(),
+        }
+
     return {
-        "pool_type": "NullPool",
-        "note": "pgbouncer handles connection pooling",
+        "pool_type": "QueuePool",
+        "pool_mode": "queue",
+        "note": "warm per-worker pool in front of pgbouncer",
         "status": "active",
+        "pid": os.getpid(),
+        "sync": _describe_pool(engine, pool_metrics),
+        "async": _describe_pool(async_engine.sync_engine, async_pool_metrics),
+        "replica": get_replica_status(),
     }
 
 
 def log_connection_health() -> None:
     """
-    Log connection health - simplified for NullPool.
+    Log connection health.
 
     With NullPool, pgbouncer handles all pooling so we just verify connectivity.
+    In queue mode the pool occupancy is logged as well.
     """
     import logging
     import time
@@ -421,7 +873,14 @@ def log_connection_health() -> None:
         with engine.connect() as conn:
             conn.execute(text("SELECT 1"))
         latency = (time.time() - start) * 1000
-        logger.info(f"DB Health: OK (latency={latency:.1f}ms, pool=NullPool/pgbouncer)")
+        if _settings.DB_POOL_MODE == "queue":
+            pool = engine.pool
+            logger.info(
+                f"DB Health: OK (latency={latency:.1f}ms, pool=QueuePool "
+                f"checked_out={pool.checkedout()} checked_in={pool.checkedin()} overflow={pool.overflow()})"
+            )
+        else:
+            logger.info(f"DB Health: OK (latency={latency:.1f}ms, pool=NullPool/pgbouncer)")
     except Exception as e:
         logger.error(f"DB Health: FAILED - {e}")
 
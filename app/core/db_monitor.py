@@ -7,12 +7,18 @@ Monitors database performance and provides optimizations to reduce connection pr
 - Query performance tracking
 - Slow query detection
 - Connection leak detection
+- Per-statement fingerprints with latency histograms (per statement and per endpoint)
+- EXPLAIN sampling of slow queries and index advice
 - Performance recommendations
 """
+import re
+import math
 import time
 import threading
 import logging
-from typing import Dict, List, Optional, Any
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Callable, Dict, Iterator, List, Optional, Any, Tuple
 from datetime import datetime, timedelta
 from dataclasses import dataclass, field
 from contextlib import contextmanager
@@ -34,6 +40,285 @@ class QueryMetrics:
     endpoint: Optional[str] = None
     connection_id: Optional[str] = None
 
+# Endpoint the current query runs for, set per request by QueryAttributionMiddleware.
+# Holds the ASGI scope so the route template can be resolved after routing.
+_current_endpoint: ContextVar[Optional[Any]] = ContextVar("db_monitor_endpoint", default=None)
+
+_MAX_FINGERPRINTS = 500
+_MAX_ENDPOINTS = 300
+_OVERFLOW_KEY = "<other>"
+
+_COMMENT_RE = re.compile(r"--[^\n]*|/\*.*?\*/", re.DOTALL)
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_PARAM_RE = re.compile(r"%\(\w+\)s|%s|\$\d+|(?<!:):\w+|\?")
+_NUMBER_RE = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?(?:e[+-]?\d+)?\b", re.IGNORECASE)
+_IN_LIST_RE = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)", re.IGNORECASE)
+_VALUES_RE = re.compile(r"\bVALUES\s*(\(\s*\?(?:\s*,\s*\?)*\s*\))(?:\s*,\s*\(\s*\?(?:\s*,\s*\?)*\s*\))*", re.IGNORECASE)
+_WS_RE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=2048)
+def fingerprint_sql(statement: str) -> str:
+    """
+    Normalize a SQL statement so every execution of the same query shape maps
+    to one key: comments dropped, literals and bind parameters replaced by ?,
+    IN lists and multi-row VALUES collapsed, whitespace squashed.
+    """
+    sql = _COMMENT_RE.sub(" ", statement)
+    sql = _STRING_RE.sub("?", sql)
+    sql = _PARAM_RE.sub("?", sql)
+    sql = _NUMBER_RE.sub("?", sql)
+    sql = _WS_RE.sub(" ", sql).strip()
+    sql = _IN_LIST_RE.sub("IN (...)", sql)
+    sql = _VALUES_RE.sub(r"VALUES \1, ...", sql)
+    return sql
+
+
+def current_endpoint() -> Optional[str]:
+    """Route template (e.g. "GET /invoices/{invoice_id}") of the request running the query."""
+    scope = _current_endpoint.get()
+    if scope is None:
+        return None
+    if isinstance(scope, str):
+        return scope
+    route = scope.get("route")
+    path = getattr(route, "path", None) or scope.get("path", "")
+    return f"{scope.get('method', '')} {path}".strip()
+
+
+class LatencyHistogram:
+    """
+    Log-bucketed latency histogram with constant memory.
+
+    Buckets grow by ~19% (2 ** 0.25), so reported percentiles are within
+    that factor of the true value regardless of how many samples are recorded.
+    """
+
+    __slots__ = ("_buckets", "count")
+
+    _BASE = 2 ** 0.25
+    _MIN_MS = 0.01
+
+    def __init__(self):
+        self._buckets: Dict[int, int] = {}
+        self.count = 0
+
+    def record(self, duration_ms: float) -> None:
+        index = int(math.log(max(duration_ms, self._MIN_MS) / self._MIN_MS, self._BASE))
+        self._buckets[index] = self._buckets.get(index, 0) + 1
+        self.count += 1
+
+    def percentile(self, pct: float) -> float:
+        if not self.count:
+            return 0.0
+        rank = max(1, math.ceil(self.count * pct / 100))
+        seen = 0
+        for index in sorted(self._buckets):
+            seen += self._buckets[index]
+            if seen >= rank:
+                return round(self._MIN_MS * self._BASE ** (index + 1), 2)
+        return 0.0
+
+
+@dataclass
+class StatementStats:
+    """Aggregated timings for one statement fingerprint or one endpoint"""
+    key: str
+    calls: int = 0
+    total_time_ms: float = 0
+    max_time_ms: float = 0
+    rows: int = 0
+    histogram: LatencyHistogram = field(default_factory=LatencyHistogram)
+    breakdown: Dict[str, float] = field(default_factory=dict)
+
+    def record(self, duration_ms: float, rows: int, related: Optional[str]) -> None:
+        self.calls += 1
+        self.total_time_ms += duration_ms
+        self.max_time_ms = max(self.max_time_ms, duration_ms)
+        self.rows += rows
+        self.histogram.record(duration_ms)
+        if related is not None and (related in self.breakdown or len(self.breakdown) < 20):
+            self.breakdown[related] = self.breakdown.get(related, 0) + duration_ms
+
+    def to_dict(self, breakdown_name: str) -> Dict[str, Any]:
+        top_related = sorted(self.breakdown.items(), key=lambda item: item[1], reverse=True)[:5]
+        return {
+            'calls': self.calls,
+            'total_time_ms': round(self.total_time_ms, 2),
+            'avg_time_ms': round(self.total_time_ms / self.calls, 2) if self.calls else 0,
+            'p50_ms': self.histogram.percentile(50),
+            'p95_ms': self.histogram.percentile(95),
+            'p99_ms': self.histogram.percentile(99),
+            'max_ms': round(self.max_time_ms, 2),
+            'rows': self.rows,
+            'avg_rows': round(self.rows / self.calls, 1) if self.calls else 0,
+            breakdown_name: [
+                {'key': key, 'total_time_ms': round(total, 2)} for key, total in top_related
+            ],
+        }
+
+# --- Index advisor -----------------------------------------------------------
+
+# Set while the advisor runs so its own EXPLAIN / pg_class lookups aren't recorded
+_advisor_active: ContextVar[bool] = ContextVar("db_monitor_advisor_active", default=False)
+
+_JOIN_COND_KEYS = ("Hash Cond", "Merge Cond", "Join Filter")
+_JSON_FIELD_RE = re.compile(r"\((?:(\w+)\.)?(\w+) ->> '(\w+)'::text\)")
+# Last group is "'%" for a leading-wildcard literal and "$" for a parameter
+_LIKE_RE = re.compile(r"\(?(?:(\w+)\.)?(\w+)\)?(?:::\w+)? (~~\*?) ('%|\$)?")
+# Literals in plan conditions; JSON keys after ->/->> are kept as they name a field
+_PLAN_LITERAL_RE = re.compile(r"(->>?\s*)?('(?:[^']|'')*'|\$\d+|(?<![\w.$])-?\d+(?:\.\d+)?\b)")
+_DRIVER_PARAM_RE = re.compile(r"%%|%\((\w+)\)s|%s")
+_EXPLAIN_STATEMENT = "db_monitor_explain"
+_COMPARE_RE = re.compile(r"\((?:(\w+)\.)?(\w+) (=|<|>|<=|>=) ")
+
+
+@dataclass
+class SlowQuerySample:
+    """
+    Latest slow execution of a fingerprint, kept so it can be EXPLAINed later.
+
+    Only the statement with positional ($1, $2, ...) markers is kept; bound
+    values are dropped so tenant data never sits in the sample table.
+    """
+    statement: str
+    param_count: int
+    duration_ms: float
+    captured_at: datetime
+
+
+def positional_sql(statement: str, has_params: bool = True) -> Tuple[str, int]:
+    """
+    Rewrite psycopg's %(name)s / %s markers as $1, $2, ... for PREPARE.
+
+    Returns the statement and the number of distinct parameters. Without
+    bound parameters the driver sends the statement as-is, so nothing to do.
+    """
+    if not has_params:
+        return statement, 0
+    positions: Dict[str, int] = {}
+    count = 0
+
+    def replace(match: re.Match) -> str:
+        nonlocal count
+        if match.group(0) == "%%":
+            return "%"
+        name = match.group(1)
+        if name is not None and name in positions:
+            return f"${positions[name]}"
+        count += 1
+        if name is not None:
+            positions[name] = count
+        return f"${count}"
+
+    return _DRIVER_PARAM_RE.sub(replace, statement), count
+
+
+def redact_condition(condition: str) -> str:
+    """Replace literal values and parameters in a plan condition with ?"""
+    return _PLAN_LITERAL_RE.sub(
+        lambda match: match.group(0) if match.group(1) else "?", condition
+    )
+
+
+def _walk_plan(node: Dict[str, Any], parent: Optional[Dict[str, Any]] = None
+               ) -> Iterator[Tuple[Dict[str, Any], Optional[Dict[str, Any]]]]:
+    yield node, parent
+    for child in node.get("Plans", []):
+        yield from _walk_plan(child, node)
+
+
+def _conditions_for(node: Dict[str, Any], parent: Optional[Dict[str, Any]]) -> List[str]:
+    """Filter on the scan itself plus join conditions evaluated against it by the parent"""
+    conditions = [node["Filter"]] if node.get("Filter") else []
+    if parent:
+        conditions.extend(parent[key] for key in _JOIN_COND_KEYS if parent.get(key))
+    return conditions
+
+
+def propose_index(schema: str, table: str, alias: str, conditions: List[str]) -> Optional[Dict[str, Any]]:
+    """
+    Turn the predicates a sequential scan evaluates into CREATE INDEX DDL.
+
+    Preference order: JSONB ->> expression index, trigram GIN for (I)LIKE
+    searches, then a btree on equality columns followed by one range column.
+    """
+    def own(qualifier: str) -> bool:
+        return not qualifier or qualifier == alias
+
+    qualified = f"{schema}.{table}" if schema and schema != "public" else table
+    text_conditions = " AND ".join(conditions)
+
+    for qualifier, column, key in _JSON_FIELD_RE.findall(text_conditions):
+        if own(qualifier):
+            return {
+                "kind": "expression",
+                "columns": [f"{column}->>'{key}'"],
+                "ddl": (
+                    f"CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_{table}_{column}_{key} "
+                    f"ON {qualified} (({column}->>'{key}'))"
+                ),
+            }
+
+    # A parameterized LIKE may start with a wildcard, which only trigram serves
+    for qualifier, column, operator, pattern in _LIKE_RE.findall(text_conditions):
+        if own(qualifier) and (operator == "~~*" or pattern):
+            return {
+                "kind": "trigram",
+                "columns": [column],
+                "requires": "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+                "ddl": (
+                    f"CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_{table}_{column}_trgm "
+                    f"ON {qualified} USING gin ({column} gin_trgm_ops)"
+                ),
+            }
+
+    equality, ranges = [], []
+    for qualifier, column, operator in _COMPARE_RE.findall(text_conditions):
+        if not own(qualifier):
+            continue
+        target = equality if operator == "=" else ranges
+        if column not in equality and column not in ranges:
+            target.append(column)
+    columns = equality[:3] + ranges[:1]
+    if not columns:
+        return None
+    return {
+        "kind": "btree",
+        "columns": columns,
+        "ddl": (
+            f"CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_{table}_{'_'.join(columns)} "
+            f"ON {qualified} ({', '.join(columns)})"
+        ),
+    }
+
+
+def find_seq_scans(plan: Dict[str, Any], table_rows: Callable[[str], float],
+                   large_table_rows: float) -> List[Dict[str, Any]]:
+    """
+    Sequential scans on tables with at least large_table_rows rows, with index
+    proposals. Conditions are returned redacted (columns and operators only).
+    """
+    findings = []
+    for node, parent in _walk_plan(plan):
+        if node.get("Node Type") != "Seq Scan":
+            continue
+        schema = node.get("Schema", "public")
+        table = node["Relation Name"]
+        rows = table_rows(f"{schema}.{table}")
+        if rows < large_table_rows:
+            continue
+        conditions = _conditions_for(node, parent)
+        findings.append({
+            "table": f"{schema}.{table}",
+            "table_rows": int(rows),
+            "plan_rows": node.get("Plan Rows"),
+            "conditions": [redact_condition(condition) for condition in conditions],
+            "index": propose_index(schema, table, node.get("Alias", table), conditions),
+        })
+    return findings
+
+
 @dataclass
 class ConnectionMetrics:
     """Metrics for database connection usage"""
@@ -50,10 +335,21 @@ class DatabaseMonitor:
     Helps identify optimization opportunities and potential issues.
     """
 
+    # Index advisor tuning
+    LARGE_TABLE_ROWS = 10_000
+    MAX_EXPLAIN_SAMPLES = 50
+    INDEX_ADVICE_TTL_SECONDS = 600
+
     def __init__(self, slow_query_threshold_ms: float = 100):
         self.slow_query_threshold = slow_query_threshold_ms
+        self._slow_samples: Dict[str, SlowQuerySample] = {}
+        self._index_report: List[Dict[str, Any]] = []
+        self._index_report_at: Optional[float] = None
+        self._advisor_thread: Optional[threading.Thread] = None
         self._queries: List[QueryMetrics] = []
         self._connections: Dict[str, ConnectionMetrics] = {}
+        self._statements: Dict[str, StatementStats] = {}
+        self._endpoints: Dict[str, StatementStats] = {}
         self._stats = {
             'total_queries': 0,
             'slow_queries': 0,
@@ -77,10 +373,12 @@ class DatabaseMonitor:
 
         @event.listens_for(Engine, "after_cursor_execute")
         def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
-            if not self._monitoring_enabled:
+            if not self._monitoring_enabled or _advisor_active.get():
                 return
 
             duration_ms = (time.time() - context._query_start_time) * 1000
+            endpoint = current_endpoint()
+            rows = max(getattr(cursor, "rowcount", 0) or 0, 0)
 
             with self._lock:
                 # Record query metrics
@@ -88,14 +386,18 @@ class DatabaseMonitor:
                     sql=statement[:500],  # Truncate long queries
                     duration_ms=duration_ms,
                     timestamp=datetime.utcnow(),
+                    endpoint=endpoint,
                     connection_id=str(id(conn))
                 )
+                self.record_statement(statement, duration_ms, rows, endpoint)
 
                 self._queries.append(query_metric)
                 self._stats['total_queries'] += 1
                 self._stats['total_time_ms'] += duration_ms
 
                 if duration_ms > self.slow_query_threshold:
+                    if not executemany:
+                        self._sample_slow_query(statement, parameters, duration_ms)
                     self._stats['slow_queries'] += 1
                     logger.warning(f"Slow query detected: {duration_ms:.1f}ms - {statement[:100]}")
 
@@ -106,6 +408,203 @@ class DatabaseMonitor:
                 # Update connection metrics
                 self._update_connection_metrics(str(id(conn)), duration_ms)
 
+    def _sample_slow_query(self, statement: str, parameters: Any, duration_ms: float):
+        """
+        Keep the latest slow execution per fingerprint (SELECTs only) for EXPLAIN.
+        The parameter values are discarded here; the plan is built generically.
+        """
+        if statement.lstrip()[:4].upper() not in ("SELE", "WITH"):
+            return
+        fingerprint = fingerprint_sql(statement)
+        if fingerprint not in self._slow_samples and len(self._slow_samples) >= self.MAX_EXPLAIN_SAMPLES:
+            return
+        positional, param_count = positional_sql(statement, bool(parameters))
+        self._slow_samples[fingerprint] = SlowQuerySample(
+            statement=positional,
+            param_count=param_count,
+            duration_ms=duration_ms,
+            captured_at=datetime.utcnow(),
+        )
+
+    def build_index_report(
+        self,
+        explain: Optional[Callable[[str, int], Dict[str, Any]]] = None,
+        table_rows: Optional[Callable[[str], float]] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        EXPLAIN every sampled slow query and rank the index proposals.
+
+        Proposals are deduplicated by DDL and ranked by the total database time
+        of the fingerprints they would serve, so the top entries are the
+        migrations worth writing first.
+        """
+        with self._lock:
+            samples = dict(self._slow_samples)
+            totals = {key: stats.total_time_ms for key, stats in self._statements.items()}
+
+        proposals: Dict[str, Dict[str, Any]] = {}
+        conn = None
+        token = _advisor_active.set(True)
+        try:
+            if explain is None or table_rows is None:
+                conn = engine.connect()
+                explain, table_rows = self._plan_readers(conn)
+
+            for fingerprint, sample in samples.items():
+                try:
+                    plan = explain(sample.statement, sample.param_count)
+                except Exception as e:
+                    logger.debug(f"EXPLAIN failed for sampled query: {e}")
+                    continue
+
+                for finding in find_seq_scans(plan, table_rows, self.LARGE_TABLE_ROWS):
+                    index = finding["index"]
+                    key = index["ddl"] if index else f"seq_scan:{finding['table']}"
+                    entry = proposals.setdefault(key, {
+                        "table": finding["table"],
+                        "table_rows": finding["table_rows"],
+                        "conditions": finding["conditions"],
+                        "index": index,
+                        "impact_ms": 0.0,
+                        "slowest_sample_ms": 0.0,
+                        "fingerprints": [],
+                    })
+                    if fingerprint not in entry["fingerprints"]:
+                        entry["fingerprints"].append(fingerprint)
+                        entry["impact_ms"] += totals.get(fingerprint, sample.duration_ms)
+                    entry["slowest_sample_ms"] = max(entry["slowest_sample_ms"], sample.duration_ms)
+        finally:
+            _advisor_active.reset(token)
+            if conn is not None:
+                conn.close()
+
+        report = sorted(proposals.values(), key=lambda entry: entry["impact_ms"], reverse=True)
+        for rank, entry in enumerate(report, start=1):
+            entry["rank"] = rank
+            entry["impact_ms"] = round(entry["impact_ms"], 2)
+            entry["slowest_sample_ms"] = round(entry["slowest_sample_ms"], 2)
+
+        with self._lock:
+            self._index_report = report
+            self._index_report_at = time.time()
+        return report
+
+    @staticmethod
+    def _plan_readers(conn) -> Tuple[Callable[[str, int], Dict[str, Any]], Callable[[str], float]]:
+        """EXPLAIN and table-size lookups over one connection"""
+        row_cache: Dict[str, float] = {}
+
+        def explain(statement: str, param_count: int) -> Dict[str, Any]:
+            # Generic plan without the original values: PREPARE + EXECUTE with
+            # NULLs under force_generic_plan (EXPLAIN GENERIC_PLAN needs PG16).
+            # Everything runs in one transaction so pgbouncer keeps us on the
+            # same server connection, and the savepoint lets DEALLOCATE run
+            # even when EXPLAIN fails.
+            args = f"({', '.join(['NULL'] * param_count)})" if param_count else ""
+            conn.exec_driver_sql("BEGIN")
+            try:
+                conn.exec_driver_sql("SET LOCAL plan_cache_mode = force_generic_plan")
+                conn.exec_driver_sql(f"PREPARE {_EXPLAIN_STATEMENT} AS {statement}")
+                conn.exec_driver_sql("SAVEPOINT db_monitor_explain")
+                try:
+                    plan = conn.exec_driver_sql(
+                        f"EXPLAIN (FORMAT JSON) EXECUTE {_EXPLAIN_STATEMENT}{args}"
+                    ).scalar()
+                except Exception:
+                    conn.exec_driver_sql("ROLLBACK TO SAVEPOINT db_monitor_explain")
+                    raise
+                finally:
+                    conn.exec_driver_sql(f"DEALLOCATE {_EXPLAIN_STATEMENT}")
+            finally:
+                conn.exec_driver_sql("ROLLBACK")
+            return plan[0]["Plan"] if isinstance(plan, list) else plan["Plan"]
+
+        def table_rows(qualified_name: str) -> float:
+            if qualified_name not in row_cache:
+                row_cache[qualified_name] = conn.execute(
+                    text("SELECT COALESCE(MAX(reltuples), 0) FROM pg_class WHERE oid = to_regclass(:name)"),
+                    {"name": qualified_name},
+                ).scalar() or 0
+            return row_cache[qualified_name]
+
+        return explain, table_rows
+
+    def _run_index_advisor(self):
+        try:
+            self.build_index_report()
+        except Exception as e:
+            logger.warning(f"Index advisor run failed: {e}")
+
+    def refresh_index_advice(self) -> bool:
+        """Start an out-of-band advisor run unless one is already in progress"""
+        with self._lock:
+            if not self._slow_samples:
+                return False
+            if self._advisor_thread is not None and self._advisor_thread.is_alive():
+                return False
+            self._advisor_thread = threading.Thread(
+                target=self._run_index_advisor, name="db-index-advisor", daemon=True
+            )
+            self._advisor_thread.start()
+            return True
+
+    def get_index_report(self) -> List[Dict[str, Any]]:
+        """Latest ranked index report; schedules a refresh when stale"""
+        with self._lock:
+            stale = (
+                self._index_report_at is None
+                or time.time() - self._index_report_at > self.INDEX_ADVICE_TTL_SECONDS
+            )
+            report = list(self._index_report)
+        if stale:
+            self.refresh_index_advice()
+        return report
+
+    def record_statement(self, statement: str, duration_ms: float, rows: int = 0,
+                         endpoint: Optional[str] = None):
+        """Add one execution to the fingerprint and endpoint histograms"""
+        fingerprint = fingerprint_sql(statement)
+        with self._lock:
+            self._bucket(self._statements, fingerprint, _MAX_FINGERPRINTS).record(
+                duration_ms, rows, endpoint
+            )
+            if endpoint is not None:
+                self._bucket(self._endpoints, endpoint, _MAX_ENDPOINTS).record(
+                    duration_ms, rows, fingerprint
+                )
+
+    @staticmethod
+    def _bucket(table: Dict[str, StatementStats], key: str, limit: int) -> StatementStats:
+        stats = table.get(key)
+        if stats is None:
+            # Bound memory: once full, new keys share one overflow bucket
+            if len(table) >= limit:
+                key = _OVERFLOW_KEY
+                stats = table.get(key)
+            if stats is None:
+                stats = table[key] = StatementStats(key=key)
+        return stats
+
+    def get_top_statements(self, limit: int = 10, order_by: str = "total_time_ms") -> List[Dict[str, Any]]:
+        """Statement fingerprints ranked by total time (or calls / p95_ms / rows)"""
+        with self._lock:
+            rows = [
+                {'fingerprint': key, **stats.to_dict('top_endpoints')}
+                for key, stats in self._statements.items()
+            ]
+        rows.sort(key=lambda row: row.get(order_by, 0), reverse=True)
+        return rows[:limit]
+
+    def get_top_endpoints(self, limit: int = 10, order_by: str = "total_time_ms") -> List[Dict[str, Any]]:
+        """Endpoints ranked by database time spent, with their heaviest statements"""
+        with self._lock:
+            rows = [
+                {'endpoint': key, **stats.to_dict('top_statements')}
+                for key, stats in self._endpoints.items()
+            ]
+        rows.sort(key=lambda row: row.get(order_by, 0), reverse=True)
+        return rows[:limit]
+
     def _update_connection_metrics(self, connection_id: str, duration_ms: float):
         """Update metrics for a specific connection"""
         now = datetime.utcnow()
@@ -184,6 +683,10 @@ class DatabaseMonitor:
                     'total_connections': len(self._connections),
                     'connection_leaks': self._detect_connection_leaks()
                 },
+                'statement_stats': {
+                    'distinct_fingerprints': len(self._statements),
+                    'tracked_endpoints': len(self._endpoints),
+                },
                 'performance_score': self._calculate_performance_score()
             }
 
@@ -276,6 +779,22 @@ class DatabaseMonitor:
                 'recommendation': 'Review database session management and ensure proper cleanup'
             })
 
+        # Index advice from EXPLAIN of sampled slow queries (computed out-of-band)
+        for entry in self.get_index_report():
+            index = entry["index"]
+            recommendations.append({
+                'type': 'index',
+                'priority': 'high' if entry['impact_ms'] >= 1000 else 'medium',
+                'issue': (
+                    f"Sequential scan on {entry['table']} (~{entry['table_rows']} rows), "
+                    f"{entry['impact_ms']}ms total across {len(entry['fingerprints'])} statement(s)"
+                ),
+                'recommendation': index['ddl'] if index else (
+                    f"No indexable predicate found for {entry['table']}; review: "
+                    + " AND ".join(entry['conditions'])
+                ),
+            })
+
         return recommendations
 
     def reset_stats(self):
@@ -283,6 +802,11 @@ class DatabaseMonitor:
         with self._lock:
             self._queries.clear()
             self._connections.clear()
+            self._statements.clear()
+            self._endpoints.clear()
+            self._slow_samples.clear()
+            self._index_report = []
+            self._index_report_at = None
             self._stats = {
                 'total_queries': 0,
                 'slow_queries': 0,
@@ -310,8 +834,13 @@ def get_db_monitored(endpoint: str = None, tenant_id: str = None):
     Get monitored database session for FastAPI endpoints.
     Drop-in replacement for the standard get_db dependency.
     """
-    with db_monitor.monitored_session(endpoint=endpoint, tenant_id=tenant_id) as db:
-        yield db
+    token = _current_endpoint.set(endpoint) if endpoint else None
+    try:
+        with db_monitor.monitored_session(endpoint=endpoint, tenant_id=tenant_id) as db:
+            yield db
+    finally:
+        if token is not None:
+            _current_endpoint.reset(token)
 
 # Health check queries
 def run_health_check() -> Dict[str, Any]:
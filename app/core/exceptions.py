@@ -102,6 +102,18 @@ class InvalidIPAddress(IPAccessError):
         )
 
 
+class IPRangeTooBroad(IPAccessError):
+    """Raised when a CIDR rule covers more addresses than allowed"""
+
+    def __init__(self, ip_address: str, min_prefix: int):
+        super().__init__(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            message=f"The range {ip_address} is too broad. IP rules may cover at most a /{min_prefix} block.",
+            error_code="IP_RANGE_TOO_BROAD",
+            details={"ip_address": ip_address, "min_prefix": min_prefix}
+        )
+
+
 class IPRuleCreationFailed(IPAccessError):
     """Raised when IP rule creation fails"""
 
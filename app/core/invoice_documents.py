@@ -0,0 +1,263 @@
+# app/core/invoice_documents.py
+"""
+Invoice document rendering (PDF and XLSX).
+
+These functions are CPU-bound and run in the CPU process pool
+(app.core.cpu_pool) rather than on the event loop, so they take and
+return plain picklable data and this module keeps its imports light:
+pool processes import it on their first task.
+"""
+from io import BytesIO
+from typing import List, Sequence
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def generate_pdf_from_invoice(invoice: dict) -> bytes:
+    """Generate a professional invoice PDF with elegant design using fpdf2."""
+    try:
+        from fpdf import FPDF
+        from datetime import datetime
+
+        # Extract invoice data
+        invoice_num = invoice.get("invoice_number", "N/A")
+        customer_name = invoice.get("customer", {}).get("name") if isinstance(invoice.get("customer"), dict) else invoice.get("customer_name", "Unknown")
+        customer_email = invoice.get("customer", {}).get("email") if isinstance(invoice.get("customer"), dict) else None
+        customer_phone = invoice.get("customer", {}).get("phone") if isinstance(invoice.get("customer"), dict) else None
+        customer_address = invoice.get("customer", {}).get("address") if isinstance(invoice.get("customer"), dict) else None
+
+        total = float(invoice.get("total") or invoice.get("amount") or 0)
+        currency = invoice.get("currency", "USD")
+        bank = invoice.get("bank")
+        expected_account = invoice.get("expected_account")
+        recipient_name = invoice.get("recipient_name")
+        due_date = invoice.get("due_date") or "N/A"
+        items = invoice.get("items", [])
+
+        # Premium color scheme
+        CREAM = (245, 237, 230)
+        DARK = (51, 51, 51)
+        ACCENT = (139, 115, 85)
+        GRAY = (120, 120, 120)
+        TABLE_HEADER = (230, 220, 210)
+
+        pdf = FPDF()
+        pdf.add_page()
+        pdf.set_auto_page_break(auto=True, margin=20)
+
+        # Elegant cream background
+        pdf.set_fill_color(*CREAM)
+        pdf.rect(0, 0, 210, 297, 'F')
+
+        # Company branding
+        pdf.set_y(15)
+        pdf.set_font("Helvetica", "B", 20)
+        pdf.set_text_color(*ACCENT)
+        pdf.cell(0, 10, "YOUR COMPANY", ln=True, align="C")
+
+        pdf.set_draw_color(*ACCENT)
+        pdf.set_line_width(0.5)
+        pdf.line(85, 27, 125, 27)
+        pdf.ln(8)
+
+        # Invoice header
+        pdf.set_font("Helvetica", "B", 11)
+        pdf.set_text_color(*GRAY)
+        pdf.set_xy(15, 38)
+        pdf.cell(90, 6, "INVOICE NO.", ln=False)
+        pdf.set_xy(110, 38)
+        pdf.cell(85, 6, "BILLED TO", ln=True)
+
+        pdf.set_font("Helvetica", "", 11)
+        pdf.set_text_color(*DARK)
+        pdf.set_xy(15, 45)
+        pdf.cell(90, 6, str(invoice_num), ln=False)
+        pdf.set_xy(110, 45)
+        pdf.cell(85, 6, str(customer_name), ln=True)
+
+        pdf.set_xy(15, 51)
+        pdf.set_font("Helvetica", "", 9)
+        pdf.set_text_color(*GRAY)
+        formatted_date = datetime.now().strftime("%m/%d/%Y")
+        pdf.cell(90, 5, formatted_date, ln=False)
+
+        pdf.set_xy(110, 51)
+        if customer_email:
+            pdf.cell(85, 5, str(customer_email), ln=True)
+            pdf.set_xy(110, 56)
+        if customer_phone:
+            pdf.cell(85, 5, str(customer_phone), ln=True)
+            pdf.set_xy(110, 61)
+        if customer_address:
+            pdf.set_font("Helvetica", "", 8)
+            pdf.multi_cell(85, 4, str(customer_address)[:40])
+
+        pdf.ln(8)
+
+        # Title with decorative line
+        pdf.set_font("Helvetica", "B", 14)
+        pdf.set_text_color(*ACCENT)
+        pdf.cell(0, 8, "INVOICE", ln=True, align="C")
+        pdf.set_draw_color(*ACCENT)
+        pdf.set_line_width(0.3)
+        pdf.line(80, pdf.get_y(), 130, pdf.get_y())
+        pdf.ln(8)
+
+        # Items table
+        if items and len(items) > 0:
+            pdf.set_fill_color(*TABLE_HEADER)
+            pdf.set_text_color(*DARK)
+            pdf.set_font("Helvetica", "B", 10)
+            pdf.cell(75, 9, "DESCRIPTION", border=1, fill=True, align="L")
+            pdf.cell(30, 9, "PRICE", border=1, align="C", fill=True)
+            pdf.cell(20, 9, "QTY", border=1, align="C", fill=True)
+            pdf.cell(40, 9, "AMOUNT", border=1, align="R", fill=True, ln=True)
+
+            pdf.set_font("Helvetica", "", 10)
+            for idx, item in enumerate(items):
+                pdf.set_fill_color(255, 255, 255) if idx % 2 == 0 else pdf.set_fill_color(250, 248, 245)
+                description = str(item.get("description", ""))[:35]
+                quantity = item.get("quantity", 1)
+                price = float(item.get("unit_price", 0))
+                item_total = float(item.get("total", price * quantity))
+
+                pdf.cell(75, 8, description, border=1, fill=True)
+                if currency == "KHR":
+                    pdf.cell(30, 8, f"{price:,.0f}", border=1, align="C", fill=True)
+                    pdf.cell(20, 8, str(int(quantity)), border=1, align="C", fill=True)
+                    pdf.cell(40, 8, f"{item_total:,.0f}", border=1, align="R", fill=True, ln=True)
+                else:
+                    pdf.cell(30, 8, f"${price:.2f}", border=1, align="C", fill=True)
+                    pdf.cell(20, 8, str(int(quantity)), border=1, align="C", fill=True)
+                    pdf.cell(40, 8, f"${item_total:.2f}", border=1, align="R", fill=True, ln=True)
+            pdf.ln(5)
+
+        # Total box (better positioning)
+        total_x = 130
+        pdf.set_x(total_x)
+        pdf.set_font("Helvetica", "B", 11)
+        pdf.set_text_color(255, 255, 255)
+        pdf.set_fill_color(*ACCENT)
+        pdf.cell(35, 12, "TOTAL", fill=True, align="C")
+        if currency == "KHR":
+            pdf.cell(0, 12, f"{total:,.0f} KHR", fill=True, align="C", ln=True)
+        else:
+            pdf.cell(0, 12, f"${total:.2f}", fill=True, align="C", ln=True)
+
+        pdf.ln(15)
+
+        # Payment info (more prominent)
+        if bank or expected_account or recipient_name:
+            pdf.set_font("Helvetica", "B", 11)
+            pdf.set_text_color(*ACCENT)
+            pdf.cell(0, 7, "Payment Information", ln=True)
+            pdf.set_draw_color(*ACCENT)
+            pdf.set_line_width(0.3)
+            pdf.line(15, pdf.get_y(), 75, pdf.get_y())
+            pdf.ln(4)
+
+            pdf.set_font("Helvetica", "", 10)
+            pdf.set_text_color(*DARK)
+            if bank:
+                pdf.cell(0, 6, f"Bank: {bank}", ln=True)
+            if expected_account:
+                pdf.cell(0, 6, f"Account: {expected_account}", ln=True)
+            if recipient_name:
+                pdf.cell(0, 6, f"Recipient: {recipient_name}", ln=True)
+
+        # Thank you message (fixed positioning)
+        current_y = pdf.get_y()
+        if current_y < 200:
+            pdf.set_y(220)
+        else:
+            pdf.ln(15)
+
+        pdf.set_font("Helvetica", "B", 13)
+        pdf.set_text_color(*ACCENT)
+        pdf.cell(0, 8, "Thank you", ln=True, align="C")
+        pdf.set_font("Helvetica", "", 10)
+        pdf.cell(0, 5, "for your purchase!", ln=True, align="C")
+
+        # Footer (fixed at bottom)
+        pdf.set_y(-25)
+        pdf.set_font("Helvetica", "", 7)
+        pdf.set_text_color(*GRAY)
+        pdf.cell(0, 4, "Generated by Invoice System", ln=True, align="C")
+
+        return bytes(pdf.output())
+
+    except Exception as e:
+        logger.warning(f"fpdf2 failed: {e}, using fallback")
+        invoice_num = invoice.get("invoice_number", "N/A")
+        customer_name = invoice.get("customer", {}).get("name") if isinstance(invoice.get("customer"), dict) else invoice.get("customer_name", "Unknown")
+        total = invoice.get("total") or invoice.get("amount") or 0
+        currency = invoice.get("currency", "USD")
+
+        if currency == "KHR":
+            amount_str = f"{float(total):,.0f} KHR"
+        else:
+            amount_str = f"${float(total):.2f}"
+
+        content = f"Invoice: {invoice_num} | Customer: {customer_name} | Total: {amount_str}"
+        pdf_fallback = f"""%PDF-1.4
+1 0 obj << /Type /Catalog /Pages 2 0 R >> endobj
+2 0 obj << /Type /Pages /Kids [3 0 R] /Count 1 >> endobj
+3 0 obj << /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents 4 0 R /Resources << /Font << /F1 5 0 R >> >> >> endobj
+4 0 obj << /Length 100 >> stream
+BT /F1 12 Tf 50 700 Td ({content}) Tj ET
+endstream endobj
+5 0 obj << /Type /Font /Subtype /Type1 /BaseFont /Helvetica >> endobj
+xref 0 6
+0000000000 65535 f
+0000000009 00000 n
+0000000058 00000 n
+0000000115 00000 n
+0000000230 00000 n
+0000000380 00000 n
+trailer << /Size 6 /Root 1 0 R >>
+startxref 450
+%%EOF"""
+        return pdf_fallback.encode('latin-1')
+
+
+def build_invoices_xlsx(headers: Sequence[str], rows: List[Sequence[str]]) -> bytes:
+    """Invoice export workbook: styled header row, bordered cells, fitted columns, frozen header."""
+    from openpyxl import Workbook
+    from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
+    from openpyxl.utils import get_column_letter
+
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "Invoices"
+
+    header_font = Font(name="Calibri", bold=True, color="FFFFFF", size=11)
+    header_fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
+    header_alignment = Alignment(horizontal="center", vertical="center")
+    thin_border = Border(
+        left=Side(style="thin"), right=Side(style="thin"),
+        top=Side(style="thin"), bottom=Side(style="thin"),
+    )
+
+    for col_idx, header in enumerate(headers, 1):
+        cell = ws.cell(row=1, column=col_idx, value=header)
+        cell.font = header_font
+        cell.fill = header_fill
+        cell.alignment = header_alignment
+        cell.border = thin_border
+
+    widths = [len(header) for header in headers]
+    for row_idx, row in enumerate(rows, 2):
+        for col_idx, value in enumerate(row, 1):
+            cell = ws.cell(row=row_idx, column=col_idx, value=value)
+            cell.border = thin_border
+            widths[col_idx - 1] = max(widths[col_idx - 1], len(str(value or "")))
+
+    for col_idx, width in enumerate(widths, 1):
+        ws.column_dimensions[get_column_letter(col_idx)].width = min(width + 3, 40)
+
+    ws.freeze_panes = "A2"
+
+    buffer = BytesIO()
+    wb.save(buffer)
+    return buffer.getvalue()
@@ -0,0 +1,346 @@
+# app/core/ip_rules.py
+"""
+In-process snapshot of IP access rules for RateLimitMiddleware.
+
+The middleware used to open a DB session and run three queries (whitelist,
+blacklist, auto-ban) on every request. Instead, each worker keeps the active
+rules in memory and the hot path is a dict lookup (exact IPs) plus, when any
+CIDR rules exist, a walk down a binary prefix trie.
+
+- IPRuleSnapshot: immutable view of the rules; replaced wholesale on reload
+  so readers never need a lock. Expiry is checked at lookup time, so
+  temporary bans lapse without a reload. with_rule() copies only what the
+  new rule touches (one exact-address dict or one trie path).
+- IPRuleStore: owns the current snapshot. A background poller compares a
+  cheap version fingerprint (row count + latest created_at/updated_at) and
+  reloads only when it changes; the DB round trip and the rebuild happen
+  outside the lock, which is held only to swap snapshots. Rules added by
+  this worker (auto-bans, admin routes) are applied immediately and
+  re-applied to reloaded snapshots until the DB has them; other workers
+  pick them up on their next poll.
+"""
+import asyncio
+import ipaddress
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+import logging
+
+from app.core.models import IPRuleType
+
+logger = logging.getLogger(__name__)
+
+IPNetwork = Union[ipaddress.IPv4Network, ipaddress.IPv6Network]
+IPAddress = Union[ipaddress.IPv4Address, ipaddress.IPv6Address]
+_NETWORK_TYPES = (ipaddress.IPv4Network, ipaddress.IPv6Network)
+
+# Precedence when one address matches several rule types (same order the
+# middleware has always checked them in)
+RULE_PRECEDENCE = (IPRuleType.whitelist, IPRuleType.blacklist, IPRuleType.auto_banned)
+
+NEVER = float("inf")
+
+# Wait this long before retrying a failed initial load from the request path
+LOAD_RETRY_SECONDS = 5.0
+
+
+def _expiry_ts(expires_at: Optional[datetime]) -> float:
+    """Naive-UTC DB datetime -> epoch seconds (inf for permanent rules)"""
+    if expires_at is None:
+        return NEVER
+    if expires_at.tzinfo is None:
+        expires_at = expires_at.replace(tzinfo=timezone.utc)
+    return expires_at.timestamp()
+
+
+def parse_rule_target(value: str) -> Union[IPAddress, IPNetwork]:
+    """Parse a rule's ip_address column: a single address or a CIDR block"""
+    value = value.strip()
+    if "/" in value:
+        network = ipaddress.ip_network(value, strict=False)
+        if network.num_addresses == 1:
+            return network.network_address
+        return network
+    return ipaddress.ip_address(value)
+
+
+class CIDRTrie:
+    """
+    Binary prefix trie for one address family.
+
+    Each node is [zero_child, one_child, expiry]; expiry is the latest
+    expiry of any rule ending at that node. lookup returns the latest expiry
+    of every prefix containing the address, so overlapping rules of the
+    same type resolve to the one that lasts longest.
+    """
+    __slots__ = ("bits", "_root", "size")
+
+    def __init__(self, bits: int):
+        self.bits = bits
+        self._root: List = [None, None, None]
+        self.size = 0
+
+    def insert(self, network: IPNetwork, expiry: float) -> None:
+        node = self._root
+        address = int(network.network_address)
+        for depth in range(network.prefixlen):
+            bit = (address >> (self.bits - 1 - depth)) & 1
+            child = node[bit]
+            if child is None:
+                child = node[bit] = [None, None, None]
+            node = child
+        if node[2] is None:
+            self.size += 1
+            node[2] = expiry
+        else:
+            node[2] = max(node[2], expiry)
+
+    def inserted(self, network: IPNetwork, expiry: float) -> "CIDRTrie":
+        """Copy with one more prefix; only the nodes on its path are copied"""
+        trie = CIDRTrie(self.bits)
+        trie.size = self.size
+        node = trie._root = list(self._root)
+        address = int(network.network_address)
+        for depth in range(network.prefixlen):
+            bit = (address >> (self.bits - 1 - depth)) & 1
+            child = node[bit]
+            child = node[bit] = [None, None, None] if child is None else list(child)
+            node = child
+        if node[2] is None:
+            trie.size += 1
+            node[2] = expiry
+        else:
+            node[2] = max(node[2], expiry)
+        return trie
+
+    def lookup(self, address: int) -> Optional[float]:
+        node = self._root
+        best = node[2]
+        shift = self.bits - 1
+        while node is not None and shift >= 0:
+            node = node[(address >> shift) & 1]
+            shift -= 1
+            if node is not None and node[2] is not None and (best is None or node[2] > best):
+                best = node[2]
+        return best
+
+
+class _RuleSet:
+    """Exact addresses and CIDR tries for one rule type"""
+    __slots__ = ("exact", "v4", "v6")
+
+    def __init__(self):
+        self.exact: Dict[str, float] = {}
+        self.v4 = CIDRTrie(32)
+        self.v6 = CIDRTrie(128)
+
+    def add(self, target: Union[IPAddress, IPNetwork], expiry: float) -> None:
+        if isinstance(target, (ipaddress.IPv4Network, ipaddress.IPv6Network)):
+            (self.v4 if target.version == 4 else self.v6).insert(target, expiry)
+        else:
+            key = target.compressed
+            self.exact[key] = max(self.exact.get(key, expiry), expiry)
+
+    def added(self, target: Union[IPAddress, IPNetwork], expiry: float) -> "_RuleSet":
+        """Copy with one more rule, sharing whatever the rule does not touch"""
+        rules = _RuleSet.__new__(_RuleSet)
+        rules.exact, rules.v4, rules.v6 = self.exact, self.v4, self.v6
+        if isinstance(target, ipaddress.IPv4Network):
+            rules.v4 = self.v4.inserted(target, expiry)
+        elif isinstance(target, ipaddress.IPv6Network):
+            rules.v6 = self.v6.inserted(target, expiry)
+        else:
+            key = target.compressed
+            rules.exact = dict(self.exact)
+            rules.exact[key] = max(self.exact.get(key, expiry), expiry)
+        return rules
+
+    def lookup(self, raw: str, address: Optional[IPAddress]) -> Optional[float]:
+        expiry = self.exact.get(raw)
+        if address is None:
+            return expiry
+        if expiry is None and address.compressed != raw:
+            expiry = self.exact.get(address.compressed)
+        trie = self.v4 if address.version == 4 else self.v6
+        if trie.size:
+            from_trie = trie.lookup(int(address))
+            if from_trie is not None and (expiry is None or from_trie > expiry):
+                expiry = from_trie
+        return expiry
+
+
+class IPRuleSnapshot:
+    """Immutable, lock-free view of the active IP rules"""
+
+    def __init__(self, entries: Iterable[Tuple[str, IPRuleType, Optional[datetime]]] = (), version: Tuple = ()):
+        self.version = version
+        self.loaded_at = time.time()
+        self._count = 0
+        self._rules: Dict[IPRuleType, _RuleSet] = {rule_type: _RuleSet() for rule_type in RULE_PRECEDENCE}
+        self._has_networks = False
+        for ip_value, rule_type, expires_at in entries:
+            self._add(ip_value, rule_type, _expiry_ts(expires_at))
+
+    @property
+    def rule_count(self) -> int:
+        return self._count
+
+    @staticmethod
+    def _parse(ip_value: str) -> Optional[Union[IPAddress, IPNetwork]]:
+        try:
+            return parse_rule_target(ip_value)
+        except ValueError:
+            logger.warning(f"Ignoring IP rule with invalid address: {ip_value!r}")
+            return None
+
+    def _add(self, ip_value: str, rule_type: IPRuleType, expiry: float) -> None:
+        """Add in place; only while building a snapshot nobody reads yet"""
+        target = self._parse(ip_value)
+        if target is not None:
+            self._rules[IPRuleType(rule_type)].add(target, expiry)
+            self._count += 1
+            self._has_networks = self._has_networks or isinstance(target, _NETWORK_TYPES)
+
+    def with_rule(self, ip_value: str, rule_type: IPRuleType, expires_at: Optional[datetime]) -> "IPRuleSnapshot":
+        """Copy of this snapshot plus one rule (for changes made by this worker)"""
+        target = self._parse(ip_value)
+        if target is None:
+            return self
+        rule_type = IPRuleType(rule_type)
+        snapshot = IPRuleSnapshot(version=self.version)
+        snapshot._rules = dict(self._rules)
+        snapshot._rules[rule_type] = self._rules[rule_type].added(target, _expiry_ts(expires_at))
+        snapshot._count = self._count + 1
+        snapshot._has_networks = self._has_networks or isinstance(target, _NETWORK_TYPES)
+        return snapshot
+
+    def covers(self, ip_value: str, rule_type: IPRuleType, expiry: float) -> bool:
+        """Whether a rule_type rule for ip_value lasting until expiry is already in effect"""
+        try:
+            address = ipaddress.ip_address(ip_value)
+        except ValueError:
+            return False
+        found = self._rules[IPRuleType(rule_type)].lookup(address.compressed, address)
+        return found is not None and found >= expiry
+
+    def match(self, ip: str, now: Optional[float] = None) -> Tuple[Optional[IPRuleType], Optional[float]]:
+        """
+        Rule governing ip, by precedence whitelist > blacklist > auto_banned.
+
+        Returns (rule_type, expires_ts); (None, None) when no active rule
+        matches. expires_ts is inf for permanent rules.
+        """
+        now = now or time.time()
+        address = None
+        if self._has_networks or ":" in ip:
+            try:
+                address = ipaddress.ip_address(ip)
+            except ValueError:
+                address = None
+        for rule_type in RULE_PRECEDENCE:
+            expiry = self._rules[rule_type].lookup(ip, address)
+            if expiry is not None and expiry > now:
+                return rule_type, expiry
+        return None, None
+
+
+class IPRuleStore:
+    """
+    Holds the current IPRuleSnapshot for this worker and keeps it fresh.
+
+    Args:
+        session_factory: callable returning a DB session (SessionLocal)
+    """
+
+    def __init__(self, session_factory=None):
+        self._session_factory = session_factory
+        # Held only to swap snapshots, never across DB I/O
+        self._lock = threading.Lock()
+        self.snapshot = IPRuleSnapshot()
+        # Rules from add_local(), re-applied to reloads until the DB has them
+        self._local_rules: List[Tuple[str, IPRuleType, float]] = []
+        self.loaded = False
+        self._next_load_attempt = 0.0
+        self.stats = {'reloads': 0, 'polls': 0, 'errors': 0}
+
+    def _session(self):
+        if self._session_factory is None:
+            from app.core.db import SessionLocal
+            self._session_factory = SessionLocal
+        return self._session_factory()
+
+    def refresh(self, force: bool = False) -> bool:
+        """
+        Reload rules if the table's version fingerprint changed.
+        Returns True when a new snapshot was installed; errors keep the old one.
+        """
+        from app.repositories.ip_access import IPAccessRepository
+
+        self.stats['polls'] += 1
+        try:
+            with self._session() as session:
+                repo = IPAccessRepository(session)
+                version = repo.get_rules_version()
+                if self.loaded and not force and version == self.snapshot.version:
+                    return False
+                snapshot = IPRuleSnapshot(repo.get_active_rule_entries(), version=version)
+        except Exception as e:
+            self.stats['errors'] += 1
+            self._next_load_attempt = time.time() + LOAD_RETRY_SECONDS
+            logger.error(f"Failed to load IP access rules: {e}")
+            return False
+
+        with self._lock:
+            self._apply_local_rules(snapshot)
+            self.snapshot = snapshot
+            self.loaded = True
+            self.stats['reloads'] += 1
+        logger.debug(f"Loaded {snapshot.rule_count} IP access rules")
+        return True
+
+    def _apply_local_rules(self, snapshot: IPRuleSnapshot) -> None:
+        """Add local rules the loaded rows don't cover yet (lock held; snapshot not yet published)"""
+        now = time.time()
+        pending = []
+        for ip, rule_type, expiry in self._local_rules:
+            if expiry > now and not snapshot.covers(ip, rule_type, expiry):
+                snapshot._add(ip, rule_type, expiry)
+                pending.append((ip, rule_type, expiry))
+        self._local_rules = pending
+
+    def add_local(self, ip: str, rule_type: IPRuleType, expires_at: Optional[datetime] = None) -> None:
+        """Apply a rule this worker just wrote, without waiting for the next poll"""
+        with self._lock:
+            self._local_rules.append((ip, IPRuleType(rule_type), _expiry_ts(expires_at)))
+            self.snapshot = self.snapshot.with_rule(ip, rule_type, expires_at)
+
+    def match(self, ip: str) -> Tuple[Optional[IPRuleType], Optional[float]]:
+        return self.snapshot.match(ip)
+
+    async def ensure_loaded(self) -> None:
+        """First-request fallback when the startup load failed (throttled retries)"""
+        if self.loaded or time.time() < self._next_load_attempt:
+            return
+        self._next_load_attempt = time.time() + LOAD_RETRY_SECONDS
+        await asyncio.to_thread(self.refresh)
+
+    async def run(self, interval: int) -> None:
+        """Background poller: one fingerprint query per interval"""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await asyncio.to_thread(self.refresh)
+            except Exception as e:
+                logger.error(f"IP rule refresh failed: {e}")
+
+    def get_stats(self) -> Dict:
+        return {
+            **self.stats,
+            'loaded': self.loaded,
+            'rules': self.snapshot.rule_count,
+            'age_seconds': round(time.time() - self.snapshot.loaded_at, 1),
+        }
+
+
+ip_rule_store = IPRuleStore()
@@ -0,0 +1,290 @@
+# app/core/platform_rate_limit.py
+"""
+Shared (cross-worker) rate limiting for outbound Facebook and TikTok calls.
+
+The limiters in app.core.rate_limit keep state per process, so N API
+workers plus the schedulers each spend the full quota. These limiters keep
+their state in Redis through RateLimitStore (GCRA Lua script, in-memory
+twin when Redis is not configured) and are keyed per access token and per
+ad account, the units Meta actually meters.
+
+On top of the fixed rate, PlatformRateLimiter backs off adaptively:
+- Meta reports quota use in X-App-Usage, X-Business-Use-Case-Usage and
+  X-Ad-Account-Usage (percentages, plus estimated_time_to_regain_access in
+  minutes). Above SLOWDOWN_PCT each call costs more GCRA units; at
+  PAUSE_PCT, or when Meta names a regain time, calls pause until then.
+- HTTP 429 (both platforms) pauses for Retry-After.
+The backoff is stored next to the limiter state, so one worker seeing a
+warning slows every worker down.
+
+Calls can wait for a slot (wait / wait_sync) instead of failing. The async
+side (wait, aobserve) runs its Redis round trips in a worker thread, and
+wait_sync never sleeps on an event loop thread: there it raises
+PlatformRateLimited at once instead of stalling every request on the loop.
+"""
+import asyncio
+import hashlib
+import json
+import threading
+import time
+from typing import Dict, Mapping, Optional, Tuple
+import logging
+
+from app.core.rate_limit_store import RateLimitResult, RateLimitStore
+
+logger = logging.getLogger(__name__)
+
+# Usage percentages that trigger a slowdown / a full pause
+SLOWDOWN_PCT = 75
+PAUSE_PCT = 95
+# Pause when Meta reports >= PAUSE_PCT without a regain estimate
+DEFAULT_PAUSE_SECONDS = 60
+# Backoff state is re-read from the shared store at most this often per key
+BACKOFF_CACHE_SECONDS = 1.0
+
+USAGE_HEADERS = ("x-app-usage", "x-business-use-case-usage", "x-ad-account-usage")
+
+
+class PlatformRateLimited(Exception):
+    """No slot became available within the caller's timeout"""
+
+    def __init__(self, platform: str, key: str, retry_after: float):
+        super().__init__(f"{platform} rate limit for {key}: retry in {retry_after:.1f}s")
+        self.platform = platform
+        self.key = key
+        self.retry_after = retry_after
+
+
+def token_key(access_token: str) -> str:
+    """Stable limiter key for an access token (the token itself is never stored)"""
+    return "tok:" + hashlib.sha1(access_token.encode()).hexdigest()[:16]
+
+
+def parse_usage_headers(headers: Mapping[str, str]) -> Tuple[float, float]:
+    """
+    Highest usage percentage and longest regain time (seconds) across Meta's usage headers.
+
+    X-App-Usage / X-Ad-Account-Usage are flat objects; X-Business-Use-Case-Usage
+    maps business ids to lists of per-use-case objects.
+    """
+    highest, regain = 0.0, 0.0
+
+    def visit(obj):
+        nonlocal highest, regain
+        if isinstance(obj, list):
+            for item in obj:
+                visit(item)
+        elif isinstance(obj, dict):
+            for name, value in obj.items():
+                if isinstance(value, (dict, list)):
+                    visit(value)
+                elif not isinstance(value, (int, float)):
+                    continue
+                elif name == "estimated_time_to_regain_access":
+                    regain = max(regain, value * 60)
+                elif name == "reset_time_duration":
+                    continue
+                elif name in ("call_count", "total_cputime", "total_time", "acc_id_util_pct"):
+                    highest = max(highest, float(value))
+
+    for header in USAGE_HEADERS:
+        raw = headers.get(header)
+        if not raw:
+            continue
+        try:
+            visit(json.loads(raw))
+        except ValueError:
+            logger.debug(f"Unparseable {header} header: {raw!r}")
+    return highest, regain
+
+
+class PlatformRateLimiter:
+    """
+    GCRA limiter shared by every worker, with usage-driven backoff.
+
+    Args:
+        platform: name used in store keys and errors ("facebook", "tiktok")
+        max_requests: requests per time_window per key
+        time_window: seconds
+        burst_size: requests allowed back-to-back (defaults to max_requests)
+        store: RateLimitStore; defaults to one on REDIS_URL
+    """
+
+    def __init__(
+        self,
+        platform: str,
+        max_requests: int,
+        time_window: float,
+        burst_size: Optional[int] = None,
+        store: Optional[RateLimitStore] = None,
+    ):
+        self.platform = platform
+        self.max_requests = max_requests
+        self.time_window = time_window
+        self.burst_size = burst_size
+        self._store = store
+        self._memory_backoff: Dict[str, Tuple[float, int]] = {}
+        self._backoff_cache: Dict[str, Tuple[float, Tuple[float, int]]] = {}
+        self._lock = threading.Lock()
+        self.stats = {'acquired': 0, 'waits': 0, 'paused': 0, 'slowed': 0}
+
+    @property
+    def store(self) -> RateLimitStore:
+        if self._store is None:
+            from app.core.config import get_settings
+            self._store = RateLimitStore(redis_url=get_settings().REDIS_URL)
+        return self._store
+
+    def _backoff_key(self, key: str) -> str:
+        return f"platform:{self.platform}:backoff:{key}"
+
+    # -- backoff state ------------------------------------------------------
+
+    def _get_backoff(self, key: str) -> Tuple[float, int]:
+        """(paused until epoch seconds, GCRA cost per call) for key"""
+        now = time.time()
+        cached = self._backoff_cache.get(key)
+        if cached is not None and cached[0] > now:
+            return cached[1]
+
+        state = (0.0, 1)
+        redis_client = self.store.redis_client
+        if redis_client is not None:
+            try:
+                raw = redis_client.get(self._backoff_key(key))
+                if raw:
+                    until, cost = raw.split("|")
+                    state = (float(until), int(cost))
+            except Exception as e:
+                logger.warning(f"Could not read {self.platform} backoff state: {e}")
+        else:
+            with self._lock:
+                state = self._memory_backoff.get(key, state)
+
+        self._backoff_cache[key] = (now + BACKOFF_CACHE_SECONDS, state)
+        return state
+
+    def _set_backoff(self, key: str, until: float, cost: int, ttl: float) -> None:
+        state = (until, cost)
+        self._backoff_cache[key] = (time.time() + BACKOFF_CACHE_SECONDS, state)
+        redis_client = self.store.redis_client
+        if redis_client is not None:
+            try:
+                redis_client.set(self._backoff_key(key), f"{until}|{cost}", px=max(1, int(ttl * 1000)))
+                return
+            except Exception as e:
+                logger.warning(f"Could not store {self.platform} backoff state: {e}")
+        with self._lock:
+            self._memory_backoff[key] = state
+
+    def pause(self, key: str, seconds: float) -> None:
+        """Stop all workers calling with key for seconds"""
+        self.stats['paused'] += 1
+        logger.warning(f"{self.platform} calls for {key} paused for {seconds:.0f}s")
+        self._set_backoff(key, time.time() + seconds, 1, seconds)
+
+    def observe(self, key: str, status_code: int, headers: Mapping[str, str]) -> None:
+        """Feed a response back into the limiter (usage headers, 429 Retry-After)"""
+        if status_code == 429:
+            try:
+                retry_after = float(headers.get("retry-after") or DEFAULT_PAUSE_SECONDS)
+            except ValueError:
+                retry_after = DEFAULT_PAUSE_SECONDS
+            self.pause(key, retry_after)
+            return
+
+        usage, regain = parse_usage_headers(headers)
+        if regain > 0 or usage >= PAUSE_PCT:
+            self.pause(key, regain or DEFAULT_PAUSE_SECONDS)
+        elif usage >= SLOWDOWN_PCT:
+            # 75% -> 2x cost, 85% -> 3x, up to 4x just below the pause threshold
+            cost = 2 + int((usage - SLOWDOWN_PCT) // 10)
+            self.stats['slowed'] += 1
+            self._set_backoff(key, 0.0, cost, self.time_window)
+        elif self._get_backoff(key)[1] > 1:
+            self._set_backoff(key, 0.0, 1, self.time_window)
+
+    async def aobserve(self, key: str, status_code: int, headers: Mapping[str, str]) -> None:
+        """observe() for async callers; backoff writes run off the event loop"""
+        await self._off_loop(self.observe, key, status_code, headers)
+
+    async def _off_loop(self, fn, *args):
+        """Run fn in a worker thread when it would do Redis I/O, inline otherwise"""
+        if self.store.redis_client is None:
+            return fn(*args)
+        return await asyncio.to_thread(fn, *args)
+
+    # -- acquiring ----------------------------------------------------------
+
+    def try_acquire(self, key: str) -> RateLimitResult:
+        """One non-blocking attempt; the result's retry_after says how long to wait"""
+        paused_until, cost = self._get_backoff(key)
+        now = time.time()
+        if paused_until > now:
+            return RateLimitResult(False, self.max_requests, 0, paused_until - now, paused_until - now)
+
+        result = self.store.hit(
+            f"platform:{self.platform}:{key}", self.max_requests, self.time_window,
+            burst=self.burst_size, cost=cost,
+        )
+        if result.allowed:
+            self.stats['acquired'] += 1
+        return result
+
+    async def wait(self, *keys: str, timeout: Optional[float] = None) -> None:
+        """Await a slot for every key (e.g. token and ad account)"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for key in keys:
+            while True:
+                result = await self._off_loop(self.try_acquire, key)
+                if result.allowed:
+                    break
+                delay = self._delay(key, result, deadline)
+                self.stats['waits'] += 1
+                await asyncio.sleep(delay)
+
+    def wait_sync(self, *keys: str, timeout: Optional[float] = None) -> None:
+        """
+        Blocking wait for synchronous clients.
+
+        Called from an event loop thread (a sync client used inside a
+        coroutine) it never sleeps: a missing slot raises PlatformRateLimited
+        immediately so the caller can defer the work.
+        """
+        try:
+            asyncio.get_running_loop()
+            timeout = 0.0
+        except RuntimeError:
+            pass
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for key in keys:
+            while True:
+                result = self.try_acquire(key)
+                if result.allowed:
+                    break
+                delay = self._delay(key, result, deadline)
+                self.stats['waits'] += 1
+                time.sleep(delay)
+
+    def _delay(self, key: str, result: RateLimitResult, deadline: Optional[float]) -> float:
+        delay = max(result.retry_after, 0.01)
+        if deadline is not None and time.monotonic() + delay > deadline:
+            raise PlatformRateLimited(self.platform, key, result.retry_after)
+        return delay
+
+
+_limiters: Dict[str, PlatformRateLimiter] = {}
+
+# Same budgets as PlatformRateLimiters, now per key and shared by all workers
+PLATFORM_LIMITS = {
+    "facebook": dict(max_requests=200, time_window=3600, burst_size=10),
+    "tiktok": dict(max_requests=100, time_window=60, burst_size=10),
+}
+
+
+def get_platform_limiter(platform: str) -> PlatformRateLimiter:
+    """Process-wide limiter for "facebook" or "tiktok" """
+    limiter = _limiters.get(platform)
+    if limiter is None:
+        limiter = _limiters[platform] = PlatformRateLimiter(platform, **PLATFORM_LIMITS[platform])
+    return limiter
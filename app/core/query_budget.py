@@ -0,0 +1,151 @@
+# app/core/query_budget.py
+"""
+Per-request / per-job query budgets and N+1 detection.
+
+Counts the statements executed inside a budget scope and how often each
+statement fingerprint repeats. A fingerprint executed once per item in a
+loop (e.g. one get_by_id per target chat) shows up as a high repeat count.
+When a scope ends over budget, the violation is logged and kept for
+/db/performance, or raised as QueryBudgetExceeded when configured (tests/CI).
+
+Usage:
+    with query_budget("ads_alert_scheduler.process_scheduled_promotions"):
+        ...
+
+    # In tests - fail on any N+1:
+    with query_budget("list chats", max_statements=5, max_repeats=2, raise_on_violation=True):
+        client.get("/api/ads-alert/chats")
+"""
+import logging
+import threading
+from collections import Counter, deque
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Any, Deque, Dict, Generator, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import get_settings
+from app.core.db_monitor import fingerprint_sql
+
+logger = logging.getLogger(__name__)
+
+_active_budget: ContextVar[Optional["QueryBudget"]] = ContextVar("query_budget", default=None)
+_recent_violations: Deque[Dict[str, Any]] = deque(maxlen=50)
+_violations_lock = threading.Lock()
+
+
+class QueryBudgetExceeded(RuntimeError):
+    """A request or job issued more statements than its budget allows"""
+
+    def __init__(self, report: Dict[str, Any]):
+        self.report = report
+        super().__init__(
+            f"Query budget exceeded for {report['name']}: "
+            f"{report['statements']} statements, repeated: {report['repeated']}"
+        )
+
+
+class QueryBudget:
+    """Statement counter for one request or job"""
+
+    def __init__(self, name: str, max_statements: int, max_repeats: int):
+        self.name = name
+        self.max_statements = max_statements
+        self.max_repeats = max_repeats
+        self.statements = 0
+        self._fingerprints: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def record(self, statement: str) -> None:
+        fingerprint = fingerprint_sql(statement)
+        with self._lock:
+            self.statements += 1
+            self._fingerprints[fingerprint] += 1
+
+    def repeated(self) -> List[Dict[str, Any]]:
+        """Fingerprints executed more than max_repeats times, most repeated first"""
+        with self._lock:
+            return [
+                {"fingerprint": fingerprint, "count": count}
+                for fingerprint, count in self._fingerprints.most_common()
+                if count > self.max_repeats
+            ]
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "statements": self.statements,
+            "max_statements": self.max_statements,
+            "max_repeats": self.max_repeats,
+            "repeated": self.repeated(),
+            "timestamp": datetime.utcnow().isoformat(),
+        }
+
+    @property
+    def exceeded(self) -> bool:
+        return self.statements > self.max_statements or bool(self.repeated())
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _count_statement(conn, cursor, statement, parameters, context, executemany):
+    budget = _active_budget.get()
+    if budget is not None:
+        budget.record(statement)
+
+
+@contextmanager
+def query_budget(
+    name: str,
+    max_statements: Optional[int] = None,
+    max_repeats: Optional[int] = None,
+    raise_on_violation: Optional[bool] = None,
+) -> Generator[QueryBudget, None, None]:
+    """
+    Count statements issued inside the block and check them against a budget.
+
+    Limits default to QUERY_BUDGET_MAX_STATEMENTS / QUERY_BUDGET_MAX_REPEATS and
+    the action to QUERY_BUDGET_RAISE. Nested scopes count independently; the
+    inner scope's statements are not added to the outer one.
+    """
+    settings = get_settings()
+    budget = QueryBudget(
+        name=name,
+        max_statements=max_statements or settings.QUERY_BUDGET_MAX_STATEMENTS,
+        max_repeats=max_repeats or settings.QUERY_BUDGET_MAX_REPEATS,
+    )
+    should_raise = settings.QUERY_BUDGET_RAISE if raise_on_violation is None else raise_on_violation
+
+    token = _active_budget.set(budget)
+    try:
+        yield budget
+    finally:
+        _active_budget.reset(token)
+
+    if budget.exceeded:
+        report = budget.report()
+        with _violations_lock:
+            _recent_violations.append(report)
+        if should_raise:
+            raise QueryBudgetExceeded(report)
+        top = report["repeated"][0] if report["repeated"] else None
+        logger.warning(
+            f"Query budget exceeded in {name}: {budget.statements} statements "
+            f"(budget {budget.max_statements})"
+            + (f", N+1 suspect x{top['count']}: {top['fingerprint'][:200]}" if top else "")
+        )
+
+
+def job_query_budget(name: str):
+    """query_budget for background jobs when QUERY_BUDGET_ENABLED, otherwise a no-op"""
+    if get_settings().QUERY_BUDGET_ENABLED:
+        return query_budget(name)
+    return nullcontext()
+
+
+def get_recent_violations(limit: int = 20) -> List[Dict[str, Any]]:
+    """Most recent budget violations, newest first"""
+    with _violations_lock:
+        return list(_recent_violations)[-limit:][::-1]
@@ -4,6 +4,9 @@ Rate limiting utilities for API calls to external services.
 
 Provides both token bucket and sliding window rate limiters to prevent
 exceeding API rate limits for Facebook, TikTok, and other third-party services.
+
+These limiters are per process. The Facebook and TikTok API clients use the
+shared, per-token limiters in app.core.platform_rate_limit instead.
 """
 from __future__ import annotations
 import asyncio
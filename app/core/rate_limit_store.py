@@ -1,11 +1,81 @@
 # app/core/rate_limit_store.py
 """
 Rate limit counter storage with Redis fallback to in-memory
+
+Two limiters share one store:
+- hit() / ahit(): GCRA (generic cell rate algorithm). One Lua script does
+  the whole check-and-update atomically in Redis using the server clock, so
+  every worker sees the same state; an in-memory twin with identical integer
+  arithmetic serves Redis-less deployments and tests. Unlike a fixed
+  window it never admits 2x the limit across a window boundary, and it
+  reports remaining/reset values for X-RateLimit-* headers. ahit() runs the
+  script on a redis.asyncio client so middleware never blocks the loop.
+- increment(): the original fixed-window counter, kept for existing callers.
 """
+import heapq
+import logging
 import time
-from typing import Optional, Dict, Tuple
+from dataclasses import dataclass
+from typing import Optional, Dict, List, Tuple
 from threading import Lock
 
+logger = logging.getLogger(__name__)
+
+US = 1_000_000
+
+# KEYS[1] = limiter key
+# ARGV = emission interval (us), burst tolerance (us), cost
+# Returns {allowed, remaining, retry_after_us, reset_after_us}
+# Keep the arithmetic in step with gcra_step() below.
+GCRA_SCRIPT = """
+if redis.replicate_commands then redis.replicate_commands() end
+local emission = tonumber(ARGV[1])
+local tolerance = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) * 1000000 + tonumber(clock[2])
+local tat = tonumber(redis.call('GET', KEYS[1]) or now)
+if tat < now then tat = now end
+local new_tat = tat + emission * cost
+local diff = now - (new_tat - tolerance)
+if diff < 0 then
+  return {0, 0, -diff, tat - now}
+end
+redis.call('SET', KEYS[1], string.format('%.0f', new_tat), 'PX', math.ceil((new_tat - now) / 1000))
+return {1, math.floor(diff / emission), 0, new_tat - now}
+"""
+
+
+@dataclass(frozen=True)
+class RateLimitResult:
+    """Outcome of one GCRA check"""
+    allowed: bool
+    limit: int
+    remaining: int
+    retry_after: float  # seconds until a request would be allowed (0 when allowed)
+    reset_after: float  # seconds until the full burst is available again
+
+
+def gcra_step(tat: Optional[int], now: int, emission: int, tolerance: int, cost: int = 1) -> Tuple[bool, int, int, int, Optional[int]]:
+    """
+    One GCRA decision in integer microseconds (mirrors GCRA_SCRIPT).
+
+    Args:
+        tat: stored theoretical arrival time, None for an unseen key
+        now: current time
+        emission: interval between requests at the sustained rate
+        tolerance: emission * burst
+
+    Returns:
+        (allowed, remaining, retry_after, reset_after, new_tat); new_tat is None when denied
+    """
+    tat = now if tat is None or tat < now else tat
+    new_tat = tat + emission * cost
+    diff = now - (new_tat - tolerance)
+    if diff < 0:
+        return False, 0, -diff, tat - now, None
+    return True, diff // emission, 0, new_tat - now, new_tat
+
 
 class RateLimitStore:
     """
@@ -25,19 +95,104 @@ class RateLimitStore:
         self.redis_client = None
         self._memory_store: Dict[str, Tuple[int, float]] = {}  # key -> (count, expiry_time)
         self._lock = Lock()
+        # GCRA twin: key -> theoretical arrival time (us), plus a lazy (tat, key) expiry heap
+        self._gcra_tat: Dict[str, int] = {}
+        self._gcra_expiry: List[Tuple[int, str]] = []
+        self._gcra_script = None
+        # Async twin of redis_client for ahit(), used from ASGI middleware
+        self.async_client = None
+        self._async_gcra_script = None
 
         # Try to connect to Redis if URL provided
         if redis_url:
             try:
                 import redis.asyncio as aioredis
-                # We'll use sync Redis for simplicity in middleware
                 import redis
                 self.redis_client = redis.from_url(redis_url, decode_responses=True)
                 # Test connection
                 self.redis_client.ping()
+                self._gcra_script = self.redis_client.register_script(GCRA_SCRIPT)
+                # Load once up front so neither client starts with a NOSCRIPT round trip
+                self.redis_client.script_load(GCRA_SCRIPT)
+                self.async_client = aioredis.from_url(redis_url, decode_responses=True)
+                self._async_gcra_script = self.async_client.register_script(GCRA_SCRIPT)
             except Exception as e:
                 print(f"[RateLimitStore] Failed to connect to Redis: {e}, falling back to in-memory")
                 self.redis_client = None
+                self.async_client = None
+
+    def hit(self, key: str, limit: int, period: float = 60, burst: Optional[int] = None, cost: int = 1) -> RateLimitResult:
+        """
+        Count one request against a GCRA limit
+
+        Args:
+            key: Unique identifier (usually IP address)
+            limit: Requests allowed per period at the sustained rate
+            period: Period in seconds (default: 60)
+            burst: Requests allowed back-to-back (defaults to limit)
+            cost: Units this request consumes
+
+        Returns:
+            RateLimitResult with allowed flag and header values
+        """
+        emission, tolerance = self._gcra_params(limit, period, burst)
+
+        if self.redis_client:
+            try:
+                reply = self._gcra_script(keys=[f"rate_limit:gcra:{key}"], args=[emission, tolerance, cost])
+                return self._result(limit, *reply)
+            except Exception as e:
+                logger.warning(f"GCRA script failed, using in-memory limiter: {e}")
+
+        return self._result(limit, *self._hit_memory(key, emission, tolerance, cost))
+
+    async def ahit(self, key: str, limit: int, period: float = 60, burst: Optional[int] = None, cost: int = 1) -> RateLimitResult:
+        """
+        hit() for async callers: awaits the GCRA script on the redis.asyncio
+        client instead of blocking the event loop on a sync EVALSHA.
+        Same arguments, result and in-memory fallback as hit().
+        """
+        emission, tolerance = self._gcra_params(limit, period, burst)
+
+        if self.async_client:
+            try:
+                reply = await self._async_gcra_script(keys=[f"rate_limit:gcra:{key}"], args=[emission, tolerance, cost])
+                return self._result(limit, *reply)
+            except Exception as e:
+                logger.warning(f"GCRA script failed, using in-memory limiter: {e}")
+
+        return self._result(limit, *self._hit_memory(key, emission, tolerance, cost))
+
+    @staticmethod
+    def _gcra_params(limit: int, period: float, burst: Optional[int]) -> Tuple[int, int]:
+        """(emission interval, burst tolerance) in microseconds"""
+        emission = max(1, int(period * US / limit))
+        return emission, emission * (burst or limit)
+
+    @staticmethod
+    def _result(limit: int, allowed, remaining, retry_us, reset_us) -> RateLimitResult:
+        return RateLimitResult(bool(allowed), limit, int(remaining), retry_us / US, reset_us / US)
+
+    def _hit_memory(self, key: str, emission: int, tolerance: int, cost: int) -> Tuple[bool, int, int, int]:
+        """In-memory GCRA; expired keys are dropped from the heap head, never by a full sweep"""
+        now = time.time_ns() // 1000
+        with self._lock:
+            while self._gcra_expiry and self._gcra_expiry[0][0] <= now:
+                expires, stale_key = heapq.heappop(self._gcra_expiry)
+                # Skip heap items superseded by a later update
+                if self._gcra_tat.get(stale_key) == expires:
+                    del self._gcra_tat[stale_key]
+
+            allowed, remaining, retry_us, reset_us, new_tat = gcra_step(
+                self._gcra_tat.get(key), now, emission, tolerance, cost
+            )
+            if new_tat is not None:
+                self._gcra_tat[key] = new_tat
+                heapq.heappush(self._gcra_expiry, (new_tat, key))
+                if len(self._gcra_expiry) > 2 * len(self._gcra_tat) + 64:
+                    self._gcra_expiry = [(tat, k) for k, tat in self._gcra_tat.items()]
+                    heapq.heapify(self._gcra_expiry)
+            return allowed, remaining, retry_us, reset_us
 
     def increment(self, key: str, window: int = 60) -> int:
         """
@@ -97,7 +252,7 @@ class RateLimitStore:
 
     def _reset_redis(self, key: str):
         """Reset counter in Redis"""
-        self.redis_client.delete(f"rate_limit:{key}")
+        self.redis_client.delete(f"rate_limit:{key}", f"rate_limit:gcra:{key}")
 
     def _increment_memory(self, key: str, window: int) -> int:
         """Increment using in-memory store"""
@@ -142,6 +297,7 @@ class RateLimitStore:
         with self._lock:
             if key in self._memory_store:
                 del self._memory_store[key]
+            self._gcra_tat.pop(key, None)
 
     def _cleanup_expired(self):
         """Clean up expired entries from memory store (called with lock held)"""
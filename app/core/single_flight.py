@@ -0,0 +1,163 @@
+# app/core/single_flight.py
+"""
+Cache stampede protection shared by @cached (sync) and cached_method (async).
+
+- SingleFlight / AsyncSingleFlight: per-key request coalescing. The first
+  caller for a missing key computes it; concurrent callers wait for that
+  result instead of hitting the database too.
+- Stamped: cache envelope recording when a value stops being fresh and how
+  long it took to compute, for stale-while-revalidate and early refresh.
+- should_refresh_early: probabilistic early expiration ("XFetch"), so one
+  caller refreshes a hot key shortly before it expires instead of all
+  callers at the moment it does.
+
+Refreshes always run on the caller that wins the flight (its own thread,
+task and DB session); nothing is recomputed on a detached background task.
+"""
+import asyncio
+import math
+import random
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, TypeVar
+import logging
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+# Followers stop waiting for a stuck leader after this long and compute themselves
+DEFAULT_WAIT_TIMEOUT = 30.0
+
+
+class Stamped:
+    """Cached value plus freshness metadata"""
+    __slots__ = ("value", "fresh_until", "compute_time")
+
+    def __init__(self, value: Any, fresh_until: float, compute_time: float):
+        self.value = value
+        self.fresh_until = fresh_until
+        self.compute_time = compute_time
+
+    def __getstate__(self):
+        return (self.value, self.fresh_until, self.compute_time)
+
+    def __setstate__(self, state):
+        self.value, self.fresh_until, self.compute_time = state
+
+    def is_fresh(self, now: Optional[float] = None) -> bool:
+        return (now or time.time()) < self.fresh_until
+
+
+def should_refresh_early(entry: Stamped, beta: float, now: Optional[float] = None) -> bool:
+    """
+    XFetch: refresh with probability rising towards fresh_until, scaled by
+    how expensive the value is to compute. beta=0 disables; 1.0 is the usual setting.
+    """
+    if beta <= 0:
+        return False
+    now = now or time.time()
+    return now - entry.compute_time * beta * math.log(1.0 - random.random()) >= entry.fresh_until
+
+
+class _Call:
+    __slots__ = ("event", "result", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """Thread-level request coalescing keyed by cache key"""
+
+    def __init__(self, wait_timeout: float = DEFAULT_WAIT_TIMEOUT):
+        self.wait_timeout = wait_timeout
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _Call] = {}
+        self.stats = {'leaders': 0, 'coalesced': 0, 'timeouts': 0}
+
+    def in_flight(self, key: str) -> bool:
+        return key in self._calls
+
+    def do(self, key: str, fn: Callable[[], T]) -> Tuple[T, bool]:
+        """
+        Run fn once for all concurrent callers of key.
+        Returns (result, is_leader); the leader's exception is re-raised for everyone.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.stats['leaders'] += 1
+            else:
+                self.stats['coalesced'] += 1
+
+        if not leader:
+            if not call.event.wait(self.wait_timeout):
+                self.stats['timeouts'] += 1
+                logger.warning(f"Single-flight wait timed out for {key}, computing locally")
+                return fn(), False
+            if call.error is not None:
+                raise call.error
+            return call.result, False
+
+        try:
+            call.result = fn()
+            return call.result, True
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.event.set()
+
+
+class AsyncSingleFlight:
+    """Coroutine-level request coalescing keyed by cache key (one event loop)"""
+
+    def __init__(self, wait_timeout: float = DEFAULT_WAIT_TIMEOUT):
+        self.wait_timeout = wait_timeout
+        self._calls: Dict[str, asyncio.Future] = {}
+        self.stats = {'leaders': 0, 'coalesced': 0, 'timeouts': 0}
+
+    def in_flight(self, key: str) -> bool:
+        return key in self._calls
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> Tuple[T, bool]:
+        """Async counterpart of SingleFlight.do"""
+        future = self._calls.get(key)
+        if future is not None:
+            self.stats['coalesced'] += 1
+            try:
+                return await asyncio.wait_for(asyncio.shield(future), self.wait_timeout), False
+            except asyncio.TimeoutError:
+                self.stats['timeouts'] += 1
+                logger.warning(f"Single-flight wait timed out for {key}, computing locally")
+                return await fn(), False
+            except asyncio.CancelledError:
+                # Leader was cancelled (e.g. client disconnected); we were not
+                if future.cancelled() and not asyncio.current_task().cancelling():
+                    return await fn(), False
+                raise
+
+        future = asyncio.get_running_loop().create_future()
+        self._calls[key] = future
+        self.stats['leaders'] += 1
+        try:
+            result = await fn()
+            future.set_result(result)
+            return result, True
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark retrieved so an unawaited failure doesn't log "exception never retrieved"
+            future.exception()
+            raise
+        finally:
+            self._calls.pop(key, None)
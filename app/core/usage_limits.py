@@ -1,11 +1,12 @@
 """Usage limits and fair usage policy enforcement"""
 from datetime import datetime, timezone, timedelta
-from typing import Dict, Optional
+from typing import Dict, Optional, Union
 from uuid import UUID
 
 from fastapi import HTTPException, status
 from sqlalchemy import text
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.models import Tenant, SubscriptionTier, Subscription, User, UserRole
 
@@ -225,8 +226,15 @@ async def check_team_member_limit(tenant_id: UUID, db: Session) -> None:
         )
 
 
-async def check_export_limit(tenant_id: UUID, db: Session) -> None:
+async def check_export_limit(tenant_id: UUID, db: Union[Session, AsyncSession]) -> None:
     """Check if tenant can export (PDF/XLSX)"""
+    if isinstance(db, AsyncSession):
+        await db.run_sync(lambda sync_db: _enforce_export_limit(tenant_id, sync_db))
+    else:
+        _enforce_export_limit(tenant_id, db)
+
+
+def _enforce_export_limit(tenant_id: UUID, db: Session) -> None:
     tenant = db.query(Tenant).filter(Tenant.id == tenant_id).first()
     if not tenant:
         raise HTTPException(status_code=404, detail="Tenant not found")
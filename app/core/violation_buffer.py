@@ -0,0 +1,177 @@
+# app/core/violation_buffer.py
+"""
+Write-behind buffer for rate limit violations and auto-bans.
+
+RateLimitMiddleware used to write each violation, re-count the last hour
+and possibly insert a ban inside the request, so an attack turned straight
+into a database write storm. Now the middleware only touches memory:
+
+- record() aggregates violations per (ip, endpoint) and decides auto-bans
+  from an in-memory sliding window per IP (the last `threshold` violation
+  times), so the decision is O(1) and needs no query.
+- flush() runs on an interval off the request path and writes everything
+  accumulated since the last flush in one transaction, then persists any
+  pending bans. Failed flushes are merged back and retried.
+
+Counters are per worker: with N workers an IP can collect up to
+N * threshold violations before every worker has banned it locally, but
+the first worker to ban it persists the rule and the others pick it up on
+their next IP rule poll (app.core.ip_rules).
+"""
+import asyncio
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Callable, Deque, Dict, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+# RateLimitViolation.endpoint column length
+MAX_ENDPOINT_LENGTH = 500
+
+# Cap on distinct (ip, endpoint) pairs held between flushes; a distributed
+# flood beyond this is counted in stats and logged instead of growing memory
+MAX_PENDING_KEYS = 50_000
+
+BAN_WINDOW_SECONDS = 3600
+
+
+class ViolationBuffer:
+    """
+    Aggregates violations in memory and persists them in batches.
+
+    Args:
+        session_factory: callable returning a DB session (SessionLocal)
+    """
+
+    def __init__(self, session_factory: Optional[Callable] = None):
+        self._session_factory = session_factory
+        self._lock = threading.Lock()
+        # (ip, endpoint) -> [count, last violation (naive UTC)]
+        self._pending: Dict[Tuple[str, str], list] = {}
+        # ip -> (violations in window at ban time, ban duration seconds)
+        self._pending_bans: Dict[str, Tuple[int, int]] = {}
+        # ip -> monotonic times of the most recent violations (at most threshold)
+        self._recent: Dict[str, Deque[float]] = {}
+        self.stats = {'recorded': 0, 'flushed': 0, 'bans': 0, 'dropped': 0, 'flush_errors': 0}
+
+    def _session(self):
+        if self._session_factory is None:
+            from app.core.db import SessionLocal
+            self._session_factory = SessionLocal
+        return self._session_factory()
+
+    def record(self, ip: str, endpoint: str, threshold: int, ban_duration: int) -> Tuple[int, Optional[datetime]]:
+        """
+        Count one violation.
+
+        Returns:
+            (violations by this IP in the last hour as seen by this worker,
+             ban expiry when this violation triggered an auto-ban, else None)
+        """
+        now = time.monotonic()
+        endpoint = endpoint[:MAX_ENDPOINT_LENGTH]
+        with self._lock:
+            self.stats['recorded'] += 1
+            key = (ip, endpoint)
+            entry = self._pending.get(key)
+            if entry is not None:
+                entry[0] += 1
+                entry[1] = datetime.utcnow()
+            elif len(self._pending) < MAX_PENDING_KEYS:
+                self._pending[key] = [1, datetime.utcnow()]
+            else:
+                self.stats['dropped'] += 1
+
+            window = self._recent.get(ip)
+            if window is None or window.maxlen != threshold:
+                window = self._recent[ip] = deque(window or (), maxlen=threshold)
+            window.append(now)
+            while window and window[0] < now - BAN_WINDOW_SECONDS:
+                window.popleft()
+            count = len(window)
+
+            if count < threshold or ip in self._pending_bans:
+                return count, None
+
+            self._pending_bans[ip] = (count, ban_duration)
+            self._recent.pop(ip, None)
+            self.stats['bans'] += 1
+            return count, datetime.utcnow() + timedelta(seconds=ban_duration)
+
+    def pending(self) -> int:
+        return len(self._pending) + len(self._pending_bans)
+
+    def flush(self) -> int:
+        """Write buffered violations and bans; returns rows written"""
+        from app.repositories.ip_access import IPAccessRepository
+
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            bans, self._pending_bans = self._pending_bans, {}
+            self._prune_recent()
+
+        if not pending and not bans:
+            return 0
+
+        counts = {key: (count, last_at) for key, (count, last_at) in pending.items()}
+        written = 0
+        try:
+            with self._session() as session:
+                repo = IPAccessRepository(session)
+                written = repo.record_violations_batch(counts)
+                counts = {}
+                while bans:
+                    ip, (violations, duration) = next(iter(bans.items()))
+                    repo.auto_ban_ip(
+                        ip=ip,
+                        reason=f"Automatic ban due to {violations} rate limit violations in 1 hour",
+                        duration_seconds=duration
+                    )
+                    del bans[ip]
+                    written += 1
+        except Exception as e:
+            self.stats['flush_errors'] += 1
+            logger.error(f"Failed to flush rate limit violations: {e}")
+            self._merge_back(counts, bans)
+        self.stats['flushed'] += written
+        return written
+
+    def _merge_back(self, counts: Dict[Tuple[str, str], Tuple[int, datetime]], bans: Dict[str, Tuple[int, int]]) -> None:
+        """Requeue unwritten work ahead of anything recorded since the swap"""
+        with self._lock:
+            for key, (count, last_at) in counts.items():
+                entry = self._pending.get(key)
+                if entry is not None:
+                    entry[0] += count
+                elif len(self._pending) < MAX_PENDING_KEYS:
+                    self._pending[key] = [count, last_at]
+                else:
+                    self.stats['dropped'] += count
+            for ip, ban in bans.items():
+                self._pending_bans.setdefault(ip, ban)
+
+    def _prune_recent(self) -> None:
+        """Forget IPs with no violation inside the ban window (called with lock held)"""
+        cutoff = time.monotonic() - BAN_WINDOW_SECONDS
+        stale = [ip for ip, window in self._recent.items() if not window or window[-1] < cutoff]
+        for ip in stale:
+            del self._recent[ip]
+
+    async def run(self, interval: int) -> None:
+        """Background flusher; flushes what is left when cancelled"""
+        try:
+            while True:
+                await asyncio.sleep(interval)
+                try:
+                    await asyncio.to_thread(self.flush)
+                except Exception as e:
+                    logger.error(f"Violation flush failed: {e}")
+        finally:
+            if self.pending():
+                await asyncio.to_thread(self.flush)
+
+
+violation_buffer = ViolationBuffer()
@@ -7,7 +7,7 @@ from fastapi import Depends
 from sqlalchemy.orm import Session
 
 from app.core.config import get_settings, Settings
-from app.core.db import get_db as get_database_session
+from app.core.db import get_db as get_database_session, get_read_db as get_read_database_session
 
 # Service imports
 from app.services import TenantService, AuthService, AutomationService
@@ -47,6 +47,10 @@ def get_db() -> Generator[Session, None, None]:
     """Database session dependency with improved error handling"""
     yield from get_database_session()
 
+def get_read_db() -> Generator[Session, None, None]:
+    """Read-only session dependency (read replica when healthy, else primary)"""
+    yield from get_read_database_session()
+
 # --- Repositories ---
 def get_tenant_repository(db: Session = Depends(get_db)) -> TenantRepository:
     """Get tenant repository"""
@@ -116,6 +120,7 @@ def get_tiktok_service(db: Session = Depends(get_db)) -> TikTokService:
 
 # --- Type aliases for easier imports ---
 DatabaseSession = Annotated[Session, Depends(get_db)]
+ReadOnlyDatabaseSession = Annotated[Session, Depends(get_read_db)]
 SettingsDep = Annotated[Settings, Depends(get_settings_dep)]
 LoggerDep = Annotated[logging.Logger, Depends(get_logger)]
 
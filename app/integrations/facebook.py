@@ -11,6 +11,8 @@ from datetime import datetime, timedelta
 import httpx
 from loguru import logger
 
+from app.core.platform_rate_limit import get_platform_limiter, token_key
+
 
 class FacebookAPIClient:
     """
@@ -21,16 +23,23 @@ class FacebookAPIClient:
     """
 
     BASE_URL = "https://graph.facebook.com/v18.0"
+    # Longest wait for a shared rate limit slot before PlatformRateLimited
+    RATE_LIMIT_TIMEOUT = 30.0
 
-    def __init__(self, access_token: str):
+    def __init__(self, access_token: str, rate_limit_timeout: float = RATE_LIMIT_TIMEOUT):
         """
         Initialize the Facebook API client.
 
         Args:
             access_token: Facebook access token with appropriate permissions
+            rate_limit_timeout: Seconds to wait for a rate limit slot (never
+                waits when called on an event loop thread)
         """
         self.access_token = access_token
+        self.rate_limit_timeout = rate_limit_timeout
         self.client = httpx.Client(timeout=30.0)
+        self.limiter = get_platform_limiter("facebook")
+        self.token_key = token_key(access_token)
 
     def _make_request(
         self,
@@ -53,6 +62,7 @@ class FacebookAPIClient:
 
         Raises:
             httpx.HTTPError: If the request fails
+            PlatformRateLimited: If no rate limit slot frees up in time
         """
         url = f"{self.BASE_URL}{endpoint}"
 
@@ -62,6 +72,12 @@ class FacebookAPIClient:
         # Add access token to all requests
         params["access_token"] = self.access_token
 
+        # Shared quota: per token, plus per ad account for /act_<id>/... endpoints
+        limiter_keys = [self.token_key]
+        if endpoint.startswith("/act_"):
+            limiter_keys.append(endpoint.split("/")[1])
+        self.limiter.wait_sync(*limiter_keys, timeout=self.rate_limit_timeout)
+
         try:
             response = self.client.request(
                 method=method,
@@ -69,6 +85,8 @@ class FacebookAPIClient:
                 params=params,
                 json=data
             )
+            for key in limiter_keys:
+                self.limiter.observe(key, response.status_code, response.headers)
             response.raise_for_status()
             return response.json()
         except httpx.HTTPError as e:
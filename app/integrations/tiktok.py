@@ -17,6 +17,7 @@ from dataclasses import dataclass
 
 from app.core.config import get_settings
 from app.core.crypto import load_encryptor
+from app.core.platform_rate_limit import get_platform_limiter, token_key
 
 
 @dataclass
@@ -70,6 +71,8 @@ class TikTokAPIClient:
         self.access_token = access_token
         self.settings = settings or get_settings()
         self.encryptor = load_encryptor()
+        self.limiter = get_platform_limiter("tiktok")
+        self.token_key = token_key(access_token)
 
     async def _make_request(
         self,
@@ -93,6 +96,9 @@ class TikTokAPIClient:
         if files and "Content-Type" in default_headers:
             del default_headers["Content-Type"]
 
+        # Shared per-token quota across all workers; waits instead of failing
+        await self.limiter.wait(self.token_key)
+
         async with httpx.AsyncClient(timeout=timeout) as client:
             try:
                 if method.upper() == "GET":
@@ -107,6 +113,7 @@ class TikTokAPIClient:
                 else:
                     raise ValueError(f"Unsupported HTTP method: {method}")
 
+                await self.limiter.aobserve(self.token_key, response.status_code, response.headers)
                 response.raise_for_status()
                 return response.json()
 
@@ -5,6 +5,7 @@ from datetime import datetime, timezone
 from typing import Optional
 
 from app.core.db import get_db_session, get_db_session_with_retry
+from app.core.query_budget import job_query_budget
 from app.deps import get_logger
 from app.repositories.ads_alert import AdsAlertPromotionRepository, AdsAlertChatRepository
 from app.services.ads_alert_service import AdsAlertService
@@ -118,7 +119,8 @@ async def run_ads_alert_scheduler(check_interval: int = 60):
 
     while True:
         try:
-            results = await process_scheduled_promotions()
+            with job_query_budget("ads_alert_scheduler.process_scheduled_promotions"):
+                results = await process_scheduled_promotions()
 
             if results["processed"] > 0:
                 log.info(
@@ -9,7 +9,12 @@ from pydantic import BaseModel, Field
 
 from app.deps import get_logger, get_settings_dep, SettingsDep, TenantSvc, AuthSvc
 from app.core.config import get_settings
-from app.core.db import init_db, dispose_engine
+from app.core.db import init_db, dispose_engine, dispose_async_engine
+from app.core.cache import configure_cache_backend, shutdown_cache_backend
+from app.core.cpu_pool import cpu_pool
+from app.core.ip_rules import ip_rule_store
+from app.core.violation_buffer import violation_buffer
+from app.services.cache_service import close_redis_clients
 from app.core.monitoring import collect_monitoring_snapshot, log_monitoring_snapshot
 from app.routes import oauth_router
 from app.routes.webhooks import router as webhook_router
@@ -33,6 +38,7 @@ from app.routes.dashboard import router as dashboard_router
 from app.routes.mfa import router as mfa_router
 from app.routes.verifications import router as verifications_router
 from app.routes.cloudflare import router as cloudflare_router
+from app.routes.db_health import router as db_health_router
 
 
 # Request/Response models
@@ -75,6 +81,8 @@ async def lifespan(app: FastAPI):
 
     # Initialize database and validate schema
     init_db()
+    configure_cache_backend(s.REDIS_URL, l1_max_ttl=s.CACHE_L1_MAX_TTL)
+    ip_rule_store.refresh(force=True)
     log.info("🚀 FB/TikTok Automation API started (env=%s)", s.ENV)
     log_monitoring_snapshot(log, collect_monitoring_snapshot(s), context="startup")
 
@@ -85,8 +93,15 @@ async def lifespan(app: FastAPI):
     ads_alert_task = None
     trial_checker_task = None
     backup_task = None
+    ip_rules_task = None
+    violation_flush_task = None
 
     try:
+        # Rate limiter state: poll IP rule changes, batch-write buffered violations
+        ip_rules_task = asyncio.create_task(ip_rule_store.run(s.IP_RULES_REFRESH_INTERVAL))
+        log.info(f"✅ IP rule refresher started (interval: {s.IP_RULES_REFRESH_INTERVAL}s)")
+        violation_flush_task = asyncio.create_task(violation_buffer.run(s.RATE_LIMIT_VIOLATION_FLUSH_INTERVAL))
+
         # Start token refresh and cleanup tasks
         token_refresh_task = asyncio.create_task(run_token_refresh_scheduler())
         cleanup_task = asyncio.create_task(run_daily_cleanup_scheduler())
@@ -121,6 +136,8 @@ async def lifespan(app: FastAPI):
             ("Ads Alert Scheduler", ads_alert_task),
             ("Trial Checker", trial_checker_task),
             ("Backup Scheduler", backup_task),
+            ("IP Rule Refresher", ip_rules_task),
+            ("Violation Flush", violation_flush_task),
         ]
 
         for task_name, task in tasks_to_cancel:
@@ -131,7 +148,11 @@ async def lifespan(app: FastAPI):
                 except asyncio.CancelledError:
                     log.info(f"✅ {task_name} task stopped")
 
+        shutdown_cache_backend()
+        cpu_pool.shutdown()
+        await close_redis_clients()
         dispose_engine()
+        await dispose_async_engine()
         log.info("🛑 API shutting down")
 
 # Create FastAPI application
@@ -166,6 +187,8 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Keyset-paginated list endpoints return the next page cursor in this header
+    expose_headers=["X-Next-Cursor"],
 )
 
 # Add security headers middleware
@@ -176,10 +199,19 @@ app.add_middleware(SecurityHeadersMiddleware)
 from app.middleware.rate_limit import RateLimitMiddleware
 app.add_middleware(RateLimitMiddleware)
 
+# Attribute database statements to the endpoint that issued them (db_monitor)
+from app.middleware.query_attribution import QueryAttributionMiddleware
+app.add_middleware(QueryAttributionMiddleware)
+
+# Per-request query budget / N+1 detection (opt-in)
+if settings.QUERY_BUDGET_ENABLED:
+    from app.middleware.query_budget import QueryBudgetMiddleware
+    app.add_middleware(QueryBudgetMiddleware)
+
 # Email verification middleware disabled - SMTP not available on Railway
 # Users are auto-verified on registration
-# from app.middleware.email_verification import email_verification_middleware
-# app.middleware("http")(email_verification_middleware)
+# from app.middleware.email_verification import EmailVerificationMiddleware
+# app.add_middleware(EmailVerificationMiddleware)
 
 # --- Global Exception Handlers ---
 import logging as _logging
@@ -250,6 +282,7 @@ app.include_router(dashboard_router)
 app.include_router(mfa_router)
 app.include_router(verifications_router)
 app.include_router(cloudflare_router)
+app.include_router(db_health_router)
 
 # Mount static files for policy pages
 import os
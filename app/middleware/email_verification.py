@@ -4,12 +4,14 @@ Middleware to enforce email verification on protected endpoints.
 Blocks unverified users from accessing core features.
 """
 import logging
-from typing import List, Set
+from typing import List, Optional, Set
 
-from fastapi import HTTPException, status, Request, Response
+from fastapi import HTTPException, status
 from fastapi.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
 
 from app.core.models import User
+from app.middleware.path_matcher import PathMatcher
 
 logger = logging.getLogger(__name__)
 
@@ -85,6 +87,10 @@ EXEMPT_PATHS: Set[str] = {
 }
 
 
+_is_exempt = PathMatcher(exact=EXEMPT_PATHS)
+_is_protected = PathMatcher(exact=VERIFICATION_REQUIRED_PATHS, prefixes=VERIFICATION_REQUIRED_PREFIXES)
+
+
 def requires_email_verification(path: str) -> bool:
     """
     Check if a path requires email verification.
@@ -96,76 +102,71 @@ def requires_email_verification(path: str) -> bool:
         bool: True if verification is required
     """
     # Remove query parameters
-    clean_path = path.split("?")[0]
-
-    # Check exempt paths first
-    if clean_path in EXEMPT_PATHS:
-        return False
-
-    # Check exact matches
-    if clean_path in VERIFICATION_REQUIRED_PATHS:
-        return True
-
-    # Check prefixes
-    for prefix in VERIFICATION_REQUIRED_PREFIXES:
-        if clean_path.startswith(prefix):
-            return True
+    clean_path = path.partition("?")[0]
 
-    return False
+    # Exempt paths win over exact and prefix matches
+    return not _is_exempt(clean_path) and _is_protected(clean_path)
 
 
-async def email_verification_middleware(request: Request, call_next):
+class EmailVerificationMiddleware:
     """
     Middleware to enforce email verification for protected endpoints.
 
-    Args:
-        request: FastAPI request object
-        call_next: Next middleware/endpoint in chain
-
-    Returns:
-        Response: Either verification error or next response
+    Implemented as plain ASGI so streaming responses and background tasks
+    pass through untouched; only requests from unverified users on
+    protected paths are answered here.
     """
-    try:
-        # Check if this endpoint requires verification
-        if not requires_email_verification(request.url.path):
-            return await call_next(request)
 
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not requires_email_verification(scope["path"]):
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            response = self._check(scope)
+        except Exception as e:
+            logger.error(f"Email verification middleware error: {e}", exc_info=True)
+            response = JSONResponse(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                content={"detail": "Internal server error during request processing"}
+            )
+
+        if response is not None:
+            await response(scope, receive, send)
+            return
+        await self.app(scope, receive, send)
+
+    @staticmethod
+    def _check(scope: Scope) -> Optional[JSONResponse]:
+        """Verification error response, or None to continue"""
         # Check if user is authenticated (has current_user in request state)
-        user = getattr(request.state, 'current_user', None)
+        user = scope.get("state", {}).get("current_user")
         if not user:
             # No user authenticated - let auth middleware handle it
-            return await call_next(request)
+            return None
 
         # Check if user's email is verified
-        if not user.email_verified:
-            logger.warning(
-                f"Unverified user {user.id} attempted to access protected endpoint: {request.url.path}"
-            )
-
-            return JSONResponse(
-                status_code=status.HTTP_403_FORBIDDEN,
-                content={
-                    "detail": "Email verification required",
-                    "message": "Please verify your email address to access this feature",
-                    "verification_required": True,
-                    "user_email": user.email,
-                    "verification_endpoints": {
-                        "request_verification": "/auth/request-verification",
-                        "verification_status": "/auth/verification-status"
-                    }
-                }
-            )
+        if user.email_verified:
+            return None
 
-        # User is verified, continue to endpoint
-        return await call_next(request)
-
-    except Exception as e:
-        logger.error(f"Email verification middleware error: {e}", exc_info=True)
-        # On middleware error, return a safe error response
-        # Don't try to call call_next again as it may have already been consumed
+        logger.warning(
+            f"Unverified user {user.id} attempted to access protected endpoint: {scope['path']}"
+        )
         return JSONResponse(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            content={"detail": "Internal server error during request processing"}
+            status_code=status.HTTP_403_FORBIDDEN,
+            content={
+                "detail": "Email verification required",
+                "message": "Please verify your email address to access this feature",
+                "verification_required": True,
+                "user_email": user.email,
+                "verification_endpoints": {
+                    "request_verification": "/auth/request-verification",
+                    "verification_status": "/auth/verification-status"
+                }
+            }
         )
 
 
@@ -0,0 +1,51 @@
+# app/middleware/path_matcher.py
+"""
+Precompiled request path matching for middleware.
+
+Middleware used to loop over lists of paths/prefixes/substrings on every
+request. PathMatcher compiles them once: exact paths go into a frozenset and
+prefixes/substrings into a single alternation regex, so a lookup is one set
+probe plus at most one regex call regardless of how many entries there are.
+"""
+import re
+from typing import Iterable, Optional, Pattern
+
+
+def _alternation(parts: Iterable[str], flags: int = 0) -> Optional[Pattern]:
+    # Longest first so the regex engine tries specific entries before general ones
+    parts = sorted(set(parts), key=len, reverse=True)
+    if not parts:
+        return None
+    return re.compile("|".join(re.escape(part) for part in parts), flags)
+
+
+class PathMatcher:
+    """
+    Match a path against exact paths, prefixes and/or substrings.
+
+    Args:
+        exact: paths matched in full
+        prefixes: paths matched with str.startswith semantics
+        contains: substrings matched anywhere in the path
+        ignore_case: case-insensitive prefix/substring matching
+    """
+    __slots__ = ("exact", "_prefix", "_contains")
+
+    def __init__(
+        self,
+        exact: Iterable[str] = (),
+        prefixes: Iterable[str] = (),
+        contains: Iterable[str] = (),
+        ignore_case: bool = False,
+    ):
+        flags = re.IGNORECASE if ignore_case else 0
+        self.exact = frozenset(exact)
+        self._prefix = _alternation(prefixes, flags)
+        self._contains = _alternation(contains, flags)
+
+    def __call__(self, path: str) -> bool:
+        if path in self.exact:
+            return True
+        if self._prefix is not None and self._prefix.match(path):
+            return True
+        return self._contains is not None and self._contains.search(path) is not None
@@ -0,0 +1,31 @@
+# app/middleware/query_attribution.py
+"""
+Query attribution middleware.
+
+Tags every database statement executed while handling a request with the
+request's route template, so DatabaseMonitor can break database time down
+per endpoint. Implemented as plain ASGI (no response buffering).
+"""
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.db_monitor import _current_endpoint
+
+
+class QueryAttributionMiddleware:
+    """Expose the current request scope to the DB monitor's statement listener."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        # The router fills scope["route"] in place, so the listener resolves
+        # the route template lazily at query time.
+        token = _current_endpoint.set(scope)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _current_endpoint.reset(token)
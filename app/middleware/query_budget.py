@@ -0,0 +1,30 @@
+# app/middleware/query_budget.py
+"""
+Query budget middleware.
+
+Wraps each HTTP request in a query_budget scope named after the route, so
+N+1 patterns and statement-heavy endpoints are logged (or raised in tests).
+Opt-in via QUERY_BUDGET_ENABLED. Implemented as plain ASGI.
+"""
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.query_budget import query_budget
+
+
+class QueryBudgetMiddleware:
+    """Apply the configured per-request query budget."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with query_budget(f"{scope['method']} {scope['path']}") as budget:
+            await self.app(scope, receive, send)
+            # Rename to the route template once routing has happened
+            route = scope.get("route")
+            if route is not None:
+                budget.name = f"{scope['method']} {route.path}"
@@ -4,18 +4,25 @@ Rate limiting middleware with IP blocking support
 
 Implements per-IP rate limiting with automatic banning and whitelist/blacklist support.
 Includes suspicious path detection to block vulnerability scanners before database queries.
+IP rules are checked against an in-memory snapshot (app.core.ip_rules) and
+violations are buffered and written in batches (app.core.violation_buffer),
+so no request waits on the database.
 """
+from typing import Optional, Tuple
+
 from fastapi import Request, Response
 from fastapi.responses import JSONResponse
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.types import ASGIApp
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+import math
 import time
 import logging
 
 from app.core.config import get_settings
-from app.core.rate_limit_store import RateLimitStore
-from app.core.db import SessionLocal
-from app.repositories.ip_access import IPAccessRepository
+from app.core.rate_limit_store import RateLimitResult, RateLimitStore
+from app.core.ip_rules import NEVER, ip_rule_store
+from app.core.violation_buffer import violation_buffer
+from app.middleware.path_matcher import PathMatcher
 from app.core.models import IPRuleType
 
 _logger = logging.getLogger("app.middleware.rate_limit")
@@ -33,6 +40,9 @@ SUSPICIOUS_PATTERNS = [
     '_profiler',
 ]
 
+EXEMPT_PATHS = ["/health", "/", "/docs", "/redoc", "/openapi.json"]
+EXEMPT_PREFIXES = ["/policies/"]
+
 
 def get_client_ip(request: Request, trust_proxy: bool = True) -> str:
     """
@@ -64,13 +74,14 @@ def get_client_ip(request: Request, trust_proxy: bool = True) -> str:
     return "unknown"
 
 
-def _is_suspicious_path(path: str) -> bool:
-    """Check if a request path matches known vulnerability scanner patterns."""
-    path_lower = path.lower()
-    return any(pattern in path_lower for pattern in SUSPICIOUS_PATTERNS)
+# Check if a request path matches known vulnerability scanner patterns (case-insensitive substring)
+_is_suspicious_path = PathMatcher(contains=SUSPICIOUS_PATTERNS, ignore_case=True)
+
+# Health checks, docs and static policy pages are never rate limited
+_is_exempt_path = PathMatcher(exact=EXEMPT_PATHS, prefixes=EXEMPT_PREFIXES)
 
 
-class RateLimitMiddleware(BaseHTTPMiddleware):
+class RateLimitMiddleware:
     """
     Middleware for rate limiting and IP blocking
 
@@ -80,138 +91,158 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
     - IP blacklist (block immediately with 403)
     - Automatic IP banning after repeated violations
     - Suspicious path detection (blocks scanners before DB queries)
+    - IP rules served from an in-memory snapshot (no DB query per request)
     - Returns 429 with Retry-After header
+
+    Implemented as plain ASGI: allowed requests stream straight through and
+    only the response start message is touched to add X-RateLimit-* headers.
     """
 
     def __init__(self, app: ASGIApp):
-        super().__init__(app)
+        self.app = app
         self.settings = get_settings()
         self.rate_limit_store = RateLimitStore(redis_url=self.settings.REDIS_URL)
-
-    async def dispatch(self, request: Request, call_next):
-        """Process request with rate limiting and IP blocking"""
-
-        # Get client IP
+        self.ip_rules = ip_rule_store
+        self.violations = violation_buffer
+
+    @staticmethod
+    def _rate_limit_headers(result: RateLimitResult) -> dict:
+        """X-RateLimit-* headers from the shared limiter state (Reset is an epoch timestamp)"""
+        return {
+            "X-RateLimit-Limit": str(result.limit),
+            "X-RateLimit-Remaining": str(result.remaining),
+            "X-RateLimit-Reset": str(math.ceil(time.time() + result.reset_after)),
+        }
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or _is_exempt_path(scope["path"]):
+            await self.app(scope, receive, send)
+            return
+
+        response, result = await self._check(Request(scope))
+        if response is not None:
+            await response(scope, receive, send)
+            return
+
+        if result is None:
+            await self.app(scope, receive, send)
+            return
+
+        rate_limit_headers = self._rate_limit_headers(result)
+
+        async def send_with_headers(message: Message):
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message).update(rate_limit_headers)
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
+
+    async def _check(self, request: Request) -> Tuple[Optional[Response], Optional[RateLimitResult]]:
+        """
+        Apply IP rules and the rate limit.
+        Returns (rejection response or None, limiter result for the headers).
+        """
+        path = request.scope["path"]
         client_ip = get_client_ip(request, self.settings.TRUST_PROXY_HEADERS)
 
-        # Skip rate limiting for health check and static files
-        if request.url.path in ["/health", "/", "/docs", "/redoc", "/openapi.json"]:
-            return await call_next(request)
-
-        if request.url.path.startswith("/policies/"):
-            return await call_next(request)
-
         # Block suspicious scanner paths immediately (no DB query needed)
-        if _is_suspicious_path(request.url.path):
+        if _is_suspicious_path(path):
             _logger.warning(
                 "Vulnerability scan blocked: %s %s from %s (UA: %s)",
                 request.method,
-                request.url.path,
+                path,
                 client_ip,
                 request.headers.get("user-agent", "unknown"),
             )
             return JSONResponse(
                 status_code=404,
                 content={"detail": "Not found"}
-            )
+            ), None
 
-        # Check IP access rules using database (with fail-open error handling)
-        current_count = 0
-        try:
-            with SessionLocal() as session:
-                ip_repo = IPAccessRepository(session)
+        # Check IP access rules against the in-memory snapshot (no DB I/O)
+        await self.ip_rules.ensure_loaded()
+        rule_type, expires_ts = self.ip_rules.match(client_ip)
 
-                # 1. Check whitelist (always allow, bypass rate limiting)
-                if ip_repo.is_ip_whitelisted(client_ip):
-                    return await call_next(request)
-
-                # 2. Check blacklist (immediate block)
-                if ip_repo.is_ip_blacklisted(client_ip):
-                    return JSONResponse(
-                        status_code=403,
-                        content={
-                            "detail": "Access denied",
-                            "error": "forbidden",
-                            "ip": client_ip
-                        }
-                    )
-
-                # 3. Check auto-ban (temporary ban from violations)
-                if ip_repo.is_ip_auto_banned(client_ip):
-                    retry_after = self.rate_limit_store.get_retry_after(client_ip, window=self.settings.RATE_LIMIT_AUTO_BAN_DURATION)
-                    return JSONResponse(
-                        status_code=429,
-                        content={
-                            "detail": "Too many violations. Temporarily banned.",
-                            "error": "too_many_requests",
-                            "retry_after": retry_after,
-                            "ip": client_ip
-                        },
-                        headers={"Retry-After": str(retry_after)}
-                    )
-
-                # 4. Rate limiting check
-                rate_limit_key = f"ip:{client_ip}"
-                current_count = self.rate_limit_store.increment(rate_limit_key, window=60)
-
-                if current_count > self.settings.RATE_LIMIT_PER_MINUTE:
-                    # Rate limit exceeded
-                    retry_after = self.rate_limit_store.get_retry_after(rate_limit_key, window=60)
-
-                    # Record violation in database
-                    ip_repo.record_violation(client_ip, request.url.path)
-
-                    # Check if we should auto-ban
-                    violations_count = ip_repo.get_violations_count(client_ip, time_window=3600)  # Last hour
-
-                    if violations_count >= self.settings.RATE_LIMIT_VIOLATION_THRESHOLD:
-                        # Auto-ban this IP
-                        ip_repo.auto_ban_ip(
-                            ip=client_ip,
-                            reason=f"Automatic ban due to {violations_count} rate limit violations in 1 hour",
-                            duration_seconds=self.settings.RATE_LIMIT_AUTO_BAN_DURATION
-                        )
-
-                        return JSONResponse(
-                            status_code=429,
-                            content={
-                                "detail": f"Too many violations. Automatically banned for {self.settings.RATE_LIMIT_AUTO_BAN_DURATION // 3600} hours.",
-                                "error": "too_many_requests",
-                                "retry_after": self.settings.RATE_LIMIT_AUTO_BAN_DURATION,
-                                "ip": client_ip,
-                                "violations": violations_count
-                            },
-                            headers={"Retry-After": str(self.settings.RATE_LIMIT_AUTO_BAN_DURATION)}
-                        )
+        # 1. Whitelist: always allow, bypass rate limiting
+        if rule_type == IPRuleType.whitelist:
+            return None, None
 
+        # 2. Blacklist: immediate block
+        if rule_type == IPRuleType.blacklist:
+            return JSONResponse(
+                status_code=403,
+                content={
+                    "detail": "Access denied",
+                    "error": "forbidden",
+                    "ip": client_ip
+                }
+            ), None
+
+        # 3. Auto-ban: temporary ban from violations
+        if rule_type == IPRuleType.auto_banned:
+            if expires_ts == NEVER:
+                retry_after = self.settings.RATE_LIMIT_AUTO_BAN_DURATION
+            else:
+                retry_after = max(1, int(expires_ts - time.time()))
+            return JSONResponse(
+                status_code=429,
+                content={
+                    "detail": "Too many violations. Temporarily banned.",
+                    "error": "too_many_requests",
+                    "retry_after": retry_after,
+                    "ip": client_ip
+                },
+                headers={"Retry-After": str(retry_after)}
+            ), None
+
+        # 4. Rate limiting check (GCRA: no 2x bursts at window boundaries)
+        result = None
+        try:
+            result = await self.rate_limit_store.ahit(f"ip:{client_ip}", self.settings.RATE_LIMIT_PER_MINUTE, period=60)
+
+            if not result.allowed:
+                # Rate limit exceeded: counted in memory, written to the DB in batches
+                retry_after = max(1, math.ceil(result.retry_after))
+                violations_count, banned_until = self.violations.record(
+                    client_ip, path,
+                    threshold=self.settings.RATE_LIMIT_VIOLATION_THRESHOLD,
+                    ban_duration=self.settings.RATE_LIMIT_AUTO_BAN_DURATION,
+                )
+
+                if banned_until is not None:
+                    # Block follow-up requests on this worker right away; others see it on their next poll
+                    self.ip_rules.add_local(client_ip, IPRuleType.auto_banned, banned_until)
                     return JSONResponse(
                         status_code=429,
                         content={
-                            "detail": f"Rate limit exceeded. Maximum {self.settings.RATE_LIMIT_PER_MINUTE} requests per minute.",
+                            "detail": f"Too many violations. Automatically banned for {self.settings.RATE_LIMIT_AUTO_BAN_DURATION // 3600} hours.",
                             "error": "too_many_requests",
-                            "retry_after": retry_after,
+                            "retry_after": self.settings.RATE_LIMIT_AUTO_BAN_DURATION,
                             "ip": client_ip,
-                            "current_count": current_count,
-                            "limit": self.settings.RATE_LIMIT_PER_MINUTE
+                            "violations": violations_count
                         },
-                        headers={"Retry-After": str(retry_after)}
-                    )
+                        headers={"Retry-After": str(self.settings.RATE_LIMIT_AUTO_BAN_DURATION)}
+                    ), result
+
+                return JSONResponse(
+                    status_code=429,
+                    content={
+                        "detail": f"Rate limit exceeded. Maximum {self.settings.RATE_LIMIT_PER_MINUTE} requests per minute.",
+                        "error": "too_many_requests",
+                        "retry_after": retry_after,
+                        "ip": client_ip,
+                        "limit": self.settings.RATE_LIMIT_PER_MINUTE
+                    },
+                    headers={"Retry-After": str(retry_after), **self._rate_limit_headers(result)}
+                ), result
 
         except Exception as e:
-            # Database failure: fail open so legitimate requests are not blocked.
+            # Limiter failure: fail open so legitimate requests are not blocked.
             # Rate limiting is temporarily bypassed but the app stays available.
             _logger.error(
-                "Rate limit DB error for %s on %s: %s",
-                client_ip, request.url.path, e,
+                "Rate limit error for %s on %s: %s",
+                client_ip, path, e,
                 exc_info=True,
             )
 
-        # Request is allowed
-        response = await call_next(request)
-
-        # Add rate limit headers to response
-        response.headers["X-RateLimit-Limit"] = str(self.settings.RATE_LIMIT_PER_MINUTE)
-        response.headers["X-RateLimit-Remaining"] = str(max(0, self.settings.RATE_LIMIT_PER_MINUTE - current_count))
-        response.headers["X-RateLimit-Reset"] = str(int(time.time()) + 60)
-
-        return response
+        return None, result
@@ -4,34 +4,41 @@ Security headers middleware for FastAPI application.
 
 Adds standard security headers to all HTTP responses to protect against
 common web vulnerabilities (XSS, clickjacking, MIME sniffing, etc.).
+Implemented as plain ASGI (no response buffering).
 """
-from fastapi import Request
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.types import ASGIApp
-
-
-class SecurityHeadersMiddleware(BaseHTTPMiddleware):
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+SECURITY_HEADERS = {
+    # Prevent MIME type sniffing
+    "X-Content-Type-Options": "nosniff",
+    # Prevent clickjacking
+    "X-Frame-Options": "DENY",
+    # Control referrer information
+    "Referrer-Policy": "strict-origin-when-cross-origin",
+    # HSTS - enforce HTTPS (Railway serves over HTTPS)
+    "Strict-Transport-Security": "max-age=31536000; includeSubDomains",
+}
+
+
+class SecurityHeadersMiddleware:
     """Add security headers to all responses."""
 
-    async def dispatch(self, request: Request, call_next):
-        response = await call_next(request)
-
-        # Prevent MIME type sniffing
-        response.headers["X-Content-Type-Options"] = "nosniff"
-
-        # Prevent clickjacking
-        response.headers["X-Frame-Options"] = "DENY"
-
-        # Control referrer information
-        response.headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
+    def __init__(self, app: ASGIApp):
+        self.app = app
 
-        # HSTS - enforce HTTPS (Railway serves over HTTPS)
-        response.headers["Strict-Transport-Security"] = (
-            "max-age=31536000; includeSubDomains"
-        )
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
 
-        # Hide server implementation details
-        if "Server" in response.headers:
-            del response.headers["Server"]
+        async def send_with_headers(message: Message):
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers.update(SECURITY_HEADERS)
+                # Hide server implementation details
+                if "Server" in headers:
+                    del headers["Server"]
+            await send(message)
 
-        return response
+        await self.app(scope, receive, send_with_headers)
@@ -10,6 +10,7 @@ from app.core.models import (
     PromotionStatus, BroadcastStatus
 )
 from app.repositories.base import BaseRepository
+from app.repositories.optimized_base import KeysetPage, keyset_paginate
 
 
 class AdsAlertChatRepository(BaseRepository[AdsAlertChat]):
@@ -27,6 +28,24 @@ class AdsAlertChatRepository(BaseRepository[AdsAlertChat]):
         limit: int = 100
     ) -> List[AdsAlertChat]:
         """Get all chats for a tenant"""
+        query = self._tenant_query(tenant_id, subscribed_only, active_only, tags)
+        return query.order_by(desc(AdsAlertChat.created_at)).limit(limit).all()
+
+    def get_page_by_tenant(
+        self,
+        tenant_id: UUID,
+        subscribed_only: bool = False,
+        active_only: bool = True,
+        tags: Optional[List[str]] = None,
+        limit: int = 100,
+        cursor: Optional[str] = None
+    ) -> KeysetPage:
+        """Cursor-paginated chats for a tenant, newest first"""
+        query = self._tenant_query(tenant_id, subscribed_only, active_only, tags)
+        return keyset_paginate(query, (AdsAlertChat.created_at, AdsAlertChat.id), limit=limit, cursor=cursor)
+
+    def _tenant_query(self, tenant_id: UUID, subscribed_only: bool, active_only: bool,
+                      tags: Optional[List[str]]):
         query = self.db.query(AdsAlertChat).filter(AdsAlertChat.tenant_id == tenant_id)
         if active_only:
             query = query.filter(AdsAlertChat.is_active == True)
@@ -34,7 +53,7 @@ class AdsAlertChatRepository(BaseRepository[AdsAlertChat]):
             query = query.filter(AdsAlertChat.subscribed == True)
         if tags:
             query = query.filter(AdsAlertChat.tags.overlap(tags))
-        return query.order_by(desc(AdsAlertChat.created_at)).limit(limit).all()
+        return query
 
     def get_by_chat_id(self, tenant_id: UUID, chat_id: str) -> Optional[AdsAlertChat]:
         """Get chat by telegram/platform chat_id"""
@@ -207,12 +226,29 @@ class AdsAlertPromotionRepository(BaseRepository[AdsAlertPromotion]):
         limit: int = 50
     ) -> List[AdsAlertPromotion]:
         """Get all promotions for a tenant"""
+        query = self._tenant_query(tenant_id, status)
+        return query.order_by(desc(AdsAlertPromotion.created_at)).limit(limit).all()
+
+    def get_page_by_tenant(
+        self,
+        tenant_id: UUID,
+        status: Optional[PromotionStatus] = None,
+        limit: int = 50,
+        cursor: Optional[str] = None
+    ) -> KeysetPage:
+        """Cursor-paginated promotions for a tenant, newest first"""
+        query = self._tenant_query(tenant_id, status)
+        return keyset_paginate(
+            query, (AdsAlertPromotion.created_at, AdsAlertPromotion.id), limit=limit, cursor=cursor
+        )
+
+    def _tenant_query(self, tenant_id: UUID, status: Optional[PromotionStatus]):
         query = self.db.query(AdsAlertPromotion).filter(
             AdsAlertPromotion.tenant_id == tenant_id
         )
         if status:
             query = query.filter(AdsAlertPromotion.status == status)
-        return query.order_by(desc(AdsAlertPromotion.created_at)).limit(limit).all()
+        return query
 
     def get_by_id_and_tenant(self, id: UUID, tenant_id: UUID) -> Optional[AdsAlertPromotion]:
         """Get promotion by ID ensuring tenant isolation"""
@@ -374,6 +410,22 @@ class AdsAlertMediaRepository(BaseRepository[AdsAlertMedia]):
         limit: int = 100
     ) -> List[AdsAlertMedia]:
         """Get media files for a tenant"""
+        query = self._tenant_query(tenant_id, folder_id, file_type_prefix)
+        return query.order_by(desc(AdsAlertMedia.created_at)).limit(limit).all()
+
+    def get_page_by_tenant(
+        self,
+        tenant_id: UUID,
+        folder_id: Optional[UUID] = None,
+        file_type_prefix: Optional[str] = None,
+        limit: int = 100,
+        cursor: Optional[str] = None
+    ) -> KeysetPage:
+        """Cursor-paginated media files for a tenant folder, newest first"""
+        query = self._tenant_query(tenant_id, folder_id, file_type_prefix)
+        return keyset_paginate(query, (AdsAlertMedia.created_at, AdsAlertMedia.id), limit=limit, cursor=cursor)
+
+    def _tenant_query(self, tenant_id: UUID, folder_id: Optional[UUID], file_type_prefix: Optional[str]):
         query = self.db.query(AdsAlertMedia).filter(
             AdsAlertMedia.tenant_id == tenant_id
         )
@@ -384,7 +436,7 @@ class AdsAlertMediaRepository(BaseRepository[AdsAlertMedia]):
             query = query.filter(AdsAlertMedia.folder_id.is_(None))
         if file_type_prefix:
             query = query.filter(AdsAlertMedia.file_type.startswith(file_type_prefix))
-        return query.order_by(desc(AdsAlertMedia.created_at)).limit(limit).all()
+        return query
 
     def get_all_by_tenant(self, tenant_id: UUID, limit: int = 500) -> List[AdsAlertMedia]:
         """Get all media for a tenant regardless of folder"""
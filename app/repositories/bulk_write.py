@@ -0,0 +1,190 @@
+# app/repositories/bulk_write.py
+"""
+Bulk write engine: set-based INSERT / UPDATE with a fixed number of round-trips.
+
+Replaces per-row patterns (flush + refresh per instance, one UPDATE per record)
+with:
+- multi-row INSERT ... [ON CONFLICT ...] RETURNING, batched under the
+  PostgreSQL bind-parameter limit
+- UPDATE ... FROM (VALUES ...) keyed on the primary key (PostgreSQL), with an
+  executemany fallback on other dialects
+- COPY ... FROM STDIN for very large plain loads (PostgreSQL + psycopg3)
+
+Works against ORM models or Core tables, so raw-SQL repositories such as
+CustomerRepository can use it too.
+
+Usage:
+    writer = BulkWriter(db, Customer)
+    rows = writer.insert(data, returning=["id", "name"], conflict_columns=["tenant_id", "phone"])
+    writer.update([{"id": ..., "name": ...}, ...])
+    writer.round_trips  # statements sent to the server
+"""
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Union
+
+from sqlalchemy import Table, bindparam, cast, column, insert, update, values
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import TableClause
+
+logger = logging.getLogger(__name__)
+
+# PostgreSQL accepts at most 65535 bind parameters per statement
+MAX_BIND_PARAMS = 65535
+
+
+def _as_table(target: Any) -> Union[Table, TableClause]:
+    return target if isinstance(target, (Table, TableClause)) else target.__table__
+
+
+class BulkWriter:
+    """
+    Set-based writer for one table.
+
+    round_trips counts statements sent to the database (COPY counts as one),
+    which is what the bulk benchmark reports.
+    """
+
+    def __init__(self, db: Session, target: Any, batch_size: int = 1000, copy_threshold: int = 50_000):
+        self.db = db
+        self.table = _as_table(target)
+        self.batch_size = batch_size
+        self.copy_threshold = copy_threshold
+        self.round_trips = 0
+
+    @property
+    def dialect(self) -> str:
+        return self.db.get_bind().dialect.name
+
+    def _batches(self, rows: List[Dict[str, Any]], columns_per_row: int) -> Iterable[List[Dict[str, Any]]]:
+        size = max(1, min(self.batch_size, MAX_BIND_PARAMS // max(columns_per_row, 1)))
+        for start in range(0, len(rows), size):
+            yield rows[start:start + size]
+
+    def _insert_construct(self):
+        if self.dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        elif self.dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        else:
+            return insert(self.table)
+        return dialect_insert(self.table)
+
+    def insert(
+        self,
+        rows: List[Dict[str, Any]],
+        returning: Optional[Sequence[str]] = None,
+        conflict_columns: Optional[Sequence[str]] = None,
+        update_columns: Optional[Sequence[str]] = None,
+    ) -> List[Row]:
+        """
+        Insert rows with one multi-row INSERT per batch.
+
+        conflict_columns: target of ON CONFLICT. With update_columns the
+        conflicting rows are updated (upsert), otherwise they are skipped.
+        returning: column names to return for every inserted/upserted row.
+
+        All rows must have the same keys. Large loads with no returning/conflict
+        handling go through COPY on PostgreSQL.
+        """
+        if not rows:
+            return []
+
+        if not returning and not conflict_columns and len(rows) >= self.copy_threshold:
+            try:
+                self.copy(rows)
+                return []
+            except NotImplementedError:
+                pass
+
+        results: List[Row] = []
+        columns = list(rows[0].keys())
+        for batch in self._batches(rows, len(columns)):
+            stmt = self._insert_construct().values(batch)
+            if conflict_columns:
+                if update_columns:
+                    stmt = stmt.on_conflict_do_update(
+                        index_elements=list(conflict_columns),
+                        set_={name: stmt.excluded[name] for name in update_columns},
+                    )
+                else:
+                    stmt = stmt.on_conflict_do_nothing(index_elements=list(conflict_columns))
+            if returning:
+                stmt = stmt.returning(*(self.table.c[name] for name in returning))
+
+            result = self.db.execute(stmt)
+            self.round_trips += 1
+            if returning:
+                results.extend(result.fetchall())
+
+        logger.debug(f"Bulk inserted {len(rows)} rows into {self.table.name} in {self.round_trips} round-trips")
+        return results
+
+    def update(self, rows: List[Dict[str, Any]], key: str = "id") -> int:
+        """
+        Update rows matched on key, each row carrying its own new values.
+
+        PostgreSQL: one UPDATE ... FROM (VALUES ...) per batch. Values are cast
+        to the target column types so enums, UUIDs and timestamps bind cleanly.
+        Other dialects: one executemany UPDATE ... WHERE key = ?.
+        """
+        if not rows:
+            return 0
+
+        set_columns = [name for name in rows[0].keys() if name != key]
+        if not set_columns:
+            return 0
+
+        if self.dialect != "postgresql":
+            stmt = (
+                update(self.table)
+                .where(self.table.c[key] == bindparam("_key"))
+                .values({name: bindparam(name) for name in set_columns})
+            )
+            params = [{"_key": row[key], **{name: row[name] for name in set_columns}} for row in rows]
+            result = self.db.execute(stmt, params)
+            self.round_trips += 1
+            return result.rowcount
+
+        updated = 0
+        value_columns = [self.table.c[key]] + [self.table.c[name] for name in set_columns]
+        for batch in self._batches(rows, len(value_columns)):
+            source = values(
+                *(column(col.name, col.type) for col in value_columns),
+                name="v",
+            ).data([tuple(row[col.name] for col in value_columns) for row in batch])
+            stmt = (
+                update(self.table)
+                .where(self.table.c[key] == source.c[key])
+                .values({name: cast(source.c[name], self.table.c[name].type) for name in set_columns})
+            )
+            updated += self.db.execute(stmt).rowcount
+            self.round_trips += 1
+        return updated
+
+    def copy(self, rows: List[Dict[str, Any]]) -> int:
+        """
+        Stream rows with COPY ... FROM STDIN (PostgreSQL + psycopg3 only).
+
+        No ON CONFLICT and no RETURNING - use insert() when you need either.
+        Raises NotImplementedError on other drivers.
+        """
+        if not rows:
+            return 0
+        if self.dialect != "postgresql":
+            raise NotImplementedError("COPY is only available on PostgreSQL")
+
+        columns = list(rows[0].keys())
+        qualified = f'"{self.table.schema}"."{self.table.name}"' if self.table.schema else f'"{self.table.name}"'
+        column_list = ", ".join(f'"{name}"' for name in columns)
+
+        dbapi_conn = self.db.connection().connection.dbapi_connection
+        with dbapi_conn.cursor() as cursor:
+            if not hasattr(cursor, "copy"):
+                raise NotImplementedError("COPY requires the psycopg3 driver")
+            with cursor.copy(f"COPY {qualified} ({column_list}) FROM STDIN") as copy:
+                for row in rows:
+                    copy.write_row([row[name] for name in columns])
+        self.round_trips += 1
+        logger.debug(f"COPY loaded {len(rows)} rows into {self.table.name}")
+        return len(rows)
@@ -1,9 +1,35 @@
 """Customer repository for invoice.customer table operations."""
-from typing import Optional, List
+from typing import Optional, List, Dict, Any, Sequence
 from sqlalchemy.orm import Session
-from sqlalchemy import text
+from sqlalchemy import text, table, column, func, DateTime
 from uuid import UUID
 
+from app.repositories.bulk_write import BulkWriter
+
+# Core table for set-based writes (the rest of this repository uses raw SQL)
+customer_table = table(
+    "customer",
+    column("id"),
+    column("tenant_id"),
+    column("merchant_id"),
+    column("name"),
+    column("email"),
+    column("phone"),
+    column("address"),
+    column("telegram_chat_id"),
+    column("telegram_username"),
+    column("telegram_linked_at", DateTime),
+    column("created_at", DateTime),
+    column("updated_at", DateTime),
+    schema="invoice",
+)
+
+CUSTOMER_RETURNING = [
+    "id", "tenant_id", "merchant_id", "name", "email", "phone", "address",
+    "telegram_chat_id", "telegram_username", "telegram_linked_at",
+    "created_at", "updated_at",
+]
+
 
 class CustomerRepository:
     """Repository for invoice.customer table operations with tenant isolation."""
@@ -70,6 +96,73 @@ class CustomerRepository:
             "updated_at": row.updated_at.isoformat()
         }
 
+    @staticmethod
+    def bulk_create(
+        db: Session,
+        tenant_id: UUID,
+        merchant_id: UUID,
+        customers: List[Dict[str, Any]],
+        conflict_columns: Optional[Sequence[str]] = None,
+        update_columns: Optional[Sequence[str]] = None,
+    ) -> List[dict]:
+        """
+        Import many customers with one multi-row INSERT ... RETURNING per batch.
+
+        Args:
+            db: Database session
+            tenant_id: Tenant UUID for isolation
+            merchant_id: Merchant (user) UUID who owns these customers
+            customers: Dicts with name (required), email, phone, address
+            conflict_columns: Unique columns for ON CONFLICT (optional)
+            update_columns: Columns to overwrite on conflict; skip duplicates if omitted
+
+        Returns:
+            list: Created (or upserted) customer data, in the same shape as create()
+        """
+        if not customers:
+            return []
+
+        rows = [
+            {
+                "tenant_id": str(tenant_id),
+                "merchant_id": str(merchant_id),
+                "name": customer["name"],
+                "email": customer.get("email"),
+                "phone": customer.get("phone"),
+                "address": customer.get("address"),
+                "created_at": func.now(),
+                "updated_at": func.now(),
+            }
+            for customer in customers
+        ]
+
+        created = BulkWriter(db, customer_table).insert(
+            rows,
+            returning=CUSTOMER_RETURNING,
+            conflict_columns=conflict_columns,
+            update_columns=update_columns,
+        )
+        db.commit()
+
+        return [CustomerRepository._row_to_dict(row) for row in created]
+
+    @staticmethod
+    def _row_to_dict(row) -> dict:
+        return {
+            "id": str(row.id),
+            "tenant_id": str(row.tenant_id),
+            "merchant_id": str(row.merchant_id),
+            "name": row.name,
+            "email": row.email,
+            "phone": row.phone,
+            "address": row.address,
+            "telegram_chat_id": row.telegram_chat_id,
+            "telegram_username": row.telegram_username,
+            "telegram_linked_at": row.telegram_linked_at.isoformat() if row.telegram_linked_at else None,
+            "created_at": row.created_at.isoformat(),
+            "updated_at": row.updated_at.isoformat()
+        }
+
     @staticmethod
     def get_by_id(db: Session, customer_id: UUID, tenant_id: UUID) -> Optional[dict]:
         """
@@ -1,7 +1,7 @@
 # app/repositories/ip_access.py
 """Repository for IP access control and rate limit violations"""
 from datetime import datetime, timedelta
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 from uuid import UUID, uuid4
 from sqlalchemy import select, and_, or_, func
 from sqlalchemy.orm import Session
@@ -120,6 +120,33 @@ class IPAccessRepository:
         result = self.session.execute(stmt).scalars().all()
         return list(result)
 
+    def get_active_rule_entries(self) -> List[Tuple[str, IPRuleType, Optional[datetime]]]:
+        """(ip_address, rule_type, expires_at) for every active, unexpired rule - for the in-memory snapshot"""
+        stmt = select(IPAccessRule.ip_address, IPAccessRule.rule_type, IPAccessRule.expires_at).where(
+            and_(
+                IPAccessRule.is_active == True,
+                or_(
+                    IPAccessRule.expires_at.is_(None),
+                    IPAccessRule.expires_at > datetime.utcnow()
+                )
+            )
+        )
+        return [tuple(row) for row in self.session.execute(stmt).all()]
+
+    def get_rules_version(self) -> Tuple:
+        """
+        Cheap fingerprint of the rule table (row count, latest create/update).
+
+        Changes whenever a rule is added, deactivated or deleted, so pollers
+        only reload the full rule set when something actually changed.
+        """
+        stmt = select(
+            func.count(IPAccessRule.id),
+            func.max(IPAccessRule.created_at),
+            func.max(IPAccessRule.updated_at),
+        )
+        return tuple(self.session.execute(stmt).one())
+
     def record_violation(self, ip: str, endpoint: str) -> RateLimitViolation:
         """Record a rate limit violation"""
         # Check if violation already exists for this IP+endpoint
@@ -150,6 +177,43 @@ class IPAccessRepository:
         self.session.refresh(violation)
         return violation
 
+    def record_violations_batch(self, counts: Dict[Tuple[str, str], Tuple[int, datetime]]) -> int:
+        """
+        Add aggregated violations in one transaction
+
+        Args:
+            counts: (ip, endpoint) -> (violations since last flush, last violation time)
+
+        Returns:
+            Number of (ip, endpoint) rows written
+        """
+        if not counts:
+            return 0
+
+        ips = {ip for ip, _ in counts}
+        stmt = select(RateLimitViolation).where(RateLimitViolation.ip_address.in_(ips))
+        existing = {
+            (violation.ip_address, violation.endpoint): violation
+            for violation in self.session.execute(stmt).scalars().all()
+        }
+
+        for (ip, endpoint), (count, last_at) in counts.items():
+            violation = existing.get((ip, endpoint))
+            if violation:
+                violation.violation_count += count
+                violation.last_violation_at = max(violation.last_violation_at, last_at)
+            else:
+                self.session.add(RateLimitViolation(
+                    id=uuid4(),
+                    ip_address=ip,
+                    endpoint=endpoint,
+                    violation_count=count,
+                    last_violation_at=last_at
+                ))
+
+        self.session.commit()
+        return len(counts)
+
     def get_violations_count(self, ip: str, time_window: int = 3600) -> int:
         """
         Get count of violations for IP within time window (in seconds)
@@ -7,18 +7,23 @@ Key optimizations:
 - Lazy loading and eager loading strategies
 - Query batching and bulk operations
 - Connection-efficient patterns
+- Keyset (cursor) pagination with constant cost per page
 - Statistics collection for monitoring
 """
 from abc import ABC
-from typing import TypeVar, Generic, Type, Optional, List, Any, Dict, Set, Union
+from typing import TypeVar, Generic, Type, Optional, List, Any, Dict, Set, Union, Sequence, Tuple
 from uuid import UUID
-from sqlalchemy.orm import Session, joinedload, selectinload
-from sqlalchemy import and_, or_, desc, asc, text, func
+from sqlalchemy.orm import Session, Query, joinedload, selectinload
+from sqlalchemy import and_, or_, desc, asc, text, func, tuple_, insert
+from dataclasses import dataclass
 from datetime import datetime
+import base64
+import json
 import logging
 
 from app.core.models import Base
 from app.core.cache import cached, cache_tenant_data, cache_user_data, invalidate_tenant_cache
+from app.repositories.bulk_write import BulkWriter
 
 logger = logging.getLogger(__name__)
 
@@ -62,6 +67,130 @@ class QueryStats:
 # Global query stats instance
 _query_stats = QueryStats()
 
+
+# --- Keyset pagination --------------------------------------------------------
+
+class InvalidCursor(ValueError):
+    """Cursor token is malformed or was issued for a different sort order"""
+
+
+@dataclass
+class KeysetPage:
+    """One page of a keyset-paginated listing"""
+    items: List[Any]
+    next_cursor: Optional[str]
+    limit: int
+    total: Optional[int] = None
+    total_is_estimate: bool = False
+
+    @property
+    def has_more(self) -> bool:
+        return self.next_cursor is not None
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, UUID):
+        return str(value)
+    return value
+
+
+def _decode_value(column, raw: Any) -> Any:
+    if raw is None:
+        return None
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        return raw
+    if python_type is datetime:
+        return datetime.fromisoformat(raw)
+    if python_type is UUID:
+        return UUID(raw)
+    return python_type(raw)
+
+
+def encode_cursor(row: Any, keys: Sequence) -> str:
+    """Opaque cursor holding the sort-key values of the last row on a page"""
+    payload = {
+        "k": [column.key for column in keys],
+        "v": [_encode_value(getattr(row, column.key)) for column in keys],
+    }
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token: str, keys: Sequence) -> Tuple[Any, ...]:
+    """Decode a cursor produced by encode_cursor for the same sort keys"""
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        payload = json.loads(raw)
+        if payload["k"] != [column.key for column in keys]:
+            raise InvalidCursor("Cursor does not match this listing's sort order")
+        return tuple(_decode_value(column, value) for column, value in zip(keys, payload["v"], strict=True))
+    except InvalidCursor:
+        raise
+    except Exception as e:
+        raise InvalidCursor(f"Malformed pagination cursor: {e}") from e
+
+
+def estimate_count(query: Query) -> Optional[int]:
+    """Planner row estimate for a query (PostgreSQL only, no table scan)"""
+    session = query.session
+    if session.get_bind().dialect.name != "postgresql":
+        return None
+    compiled = query.order_by(None).statement.compile(
+        dialect=session.get_bind().dialect, compile_kwargs={"literal_binds": True}
+    )
+    plan = session.execute(text(f"EXPLAIN (FORMAT JSON) {compiled}")).scalar()
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def keyset_paginate(
+    query: Query,
+    keys: Sequence,
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    descending: bool = True,
+    total: Optional[str] = None,
+) -> KeysetPage:
+    """
+    Paginate a query by seeking past the last row instead of OFFSET.
+
+    keys must end in a unique column (usually (created_at, id)) so the order is
+    total. Each page is a single indexed range scan of limit + 1 rows, so page
+    N costs the same as page 1.
+
+    total: None (skip), "exact" (COUNT over the filtered query) or
+    "estimate" (planner estimate, falls back to exact off PostgreSQL).
+    """
+    page_total, is_estimate = None, False
+    if total == "estimate":
+        try:
+            page_total, is_estimate = estimate_count(query), True
+        except Exception as e:
+            logger.debug(f"Row estimate failed, using exact count: {e}")
+    if total in ("exact", "estimate") and page_total is None:
+        page_total, is_estimate = query.order_by(None).count(), False
+
+    if cursor:
+        after = decode_cursor(cursor, keys)
+        key_tuple, cursor_tuple = tuple_(*keys), tuple_(*after)
+        query = query.filter(key_tuple < cursor_tuple if descending else key_tuple > cursor_tuple)
+
+    direction = desc if descending else asc
+    rows = query.order_by(None).order_by(*(direction(column) for column in keys)).limit(limit + 1).all()
+
+    next_cursor = encode_cursor(rows[limit - 1], keys) if len(rows) > limit else None
+    return KeysetPage(
+        items=rows[:limit],
+        next_cursor=next_cursor,
+        limit=limit,
+        total=page_total,
+        total_is_estimate=is_estimate,
+    )
+
+
 class OptimizedBaseRepository(Generic[T], ABC):
     """
     Optimized base repository with caching and query optimizations.
@@ -177,33 +306,64 @@ class OptimizedBaseRepository(Generic[T], ABC):
             'pages': (total + limit - 1) // limit
         }
 
+    def get_keyset_page(
+        self,
+        tenant_id: UUID = None,
+        cursor: Optional[str] = None,
+        limit: int = 50,
+        active_only: bool = True,
+        total: Optional[str] = None,
+        **filters
+    ) -> KeysetPage:
+        """
+        Cursor-paginated listing ordered by (created_at, id) newest first.
+
+        Unlike get_paginated there is no OFFSET and no COUNT per page.
+        total="cached" reuses the cached count_by_tenant; "estimate" and
+        "exact" are passed through to keyset_paginate.
+        """
+        query = self.db.query(self.model)
+
+        if tenant_id and hasattr(self.model, 'tenant_id'):
+            query = query.filter(self.model.tenant_id == tenant_id)
+
+        if active_only and hasattr(self.model, 'is_active'):
+            query = query.filter(self.model.is_active == True)
+
+        for key, value in filters.items():
+            if hasattr(self.model, key) and value is not None:
+                query = query.filter(getattr(self.model, key) == value)
+
+        page = keyset_paginate(
+            query,
+            keys=(self.model.created_at, self.model.id),
+            limit=limit,
+            cursor=cursor,
+            total=None if total == "cached" else total,
+        )
+        if total == "cached" and tenant_id:
+            page.total = self.count_by_tenant(tenant_id, active_only=active_only, **filters)
+        return page
+
     # Bulk operations to reduce connection pressure
-    def bulk_create(self, data_list: List[Dict[str, Any]], batch_size: int = 100) -> List[T]:
+    def bulk_create(self, data_list: List[Dict[str, Any]], batch_size: int = 1000) -> List[T]:
         """
-        Create multiple records efficiently in batches.
-        Reduces database round-trips.
+        Create multiple records with one multi-row INSERT ... RETURNING per batch.
+        Returned instances are loaded from RETURNING, so no per-row refresh.
         """
         if not data_list:
             return []
 
         created_items = []
 
-        # Process in batches to avoid memory issues
         for i in range(0, len(data_list), batch_size):
             batch = data_list[i:i + batch_size]
-
-            # Create instances
-            instances = [self.model(**data) for data in batch]
-
-            # Add all to session
-            self.db.add_all(instances)
-            self.db.flush()  # Get IDs without committing
-
-            # Refresh instances to get generated values
-            for instance in instances:
-                self.db.refresh(instance)
-
-            created_items.extend(instances)
+            created_items.extend(
+                self.db.scalars(
+                    insert(self.model).returning(self.model, sort_by_parameter_order=True),
+                    batch,
+                ).all()
+            )
 
         self._stats.bulk_operations += 1
         logger.info(f"Bulk created {len(created_items)} {self.model.__tablename__} records")
@@ -214,19 +374,21 @@ class OptimizedBaseRepository(Generic[T], ABC):
         """
         Update multiple records efficiently.
         Each update dict should contain 'id' and fields to update.
+
+        Records updating the same set of fields share one
+        UPDATE ... FROM (VALUES ...) statement (see BulkWriter.update).
         """
         if not updates:
             return 0
 
-        updated_count = 0
-
+        groups: Dict[Tuple[str, ...], List[Dict[str, Any]]] = {}
         for update_data in updates:
-            record_id = update_data.pop('id')
-            if update_data:  # Only update if there are fields to update
-                result = self.db.query(self.model).filter(
-                    self.model.id == record_id
-                ).update(update_data)
-                updated_count += result
+            fields = tuple(sorted(key for key in update_data if key != 'id'))
+            if fields:  # Only update if there are fields to update
+                groups.setdefault(fields, []).append(update_data)
+
+        writer = BulkWriter(self.db, self.model)
+        updated_count = sum(writer.update(rows) for rows in groups.values())
 
         self.db.flush()
         self._stats.bulk_operations += 1
@@ -8,7 +8,7 @@ Demonstrates best practices for:
 - Connection efficiency
 - Performance monitoring
 """
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Union
 from uuid import UUID
 from datetime import datetime, timedelta
 from sqlalchemy.orm import Session
@@ -16,8 +16,12 @@ from sqlalchemy import and_, func
 
 from app.core.models import User, UserRole
 from app.core.cache import cached, cache_user_data, invalidate_user_cache
+from app.repositories.bulk_write import BulkWriter
 from app.repositories.optimized_base import TenantAwareRepository
 
+# Ids per UPDATE ... WHERE id IN (...) statement
+MAX_IN_IDS = 10000
+
 class OptimizedUserRepository(TenantAwareRepository[User]):
     """Optimized user repository with caching and bulk operations"""
 
@@ -140,16 +144,33 @@ class OptimizedUserRepository(TenantAwareRepository[User]):
 
         return users
 
-    def bulk_update_last_login(self, user_ids: List[UUID], login_time: datetime = None) -> int:
-        """Bulk update last login timestamps"""
+    def bulk_update_last_login(
+        self,
+        user_ids: Union[List[UUID], Dict[UUID, datetime]],
+        login_time: datetime = None,
+    ) -> int:
+        """
+        Bulk update last login timestamps.
+
+        user_ids is either a list of ids sharing login_time, or a mapping of
+        id -> login time (e.g. a batch of session events) which is applied with
+        one UPDATE ... FROM (VALUES ...) per batch instead of one UPDATE per user.
+        """
         if not user_ids:
             return 0
 
-        login_time = login_time or datetime.utcnow()
-
-        result = self.db.query(User).filter(
-            User.id.in_(user_ids)
-        ).update({User.last_login: login_time}, synchronize_session=False)
+        if isinstance(user_ids, dict):
+            rows = [{'id': user_id, 'last_login': at} for user_id, at in user_ids.items()]
+            result = BulkWriter(self.db, User).update(rows)
+        else:
+            login_time = login_time or datetime.utcnow()
+            user_ids = list(user_ids)
+            result = 0
+            # Stay well under the bind-parameter limit for very large id lists
+            for i in range(0, len(user_ids), MAX_IN_IDS):
+                result += self.db.query(User).filter(
+                    User.id.in_(user_ids[i:i + MAX_IN_IDS])
+                ).update({User.last_login: login_time}, synchronize_session=False)
 
         self.db.flush()
         return result
@@ -4,6 +4,7 @@ from sqlalchemy.orm import Session
 from sqlalchemy import and_, desc, asc
 from app.core.models import Product, StockMovement, MovementType
 from app.repositories.base import BaseRepository
+from app.repositories.optimized_base import KeysetPage, keyset_paginate
 
 
 class ProductRepository(BaseRepository[Product]):
@@ -17,6 +18,21 @@ class ProductRepository(BaseRepository[Product]):
             query = query.filter(Product.is_active == True)
         return query.order_by(asc(Product.name)).all()
 
+    def get_page_by_tenant(
+        self,
+        tenant_id: UUID,
+        active_only: bool = True,
+        limit: int = 100,
+        cursor: Optional[str] = None
+    ) -> KeysetPage:
+        """Cursor-paginated products for a tenant, in name order like get_by_tenant"""
+        query = self.db.query(Product).filter(Product.tenant_id == tenant_id)
+        if active_only:
+            query = query.filter(Product.is_active == True)
+        return keyset_paginate(
+            query, (Product.name, Product.id), limit=limit, cursor=cursor, descending=False
+        )
+
     def get_by_sku(self, tenant_id: UUID, sku: str) -> Optional[Product]:
         """Get product by SKU within tenant"""
         return self.db.query(Product).filter(
@@ -1,9 +1,11 @@
 # app/repositories/user.py
-from typing import Optional, List
+from typing import Optional, List, Dict
 from uuid import UUID
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 from app.core.models import User, UserRole
 from .base import BaseRepository
+from .optimized_base import KeysetPage, keyset_paginate
 
 
 class UserRepository(BaseRepository[User]):
@@ -27,6 +29,28 @@ class UserRepository(BaseRepository[User]):
             filters["is_active"] = True
         return self.find_by(**filters)
 
+    def get_tenant_users_page(
+        self,
+        tenant_id: UUID,
+        active_only: bool = True,
+        limit: int = 100,
+        cursor: Optional[str] = None
+    ) -> KeysetPage:
+        """Cursor-paginated users for a tenant, newest first"""
+        query = self.db.query(User).filter(User.tenant_id == tenant_id)
+        if active_only:
+            query = query.filter(User.is_active == True)
+        return keyset_paginate(query, (User.created_at, User.id), limit=limit, cursor=cursor)
+
+    def get_tenant_user_counts(self, tenant_id: UUID) -> Dict[str, int]:
+        """Total, active and active-owner counts for a tenant in one aggregate query"""
+        total, active, owners = self.db.query(
+            func.count(User.id),
+            func.count(User.id).filter(User.is_active == True),
+            func.count(User.id).filter(User.is_active == True, User.role == UserRole.admin),
+        ).filter(User.tenant_id == tenant_id).one()
+        return {"total_count": total, "active_count": active, "owner_count": owners}
+
     def get_by_username(self, tenant_id: UUID, username: str) -> Optional[User]:
         """Get user by tenant and username"""
         return self.find_one_by(tenant_id=tenant_id, username=username)
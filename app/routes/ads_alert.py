@@ -8,8 +8,9 @@ from uuid import UUID
 from datetime import datetime, timezone
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Query, status, Response
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.db import get_db
+from app.core.db import get_db, get_async_db
 from app.core.models import User, PromotionStatus, ModerationStatus
 from app.core.dependencies import get_current_user
 from app.core.authorization import get_current_owner, get_current_member_or_owner, require_subscription_feature
@@ -27,7 +28,8 @@ from app.repositories.ads_alert import (
     AdsAlertChatRepository, AdsAlertPromotionRepository,
     AdsAlertMediaRepository, AdsAlertMediaFolderRepository
 )
-from app.services.ads_alert_service import AdsAlertService
+from app.repositories.optimized_base import InvalidCursor
+from app.services.ads_alert_service import AdsAlertService, GridFSStorageService
 from app.services.content_moderation_service import content_moderation_service
 from app.core.usage_limits import (
     check_promotion_limit, increment_promotion_counter,
@@ -39,23 +41,35 @@ logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/ads-alert", tags=["ads-alert"])
 
 
+async def _fetch_page(db: AsyncSession, response: Response, load):
+    """Run a keyset page loader and expose the next cursor as X-Next-Cursor"""
+    try:
+        page = await db.run_sync(load)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    if page.next_cursor:
+        response.headers["X-Next-Cursor"] = page.next_cursor
+    return page.items
+
+
 # ==================== Stats ====================
 
 @router.get("/stats", response_model=AdsAlertStats)
 async def get_stats(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_member_or_owner)
 ):
     """Get statistics for the ads alert system"""
-    service = AdsAlertService(db)
-    return service.get_stats(current_user.tenant_id)
+    return await db.run_sync(
+        lambda sync_db: AdsAlertService(sync_db).get_stats(current_user.tenant_id)
+    )
 
 
 # ==================== Sync Customers ====================
 
 @router.post("/sync-customers")
 async def sync_customers_to_ads_alert(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_owner)
 ):
     """
@@ -66,7 +80,7 @@ async def sync_customers_to_ads_alert(
     """
     from sqlalchemy import text
 
-    result = db.execute(text("""
+    result = await db.execute(text("""
         INSERT INTO ads_alert.chat (tenant_id, customer_id, platform, chat_id, chat_name, customer_name, subscribed, is_active)
         SELECT
             c.tenant_id,
@@ -89,7 +103,7 @@ async def sync_customers_to_ads_alert(
     """), {"tenant_id": str(current_user.tenant_id)})
 
     synced = result.fetchall()
-    db.commit()
+    await db.commit()
 
     logger.info(f"Synced {len(synced)} customers to ads_alert for tenant {current_user.tenant_id}")
 
@@ -100,22 +114,23 @@ async def sync_customers_to_ads_alert(
 
 @router.get("/chats", response_model=List[ChatResponse])
 async def list_chats(
+    response: Response,
     subscribed_only: bool = Query(False, description="Filter to subscribed chats only"),
     tags: Optional[str] = Query(None, description="Comma-separated tags to filter by"),
     limit: int = Query(100, le=500),
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor from the previous page"),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_member_or_owner)
 ):
-    """List all registered chats for the tenant"""
-    chat_repo = AdsAlertChatRepository(db)
+    """List registered chats for the tenant, newest first (cursor paginated)"""
     tags_list = tags.split(",") if tags else None
-    chats = chat_repo.get_by_tenant(
+    return await _fetch_page(db, response, lambda sync_db: AdsAlertChatRepository(sync_db).get_page_by_tenant(
         tenant_id=current_user.tenant_id,
         subscribed_only=subscribed_only,
         tags=tags_list,
-        limit=limit
-    )
-    return chats
+        limit=limit,
+        cursor=cursor
+    ))
 
 
 @router.post("/chats", response_model=ChatResponse, status_code=status.HTTP_201_CREATED)
@@ -151,12 +166,13 @@ async def create_chat(
 @router.get("/chats/{chat_id}", response_model=ChatResponse)
 async def get_chat(
     chat_id: UUID,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_member_or_owner)
 ):
     """Get a specific chat by ID"""
-    chat_repo = AdsAlertChatRepository(db)
-    chat = chat_repo.get_by_id_and_tenant(chat_id, current_user.tenant_id)
+    chat = await db.run_sync(
+        lambda sync_db: AdsAlertChatRepository(sync_db).get_by_id_and_tenant(chat_id, current_user.tenant_id)
+    )
     if not chat:
         raise HTTPException(status_code=404, detail="Chat not found")
     return chat
@@ -196,17 +212,18 @@ async def delete_chat(
 async def list_targetable_customers(
     subscribed_only: bool = Query(True, description="Filter to subscribed customers only"),
     limit: int = Query(100, le=500),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_member_or_owner)
 ):
     """
     List invoice customers that can be targeted for promotions.
     Only returns customers with linked Telegram accounts.
     """
-    chat_repo = AdsAlertChatRepository(db)
-    chats = chat_repo.get_all_customer_chats(
-        tenant_id=current_user.tenant_id,
-        subscribed_only=subscribed_only
+    chats = await db.run_sync(
+        lambda sync_db: AdsAlertChatRepository(sync_db).get_all_customer_chats(
+            tenant_id=current_user.tenant_id,
+            subscribed_only=subscribed_only
+        )
     )
 
     # Return customer-focused data
@@ -227,20 +244,21 @@ async def list_targetable_customers(
 
 @router.get("/promotions", response_model=List[PromotionResponse])
 async def list_promotions(
+    response: Response,
     status: Optional[PromotionStatusEnum] = Query(None),
     limit: int = Query(50, le=200),
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor from the previous page"),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_member_or_owner)
 ):
-    """List all promotions for the tenant"""
-    promotion_repo = AdsAlertPromotionRepository(db)
+    """List promotions for the tenant, newest first (cursor paginated)"""
     status_enum = PromotionStatus[status.value] if status else None
-    promotions = promotion_repo.get_by_tenant(
+    return await _fetch_page(db, response, lambda sync_db: AdsAlertPromotionRepository(sync_db).get_page_by_tenant(
         tenant_id=current_user.tenant_id,
         status=status_enum,
-        limit=limit
-    )
-    return promotions
+        limit=limit,
+        cursor=cursor
+    ))
 
 
 @router.post("/promotions", response_model=PromotionResponse, status_code=status.HTTP_201_CREATED)
@@ -332,12 +350,13 @@ async def create_promotion(
 @router.get("/promotions/{promotion_id}", response_model=PromotionResponse)
 async def get_promotion(
     promotion_id: UUID,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_member_or_owner)
 ):
     """Get a specific promotion by ID"""
-    promotion_repo = AdsAlertPromotionRepository(db)
-    promotion = promotion_repo.get_by_id_and_tenant(promotion_id, current_user.tenant_id)
+    promotion = await db.run_sync(
+        lambda sync_db: AdsAlertPromotionRepository(sync_db).get_by_id_and_tenant(promotion_id, current_user.tenant_id)
+    )
     if not promotion:
         raise HTTPException(status_code=404, detail="Promotion not found")
     return promotion
@@ -488,26 +507,28 @@ async def schedule_promotion(
 @router.get("/folders", response_model=List[FolderResponse])
 async def list_folders(
     parent_id: Optional[UUID] = Query(None, description="Parent folder ID (null for root)"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_member_or_owner)
 ):
     """List folders, optionally filtered by parent"""
-    folder_repo = AdsAlertMediaFolderRepository(db)
-    folders = folder_repo.get_by_tenant(
-        tenant_id=current_user.tenant_id,
-        parent_id=parent_id
+    folders = await db.run_sync(
+        lambda sync_db: AdsAlertMediaFolderRepository(sync_db).get_by_tenant(
+            tenant_id=current_user.tenant_id,
+            parent_id=parent_id
+        )
     )
     return folders
 
 
 @router.get("/folders/tree", response_model=List[FolderTreeResponse])
 async def get_folder_tree(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_member_or_owner)
 ):
     """Get complete folder tree structure"""
-    folder_repo = AdsAlertMediaFolderRepository(db)
-    all_folders = folder_repo.get_all_by_tenant(current_user.tenant_id)
+    all_folders = await db.run_sync(
+        lambda sync_db: AdsAlertMediaFolderRepository(sync_db).get_all_by_tenant(current_user.tenant_id)
+    )
 
     # Build tree structure
     folder_map = {f.id: {"id": f.id, "name": f.name, "parent_id": f.parent_id, "children": []} for f in all_folders}
@@ -573,22 +594,23 @@ async def delete_folder(
 
 @router.get("/media", response_model=List[MediaResponse])
 async def list_media(
+    response: Response,
     folder_id: Optional[UUID] = Query(None, description="Folder ID (null for root)"),
     file_type: Optional[str] = Query(None, description="Filter by file type prefix (e.g., 'image/', 'video/')"),
     limit: int = Query(100, le=500),
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor from the previous page"),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_member_or_owner)
 ):
-    """List media files, optionally filtered by folder"""
-    media_repo = AdsAlertMediaRepository(db)
-    service = AdsAlertService(db)
-
-    media_list = media_repo.get_by_tenant(
+    """List media files, optionally filtered by folder (cursor paginated)"""
+    media_list = await _fetch_page(db, response, lambda sync_db: AdsAlertMediaRepository(sync_db).get_page_by_tenant(
         tenant_id=current_user.tenant_id,
         folder_id=folder_id,
         file_type_prefix=file_type,
-        limit=limit
-    )
+        limit=limit,
+        cursor=cursor
+    ))
+    storage = GridFSStorageService()
 
     # Add URLs to response
     result = []
@@ -600,10 +622,10 @@ async def list_media(
             "filename": media.filename,
             "original_filename": media.original_filename,
             "storage_path": media.storage_path,
-            "url": service.get_media_url(media.storage_path),
+            "url": storage.get_public_url(media.storage_path),
             "file_type": media.file_type,
             "file_size": media.file_size,
-            "thumbnail_url": service.get_media_url(media.thumbnail_path) if media.thumbnail_path else None,
+            "thumbnail_url": storage.get_public_url(media.thumbnail_path) if media.thumbnail_path else None,
             "width": media.width,
             "height": media.height,
             "duration": media.duration,
@@ -619,18 +641,18 @@ async def list_media(
 async def search_media(
     q: str = Query(..., min_length=1, description="Search query"),
     limit: int = Query(50, le=200),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_member_or_owner)
 ):
     """Search media by filename"""
-    media_repo = AdsAlertMediaRepository(db)
-    service = AdsAlertService(db)
-
-    media_list = media_repo.search_by_filename(
-        tenant_id=current_user.tenant_id,
-        search_term=q,
-        limit=limit
+    media_list = await db.run_sync(
+        lambda sync_db: AdsAlertMediaRepository(sync_db).search_by_filename(
+            tenant_id=current_user.tenant_id,
+            search_term=q,
+            limit=limit
+        )
     )
+    storage = GridFSStorageService()
 
     # Add URLs to response
     result = []
@@ -642,10 +664,10 @@ async def search_media(
             "filename": media.filename,
             "original_filename": media.original_filename,
             "storage_path": media.storage_path,
-            "url": service.get_media_url(media.storage_path),
+            "url": storage.get_public_url(media.storage_path),
             "file_type": media.file_type,
             "file_size": media.file_size,
-            "thumbnail_url": service.get_media_url(media.thumbnail_path) if media.thumbnail_path else None,
+            "thumbnail_url": storage.get_public_url(media.thumbnail_path) if media.thumbnail_path else None,
             "width": media.width,
             "height": media.height,
             "duration": media.duration,
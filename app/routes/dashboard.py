@@ -7,10 +7,10 @@ from typing import Optional, List
 from uuid import UUID
 from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
 
-from app.core.db import get_db
+from app.core.db import get_async_read_db
 from app.core.models import User
 from app.core.authorization import get_current_member_or_owner
 
@@ -81,12 +81,13 @@ def _relative_time(dt: datetime) -> str:
 
 @router.get("/stats", response_model=DashboardStats)
 async def get_dashboard_stats(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_read_db),
     current_user: User = Depends(get_current_member_or_owner)
 ):
     """
     Get unified dashboard statistics for the current tenant.
     Returns real data, showing 0 for empty data.
+    Served from the read replica when one is available.
     """
     tenant_id = str(current_user.tenant_id)
     now = datetime.now(timezone.utc)
@@ -95,20 +96,20 @@ async def get_dashboard_stats(
     last_month_start = (start_of_month - timedelta(days=1)).replace(day=1)
 
     # Revenue this month
-    revenue_result = db.execute(text("""
+    revenue_result = (await db.execute(text("""
         SELECT COALESCE(SUM(amount), 0) as revenue,
                COALESCE(MAX(currency), 'KHR') as currency
         FROM invoice.invoice
         WHERE tenant_id = :tenant_id
           AND (status = 'paid' OR verification_status = 'verified')
           AND created_at >= :start_of_month
-    """), {"tenant_id": tenant_id, "start_of_month": start_of_month}).fetchone()
+    """), {"tenant_id": tenant_id, "start_of_month": start_of_month})).fetchone()
 
     revenue_this_month = float(revenue_result.revenue) if revenue_result else 0
     revenue_currency = revenue_result.currency if revenue_result else "KHR"
 
     # Revenue last month (for change calculation)
-    last_month_result = db.execute(text("""
+    last_month_result = (await db.execute(text("""
         SELECT COALESCE(SUM(amount), 0) as revenue
         FROM invoice.invoice
         WHERE tenant_id = :tenant_id
@@ -119,7 +120,7 @@ async def get_dashboard_stats(
         "tenant_id": tenant_id,
         "last_month_start": last_month_start,
         "start_of_month": start_of_month
-    }).fetchone()
+    })).fetchone()
 
     last_month_revenue = float(last_month_result.revenue) if last_month_result else 0
     revenue_change = None
@@ -127,29 +128,29 @@ async def get_dashboard_stats(
         revenue_change = round(((revenue_this_month - last_month_revenue) / last_month_revenue) * 100, 1)
 
     # Pending invoices
-    pending_result = db.execute(text("""
+    pending_result = (await db.execute(text("""
         SELECT COUNT(*) as count, COALESCE(SUM(amount), 0) as amount
         FROM invoice.invoice
         WHERE tenant_id = :tenant_id
           AND status IN ('pending', 'sent', 'draft')
           AND (verification_status IS NULL OR verification_status IN ('pending', 'pending_approval'))
-    """), {"tenant_id": tenant_id}).fetchone()
+    """), {"tenant_id": tenant_id})).fetchone()
 
     pending_count = pending_result.count if pending_result else 0
     pending_amount = float(pending_result.amount) if pending_result else 0
 
     # Scheduled promotions
-    scheduled_result = db.execute(text("""
+    scheduled_result = (await db.execute(text("""
         SELECT COUNT(*) as count
         FROM ads_alert.promotion
         WHERE tenant_id = :tenant_id
           AND status = 'scheduled'
-    """), {"tenant_id": tenant_id}).fetchone()
+    """), {"tenant_id": tenant_id})).fetchone()
 
     scheduled_posts = scheduled_result.count if scheduled_result else 0
 
     # Verified today
-    verified_result = db.execute(text("""
+    verified_result = (await db.execute(text("""
         SELECT
             COUNT(*) FILTER (WHERE verified = true AND verified_at >= :start_of_today) as verified_today,
             COUNT(*) FILTER (
@@ -160,36 +161,36 @@ async def get_dashboard_stats(
             ) as auto_approved
         FROM scriptclient.screenshot
         WHERE tenant_id = :tenant_id
-    """), {"tenant_id": tenant_id, "start_of_today": start_of_today}).fetchone()
+    """), {"tenant_id": tenant_id, "start_of_today": start_of_today})).fetchone()
 
     verified_today = verified_result.verified_today if verified_result else 0
     auto_approved_today = verified_result.auto_approved if verified_result else 0
 
     # Facebook pages count
-    fb_pages = db.execute(text("""
+    fb_pages = (await db.execute(text("""
         SELECT COUNT(DISTINCT fp.id) as count
         FROM facebook_page fp
         JOIN social_identity si ON fp.social_identity_id = si.id
         WHERE si.tenant_id = :tenant_id
           AND si.is_active = true
           AND fp.is_active = true
-    """), {"tenant_id": tenant_id}).scalar() or 0
+    """), {"tenant_id": tenant_id})).scalar() or 0
 
     # TikTok accounts count
-    tiktok_accounts = db.execute(text("""
+    tiktok_accounts = (await db.execute(text("""
         SELECT COUNT(*) FROM social_identity
         WHERE tenant_id = :tenant_id
           AND platform = 'tiktok'
           AND is_active = true
-    """), {"tenant_id": tenant_id}).scalar() or 0
+    """), {"tenant_id": tenant_id})).scalar() or 0
 
     # Telegram linked users count
-    telegram_users = db.execute(text("""
+    telegram_users = (await db.execute(text("""
         SELECT COUNT(*) FROM "user"
         WHERE tenant_id = :tenant_id
           AND telegram_user_id IS NOT NULL
           AND is_active = true
-    """), {"tenant_id": tenant_id}).scalar() or 0
+    """), {"tenant_id": tenant_id})).scalar() or 0
 
     # Recent activity (combined from multiple sources)
     recent_activity = await _get_recent_activity(db, tenant_id)
@@ -215,19 +216,19 @@ async def get_dashboard_stats(
     )
 
 
-async def _get_recent_activity(db: Session, tenant_id: str) -> List[ActivityItem]:
+async def _get_recent_activity(db: AsyncSession, tenant_id: str) -> List[ActivityItem]:
     """Get combined recent activity from multiple sources."""
     activities = []
 
     # Recent paid invoices
-    paid_invoices = db.execute(text("""
+    paid_invoices = (await db.execute(text("""
         SELECT invoice_number, amount, currency, updated_at
         FROM invoice.invoice
         WHERE tenant_id = :tenant_id
           AND status = 'paid'
         ORDER BY updated_at DESC
         LIMIT 3
-    """), {"tenant_id": tenant_id}).fetchall()
+    """), {"tenant_id": tenant_id})).fetchall()
 
     for inv in paid_invoices:
         activities.append(ActivityItem(
@@ -240,14 +241,14 @@ async def _get_recent_activity(db: Session, tenant_id: str) -> List[ActivityItem
         ))
 
     # Recent sent invoices
-    sent_invoices = db.execute(text("""
+    sent_invoices = (await db.execute(text("""
         SELECT invoice_number, amount, currency, updated_at
         FROM invoice.invoice
         WHERE tenant_id = :tenant_id
           AND status = 'sent'
         ORDER BY updated_at DESC
         LIMIT 2
-    """), {"tenant_id": tenant_id}).fetchall()
+    """), {"tenant_id": tenant_id})).fetchall()
 
     for inv in sent_invoices:
         activities.append(ActivityItem(
@@ -260,14 +261,14 @@ async def _get_recent_activity(db: Session, tenant_id: str) -> List[ActivityItem
         ))
 
     # Recent verifications
-    verifications = db.execute(text("""
+    verifications = (await db.execute(text("""
         SELECT verified_at, meta
         FROM scriptclient.screenshot
         WHERE tenant_id = :tenant_id
           AND verified = true
         ORDER BY verified_at DESC
         LIMIT 3
-    """), {"tenant_id": tenant_id}).fetchall()
+    """), {"tenant_id": tenant_id})).fetchall()
 
     for ver in verifications:
         confidence = None
@@ -285,14 +286,14 @@ async def _get_recent_activity(db: Session, tenant_id: str) -> List[ActivityItem
         ))
 
     # Recent scheduled promotions
-    scheduled = db.execute(text("""
+    scheduled = (await db.execute(text("""
         SELECT title, created_at
         FROM ads_alert.promotion
         WHERE tenant_id = :tenant_id
           AND status = 'scheduled'
         ORDER BY created_at DESC
         LIMIT 2
-    """), {"tenant_id": tenant_id}).fetchall()
+    """), {"tenant_id": tenant_id})).fetchall()
 
     for promo in scheduled:
         activities.append(ActivityItem(
@@ -304,7 +305,7 @@ async def _get_recent_activity(db: Session, tenant_id: str) -> List[ActivityItem
         ))
 
     # Low stock alerts from inventory
-    low_stock = db.execute(text("""
+    low_stock = (await db.execute(text("""
         SELECT name, current_stock
         FROM inventory.products
         WHERE tenant_id = :tenant_id
@@ -313,7 +314,7 @@ async def _get_recent_activity(db: Session, tenant_id: str) -> List[ActivityItem
           AND current_stock <= low_stock_threshold
         ORDER BY updated_at DESC
         LIMIT 2
-    """), {"tenant_id": tenant_id}).fetchall()
+    """), {"tenant_id": tenant_id})).fetchall()
 
     for item in low_stock:
         activities.append(ActivityItem(
@@ -4,19 +4,29 @@ Database health and performance monitoring endpoints.
 
 Provides insights into database performance, query optimization,
 and connection management for production monitoring.
+
+Everything here is fleet-wide (statements and caches are shared by every
+tenant), so the whole router is restricted to platform administrators.
+Public liveness is served by /health in main.py.
 """
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from typing import Dict, Any, List
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
-from app.core.auth import get_current_owner
+from app.core.authorization import get_platform_admin
 from app.core.models import User
 from app.core.db import get_db
 from app.core.db_monitor import db_monitor, run_health_check
+from app.core.query_budget import get_recent_violations
 from app.core.cache import cache_stats, cleanup_all_caches, clear_all_caches
 from app.repositories.optimized_base import get_global_stats
 
-router = APIRouter(prefix="/db", tags=["Database Health"])
+router = APIRouter(
+    prefix="/db",
+    tags=["Database Health"],
+    dependencies=[Depends(get_platform_admin)],
+)
 
 @router.get("/health", response_model=Dict[str, Any])
 async def database_health_check():
@@ -36,11 +46,11 @@ async def database_health_check():
 
 @router.get("/performance", response_model=Dict[str, Any])
 async def get_performance_metrics(
-    current_user: User = Depends(get_current_owner)
+    current_user: User = Depends(get_platform_admin)
 ):
     """
     Get detailed database performance metrics.
-    Only accessible to tenant owners.
+    Only accessible to platform administrators.
     """
     try:
         # Get monitoring stats
@@ -55,6 +65,9 @@ async def get_performance_metrics(
         # Get slow queries
         slow_queries = db_monitor.get_slow_queries(limit=5)
 
+        # Get statements consuming the most database time
+        top_statements = db_monitor.get_top_statements(limit=5)
+
         # Get optimization recommendations
         recommendations = db_monitor.get_optimization_recommendations()
 
@@ -63,6 +76,8 @@ async def get_performance_metrics(
             "cache": cache_statistics,
             "repositories": repository_stats,
             "slow_queries": slow_queries,
+            "top_statements": top_statements,
+            "query_budget_violations": get_recent_violations(limit=10),
             "recommendations": recommendations,
             "tenant_id": str(current_user.tenant_id)
         }
@@ -72,7 +87,7 @@ async def get_performance_metrics(
 @router.get("/slow-queries", response_model=List[Dict[str, Any]])
 async def get_slow_queries(
     limit: int = 20,
-    current_user: User = Depends(get_current_owner)
+    current_user: User = Depends(get_platform_admin)
 ):
     """
     Get recent slow queries for analysis.
@@ -84,9 +99,52 @@ async def get_slow_queries(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get slow queries: {str(e)}")
 
+@router.get("/top-statements", response_model=Dict[str, Any])
+async def get_top_statements(
+    limit: int = Query(10, ge=1, le=100),
+    order_by: str = Query("total_time_ms", pattern="^(total_time_ms|calls|p95_ms|p99_ms|rows)$"),
+    current_user: User = Depends(get_platform_admin)
+):
+    """
+    Get the statement fingerprints and endpoints that dominate database time.
+
+    Literals are stripped so every execution of the same query shape is
+    aggregated into one row with call count, rows returned, total time and
+    p50/p95/p99 latency.
+    """
+    try:
+        return {
+            "statements": db_monitor.get_top_statements(limit=limit, order_by=order_by),
+            "endpoints": db_monitor.get_top_endpoints(limit=limit, order_by=order_by),
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to get top statements: {str(e)}")
+
+@router.get("/index-advice", response_model=Dict[str, Any])
+async def get_index_advice(
+    refresh: bool = False,
+    current_user: User = Depends(get_platform_admin)
+):
+    """
+    Get ranked index proposals from EXPLAIN plans of sampled slow queries.
+
+    Each entry names the table being sequentially scanned, the predicates
+    driving the scan (literals redacted to ?), the proposed CREATE INDEX DDL and the total database
+    time of the statements it would serve. With refresh=true the plans are
+    re-collected synchronously instead of returning the cached report.
+    """
+    try:
+        if refresh:
+            report = await run_in_threadpool(db_monitor.build_index_report)
+        else:
+            report = db_monitor.get_index_report()
+        return {"proposals": report, "count": len(report)}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to build index advice: {str(e)}")
+
 @router.post("/cache/cleanup", response_model=Dict[str, Any])
 async def cleanup_caches(
-    current_user: User = Depends(get_current_owner)
+    current_user: User = Depends(get_platform_admin)
 ):
     """
     Cleanup expired cache entries.
@@ -106,7 +164,7 @@ async def cleanup_caches(
 
 @router.post("/cache/clear", response_model=Dict[str, str])
 async def clear_all_cache(
-    current_user: User = Depends(get_current_owner)
+    current_user: User = Depends(get_platform_admin)
 ):
     """
     Clear all cache entries.
@@ -120,7 +178,7 @@ async def clear_all_cache(
 
 @router.get("/cache/stats", response_model=Dict[str, Any])
 async def get_cache_statistics(
-    current_user: User = Depends(get_current_owner)
+    current_user: User = Depends(get_platform_admin)
 ):
     """
     Get detailed cache performance statistics.
@@ -132,7 +190,7 @@ async def get_cache_statistics(
 
 @router.get("/optimization-tips", response_model=List[Dict[str, str]])
 async def get_optimization_tips(
-    current_user: User = Depends(get_current_owner)
+    current_user: User = Depends(get_platform_admin)
 ):
     """
     Get personalized database optimization recommendations.
@@ -168,7 +226,7 @@ async def get_optimization_tips(
 
 @router.post("/monitoring/reset", response_model=Dict[str, str])
 async def reset_monitoring_stats(
-    current_user: User = Depends(get_current_owner)
+    current_user: User = Depends(get_platform_admin)
 ):
     """
     Reset database monitoring statistics.
@@ -182,7 +240,7 @@ async def reset_monitoring_stats(
 
 @router.get("/connection-info", response_model=Dict[str, Any])
 async def get_connection_info(
-    current_user: User = Depends(get_current_owner),
+    current_user: User = Depends(get_platform_admin),
     db: Session = Depends(get_db)
 ):
     """
@@ -231,13 +289,13 @@ settings = get_settings()
 
 if settings.ENV == "dev":
     @router.post("/monitoring/enable")
-    async def enable_monitoring(current_user: User = Depends(get_current_owner)):
+    async def enable_monitoring(current_user: User = Depends(get_platform_admin)):
         """Enable database monitoring (dev only)"""
         db_monitor.enable_monitoring()
         return {"message": "Database monitoring enabled"}
 
     @router.post("/monitoring/disable")
-    async def disable_monitoring(current_user: User = Depends(get_current_owner)):
+    async def disable_monitoring(current_user: User = Depends(get_platform_admin)):
         """Disable database monitoring (dev only)"""
         db_monitor.disable_monitoring()
         return {"message": "Database monitoring disabled"}
\ No newline at end of file
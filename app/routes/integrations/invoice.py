@@ -16,14 +16,16 @@ from pydantic import BaseModel
 import httpx
 import json
 import logging
-from io import BytesIO
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
 
 from app.core.config import get_settings
+from app.core.cpu_pool import CPUTaskTimeout, cpu_pool
 from app.core.dependencies import get_current_user
+from app.core.invoice_documents import build_invoices_xlsx, generate_pdf_from_invoice
 from app.core.models import User
-from app.core.db import get_db
+from app.core.db import get_db, get_async_db, get_async_read_db
 from app.routes.subscriptions import require_pro_tier
 from app.core.authorization import require_subscription_feature, get_current_member_or_owner
 from app.core.usage_limits import (
@@ -395,7 +397,7 @@ class RegisteredClientResponse(BaseModel):
 @router.get("/registered-clients")
 async def list_registered_clients(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     limit: int = Query(default=50, ge=1, le=100),
     skip: int = Query(default=0, ge=0),
     telegram_linked: Optional[bool] = Query(default=None, description="Filter by Telegram linked status"),
@@ -440,7 +442,7 @@ async def list_registered_clients(
 
         query += " ORDER BY created_at DESC LIMIT :limit OFFSET :offset"
 
-        result = db.execute(text(query), params)
+        result = await db.execute(text(query), params)
         rows = result.fetchall()
 
         clients = []
@@ -479,7 +481,7 @@ async def list_registered_clients(
             query_params = {"tenant_id": str(current_user.tenant_id)}
             for i, cid in enumerate(client_ids):
                 query_params[f"cid_{i}"] = cid
-            invoices_result = db.execute(text(invoices_query), query_params)
+            invoices_result = await db.execute(text(invoices_query), query_params)
             invoices_rows = invoices_result.fetchall()
 
             # Group invoices by customer_id
@@ -513,7 +515,7 @@ async def list_registered_clients(
         elif telegram_linked is False:
             count_query += " AND telegram_chat_id IS NULL"
 
-        count_result = db.execute(text(count_query), {
+        count_result = await db.execute(text(count_query), {
             "tenant_id": str(current_user.tenant_id),
             "merchant_id": str(current_user.id)
         })
@@ -701,7 +703,7 @@ async def check_registered_clients_schema(
 async def get_registered_client(
     client_id: str,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     include_pending_invoices: bool = Query(default=False, description="Include pending invoices")
 ):
     """
@@ -715,7 +717,7 @@ async def get_registered_client(
     """
     try:
         # Query with ownership validation
-        result = db.execute(
+        result = await db.execute(
             text("""
                 SELECT
                     id, tenant_id, merchant_id, name, email, phone, address,
@@ -756,7 +758,7 @@ async def get_registered_client(
 
         # Include pending invoices if requested
         if include_pending_invoices:
-            invoices_result = db.execute(
+            invoices_result = await db.execute(
                 text("""
                     SELECT
                         id, invoice_number, amount, currency, bank,
@@ -988,7 +990,7 @@ async def generate_batch_code(
 @router.get("/batch-codes")
 async def list_batch_codes(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     List all batch registration codes for the current merchant.
@@ -1002,7 +1004,7 @@ async def list_batch_codes(
     logger = logging.getLogger(__name__)
 
     try:
-        result = db.execute(
+        result = await db.execute(
             text("""
                 SELECT
                     id, code, batch_name, max_uses, use_count,
@@ -1135,7 +1137,11 @@ async def send_invoice_to_telegram(
 
     # Generate PDF using the same elegant design as the download endpoint
     invoice_id = invoice.get("id")
-    pdf_bytes = generate_pdf_from_invoice(invoice)
+    try:
+        pdf_bytes = await cpu_pool.run(generate_pdf_from_invoice, invoice)
+    except Exception as e:
+        logger.warning(f"PDF rendering failed for invoice {invoice_id}: {e}")
+        pdf_bytes = None
 
     if not pdf_bytes:
         # Fall back to text message if PDF generation fails
@@ -1284,7 +1290,7 @@ async def get_registered_customer_for_invoice(
 @router.get("/invoices")
 async def list_invoices(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     limit: int = Query(default=50, ge=1, le=100),
     skip: int = Query(default=0, ge=0),
     customer_id: Optional[str] = None,
@@ -1327,7 +1333,7 @@ async def list_invoices(
 
         query += " ORDER BY i.created_at DESC"
 
-        result = db.execute(text(query), params)
+        result = await db.execute(text(query), params)
         rows = result.fetchall()
 
         for row in rows:
@@ -1550,7 +1556,8 @@ async def create_invoice(
 # NOTE: Subscription check done inline below instead of decorator (decorator was causing 400 errors)
 async def export_invoices(
     current_user: User = Depends(get_current_member_or_owner),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
+    read_db: AsyncSession = Depends(get_async_read_db),
     format: str = Query(default="csv", pattern="^(csv|xlsx)$"),
     start_date: Optional[str] = None,
     end_date: Optional[str] = None
@@ -1559,6 +1566,8 @@ async def export_invoices(
     Export invoices to CSV or Excel format.
 
     Requires Pro tier subscription when tier enforcement is enabled.
+    Usage limits and counters use the primary; the invoice rows are read from
+    the read replica when one is available.
 
     Args:
         format: Export format (csv or xlsx)
@@ -1571,21 +1580,18 @@ async def export_invoices(
     # Check tier enforcement
     if is_tier_enforced():
         from app.routes.subscriptions import has_pro_access, get_or_create_subscription
-        from app.core.db import get_db as _get_db
-        sub_db = next(_get_db())
-        try:
-            subscription = get_or_create_subscription(sub_db, current_user)
-            if not has_pro_access(subscription):
-                raise HTTPException(
-                    status_code=403,
-                    detail={
-                        "error": "Pro tier required",
-                        "message": "Export is a Pro feature. Please upgrade your subscription.",
-                        "upgrade_url": "/dashboard/integrations"
-                    }
-                )
-        finally:
-            sub_db.close()
+        pro_access = await db.run_sync(
+            lambda sync_db: has_pro_access(get_or_create_subscription(sync_db, current_user))
+        )
+        if not pro_access:
+            raise HTTPException(
+                status_code=403,
+                detail={
+                    "error": "Pro tier required",
+                    "message": "Export is a Pro feature. Please upgrade your subscription.",
+                    "upgrade_url": "/dashboard/integrations"
+                }
+            )
 
     # Query invoices directly from PostgreSQL
     query = """
@@ -1614,7 +1620,7 @@ async def export_invoices(
     query += " ORDER BY i.created_at DESC"
 
     try:
-        result = db.execute(text(query), params)
+        result = await read_db.execute(text(query), params)
         rows = result.fetchall()
     except Exception as e:
         logger.error(f"Error fetching invoices for export: {e}")
@@ -1650,51 +1656,16 @@ async def export_invoices(
         content_type = "text/csv"
         filename = f"invoices_{start_date or 'all'}.csv"
     else:
-        from openpyxl import Workbook
-        from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
-        from openpyxl.utils import get_column_letter
-
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "Invoices"
-
-        header_font = Font(name="Calibri", bold=True, color="FFFFFF", size=11)
-        header_fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
-        header_alignment = Alignment(horizontal="center", vertical="center")
-        thin_border = Border(
-            left=Side(style="thin"), right=Side(style="thin"),
-            top=Side(style="thin"), bottom=Side(style="thin"),
-        )
-
-        for col_idx, header in enumerate(headers, 1):
-            cell = ws.cell(row=1, column=col_idx, value=header)
-            cell.font = header_font
-            cell.fill = header_fill
-            cell.alignment = header_alignment
-            cell.border = thin_border
-
-        for row_idx, row in enumerate(rows, 2):
-            for col_idx, value in enumerate(format_row(row), 1):
-                cell = ws.cell(row=row_idx, column=col_idx, value=value)
-                cell.border = thin_border
-
-        for col_idx in range(1, len(headers) + 1):
-            max_length = len(headers[col_idx - 1])
-            for row_idx in range(2, len(rows) + 2):
-                cell_value = str(ws.cell(row=row_idx, column=col_idx).value or "")
-                max_length = max(max_length, len(cell_value))
-            ws.column_dimensions[get_column_letter(col_idx)].width = min(max_length + 3, 40)
-
-        ws.freeze_panes = "A2"
-
-        buffer = BytesIO()
-        wb.save(buffer)
-        content = buffer.getvalue()
+        # Building the workbook is CPU-bound; keep it off the event loop
+        try:
+            content = await cpu_pool.run(build_invoices_xlsx, headers, [format_row(row) for row in rows])
+        except CPUTaskTimeout:
+            raise HTTPException(status_code=504, detail="Export took too long; narrow the date range")
         content_type = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
         filename = f"invoices_{start_date or 'all'}.xlsx"
 
     # Increment export counter after successful generation
-    increment_export_counter(current_user.tenant_id, db)
+    await db.run_sync(lambda sync_db: increment_export_counter(current_user.tenant_id, sync_db))
 
     return Response(
         content=content,
@@ -1707,12 +1678,12 @@ async def export_invoices(
 async def get_invoice(
     invoice_id: str,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get a specific invoice by ID."""
     # Try PostgreSQL first (for registered client invoices)
     try:
-        result = db.execute(
+        result = await db.execute(
             text("""
                 SELECT i.id, i.tenant_id, i.customer_id, i.invoice_number,
                        i.amount, i.status, i.items, i.meta,
@@ -2133,214 +2104,6 @@ async def verify_standalone_screenshot(
 # PDF download endpoint
 # ============================================================================
 
-def generate_pdf_from_invoice(invoice: dict) -> bytes:
-    """Generate a professional invoice PDF with elegant design using fpdf2."""
-    try:
-        from fpdf import FPDF
-        from datetime import datetime
-
-        # Extract invoice data
-        invoice_num = invoice.get("invoice_number", "N/A")
-        customer_name = invoice.get("customer", {}).get("name") if isinstance(invoice.get("customer"), dict) else invoice.get("customer_name", "Unknown")
-        customer_email = invoice.get("customer", {}).get("email") if isinstance(invoice.get("customer"), dict) else None
-        customer_phone = invoice.get("customer", {}).get("phone") if isinstance(invoice.get("customer"), dict) else None
-        customer_address = invoice.get("customer", {}).get("address") if isinstance(invoice.get("customer"), dict) else None
-
-        total = float(invoice.get("total") or invoice.get("amount") or 0)
-        currency = invoice.get("currency", "USD")
-        bank = invoice.get("bank")
-        expected_account = invoice.get("expected_account")
-        recipient_name = invoice.get("recipient_name")
-        due_date = invoice.get("due_date") or "N/A"
-        items = invoice.get("items", [])
-
-        # Premium color scheme
-        CREAM = (245, 237, 230)
-        DARK = (51, 51, 51)
-        ACCENT = (139, 115, 85)
-        GRAY = (120, 120, 120)
-        TABLE_HEADER = (230, 220, 210)
-
-        pdf = FPDF()
-        pdf.add_page()
-        pdf.set_auto_page_break(auto=True, margin=20)
-
-        # Elegant cream background
-        pdf.set_fill_color(*CREAM)
-        pdf.rect(0, 0, 210, 297, 'F')
-
-        # Company branding
-        pdf.set_y(15)
-        pdf.set_font("Helvetica", "B", 20)
-        pdf.set_text_color(*ACCENT)
-        pdf.cell(0, 10, "YOUR COMPANY", ln=True, align="C")
-
-        pdf.set_draw_color(*ACCENT)
-        pdf.set_line_width(0.5)
-        pdf.line(85, 27, 125, 27)
-        pdf.ln(8)
-
-        # Invoice header
-        pdf.set_font("Helvetica", "B", 11)
-        pdf.set_text_color(*GRAY)
-        pdf.set_xy(15, 38)
-        pdf.cell(90, 6, "INVOICE NO.", ln=False)
-        pdf.set_xy(110, 38)
-        pdf.cell(85, 6, "BILLED TO", ln=True)
-
-        pdf.set_font("Helvetica", "", 11)
-        pdf.set_text_color(*DARK)
-        pdf.set_xy(15, 45)
-        pdf.cell(90, 6, str(invoice_num), ln=False)
-        pdf.set_xy(110, 45)
-        pdf.cell(85, 6, str(customer_name), ln=True)
-
-        pdf.set_xy(15, 51)
-        pdf.set_font("Helvetica", "", 9)
-        pdf.set_text_color(*GRAY)
-        formatted_date = datetime.now().strftime("%m/%d/%Y")
-        pdf.cell(90, 5, formatted_date, ln=False)
-
-        pdf.set_xy(110, 51)
-        if customer_email:
-            pdf.cell(85, 5, str(customer_email), ln=True)
-            pdf.set_xy(110, 56)
-        if customer_phone:
-            pdf.cell(85, 5, str(customer_phone), ln=True)
-            pdf.set_xy(110, 61)
-        if customer_address:
-            pdf.set_font("Helvetica", "", 8)
-            pdf.multi_cell(85, 4, str(customer_address)[:40])
-
-        pdf.ln(8)
-
-        # Title with decorative line
-        pdf.set_font("Helvetica", "B", 14)
-        pdf.set_text_color(*ACCENT)
-        pdf.cell(0, 8, "INVOICE", ln=True, align="C")
-        pdf.set_draw_color(*ACCENT)
-        pdf.set_line_width(0.3)
-        pdf.line(80, pdf.get_y(), 130, pdf.get_y())
-        pdf.ln(8)
-
-        # Items table
-        if items and len(items) > 0:
-            pdf.set_fill_color(*TABLE_HEADER)
-            pdf.set_text_color(*DARK)
-            pdf.set_font("Helvetica", "B", 10)
-            pdf.cell(75, 9, "DESCRIPTION", border=1, fill=True, align="L")
-            pdf.cell(30, 9, "PRICE", border=1, align="C", fill=True)
-            pdf.cell(20, 9, "QTY", border=1, align="C", fill=True)
-            pdf.cell(40, 9, "AMOUNT", border=1, align="R", fill=True, ln=True)
-
-            pdf.set_font("Helvetica", "", 10)
-            for idx, item in enumerate(items):
-                pdf.set_fill_color(255, 255, 255) if idx % 2 == 0 else pdf.set_fill_color(250, 248, 245)
-                description = str(item.get("description", ""))[:35]
-                quantity = item.get("quantity", 1)
-                price = float(item.get("unit_price", 0))
-                item_total = float(item.get("total", price * quantity))
-
-                pdf.cell(75, 8, description, border=1, fill=True)
-                if currency == "KHR":
-                    pdf.cell(30, 8, f"{price:,.0f}", border=1, align="C", fill=True)
-                    pdf.cell(20, 8, str(int(quantity)), border=1, align="C", fill=True)
-                    pdf.cell(40, 8, f"{item_total:,.0f}", border=1, align="R", fill=True, ln=True)
-                else:
-                    pdf.cell(30, 8, f"${price:.2f}", border=1, align="C", fill=True)
-                    pdf.cell(20, 8, str(int(quantity)), border=1, align="C", fill=True)
-                    pdf.cell(40, 8, f"${item_total:.2f}", border=1, align="R", fill=True, ln=True)
-            pdf.ln(5)
-
-        # Total box (better positioning)
-        total_x = 130
-        pdf.set_x(total_x)
-        pdf.set_font("Helvetica", "B", 11)
-        pdf.set_text_color(255, 255, 255)
-        pdf.set_fill_color(*ACCENT)
-        pdf.cell(35, 12, "TOTAL", fill=True, align="C")
-        if currency == "KHR":
-            pdf.cell(0, 12, f"{total:,.0f} KHR", fill=True, align="C", ln=True)
-        else:
-            pdf.cell(0, 12, f"${total:.2f}", fill=True, align="C", ln=True)
-
-        pdf.ln(15)
-
-        # Payment info (more prominent)
-        if bank or expected_account or recipient_name:
-            pdf.set_font("Helvetica", "B", 11)
-            pdf.set_text_color(*ACCENT)
-            pdf.cell(0, 7, "Payment Information", ln=True)
-            pdf.set_draw_color(*ACCENT)
-            pdf.set_line_width(0.3)
-            pdf.line(15, pdf.get_y(), 75, pdf.get_y())
-            pdf.ln(4)
-
-            pdf.set_font("Helvetica", "", 10)
-            pdf.set_text_color(*DARK)
-            if bank:
-                pdf.cell(0, 6, f"Bank: {bank}", ln=True)
-            if expected_account:
-                pdf.cell(0, 6, f"Account: {expected_account}", ln=True)
-            if recipient_name:
-                pdf.cell(0, 6, f"Recipient: {recipient_name}", ln=True)
-
-        # Thank you message (fixed positioning)
-        current_y = pdf.get_y()
-        if current_y < 200:
-            pdf.set_y(220)
-        else:
-            pdf.ln(15)
-
-        pdf.set_font("Helvetica", "B", 13)
-        pdf.set_text_color(*ACCENT)
-        pdf.cell(0, 8, "Thank you", ln=True, align="C")
-        pdf.set_font("Helvetica", "", 10)
-        pdf.cell(0, 5, "for your purchase!", ln=True, align="C")
-
-        # Footer (fixed at bottom)
-        pdf.set_y(-25)
-        pdf.set_font("Helvetica", "", 7)
-        pdf.set_text_color(*GRAY)
-        pdf.cell(0, 4, "Generated by Invoice System", ln=True, align="C")
-
-        return bytes(pdf.output())
-
-    except Exception as e:
-        logger.warning(f"fpdf2 failed: {e}, using fallback")
-        invoice_num = invoice.get("invoice_number", "N/A")
-        customer_name = invoice.get("customer", {}).get("name") if isinstance(invoice.get("customer"), dict) else invoice.get("customer_name", "Unknown")
-        total = invoice.get("total") or invoice.get("amount") or 0
-        currency = invoice.get("currency", "USD")
-
-        if currency == "KHR":
-            amount_str = f"{float(total):,.0f} KHR"
-        else:
-            amount_str = f"${float(total):.2f}"
-
-        content = f"Invoice: {invoice_num} | Customer: {customer_name} | Total: {amount_str}"
-        pdf_fallback = f"""%PDF-1.4
-1 0 obj << /Type /Catalog /Pages 2 0 R >> endobj
-2 0 obj << /Type /Pages /Kids [3 0 R] /Count 1 >> endobj
-3 0 obj << /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents 4 0 R /Resources << /Font << /F1 5 0 R >> >> >> endobj
-4 0 obj << /Length 100 >> stream
-BT /F1 12 Tf 50 700 Td ({content}) Tj ET
-endstream endobj
-5 0 obj << /Type /Font /Subtype /Type1 /BaseFont /Helvetica >> endobj
-xref 0 6
-0000000000 65535 f
-0000000009 00000 n
-0000000058 00000 n
-0000000115 00000 n
-0000000230 00000 n
-0000000380 00000 n
-trailer << /Size 6 /Root 1 0 R >>
-startxref 450
-%%EOF"""
-        return pdf_fallback.encode('latin-1')
-
-
-
 @router.get("/invoices/{invoice_id}/pdf")
 async def download_invoice_pdf(
     invoice_id: str,
@@ -2419,7 +2182,7 @@ async def download_invoice_pdf(
                     "address": row.customer_address
                 }
             }
-            pdf_content = generate_pdf_from_invoice(invoice)
+            pdf_content = await cpu_pool.run(generate_pdf_from_invoice, invoice)
             return Response(
                 content=pdf_content,
                 media_type="application/pdf",
@@ -2587,9 +2350,9 @@ async def send_invoice_to_customer(
 @require_subscription_feature('advanced_reports')
 async def get_stats(
     current_user: User = Depends(get_current_member_or_owner),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
-    """Get invoice statistics and dashboard data from PostgreSQL."""
+    """Get invoice statistics and dashboard data from PostgreSQL (read replica when available)."""
     from datetime import datetime, timedelta
 
     try:
@@ -2602,7 +2365,7 @@ async def get_stats(
             WHERE tenant_id = :tenant_id
             GROUP BY status
         """)
-        status_result = db.execute(status_query, {"tenant_id": tenant_id}).fetchall()
+        status_result = (await db.execute(status_query, {"tenant_id": tenant_id})).fetchall()
 
         status_counts = {row.status: row.count for row in status_result if row.status}
         total_invoices = sum(status_counts.values())
@@ -2616,7 +2379,7 @@ async def get_stats(
             WHERE tenant_id = :tenant_id
             AND status IN ('paid', 'verified')
         """)
-        revenue_result = db.execute(revenue_query, {"tenant_id": tenant_id}).fetchone()
+        revenue_result = (await db.execute(revenue_query, {"tenant_id": tenant_id})).fetchone()
 
         # Get recent invoices (last 30 days)
         thirty_days_ago = datetime.now() - timedelta(days=30)
@@ -2626,10 +2389,10 @@ async def get_stats(
             WHERE tenant_id = :tenant_id
             AND created_at >= :thirty_days_ago
         """)
-        recent_result = db.execute(recent_query, {
+        recent_result = (await db.execute(recent_query, {
             "tenant_id": tenant_id,
             "thirty_days_ago": thirty_days_ago
-        }).fetchone()
+        })).fetchone()
 
         # Get customer count
         customer_query = text("""
@@ -2637,7 +2400,7 @@ async def get_stats(
             FROM invoice.customer
             WHERE tenant_id = :tenant_id
         """)
-        customer_result = db.execute(customer_query, {"tenant_id": tenant_id}).fetchone()
+        customer_result = (await db.execute(customer_query, {"tenant_id": tenant_id})).fetchone()
 
         return {
             "total_invoices": total_invoices,
@@ -4,10 +4,11 @@ from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile
 from sqlalchemy.orm import Session
 from pydantic import BaseModel, Field
 
-from app.deps import get_db
+from app.deps import get_db, get_read_db
 from app.core.authorization import get_current_member_or_owner, require_role, require_subscription_feature
 from app.core.models import User, Product, StockMovement, MovementType, UserRole
 from app.repositories.product import ProductRepository
+from app.repositories.optimized_base import InvalidCursor
 from app.repositories.stock_movement import StockMovementRepository
 from app.services.product_image_service import ProductImageService
 from app.core.usage_limits import check_product_limit, check_storage_limit, increment_storage_usage
@@ -106,19 +107,32 @@ def _add_image_url(product: Product) -> dict:
 
 @router.get("/products", response_model=List[ProductResponse])
 def list_products(
+    response: Response,
     active_only: bool = Query(True, description="Filter active products only"),
     search: Optional[str] = Query(None, description="Search by name or SKU"),
     low_stock_only: bool = Query(False, description="Show only low stock products"),
+    limit: Optional[int] = Query(None, ge=1, le=500, description="Page size (enables cursor pagination)"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor from the previous page"),
     current_user: User = Depends(get_current_member_or_owner),
     db: Session = Depends(get_db)
 ):
-    """List products for the current tenant"""
+    """List products for the current tenant (cursor paginated when limit/cursor is given)"""
     product_repo = ProductRepository(db)
 
     if search:
         products = product_repo.search_products(current_user.tenant_id, search)
     elif low_stock_only:
         products = product_repo.get_low_stock_products(current_user.tenant_id)
+    elif limit or cursor:
+        try:
+            page = product_repo.get_page_by_tenant(
+                current_user.tenant_id, active_only, limit=limit or 100, cursor=cursor
+            )
+        except InvalidCursor as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+        if page.next_cursor:
+            response.headers["X-Next-Cursor"] = page.next_cursor
+        products = page.items
     else:
         products = product_repo.get_by_tenant(current_user.tenant_id, active_only)
 
@@ -318,7 +332,7 @@ def list_movements(
 @router.get("/low-stock", response_model=List[ProductResponse])
 def get_low_stock_products(
     current_user: User = Depends(get_current_member_or_owner),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get products below their low stock threshold"""
     product_repo = ProductRepository(db)
@@ -331,9 +345,9 @@ def get_movement_summary(
     start_date: Optional[dt.datetime] = Query(None, description="Start date for summary"),
     end_date: Optional[dt.datetime] = Query(None, description="End date for summary"),
     current_user: User = Depends(get_current_member_or_owner),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
-    """Get movement summary by product"""
+    """Get movement summary by product (read replica when available)"""
     movement_repo = StockMovementRepository(db)
     summary = movement_repo.get_movement_summary(
         current_user.tenant_id,
@@ -13,13 +13,15 @@ from sqlalchemy.exc import SQLAlchemyError
 
 from app.deps import LoggerDep
 from app.core.dependencies import get_current_user
-from app.core.authorization import get_current_owner
+from app.core.authorization import PlatformAdminRequired, get_current_owner, is_platform_admin
+from app.core.config import get_settings
 from app.core.models import User, UserRole, IPRuleType, IPAccessRule, RateLimitViolation
 from app.core.db import SessionLocal
+from app.core.ip_rules import ip_rule_store, parse_rule_target
 from app.repositories.ip_access import IPAccessRepository
 from app.core.exceptions import (
     IPAlreadyWhitelisted, IPAlreadyBlacklisted, IPRuleNotFound, IPNotBanned,
-    InvalidIPAddress, IPRuleCreationFailed, DatabaseError
+    InvalidIPAddress, IPRangeTooBroad, IPRuleCreationFailed, DatabaseError
 )
 
 
@@ -29,7 +31,7 @@ router = APIRouter(prefix="/api/admin/ip", tags=["admin", "ip-management"])
 # Request/Response models
 class CreateIPRuleRequest(BaseModel):
     """Request to create IP access rule"""
-    ip_address: str = Field(..., description="IP address to whitelist/blacklist", min_length=7, max_length=45)
+    ip_address: str = Field(..., description="IP address or CIDR block to whitelist/blacklist", min_length=7, max_length=45)
     rule_type: IPRuleType = Field(..., description="Rule type: whitelist, blacklist, or auto_banned")
     reason: Optional[str] = Field(None, description="Reason for the rule")
     expires_hours: Optional[int] = Field(None, description="Hours until rule expires (null = permanent)", ge=1)
@@ -80,14 +82,34 @@ class RateLimitViolationResponse(BaseModel):
 
 
 def validate_ip_address(ip_address: str) -> bool:
-    """Validate IP address format (IPv4 or IPv6)"""
+    """Validate IP address format (IPv4 or IPv6 address, or CIDR block such as 203.0.113.0/24)"""
     try:
-        ipaddress.ip_address(ip_address)
+        if "/" in ip_address:
+            ipaddress.ip_network(ip_address, strict=False)
+        else:
+            ipaddress.ip_address(ip_address)
         return True
     except ValueError:
         return False
 
 
+def check_rule_scope(ip_address: str, user: User) -> None:
+    """
+    Rules apply to every tenant, so CIDR blocks are limited to platform
+    administrators and may not be broader than the configured minimum prefix.
+    """
+    target = parse_rule_target(ip_address)
+    if not isinstance(target, (ipaddress.IPv4Network, ipaddress.IPv6Network)):
+        return
+    if not is_platform_admin(user):
+        raise PlatformAdminRequired()
+
+    settings = get_settings()
+    min_prefix = settings.IP_RULE_MIN_PREFIX_V4 if target.version == 4 else settings.IP_RULE_MIN_PREFIX_V6
+    if target.prefixlen < min_prefix:
+        raise IPRangeTooBroad(ip_address=ip_address, min_prefix=min_prefix)
+
+
 @router.post("/rules", response_model=IPRuleResponse)
 def create_ip_rule(
     request: CreateIPRuleRequest,
@@ -97,13 +119,19 @@ def create_ip_rule(
     """
     Create IP access rule (whitelist/blacklist)
 
-    Requires admin role.
+    Requires admin role; CIDR blocks require a platform administrator.
     """
     # Validate IP address format
     if not validate_ip_address(request.ip_address):
         logger.warning(f"Invalid IP address format attempted: {request.ip_address} by {admin_user.email}")
         raise InvalidIPAddress(ip_address=request.ip_address)
 
+    try:
+        check_rule_scope(request.ip_address, admin_user)
+    except (PlatformAdminRequired, IPRangeTooBroad):
+        logger.warning(f"Rejected CIDR rule {request.ip_address} ({request.rule_type.value}) by {admin_user.email}")
+        raise
+
     try:
         with SessionLocal() as session:
             ip_repo = IPAccessRepository(session)
@@ -131,6 +159,7 @@ def create_ip_rule(
                 expires_at=expires_at,
                 created_by=admin_user.username or admin_user.email or str(admin_user.id)
             )
+            ip_rule_store.refresh(force=True)
 
             rule_action = "whitelisted" if request.rule_type == IPRuleType.whitelist else "blacklisted"
             logger.info(f"IP {request.ip_address} successfully {rule_action} by {admin_user.email}")
@@ -223,6 +252,7 @@ def remove_ip_rule(
                 logger.info(f"No {rule_type.value} rule found for IP {ip_address} - removal requested by {admin_user.email}")
                 raise IPRuleNotFound(ip_address=ip_address, rule_type=rule_type.value)
 
+            ip_rule_store.refresh(force=True)
             logger.info(f"IP rule removed: {rule_type.value} for {ip_address} by {admin_user.email}")
 
             return {
@@ -272,6 +302,8 @@ def unban_ip(
                 logger.info(f"IP {ip_address} was not banned - unban requested by {admin_user.email}")
                 raise IPNotBanned(ip_address=ip_address)
 
+            ip_rule_store.refresh(force=True)
+
             # Build descriptive message
             removed_types = []
             if auto_ban_removed:
@@ -4,7 +4,7 @@ User management routes for tenant owners.
 """
 from typing import List, Optional
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from pydantic import BaseModel, EmailStr, Field
 from sqlalchemy.orm import Session
 
@@ -12,6 +12,7 @@ from app.core.db import get_db
 from app.core.models import User, UserRole
 from app.core.authorization import get_current_owner
 from app.repositories import UserRepository
+from app.repositories.optimized_base import InvalidCursor
 
 
 router = APIRouter(prefix="/users", tags=["user_management"])
@@ -63,6 +64,7 @@ class UserListResponse(BaseModel):
     total_count: int
     active_count: int
     owner_count: int
+    next_cursor: Optional[str] = None
 
 
 # Routes
@@ -70,7 +72,9 @@ class UserListResponse(BaseModel):
 async def list_tenant_users(
     owner: User = Depends(get_current_owner),
     db: Session = Depends(get_db),
-    include_inactive: bool = False
+    include_inactive: bool = False,
+    limit: Optional[int] = Query(None, ge=1, le=200, description="Page size (enables cursor pagination)"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page")
 ):
     """
     List all users in the tenant (owner only).
@@ -79,20 +83,41 @@ async def list_tenant_users(
         owner: Current tenant owner
         db: Database session
         include_inactive: Whether to include inactive users
+        limit: Page size; when set (or cursor is given) users are returned
+            newest first, one page at a time, with next_cursor for the next page
+        cursor: Cursor returned by the previous page
 
     Returns:
         List of users with summary information
     """
     user_repo = UserRepository(db)
+    next_cursor = None
+
+    if limit or cursor:
+        try:
+            page = user_repo.get_tenant_users_page(
+                owner.tenant_id, active_only=not include_inactive, limit=limit or 50, cursor=cursor
+            )
+        except InvalidCursor as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+        users = page.items
+        next_cursor = page.next_cursor
+        counts = user_repo.get_tenant_user_counts(owner.tenant_id)
+    else:
+        # Get all users for the tenant
+        all_users = user_repo.get_tenant_users(owner.tenant_id, active_only=False)
 
-    # Get all users for the tenant
-    all_users = user_repo.get_tenant_users(owner.tenant_id, active_only=False)
+        # Filter based on include_inactive
+        if not include_inactive:
+            users = [u for u in all_users if u.is_active]
+        else:
+            users = all_users
 
-    # Filter based on include_inactive
-    if not include_inactive:
-        users = [u for u in all_users if u.is_active]
-    else:
-        users = all_users
+        counts = {
+            "total_count": len(all_users),
+            "active_count": len([u for u in all_users if u.is_active]),
+            "owner_count": len([u for u in all_users if u.role == UserRole.admin and u.is_active]),
+        }
 
     # Convert to response format
     user_summaries = []
@@ -110,16 +135,10 @@ async def list_tenant_users(
             last_login=user.last_login.isoformat() if user.last_login else None
         ))
 
-    # Calculate statistics
-    total_count = len(all_users)
-    active_count = len([u for u in all_users if u.is_active])
-    owner_count = len([u for u in all_users if u.role == UserRole.admin and u.is_active])
-
     return UserListResponse(
         users=user_summaries,
-        total_count=total_count,
-        active_count=active_count,
-        owner_count=owner_count
+        next_cursor=next_cursor,
+        **counts
     )
 
 
@@ -6,11 +6,11 @@ from uuid import UUID
 from datetime import datetime
 
 from fastapi import APIRouter, Depends, HTTPException, Request
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
 from pydantic import BaseModel
 
-from app.core.db import get_db
+from app.core.db import get_async_db, get_async_read_db
 from app.core.dependencies import get_current_user
 from app.core.authorization import get_current_member_or_owner
 from app.core.models import User
@@ -74,11 +74,11 @@ async def get_pending_verifications(
     limit: int = 50,
     skip: int = 0,
     current_user: User = Depends(get_current_member_or_owner),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get list of pending payment verifications."""
     try:
-        result = db.execute(
+        result = await db.execute(
             text("""
                 SELECT
                     i.id,
@@ -132,12 +132,12 @@ async def get_pending_verifications(
 async def get_verification_history(
     invoice_id: UUID,
     current_user: User = Depends(get_current_member_or_owner),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get audit trail history for a specific invoice."""
     try:
         # Verify invoice belongs to tenant
-        invoice_check = db.execute(
+        invoice_check = await db.execute(
             text("SELECT id FROM invoice.invoice WHERE id = :invoice_id AND tenant_id = :tenant_id"),
             {"invoice_id": str(invoice_id), "tenant_id": str(current_user.tenant_id)}
         )
@@ -145,10 +145,12 @@ async def get_verification_history(
         if not invoice_check.fetchone():
             raise HTTPException(status_code=404, detail="Invoice not found")
 
-        audit_entries = OCRAuditService.get_invoice_audit_trail(
-            db=db,
-            invoice_id=invoice_id,
-            tenant_id=current_user.tenant_id
+        audit_entries = await db.run_sync(
+            lambda sync_db: OCRAuditService.get_invoice_audit_trail(
+                db=sync_db,
+                invoice_id=invoice_id,
+                tenant_id=current_user.tenant_id
+            )
         )
 
         return [AuditTrailEntry(**entry) for entry in audit_entries]
@@ -166,12 +168,12 @@ async def approve_verification(
     request_data: VerificationActionRequest,
     request: Request,
     current_user: User = Depends(get_current_member_or_owner),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Manually approve a payment verification."""
     try:
         # Get current invoice status
-        invoice_result = db.execute(
+        invoice_result = await db.execute(
             text("""
                 SELECT verification_status, amount, customer_id
                 FROM invoice.invoice
@@ -187,7 +189,7 @@ async def approve_verification(
         previous_status = invoice_row.verification_status
 
         # Update invoice status to verified
-        db.execute(
+        await db.execute(
             text("""
                 UPDATE invoice.invoice
                 SET verification_status = 'verified',
@@ -208,20 +210,22 @@ async def approve_verification(
         ip_address, user_agent = _get_client_info(request)
 
         # Log audit trail
-        OCRAuditService.log_manual_action(
-            db=db,
-            tenant_id=current_user.tenant_id,
-            invoice_id=invoice_id,
-            action="manual_approved",
-            verified_by=current_user,
-            notes=request_data.notes,
-            ip_address=ip_address,
-            user_agent=user_agent,
-            verification_method="manual_web",
-            previous_status=previous_status
+        await db.run_sync(
+            lambda sync_db: OCRAuditService.log_manual_action(
+                db=sync_db,
+                tenant_id=current_user.tenant_id,
+                invoice_id=invoice_id,
+                action="manual_approved",
+                verified_by=current_user,
+                notes=request_data.notes,
+                ip_address=ip_address,
+                user_agent=user_agent,
+                verification_method="manual_web",
+                previous_status=previous_status
+            )
         )
 
-        db.commit()
+        await db.commit()
 
         # TODO: Deduct stock if configured
         # TODO: Send notification to customer/merchant
@@ -237,7 +241,7 @@ async def approve_verification(
         raise
     except Exception as e:
         logger.error(f"Failed to approve verification for {invoice_id}: {e}")
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail="Failed to approve verification")
 
 
@@ -247,12 +251,12 @@ async def reject_verification(
     request_data: VerificationActionRequest,
     request: Request,
     current_user: User = Depends(get_current_member_or_owner),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Manually reject a payment verification."""
     try:
         # Get current invoice status
-        invoice_result = db.execute(
+        invoice_result = await db.execute(
             text("""
                 SELECT verification_status
                 FROM invoice.invoice
@@ -268,7 +272,7 @@ async def reject_verification(
         previous_status = invoice_row.verification_status
 
         # Update invoice status to rejected
-        db.execute(
+        await db.execute(
             text("""
                 UPDATE invoice.invoice
                 SET verification_status = 'rejected',
@@ -289,20 +293,22 @@ async def reject_verification(
         ip_address, user_agent = _get_client_info(request)
 
         # Log audit trail
-        OCRAuditService.log_manual_action(
-            db=db,
-            tenant_id=current_user.tenant_id,
-            invoice_id=invoice_id,
-            action="manual_rejected",
-            verified_by=current_user,
-            notes=request_data.notes,
-            ip_address=ip_address,
-            user_agent=user_agent,
-            verification_method="manual_web",
-            previous_status=previous_status
+        await db.run_sync(
+            lambda sync_db: OCRAuditService.log_manual_action(
+                db=sync_db,
+                tenant_id=current_user.tenant_id,
+                invoice_id=invoice_id,
+                action="manual_rejected",
+                verified_by=current_user,
+                notes=request_data.notes,
+                ip_address=ip_address,
+                user_agent=user_agent,
+                verification_method="manual_web",
+                previous_status=previous_status
+            )
         )
 
-        db.commit()
+        await db.commit()
 
         # TODO: Send rejection notification
 
@@ -317,7 +323,7 @@ async def reject_verification(
         raise
     except Exception as e:
         logger.error(f"Failed to reject verification for {invoice_id}: {e}")
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail="Failed to reject verification")
 
 
@@ -327,12 +333,12 @@ async def mark_for_review(
     request_data: VerificationActionRequest,
     request: Request,
     current_user: User = Depends(get_current_member_or_owner),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Mark verification for manual review."""
     try:
         # Get current invoice status
-        invoice_result = db.execute(
+        invoice_result = await db.execute(
             text("""
                 SELECT verification_status
                 FROM invoice.invoice
@@ -348,7 +354,7 @@ async def mark_for_review(
         previous_status = invoice_row.verification_status
 
         # Update invoice status to reviewing
-        db.execute(
+        await db.execute(
             text("""
                 UPDATE invoice.invoice
                 SET verification_status = 'reviewing',
@@ -366,20 +372,22 @@ async def mark_for_review(
         ip_address, user_agent = _get_client_info(request)
 
         # Log audit trail
-        OCRAuditService.log_manual_action(
-            db=db,
-            tenant_id=current_user.tenant_id,
-            invoice_id=invoice_id,
-            action="manual_pending",
-            verified_by=current_user,
-            notes=request_data.notes,
-            ip_address=ip_address,
-            user_agent=user_agent,
-            verification_method="manual_web",
-            previous_status=previous_status
+        await db.run_sync(
+            lambda sync_db: OCRAuditService.log_manual_action(
+                db=sync_db,
+                tenant_id=current_user.tenant_id,
+                invoice_id=invoice_id,
+                action="manual_pending",
+                verified_by=current_user,
+                notes=request_data.notes,
+                ip_address=ip_address,
+                user_agent=user_agent,
+                verification_method="manual_web",
+                previous_status=previous_status
+            )
         )
 
-        db.commit()
+        await db.commit()
 
         return {
             "success": True,
@@ -392,7 +400,7 @@ async def mark_for_review(
         raise
     except Exception as e:
         logger.error(f"Failed to mark verification for review {invoice_id}: {e}")
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail="Failed to mark for review")
 
 
@@ -400,14 +408,16 @@ async def mark_for_review(
 async def get_verification_stats(
     days: int = 30,
     current_user: User = Depends(get_current_member_or_owner),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
-    """Get verification statistics for the current tenant."""
+    """Get verification statistics for the current tenant (read replica when available)."""
     try:
-        stats = OCRAuditService.get_verification_stats(
-            db=db,
-            tenant_id=current_user.tenant_id,
-            days=days
+        stats = await db.run_sync(
+            lambda sync_db: OCRAuditService.get_verification_stats(
+                db=sync_db,
+                tenant_id=current_user.tenant_id,
+                days=days
+            )
         )
 
         if "error" in stats:
@@ -1,26 +1,58 @@
 # app/services/cache_service.py
 """
-Service caching layer with Redis backend and in-memory fallback.
+Service caching layer: in-process L1 in front of an async Redis backend.
 """
 import json
 import hashlib
-import pickle
+import time
 from abc import ABC, abstractmethod
 from datetime import datetime, timedelta
-from typing import Any, Optional, Dict, List, Callable, Union
+from typing import Any, Optional, Dict, List, Callable, Tuple, Union
 from functools import wraps
 import logging
 
 try:
-    import redis
+    import redis.asyncio as aioredis
     REDIS_AVAILABLE = True
 except ImportError:
     REDIS_AVAILABLE = False
 
+from app.core.cache import TieredCache, TTLCache, register_bus_only_tier
+from app.core.cache_codec import CacheSerializer, CodecError, get_cache_serializer
 from app.core.config import get_settings
+from app.core.single_flight import AsyncSingleFlight, Stamped, should_refresh_early
 
 logger = logging.getLogger(__name__)
 
+# One async client (and connection pool) per Redis URL, shared by all services
+_redis_clients: Dict[str, Any] = {}
+
+
+def get_async_redis(url: str):
+    """Shared redis.asyncio client for url; connections are opened lazily"""
+    client = _redis_clients.get(url)
+    if client is None:
+        client = aioredis.from_url(
+            url,
+            decode_responses=False,  # We handle encoding ourselves
+            socket_connect_timeout=5,
+            socket_timeout=5,
+            max_connections=50,
+            health_check_interval=30
+        )
+        _redis_clients[url] = client
+    return client
+
+
+async def close_redis_clients() -> None:
+    """Close the shared Redis connection pools (application shutdown)"""
+    for client in list(_redis_clients.values()):
+        try:
+            await client.aclose()
+        except Exception as e:
+            logger.warning(f"Error closing Redis client: {e}")
+    _redis_clients.clear()
+
 
 class CacheBackend(ABC):
     """Abstract cache backend interface"""
@@ -50,27 +82,54 @@ class CacheBackend(ABC):
         """Check if backend is healthy"""
         pass
 
+    async def mget(self, keys: List[str]) -> List[Optional[Any]]:
+        """Get several values; None for missing keys"""
+        return [await self.get(key) for key in keys]
+
+    async def set_many(self, items: Dict[str, Any], ttl: int = 300) -> bool:
+        """Set several values with the same TTL"""
+        results = [await self.set(key, value, ttl) for key, value in items.items()]
+        return all(results)
+
+    async def invalidate_tag(self, tag: str) -> int:
+        """Invalidate every key under tag (the key prefix before the first ':')"""
+        return await self.clear_pattern(f"{tag}:*")
+
 
 class RedisBackend(CacheBackend):
-    """Redis cache backend"""
+    """
+    Redis cache backend on redis.asyncio with a shared connection pool.
+
+    Keys are namespaced by tag (the prefix before the first ':', i.e. the
+    service name) and the tag's current version:
+        OCRService:abc  ->  OCRService:v3:abc
+    invalidate_tag() bumps the version with a single INCR, so clearing a
+    service's cache is O(1); orphaned keys age out by TTL. Tag versions are
+    cached in-process for version_ttl seconds, which bounds how long another
+    worker can keep reading the previous version.
+
+    Values are encoded with the configured CacheSerializer (JSON/msgpack,
+    optionally compressed); payloads that fail to decode count as misses.
+    """
 
-    def __init__(self):
-        self.redis_client = None
-        self._initialize_redis()
+    # After a failure, report unhealthy for this long before trying Redis again
+    RETRY_AFTER_SECONDS = 30
+
+    def __init__(self, redis_client=None, version_ttl: float = 1.0, serializer: Optional[CacheSerializer] = None):
+        self.redis_client = redis_client
+        self.version_ttl = version_ttl
+        self.serializer = serializer or get_cache_serializer()
+        self._versions: Dict[str, Tuple[int, float]] = {}
+        self._unhealthy_until = 0.0
+        if self.redis_client is None:
+            self._initialize_redis()
 
     def _initialize_redis(self):
-        """Initialize Redis connection"""
+        """Attach the shared async client (no I/O until first use)"""
         try:
             settings = get_settings()
             if hasattr(settings, 'REDIS_URL') and settings.REDIS_URL:
-                self.redis_client = redis.from_url(
-                    settings.REDIS_URL,
-                    decode_responses=False,  # We handle encoding ourselves
-                    socket_connect_timeout=5,
-                    socket_timeout=5
-                )
-                # Test connection
-                self.redis_client.ping()
+                self.redis_client = get_async_redis(settings.REDIS_URL)
                 logger.info("Redis cache backend initialized successfully")
             else:
                 logger.warning("Redis URL not configured, Redis backend unavailable")
@@ -78,30 +137,87 @@ class RedisBackend(CacheBackend):
             logger.warning(f"Failed to initialize Redis backend: {e}")
             self.redis_client = None
 
+    def _failed(self, action: str, target: str, error: Exception) -> None:
+        self._unhealthy_until = time.time() + self.RETRY_AFTER_SECONDS
+        logger.warning(f"Redis {action} failed for {target}: {error}")
+
+    @staticmethod
+    def _version_key(tag: str) -> str:
+        return f"cache:ver:{tag}"
+
+    async def _tag_versions(self, tags: List[str]) -> Dict[str, int]:
+        """Current version per tag, from the local cache or one MGET"""
+        now = time.time()
+        versions = {}
+        missing = []
+        for tag in tags:
+            cached_version = self._versions.get(tag)
+            if cached_version and now - cached_version[1] < self.version_ttl:
+                versions[tag] = cached_version[0]
+            else:
+                missing.append(tag)
+
+        if missing:
+            raw = await self.redis_client.mget([self._version_key(tag) for tag in missing])
+            for tag, value in zip(missing, raw):
+                versions[tag] = int(value) if value else 0
+                self._versions[tag] = (versions[tag], now)
+        return versions
+
+    async def _physical_keys(self, keys: List[str]) -> List[str]:
+        split = [key.split(':', 1) if ':' in key else ['', key] for key in keys]
+        versions = await self._tag_versions(sorted({tag for tag, _ in split}))
+        return [f"{tag}:v{versions[tag]}:{rest}" for tag, rest in split]
+
     async def get(self, key: str) -> Optional[Any]:
         """Get value from Redis"""
-        if not self.redis_client:
-            return None
+        values = await self.mget([key])
+        return values[0]
+
+    async def mget(self, keys: List[str]) -> List[Optional[Any]]:
+        """Get several values in one round-trip (plus one for uncached tag versions)"""
+        if not self.redis_client or not keys:
+            return [None] * len(keys)
 
         try:
-            data = self.redis_client.get(key)
-            if data:
-                return pickle.loads(data)
-            return None
+            data = await self.redis_client.mget(await self._physical_keys(keys))
         except Exception as e:
-            logger.warning(f"Redis get failed for key {key}: {e}")
-            return None
+            self._failed("get", ", ".join(keys[:3]), e)
+            return [None] * len(keys)
+
+        values = []
+        for key, item in zip(keys, data):
+            try:
+                values.append(self.serializer.loads(item) if item else None)
+            except CodecError as e:
+                logger.warning(f"Discarding undecodable cache value for {key}: {e}")
+                values.append(None)
+        return values
 
     async def set(self, key: str, value: Any, ttl: int = 300) -> bool:
         """Set value in Redis with TTL"""
-        if not self.redis_client:
+        return await self.set_many({key: value}, ttl)
+
+    async def set_many(self, items: Dict[str, Any], ttl: int = 300) -> bool:
+        """Set several values in one pipelined round-trip"""
+        if not self.redis_client or not items:
+            return False
+
+        try:
+            encoded = [self.serializer.dumps(value) for value in items.values()]
+        except CodecError as e:
+            logger.warning(f"Not caching {', '.join(list(items)[:3])} in Redis: {e}")
             return False
 
         try:
-            serialized = pickle.dumps(value)
-            return self.redis_client.setex(key, ttl, serialized)
+            physical = await self._physical_keys(list(items))
+            async with self.redis_client.pipeline(transaction=False) as pipe:
+                for key, data in zip(physical, encoded):
+                    pipe.set(key, data, ex=ttl)
+                results = await pipe.execute()
+            return all(results)
         except Exception as e:
-            logger.warning(f"Redis set failed for key {key}: {e}")
+            self._failed("set", ", ".join(list(items)[:3]), e)
             return False
 
     async def delete(self, key: str) -> bool:
@@ -110,30 +226,58 @@ class RedisBackend(CacheBackend):
             return False
 
         try:
-            return bool(self.redis_client.delete(key))
+            physical = (await self._physical_keys([key]))[0]
+            return bool(await self.redis_client.unlink(physical))
         except Exception as e:
-            logger.warning(f"Redis delete failed for key {key}: {e}")
+            self._failed("delete", key, e)
             return False
 
-    async def clear_pattern(self, pattern: str) -> int:
-        """Clear keys matching pattern"""
+    async def invalidate_tag(self, tag: str) -> int:
+        """O(1) invalidation: bump the tag version (returns the new version)"""
         if not self.redis_client:
             return 0
 
         try:
-            keys = self.redis_client.keys(pattern)
-            if keys:
-                return self.redis_client.delete(*keys)
+            version = await self.redis_client.incr(self._version_key(tag))
+            self._versions[tag] = (version, time.time())
+            return version
+        except Exception as e:
+            self._failed("invalidate", tag, e)
+            return 0
+
+    async def clear_pattern(self, pattern: str) -> int:
+        """
+        Clear keys matching pattern with incremental SCAN + UNLINK.
+        Prefer invalidate_tag(); this walks the keyspace.
+        """
+        if not self.redis_client:
             return 0
+
+        try:
+            count = 0
+            batch = []
+            async for key in self.redis_client.scan_iter(match=pattern, count=500):
+                batch.append(key)
+                if len(batch) >= 500:
+                    count += await self.redis_client.unlink(*batch)
+                    batch = []
+            if batch:
+                count += await self.redis_client.unlink(*batch)
+            return count
         except Exception as e:
-            logger.warning(f"Redis clear pattern failed for {pattern}: {e}")
+            self._failed("clear pattern", pattern, e)
             return 0
 
     def is_healthy(self) -> bool:
-        """Check Redis health"""
+        """Configured and not inside the back-off window after a failure"""
+        return self.redis_client is not None and time.time() >= self._unhealthy_until
+
+    async def ping(self) -> bool:
+        """Active health probe"""
         try:
-            return bool(self.redis_client and self.redis_client.ping())
-        except Exception:
+            return bool(self.redis_client and await self.redis_client.ping())
+        except Exception as e:
+            self._failed("ping", "server", e)
             return False
 
 
@@ -218,13 +362,19 @@ class MemoryBackend(CacheBackend):
 
 class ServiceCache:
     """
-    Service-level cache with automatic fallback and cache invalidation.
+    Service-level cache: an in-process L1 (TieredCache) in front of the
+    primary backend (RedisBackend, the shared L2).
+
+    The L1 tier is registered with the CacheInvalidationBus, so deleting or
+    clearing this service's keys drops them on every worker; its entries also
+    live at most CACHE_L1_MAX_TTL. Until the bus is running (no Redis, or
+    configure_cache_backend() not called) no invalidation would reach other
+    workers, so L1 is then only read while the primary is unhealthy.
     """
 
     def __init__(self, service_name: str):
         self.service_name = service_name
         self.primary_backend: CacheBackend = RedisBackend() if REDIS_AVAILABLE else MemoryBackend()
-        self.fallback_backend: CacheBackend = MemoryBackend(max_size=1000)
 
         # Cache configuration per service
         self.cache_config = {
@@ -235,16 +385,29 @@ class ServiceCache:
             'AuthService': {'default_ttl': 900, 'max_size': 5000},  # 15 minutes
         }
 
-        self.default_ttl = self.cache_config.get(service_name, {}).get('default_ttl', 300)
+        config = self.cache_config.get(service_name, {})
+        self.default_ttl = config.get('default_ttl', 300)
+        self.local = TieredCache(
+            f"service:{service_name}",
+            TTLCache(default_ttl=self.default_ttl, max_size=config.get('max_size', 1000)),
+            self.default_ttl,
+        )
+        register_bus_only_tier(self.local)
+        self._stats = {'l2_hits': 0, 'misses': 0}
+        self._flights = AsyncSingleFlight()
 
     def _make_key(self, method_name: str, *args, **kwargs) -> str:
         """Generate cache key from method name and arguments"""
         # Create deterministic key from arguments
         key_parts = [self.service_name, method_name]
 
-        # Add args
+        # Skip the bound service instance; its repr differs per process
+        if args and type(args[0]).__name__ == self.service_name:
+            args = args[1:]
+
+        # Add args (stable digest so every worker derives the same Redis key)
         if args:
-            args_str = str(hash(str(args)))
+            args_str = hashlib.sha1(str(args).encode()).hexdigest()[:16]
             key_parts.append(args_str)
 
         # Add kwargs (sorted for consistency)
@@ -255,60 +418,92 @@ class ServiceCache:
                 if not k.startswith('_') and k not in ['db', 'session']
             }
             if cacheable_kwargs:
-                kwargs_str = str(hash(str(sorted(cacheable_kwargs.items()))))
+                kwargs_str = hashlib.sha1(str(sorted(cacheable_kwargs.items())).encode()).hexdigest()[:16]
                 key_parts.append(kwargs_str)
 
         return ':'.join(key_parts)
 
-    async def get(self, key: str) -> Optional[Any]:
-        """Get value from cache with fallback"""
-        # Try primary backend first
-        if self.primary_backend.is_healthy():
-            value = await self.primary_backend.get(key)
+    def _read_local(self, keys: List[str], found: Dict[str, Any]) -> None:
+        for key in keys:
+            value = self.local.get(key)
             if value is not None:
-                return value
+                found[key] = value
 
-        # Fallback to secondary backend
-        return await self.fallback_backend.get(key)
+    async def get(self, key: str) -> Optional[Any]:
+        """Get value from L1, then the primary backend"""
+        found = await self.get_many([key])
+        return found.get(key)
 
     async def set(self, key: str, value: Any, ttl: int = None) -> bool:
-        """Set value in cache"""
-        if ttl is None:
-            ttl = self.default_ttl
-
-        success = False
-
-        # Set in primary backend
-        if self.primary_backend.is_healthy():
-            success = await self.primary_backend.set(key, value, ttl)
-
-        # Always set in fallback
-        fallback_success = await self.fallback_backend.set(key, value, ttl)
-
-        return success or fallback_success
+        """Set value in the primary backend and L1"""
+        return await self.set_many({key: value}, ttl)
 
     async def delete(self, key: str) -> bool:
-        """Delete from all backends"""
-        results = []
-
+        """Delete from the primary backend and from L1 on every worker"""
+        removed = self.local.delete(key)
         if self.primary_backend.is_healthy():
-            results.append(await self.primary_backend.delete(key))
-
-        results.append(await self.fallback_backend.delete(key))
+            removed = await self.primary_backend.delete(key) or removed
+        return removed
+
+    async def get_many(self, keys: List[str]) -> Dict[str, Any]:
+        """Get several keys: L1 first, the rest in one backend round-trip; missing keys are omitted"""
+        shared = self.local.bus is not None
+        found: Dict[str, Any] = {}
+        if shared:
+            self._read_local(keys, found)
+
+        missing = [key for key in keys if key not in found]
+        if missing and self.primary_backend.is_healthy():
+            for key, value in zip(missing, await self.primary_backend.mget(missing)):
+                if value is not None:
+                    found[key] = value
+                    self._stats['l2_hits'] += 1
+                    if shared:
+                        self.local.set(key, value)
+            missing = [key for key in missing if key not in found]
+
+        if missing and not shared and not self.primary_backend.is_healthy():
+            # Outage: serve what this worker cached while Redis was down
+            self._read_local(missing, found)
+
+        self._stats['misses'] += len(keys) - len(found)
+        return found
+
+    async def set_many(self, items: Dict[str, Any], ttl: int = None) -> bool:
+        """Set several keys with one pipelined write to the primary backend, and in L1"""
+        if ttl is None:
+            ttl = self.default_ttl
 
-        return any(results)
+        success = True
+        if self.primary_backend.is_healthy():
+            success = await self.primary_backend.set_many(items, ttl)
+
+        if self.local.bus is not None or not self.primary_backend.is_healthy():
+            for key, value in items.items():
+                self.local.set(key, value, ttl)
+            # During an outage L1 holds the value; that counts as cached
+            success = success or not self.primary_backend.is_healthy()
+        else:
+            # Drop any copy written during an outage so it can't resurface
+            for key in items:
+                self.local.l1.delete(key)
+        return success
 
     async def clear_service_cache(self) -> int:
-        """Clear all cache entries for this service"""
-        pattern = f"{self.service_name}:*"
+        """
+        Clear all cache entries for this service.
+
+        Redis: O(1) tag-version bump instead of a keyspace walk; L1 is
+        cleared on every worker through the invalidation bus.
+        """
         count = 0
 
         if self.primary_backend.is_healthy():
-            count += await self.primary_backend.clear_pattern(pattern)
+            count += await self.primary_backend.invalidate_tag(self.service_name)
 
-        count += await self.fallback_backend.clear_pattern(pattern)
+        self.local.clear()
 
-        logger.info(f"Cleared {count} cache entries for {self.service_name}")
+        logger.info(f"Invalidated cache for {self.service_name}")
         return count
 
     async def cached_call(
@@ -318,53 +513,94 @@ class ServiceCache:
         ttl: int = None,
         force_refresh: bool = False,
         *args,
+        stale_ttl: int = 0,
+        early_refresh: float = 0.0,
         **kwargs
     ) -> Any:
-        """Execute method with caching"""
-        cache_key = self._make_key(method_name, *args, **kwargs)
+        """
+        Execute method with caching.
 
-        # Try to get from cache first (unless force refresh)
-        if not force_refresh:
-            cached_value = await self.get(cache_key)
-            if cached_value is not None:
-                logger.debug(f"Cache hit for {self.service_name}.{method_name}")
-                return cached_value
-
-        # Execute method
-        logger.debug(f"Cache miss for {self.service_name}.{method_name}, executing method")
-        result = await method(*args, **kwargs) if hasattr(method, '__call__') else method
-
-        # Cache the result
-        await self.set(cache_key, result, ttl)
-
-        return result
+        Concurrent misses for one key share a single execution (single-flight).
+        stale_ttl / early_refresh enable stale-while-revalidate and
+        probabilistic early refresh, as in app.core.cache.cached.
+        """
+        cache_key = self._make_key(method_name, *args, **kwargs)
+        stamped = stale_ttl > 0 or early_refresh > 0
+
+        async def load() -> Any:
+            started = time.time()
+            # Execute method
+            logger.debug(f"Cache miss for {self.service_name}.{method_name}, executing method")
+            result = await method(*args, **kwargs) if hasattr(method, '__call__') else method
+
+            # Cache the result
+            if stamped:
+                now = time.time()
+                fresh_ttl = ttl or self.default_ttl
+                await self.set(cache_key, Stamped(result, now + fresh_ttl, now - started), fresh_ttl + stale_ttl)
+            else:
+                await self.set(cache_key, result, ttl)
+            return result
+
+        if force_refresh:
+            return (await self._flights.do(cache_key, load))[0]
+
+        # Try to get from cache first
+        cached_value = await self.get(cache_key)
+        if cached_value is None:
+            return (await self._flights.do(cache_key, load))[0]
+
+        logger.debug(f"Cache hit for {self.service_name}.{method_name}")
+        if not isinstance(cached_value, Stamped):
+            return cached_value
+
+        now = time.time()
+        if cached_value.is_fresh(now) and not should_refresh_early(cached_value, early_refresh, now):
+            return cached_value.value
+        if self._flights.in_flight(cache_key):
+            # Someone is already refreshing; serve what we have
+            return cached_value.value
+        try:
+            return (await self._flights.do(cache_key, load))[0]
+        except Exception as e:
+            logger.warning(f"Refresh of {self.service_name}.{method_name} failed, serving cached value: {e}")
+            return cached_value.value
 
     def get_cache_stats(self) -> Dict[str, Any]:
         """Get cache statistics"""
+        l1 = self.local.stats()['l1']
         return {
             "service": self.service_name,
             "primary_backend": type(self.primary_backend).__name__,
             "primary_healthy": self.primary_backend.is_healthy(),
-            "fallback_backend": type(self.fallback_backend).__name__,
-            "fallback_healthy": self.fallback_backend.is_healthy(),
-            "default_ttl": self.default_ttl
+            "l1": {**l1, "shared_invalidation": self.local.bus is not None},
+            **self._stats,
+            "default_ttl": self.default_ttl,
+            "single_flight": dict(self._flights.stats)
         }
 
 
-def cached_method(ttl: int = None, skip_args: List[str] = None):
+def cached_method(
+    ttl: int = None,
+    skip_args: List[str] = None,
+    stale_ttl: int = 0,
+    early_refresh: float = 0.0
+):
     """
     Decorator for caching service method results.
 
     Args:
         ttl: Time to live in seconds (uses service default if None)
         skip_args: List of argument names to skip in cache key generation
+        stale_ttl: Seconds a value may be served stale while one caller refreshes it
+        early_refresh: XFetch beta for probabilistic early refresh (0 disables)
     """
     def decorator(func: Callable) -> Callable:
         @wraps(func)
         async def async_wrapper(self, *args, **kwargs):
-            # Initialize cache if not present
-            if not hasattr(self, '_service_cache'):
-                self._service_cache = ServiceCache(self.__class__.__name__)
+            # One ServiceCache per service class: services are built per request,
+            # and concurrent misses must share its single-flight map to coalesce
+            cache = CacheManager.get_service_cache(self.__class__.__name__)
 
             # Remove skip_args from kwargs for cache key
             if skip_args:
@@ -372,13 +608,15 @@ def cached_method(ttl: int = None, skip_args: List[str] = None):
             else:
                 cache_kwargs = kwargs
 
-            return await self._service_cache.cached_call(
+            return await cache.cached_call(
                 func,
                 func.__name__,
                 ttl,
                 False,  # force_refresh
                 self,
                 *args,
+                stale_ttl=stale_ttl,
+                early_refresh=early_refresh,
                 **cache_kwargs
             )
 
@@ -139,16 +139,8 @@ class DatabaseHealthCheck(HealthCheck):
     def _get_pool_status(self, db: Session) -> Dict[str, Any]:
         """Get database connection pool status"""
         try:
-            engine = db.get_bind()
-            pool = getattr(engine.pool, '_pool', None)
-
-            if pool:
-                return {
-                    "pool_size": getattr(pool, 'size', 'unknown'),
-                    "checked_in": getattr(pool, 'checkedin', 'unknown'),
-                    "checked_out": getattr(pool, 'checkedout', 'unknown'),
-                    "overflow": getattr(pool, 'overflow', 'unknown')
-                }
+            from app.core.db import get_pool_status
+            return get_pool_status()
         except Exception:
             pass
 
@@ -3,29 +3,71 @@
 Async task queue system for background processing.
 """
 import asyncio
+import heapq
+import itertools
 import json
+import os
+import random
+import socket
 import uuid
 import time
+from collections import deque
 from abc import ABC, abstractmethod
 from enum import Enum
-from typing import Callable, Any, Dict, List, Optional, Union
+from typing import Callable, Any, Dict, List, Optional, Tuple, Union
 from dataclasses import dataclass, asdict
-from datetime import datetime, timedelta
-from functools import wraps
+from datetime import datetime, timedelta, timezone
+from functools import partial, wraps
+import importlib
 import logging
 import traceback
 
 try:
     import redis
+    import redis.asyncio as aioredis
     REDIS_AVAILABLE = True
 except ImportError:
     REDIS_AVAILABLE = False
 
+from app.core.cache import TTLCache
 from app.core.config import get_settings
-from app.core.exceptions import ServiceError
+from app.core.cpu_pool import CPUPool, cpu_pool
+from app.core.exceptions import ServiceError, ServiceUnavailableError
 
 logger = logging.getLogger(__name__)
 
+# Upper bound on the exponential delay between attempts of a failing task
+MAX_RETRY_DELAY = 3600
+# Each retry delay is randomised down by up to this fraction so tasks that
+# failed together (e.g. a downstream outage) do not retry in lockstep
+RETRY_JITTER = 0.5
+
+# Task wait times kept for the autoscaler's percentile
+WAIT_SAMPLES = 2048
+
+# Redis bookkeeping for retained results: task_id -> time stored, task_id -> stored bytes
+RESULT_INDEX_KEY = "task_results"
+RESULT_SIZES_KEY = "task_results:bytes"
+
+# Redis Streams backend: seconds between sweeps for stuck (unacked) tasks,
+# delayed tasks promoted per dequeue, and dead-letter stream length cap
+CLAIM_INTERVAL = 5.0
+PROMOTE_BATCH = 100
+DEAD_LETTER_MAXLEN = 10000
+
+# Moves due members of the delay ZSET ("<priority>|<task json>") into their
+# priority stream; returns {promoted, next due score or -1}
+PROMOTE_SCRIPT = """
+local due = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, tonumber(ARGV[2]))
+for _, member in ipairs(due) do
+    redis.call('ZREM', KEYS[1], member)
+    local sep = string.find(member, '|', 1, true)
+    redis.call('XADD', ARGV[3] .. string.sub(member, 1, sep - 1), '*', 'task', string.sub(member, sep + 1))
+end
+local nxt = redis.call('ZRANGE', KEYS[1], 0, 0, 'WITHSCORES')
+return {#due, nxt[2] or '-1'}
+"""
+
 
 class TaskStatus(Enum):
     """Task execution status"""
@@ -80,11 +122,16 @@ class TaskDefinition:
     retry_delay: float = 1.0
     timeout: Optional[float] = None
     created_at: datetime = None
+    attempts: int = 0
+    run_at: Optional[datetime] = None  # naive UTC; None runs as soon as possible
 
     def __post_init__(self):
         if self.created_at is None:
             self.created_at = datetime.utcnow()
 
+    def is_due(self, now: Optional[datetime] = None) -> bool:
+        return self.run_at is None or self.run_at <= (now or datetime.utcnow())
+
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dictionary for serialization"""
         return {
@@ -96,7 +143,9 @@ class TaskDefinition:
             'max_retries': self.max_retries,
             'retry_delay': self.retry_delay,
             'timeout': self.timeout,
-            'created_at': self.created_at.isoformat()
+            'created_at': self.created_at.isoformat(),
+            'attempts': self.attempts,
+            'run_at': self.run_at.isoformat() if self.run_at else None
         }
 
     @classmethod
@@ -111,10 +160,23 @@ class TaskDefinition:
             max_retries=data['max_retries'],
             retry_delay=data['retry_delay'],
             timeout=data.get('timeout'),
-            created_at=datetime.fromisoformat(data['created_at'])
+            created_at=datetime.fromisoformat(data['created_at']),
+            attempts=int(data.get('attempts', 0)),
+            run_at=datetime.fromisoformat(data['run_at']) if data.get('run_at') else None
         )
 
 
+def retry_backoff(attempt: int, base_delay: float, cap: float = MAX_RETRY_DELAY, jitter: float = RETRY_JITTER) -> float:
+    """Seconds before retry number attempt + 1: base_delay * 2^attempt, capped, minus up to jitter of it"""
+    delay = min(base_delay * (2 ** attempt), cap)
+    return delay * (1 - jitter * random.random())
+
+
+def _epoch(moment: datetime) -> float:
+    """Unix time of a naive UTC datetime"""
+    return moment.replace(tzinfo=timezone.utc).timestamp()
+
+
 class TaskQueue(ABC):
     """Abstract task queue interface"""
 
@@ -143,44 +205,118 @@ class TaskQueue(ABC):
         """Get queue information"""
         pass
 
+    async def ack(self, task: TaskDefinition) -> None:
+        """Confirm a dequeued task has been handled (backends without delivery tracking ignore this)"""
 
-class MemoryTaskQueue(TaskQueue):
-    """In-memory task queue implementation"""
+    async def retry(self, task: TaskDefinition, delay: float) -> None:
+        """Deliver task again after delay seconds"""
+        task.run_at = datetime.utcnow() + timedelta(seconds=delay)
+        await self.enqueue(task)
+
+    async def dead_letter(self, task: TaskDefinition, reason: str) -> None:
+        """Give up on a dequeued task that failed permanently"""
+        await self.ack(task)
+
+    async def release(self, task: TaskDefinition) -> None:
+        """Hand back a dequeued task whose attempt was interrupted, to be delivered again"""
+        await self.enqueue(task)
 
-    def __init__(self, max_size: int = 10000):
-        self.pending_tasks: List[TaskDefinition] = []
+
+class MemoryTaskQueue(TaskQueue):
+    """
+    In-memory task queue implementation
+
+    Pending tasks live in a heap ordered by (priority desc, enqueue order),
+    so enqueue and dequeue are O(log n). Idle workers wait on a condition
+    variable and wake as soon as a task is enqueued instead of polling.
+    Tasks with a future run_at wait in a second heap ordered by run_at and
+    move to the pending heap when due; waiting workers time their sleep to
+    the earliest one.
+
+    Results are kept in a TTLCache: each expires result_ttl seconds after it
+    is stored and at most max_results are retained, least recently polled
+    evicted first.
+    """
+
+    def __init__(self, max_size: int = 10000, result_ttl: Optional[int] = None, max_results: Optional[int] = None):
+        settings = get_settings()
+        # (-priority, sequence, task); the sequence keeps FIFO order within a priority
+        self._pending: List[Tuple[int, int, TaskDefinition]] = []
+        # (run_at, sequence, task) for tasks not yet due
+        self._delayed: List[Tuple[datetime, int, TaskDefinition]] = []
+        self._sequence = itertools.count()
         self.running_tasks: Dict[str, TaskDefinition] = {}
-        self.task_results: Dict[str, TaskResult] = {}
+        self.task_results = TTLCache(
+            default_ttl=result_ttl or settings.TASK_RESULT_TTL,
+            max_size=max_results or settings.TASK_RESULT_MAX_COUNT,
+        )
         self.max_size = max_size
+        self.stats = {"completed": 0, "failed": 0}
         self._lock = asyncio.Lock()
+        self._not_empty = asyncio.Condition(self._lock)
+
+    @property
+    def pending_tasks(self) -> List[TaskDefinition]:
+        """Pending tasks in dequeue order (a sorted copy; for inspection only)"""
+        return [task for _, _, task in sorted(self._pending)]
 
     async def enqueue(self, task: TaskDefinition) -> str:
         """Enqueue a task"""
         async with self._lock:
-            if len(self.pending_tasks) >= self.max_size:
-                raise ServiceError(f"Task queue full (max: {self.max_size})")
+            if len(self._pending) + len(self._delayed) >= self.max_size:
+                raise ServiceUnavailableError("task queue", f"queue full (max: {self.max_size})")
 
-            # Insert based on priority
-            self.pending_tasks.append(task)
-            self.pending_tasks.sort(key=lambda t: t.priority.value, reverse=True)
+            if task.is_due():
+                heapq.heappush(self._pending, (-task.priority.value, next(self._sequence), task))
+            else:
+                heapq.heappush(self._delayed, (task.run_at, next(self._sequence), task))
+            # A delayed task may be due before a waiting worker's timeout, so wake one either way
+            self._not_empty.notify()
 
             logger.debug(f"Enqueued task {task.task_id} with priority {task.priority.name}")
             return task.task_id
 
-    async def dequeue(self, timeout: float = 1.0) -> Optional[TaskDefinition]:
-        """Dequeue a task"""
-        start_time = time.time()
-        while time.time() - start_time < timeout:
-            async with self._lock:
-                if self.pending_tasks:
-                    task = self.pending_tasks.pop(0)
-                    self.running_tasks[task.task_id] = task
-                    logger.debug(f"Dequeued task {task.task_id}")
-                    return task
+    def _promote_due(self) -> Optional[float]:
+        """Move due delayed tasks to the pending heap; returns seconds until the next one (lock held)"""
+        if not self._delayed:
+            return None
+        now = datetime.utcnow()
+        while self._delayed and self._delayed[0][0] <= now:
+            _, sequence, task = heapq.heappop(self._delayed)
+            heapq.heappush(self._pending, (-task.priority.value, sequence, task))
+        if self._delayed:
+            return (self._delayed[0][0] - now).total_seconds()
+        return None
 
-            await asyncio.sleep(0.1)
+    async def dequeue(self, timeout: float = 1.0) -> Optional[TaskDefinition]:
+        """Dequeue a task, waiting up to timeout seconds for one to arrive"""
+        deadline = time.monotonic() + timeout
+        async with self._lock:
+            while True:
+                next_due = self._promote_due()
+                if self._pending:
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                if next_due is not None:
+                    remaining = min(remaining, next_due)
+                try:
+                    await asyncio.wait_for(self._not_empty.wait(), remaining)
+                except asyncio.TimeoutError:
+                    pass
+
+            _, _, task = heapq.heappop(self._pending)
+            self.running_tasks[task.task_id] = task
+            logger.debug(f"Dequeued task {task.task_id}")
+            return task
 
-        return None
+    async def release(self, task: TaskDefinition) -> None:
+        """Put an interrupted task back in the queue (ahead of later tasks of its priority)"""
+        async with self._lock:
+            self.running_tasks.pop(task.task_id, None)
+            heapq.heappush(self._pending, (-task.priority.value, -next(self._sequence), task))
+            self._not_empty.notify()
 
     async def get_task_result(self, task_id: str) -> Optional[TaskResult]:
         """Get task result"""
@@ -190,7 +326,12 @@ class MemoryTaskQueue(TaskQueue):
     async def set_task_result(self, result: TaskResult) -> None:
         """Set task result"""
         async with self._lock:
-            self.task_results[result.task_id] = result
+            self.task_results.cleanup_expired()
+            self.task_results.set(result.task_id, result)
+            if result.status == TaskStatus.COMPLETED:
+                self.stats["completed"] += 1
+            elif result.status == TaskStatus.FAILED:
+                self.stats["failed"] += 1
             # Remove from running tasks
             if result.task_id in self.running_tasks:
                 del self.running_tasks[result.task_id]
@@ -198,20 +339,46 @@ class MemoryTaskQueue(TaskQueue):
     async def get_queue_info(self) -> Dict[str, Any]:
         """Get queue information"""
         async with self._lock:
+            self.task_results.cleanup_expired()
+            self._promote_due()
+            results = self.task_results.stats()
             return {
-                "pending_tasks": len(self.pending_tasks),
+                "pending_tasks": len(self._pending),
+                "delayed_tasks": len(self._delayed),
                 "running_tasks": len(self.running_tasks),
-                "completed_tasks": len([r for r in self.task_results.values() if r.status == TaskStatus.COMPLETED]),
-                "failed_tasks": len([r for r in self.task_results.values() if r.status == TaskStatus.FAILED]),
+                "completed_tasks": self.stats["completed"],
+                "failed_tasks": self.stats["failed"],
+                "retained_results": results["size"],
+                "retained_result_bytes": results["memory_bytes"],
+                "evicted_results": results["evictions"],
                 "max_size": self.max_size
             }
 
 
 class RedisTaskQueue(TaskQueue):
-    """Redis-based task queue implementation"""
+    """
+    Redis-based task queue implementation
+
+    Results expire after result_ttl and are indexed in RESULT_INDEX_KEY so
+    the oldest can be trimmed once more than max_results are stored. Finished
+    results are also kept in a small in-process LRU, so polling a task's
+    status does not hit Redis once it has completed.
+    """
 
-    def __init__(self, redis_url: str = None):
+    def __init__(
+        self,
+        redis_url: str = None,
+        result_ttl: Optional[int] = None,
+        max_results: Optional[int] = None,
+        result_cache_size: Optional[int] = None,
+    ):
+        settings = get_settings()
         self.redis_client = None
+        self.result_ttl = result_ttl or settings.TASK_RESULT_TTL
+        self.max_results = max_results or settings.TASK_RESULT_MAX_COUNT
+        cache_size = settings.TASK_RESULT_CACHE_SIZE if result_cache_size is None else result_cache_size
+        self._recent_results = TTLCache(default_ttl=self.result_ttl, max_size=cache_size) if cache_size else None
+        self.stats = {"evicted_results": 0}
         self._initialize_redis(redis_url)
 
     def _initialize_redis(self, redis_url: str = None):
@@ -292,46 +459,100 @@ class RedisTaskQueue(TaskQueue):
         if not self.redis_client:
             return None
 
+        if self._recent_results is not None:
+            cached = self._recent_results.get(task_id)
+            if cached is not None:
+                return cached
+
         try:
-            result_key = f"result:{task_id}"
-            result_data = self.redis_client.hgetall(result_key)
+            result_data = self.redis_client.hgetall(f"result:{task_id}")
             if not result_data:
                 return None
 
-            # Convert back to TaskResult
-            return TaskResult(
-                task_id=result_data['task_id'],
-                status=TaskStatus(result_data['status']),
-                result=json.loads(result_data.get('result', 'null')),
-                error=result_data.get('error'),
-                started_at=datetime.fromisoformat(result_data['started_at']) if result_data.get('started_at') else None,
-                completed_at=datetime.fromisoformat(result_data['completed_at']) if result_data.get('completed_at') else None,
-                execution_time=float(result_data['execution_time']) if result_data.get('execution_time') else None
-            )
+            result = self._decode_result(result_data)
+            self._remember_result(result)
+            return result
         except Exception as e:
             logger.error(f"Failed to get task result {task_id}: {e}")
             return None
 
+    @staticmethod
+    def _decode_result(result_data: Dict[str, str]) -> TaskResult:
+        """Convert a result hash back to a TaskResult"""
+        return TaskResult(
+            task_id=result_data['task_id'],
+            status=TaskStatus(result_data['status']),
+            result=json.loads(result_data.get('result', 'null')),
+            error=result_data.get('error'),
+            started_at=datetime.fromisoformat(result_data['started_at']) if result_data.get('started_at') else None,
+            completed_at=datetime.fromisoformat(result_data['completed_at']) if result_data.get('completed_at') else None,
+            execution_time=float(result_data['execution_time']) if result_data.get('execution_time') else None
+        )
+
     async def set_task_result(self, result: TaskResult) -> None:
         """Set task result in Redis"""
         if not self.redis_client:
             return
 
         try:
-            result_key = f"result:{result.task_id}"
-            result_data = result.to_dict()
-            result_data['result'] = json.dumps(result_data['result'])
-
-            self.redis_client.hset(result_key, mapping=result_data)
-            self.redis_client.expire(result_key, 3600)  # 1 hour TTL
-
-            # Remove from running tasks
-            self.redis_client.srem("running_tasks", result.task_id)
+            now = time.time()
+            pipe = self.redis_client.pipeline()
+            self._queue_result_writes(pipe, result, now)
+            pipe.execute()
 
+            self._remember_result(result)
+            self._trim_results(now)
             logger.debug(f"Set task result for {result.task_id}")
         except Exception as e:
             logger.error(f"Failed to set task result {result.task_id}: {e}")
 
+    def _queue_result_writes(self, pipe, result: TaskResult, now: float) -> None:
+        """Add the commands storing and indexing a result to a (sync or async) pipeline"""
+        result_key = f"result:{result.task_id}"
+        result_data = {k: v for k, v in result.to_dict().items() if v is not None}
+        result_data['result'] = json.dumps(result.result)
+        size = sum(len(k) + len(str(v)) for k, v in result_data.items())
+
+        pipe.hset(result_key, mapping=result_data)
+        pipe.expire(result_key, self.result_ttl)
+        pipe.zadd(RESULT_INDEX_KEY, {result.task_id: now})
+        pipe.hset(RESULT_SIZES_KEY, result.task_id, size)
+        # Remove from running tasks
+        pipe.srem("running_tasks", result.task_id)
+
+    @staticmethod
+    def _queue_result_deletes(pipe, stale: List[str]) -> None:
+        """Add the commands dropping trimmed results to a (sync or async) pipeline"""
+        pipe.delete(*[f"result:{task_id}" for task_id in stale])
+        pipe.zrem(RESULT_INDEX_KEY, *stale)
+        pipe.hdel(RESULT_SIZES_KEY, *stale)
+
+    def _remember_result(self, result: TaskResult) -> None:
+        """Keep finished (immutable) results in the local LRU"""
+        if self._recent_results is not None and result.status in (
+            TaskStatus.COMPLETED, TaskStatus.FAILED, TaskStatus.CANCELLED
+        ):
+            self._recent_results.set(result.task_id, result)
+
+    def _trim_results(self, now: float) -> None:
+        """Drop index entries past the TTL and the oldest results beyond max_results"""
+        pipe = self.redis_client.pipeline()
+        pipe.zrangebyscore(RESULT_INDEX_KEY, "-inf", now - self.result_ttl)
+        pipe.zcard(RESULT_INDEX_KEY)
+        expired, retained = pipe.execute()
+
+        stale = list(expired)
+        overflow = retained - len(expired) - self.max_results
+        if overflow > 0:
+            stale += self.redis_client.zrange(RESULT_INDEX_KEY, len(expired), len(expired) + overflow - 1)
+        if not stale:
+            return
+
+        pipe = self.redis_client.pipeline()
+        self._queue_result_deletes(pipe, stale)
+        pipe.execute()
+        self.stats["evicted_results"] += max(overflow, 0)
+
     async def get_queue_info(self) -> Dict[str, Any]:
         """Get queue information from Redis"""
         if not self.redis_client:
@@ -341,6 +562,10 @@ class RedisTaskQueue(TaskQueue):
             return {
                 "pending_tasks": self.redis_client.zcard("pending_tasks"),
                 "running_tasks": self.redis_client.scard("running_tasks"),
+                "retained_results": self.redis_client.zcard(RESULT_INDEX_KEY),
+                "retained_result_bytes": sum(int(size) for size in self.redis_client.hvals(RESULT_SIZES_KEY)),
+                "evicted_results": self.stats["evicted_results"],
+                "cached_results": self._recent_results.stats()["size"] if self._recent_results else 0,
                 "redis_available": True
             }
         except Exception as e:
@@ -348,28 +573,400 @@ class RedisTaskQueue(TaskQueue):
             return {"error": str(e)}
 
 
+class RedisStreamTaskQueue(RedisTaskQueue):
+    """
+    Durable task queue on Redis Streams consumer groups.
+
+    - One stream per priority. dequeue() reads the highest priority stream
+      that has work and blocks on all of them when idle.
+    - A dequeued task stays in the group's pending entries list until
+      ack(), so a worker dying mid-task does not lose it: once an entry has
+      been idle for visibility_timeout seconds another worker reclaims it
+      with XAUTOCLAIM. Keep the timeout above the longest task run time.
+    - Entries delivered more than max_deliveries times (e.g. a task that
+      crashes its worker every time) and tasks out of retries go to the
+      dead-letter stream.
+    - retry() parks a task in a delay ZSET; dequeue() moves due tasks back
+      into their stream (PROMOTE_SCRIPT, atomic across workers).
+
+    Stream commands and result storage use redis.asyncio so blocking reads
+    do not block the event loop; results use RedisTaskQueue's key layout.
+    """
+
+    def __init__(
+        self,
+        redis_url: str = None,
+        prefix: str = "tasks",
+        group: str = "task_workers",
+        consumer: Optional[str] = None,
+        visibility_timeout: Optional[float] = None,
+        max_deliveries: Optional[int] = None,
+        **kwargs
+    ):
+        super().__init__(redis_url, **kwargs)
+        settings = get_settings()
+        self.group = group
+        self.consumer = consumer or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self.visibility_timeout = visibility_timeout or settings.TASK_VISIBILITY_TIMEOUT
+        self.max_deliveries = max_deliveries or settings.TASK_MAX_DELIVERIES
+        # Highest priority first
+        self.streams = [f"{prefix}:stream:{p.value}" for p in sorted(TaskPriority, key=lambda p: -p.value)]
+        self.stream_prefix = f"{prefix}:stream:"
+        self.delayed_key = f"{prefix}:delayed"
+        self.dead_letter_stream = f"{prefix}:dead"
+
+        self.stream_client = None
+        self._promote_script = None
+        url = redis_url or settings.REDIS_URL
+        if self.redis_client is not None and url:
+            self.stream_client = aioredis.from_url(url, decode_responses=True)
+            self._promote_script = self.stream_client.register_script(PROMOTE_SCRIPT)
+
+        self._groups_ready = False
+        self._next_claim = 0.0
+        # task_id -> (stream, message id) for tasks dequeued but not yet acked
+        self._inflight: Dict[str, Tuple[str, str]] = {}
+        # Extra entries returned by a multi-stream blocking read
+        self._ready: deque = deque()
+        self.stats.update({"redelivered": 0, "dead_lettered": 0, "retried": 0})
+
+    async def _ensure_groups(self) -> None:
+        if self._groups_ready:
+            return
+        for stream in self.streams:
+            try:
+                await self.stream_client.xgroup_create(stream, self.group, id="0", mkstream=True)
+            except redis.ResponseError as e:
+                if "BUSYGROUP" not in str(e):
+                    raise
+        self._groups_ready = True
+
+    async def enqueue(self, task: TaskDefinition) -> str:
+        """Append a task to its priority stream"""
+        if not self.stream_client:
+            raise ServiceUnavailableError("task queue", "Redis not available")
+
+        try:
+            await self._ensure_groups()
+            if task.is_due():
+                await self.stream_client.xadd(self.stream_prefix + str(task.priority.value), {"task": json.dumps(task.to_dict())})
+                logger.debug(f"Enqueued task {task.task_id} in Redis stream")
+            else:
+                await self.stream_client.zadd(self.delayed_key, self._delayed_entry(task))
+                logger.debug(f"Scheduled task {task.task_id} for {task.run_at.isoformat()}")
+            return task.task_id
+        except Exception as e:
+            logger.error(f"Failed to enqueue task {task.task_id}: {e}")
+            raise ServiceUnavailableError("task queue", str(e))
+
+    async def dequeue(self, timeout: float = 1.0) -> Optional[TaskDefinition]:
+        """Next task: reclaimed stuck tasks, then new ones by priority, blocking up to timeout"""
+        if not self.stream_client:
+            return None
+        if self._ready:
+            return self._ready.popleft()
+
+        deadline = time.monotonic() + timeout
+        try:
+            await self._ensure_groups()
+            while True:
+                next_due = await self._promote_due()
+                task = await self._claim_stuck() or await self._read()
+                if task is not None:
+                    return task
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                # Wake up in time to promote the next delayed task
+                if next_due is not None:
+                    remaining = min(remaining, max(next_due - time.time(), 0.001))
+                task = await self._read(block_ms=max(1, int(remaining * 1000)))
+                if task is not None:
+                    return task
+        except Exception as e:
+            # e.g. NOGROUP after the streams were deleted; recreate on the next call
+            self._groups_ready = False
+            logger.error(f"Failed to dequeue task: {e}")
+            await asyncio.sleep(min(timeout, 1.0))
+            return None
+
+    async def _promote_due(self) -> Optional[float]:
+        """Move due delayed tasks into their streams; returns when the next one is due"""
+        promoted, next_due = await self._promote_script(
+            keys=[self.delayed_key], args=[time.time(), PROMOTE_BATCH, self.stream_prefix]
+        )
+        if promoted:
+            logger.debug(f"Promoted {promoted} delayed tasks")
+        next_due = float(next_due)
+        return None if next_due < 0 else next_due
+
+    async def _read(self, block_ms: Optional[int] = None) -> Optional[TaskDefinition]:
+        if block_ms is None:
+            for stream in self.streams:
+                response = await self.stream_client.xreadgroup(self.group, self.consumer, {stream: ">"}, count=1)
+                if response:
+                    return await self._accept(response)
+            return None
+
+        response = await self.stream_client.xreadgroup(
+            self.group, self.consumer, {stream: ">" for stream in self.streams}, count=1, block=block_ms
+        )
+        return await self._accept(response) if response else None
+
+    async def _accept(self, response) -> Optional[TaskDefinition]:
+        """Decode XREADGROUP/XAUTOCLAIM entries; keeps any beyond the first for the next dequeue"""
+        tasks = []
+        for stream, messages in response:
+            for message_id, fields in messages:
+                try:
+                    task = TaskDefinition.from_dict(json.loads(fields["task"]))
+                except (KeyError, TypeError, ValueError) as e:
+                    await self._dead_letter_entry(stream, message_id, fields, f"undecodable task: {e}")
+                    continue
+                self._inflight[task.task_id] = (stream, message_id)
+                tasks.append(task)
+        self._ready.extend(tasks[1:])
+        return tasks[0] if tasks else None
+
+    async def _claim_stuck(self) -> Optional[TaskDefinition]:
+        """Take over one entry left unacked for visibility_timeout, dead-lettering over-delivered ones"""
+        now = time.monotonic()
+        if now < self._next_claim:
+            return None
+
+        min_idle = int(self.visibility_timeout * 1000)
+        for stream in self.streams:
+            while True:
+                _, claimed, *_ = await self.stream_client.xautoclaim(
+                    stream, self.group, self.consumer, min_idle_time=min_idle, start_id="0-0", count=1
+                )
+                if not claimed:
+                    break
+                message_id, fields = claimed[0]
+                if fields is None:
+                    # Entry deleted while pending
+                    await self.stream_client.xack(stream, self.group, message_id)
+                    continue
+
+                pending = await self.stream_client.xpending_range(
+                    stream, self.group, min=message_id, max=message_id, count=1
+                )
+                deliveries = pending[0]["times_delivered"] if pending else 1
+                if deliveries > self.max_deliveries:
+                    await self._dead_letter_entry(
+                        stream, message_id, fields, f"delivered {deliveries} times without ack", record_result=True
+                    )
+                    continue
+
+                task = await self._accept([[stream, [(message_id, fields)]]])
+                if task is not None:
+                    self.stats["redelivered"] += 1
+                    logger.warning(f"Reclaimed task {task.task_id} (delivery {deliveries}) from {stream}")
+                    return task
+
+        self._next_claim = now + CLAIM_INTERVAL
+        return None
+
+    async def ack(self, task: TaskDefinition) -> None:
+        """Remove a handled task from the pending entries list and the stream"""
+        location = self._inflight.pop(task.task_id, None)
+        if location is None or not self.stream_client:
+            return
+        stream, message_id = location
+        pipe = self.stream_client.pipeline()
+        pipe.xack(stream, self.group, message_id)
+        pipe.xdel(stream, message_id)
+        await pipe.execute()
+
+    async def release(self, task: TaskDefinition) -> None:
+        """Leave an interrupted task pending in the group; XAUTOCLAIM redelivers it"""
+        self._inflight.pop(task.task_id, None)
+
+    @staticmethod
+    def _delayed_entry(task: TaskDefinition) -> Dict[str, float]:
+        """Delay ZSET member ("<priority>|<task json>", see PROMOTE_SCRIPT) and its due time"""
+        return {f"{task.priority.value}|{json.dumps(task.to_dict())}": _epoch(task.run_at)}
+
+    async def retry(self, task: TaskDefinition, delay: float) -> None:
+        """Park the task in the delay ZSET and ack the current delivery, atomically"""
+        task.run_at = datetime.utcnow() + timedelta(seconds=delay)
+        location = self._inflight.pop(task.task_id, None)
+        pipe = self.stream_client.pipeline()
+        pipe.zadd(self.delayed_key, self._delayed_entry(task))
+        if location is not None:
+            stream, message_id = location
+            pipe.xack(stream, self.group, message_id)
+            pipe.xdel(stream, message_id)
+        await pipe.execute()
+        self.stats["retried"] += 1
+
+    async def dead_letter(self, task: TaskDefinition, reason: str) -> None:
+        """Move a task that failed permanently to the dead-letter stream"""
+        location = self._inflight.pop(task.task_id, None)
+        if location is None:
+            return
+        stream, message_id = location
+        await self._dead_letter_entry(stream, message_id, {"task": json.dumps(task.to_dict())}, reason)
+
+    async def _dead_letter_entry(
+        self, stream: str, message_id: str, fields: Dict[str, str], reason: str, record_result: bool = False
+    ) -> None:
+        payload = fields.get("task", "")
+        pipe = self.stream_client.pipeline()
+        pipe.xadd(
+            self.dead_letter_stream,
+            {"task": payload, "reason": reason, "stream": stream, "message_id": message_id,
+             "failed_at": datetime.utcnow().isoformat()},
+            maxlen=DEAD_LETTER_MAXLEN, approximate=True,
+        )
+        pipe.xack(stream, self.group, message_id)
+        pipe.xdel(stream, message_id)
+        await pipe.execute()
+        self.stats["dead_lettered"] += 1
+        logger.error(f"Dead-lettered {stream} entry {message_id}: {reason}")
+
+        if record_result:
+            try:
+                task_id = json.loads(payload)["task_id"]
+            except (KeyError, TypeError, ValueError):
+                return
+            await self.set_task_result(TaskResult(
+                task_id=task_id, status=TaskStatus.FAILED, error=reason, completed_at=datetime.utcnow()
+            ))
+
+    async def get_task_result(self, task_id: str) -> Optional[TaskResult]:
+        """Get task result from Redis"""
+        if not self.stream_client:
+            return None
+
+        if self._recent_results is not None:
+            cached = self._recent_results.get(task_id)
+            if cached is not None:
+                return cached
+
+        try:
+            result_data = await self.stream_client.hgetall(f"result:{task_id}")
+            if not result_data:
+                return None
+
+            result = self._decode_result(result_data)
+            self._remember_result(result)
+            return result
+        except Exception as e:
+            logger.error(f"Failed to get task result {task_id}: {e}")
+            return None
+
+    async def set_task_result(self, result: TaskResult) -> None:
+        """Set task result in Redis"""
+        if not self.stream_client:
+            return
+
+        try:
+            now = time.time()
+            pipe = self.stream_client.pipeline()
+            self._queue_result_writes(pipe, result, now)
+            await pipe.execute()
+
+            self._remember_result(result)
+            await self._trim_results(now)
+            logger.debug(f"Set task result for {result.task_id}")
+        except Exception as e:
+            logger.error(f"Failed to set task result {result.task_id}: {e}")
+
+    async def _trim_results(self, now: float) -> None:
+        """Async RedisTaskQueue._trim_results"""
+        pipe = self.stream_client.pipeline()
+        pipe.zrangebyscore(RESULT_INDEX_KEY, "-inf", now - self.result_ttl)
+        pipe.zcard(RESULT_INDEX_KEY)
+        expired, retained = await pipe.execute()
+
+        stale = list(expired)
+        overflow = retained - len(expired) - self.max_results
+        if overflow > 0:
+            stale += await self.stream_client.zrange(RESULT_INDEX_KEY, len(expired), len(expired) + overflow - 1)
+        if not stale:
+            return
+
+        pipe = self.stream_client.pipeline()
+        self._queue_result_deletes(pipe, stale)
+        await pipe.execute()
+        self.stats["evicted_results"] += max(overflow, 0)
+
+    async def get_queue_info(self) -> Dict[str, Any]:
+        """Queue depth per state, plus result retention"""
+        if not self.stream_client:
+            return {"error": "Redis not available"}
+
+        try:
+            await self._ensure_groups()
+            pipe = self.stream_client.pipeline(transaction=False)
+            for stream in self.streams:
+                pipe.xlen(stream)
+                pipe.xpending(stream, self.group)
+            pipe.zcard(self.delayed_key)
+            pipe.xlen(self.dead_letter_stream)
+            pipe.zcard(RESULT_INDEX_KEY)
+            pipe.hvals(RESULT_SIZES_KEY)
+            *per_stream, delayed, dead, retained, sizes = await pipe.execute()
+
+            lengths, pending = per_stream[0::2], per_stream[1::2]
+            running = sum(p["pending"] for p in pending)
+            return {
+                "pending_tasks": sum(lengths) - running,
+                "running_tasks": running,
+                "delayed_tasks": delayed,
+                "dead_letter_tasks": dead,
+                "redelivered_tasks": self.stats["redelivered"],
+                "retained_results": retained,
+                "retained_result_bytes": sum(int(size) for size in sizes),
+                "evicted_results": self.stats["evicted_results"],
+                "cached_results": self._recent_results.stats()["size"] if self._recent_results else 0,
+                "redis_available": True
+            }
+        except Exception as e:
+            logger.error(f"Failed to get stream queue info: {e}")
+            return {"error": str(e)}
+
+
 class TaskWorker:
     """Task worker that processes tasks from the queue"""
 
-    def __init__(self, queue: TaskQueue, worker_id: str = None):
+    def __init__(
+        self,
+        queue: TaskQueue,
+        worker_id: str = None,
+        cpu_pool: Optional[CPUPool] = None,
+        wait_samples: Optional[deque] = None,
+    ):
         self.queue = queue
         self.worker_id = worker_id or str(uuid.uuid4())[:8]
         self.running = False
+        # Longest a stopped worker idles before exiting
+        self.dequeue_timeout = 5.0
+        # Shared (monotonic time, seconds the task waited to start) samples
+        self.wait_samples = wait_samples
         self.task_registry: Dict[str, Callable] = {}
+        # Tasks run in the CPU process pool instead of a thread
+        self.cpu_bound_tasks: set = set()
+        self.cpu_pool = cpu_pool
         self.current_task: Optional[str] = None
         self.stats = {
             "tasks_processed": 0,
             "tasks_failed": 0,
+            "tasks_retried": 0,
             "started_at": None
         }
 
-    def register_task(self, name: str, func: Callable):
+    def register_task(self, name: str, func: Callable, cpu_bound: bool = False):
         """Register a task function"""
         self.task_registry[name] = func
+        if cpu_bound:
+            self.cpu_bound_tasks.add(name)
         logger.info(f"Worker {self.worker_id} registered task: {name}")
 
     async def start(self):
-        """Start the worker"""
+        """Start the worker; returns after stop() once the current task is finished"""
         self.running = True
         self.stats["started_at"] = datetime.utcnow()
         logger.info(f"Task worker {self.worker_id} started")
@@ -388,11 +985,14 @@ class TaskWorker:
 
     async def _process_next_task(self):
         """Process the next task from the queue"""
-        task = await self.queue.dequeue(timeout=5.0)
+        task = await self.queue.dequeue(timeout=self.dequeue_timeout)
         if not task:
             return
 
         self.current_task = task.task_id
+        if self.wait_samples is not None:
+            due = max(task.created_at, task.run_at or task.created_at)
+            self.wait_samples.append((time.monotonic(), max((datetime.utcnow() - due).total_seconds(), 0.0)))
         logger.info(f"Worker {self.worker_id} processing task {task.task_id}")
 
         result = TaskResult(
@@ -408,8 +1008,11 @@ class TaskWorker:
 
             func = self.task_registry[task.func_name]
 
+            if task.func_name in self.cpu_bound_tasks and self.cpu_pool is not None:
+                # The pool enforces the timeout by terminating the process
+                task_result = await self.cpu_pool.run(func, *task.args, timeout=task.timeout, **task.kwargs)
             # Execute with timeout if specified
-            if task.timeout:
+            elif task.timeout:
                 task_result = await asyncio.wait_for(
                     self._execute_task(func, task.args, task.kwargs),
                     timeout=task.timeout
@@ -426,6 +1029,14 @@ class TaskWorker:
             self.stats["tasks_processed"] += 1
             logger.info(f"Task {task.task_id} completed successfully")
 
+        except asyncio.CancelledError:
+            # Worker cancelled mid-task (drain timeout, shutdown): the attempt
+            # has no outcome, so record nothing and hand the task back
+            logger.warning(f"Worker {self.worker_id} cancelled during task {task.task_id}; releasing it")
+            self.current_task = None
+            await self.queue.release(task)
+            raise
+
         except Exception as e:
             # Failure
             result.status = TaskStatus.FAILED
@@ -434,13 +1045,40 @@ class TaskWorker:
             if result.started_at:
                 result.execution_time = (result.completed_at - result.started_at).total_seconds()
 
-            self.stats["tasks_failed"] += 1
-            logger.error(f"Task {task.task_id} failed: {e}")
+            if task.attempts < task.max_retries and task.func_name in self.task_registry:
+                result.status = TaskStatus.RETRYING
+                logger.warning(f"Task {task.task_id} failed (attempt {task.attempts + 1}/{task.max_retries + 1}): {e}")
+            else:
+                logger.error(f"Task {task.task_id} failed: {e}")
 
-        finally:
+        # Record the outcome before a retry is queued, so a fast retry's
+        # result cannot be overwritten by this attempt's
+        try:
             await self.queue.set_task_result(result)
+            await self._finish(task, result)
+        finally:
             self.current_task = None
 
+    async def _finish(self, task: TaskDefinition, result: TaskResult) -> None:
+        """Ack, retry or dead-letter a task after its attempt"""
+        if result.status == TaskStatus.RETRYING:
+            delay = retry_backoff(task.attempts, task.retry_delay)
+            task.attempts += 1
+            try:
+                await self.queue.retry(task, delay)
+                self.stats["tasks_retried"] += 1
+                return
+            except Exception as e:
+                logger.error(f"Could not queue retry of task {task.task_id}: {e}")
+                result.status = TaskStatus.FAILED
+                await self.queue.set_task_result(result)
+
+        if result.status == TaskStatus.FAILED:
+            self.stats["tasks_failed"] += 1
+            await self.queue.dead_letter(task, result.error or "failed")
+        else:
+            await self.queue.ack(task)
+
     async def _execute_task(self, func: Callable, args: tuple, kwargs: dict) -> Any:
         """Execute task function"""
         if asyncio.iscoroutinefunction(func):
@@ -471,23 +1109,38 @@ class TaskManager:
 
     def __init__(self, use_redis: bool = True):
         # Initialize queue
-        if use_redis and REDIS_AVAILABLE:
-            self.queue = RedisTaskQueue()
+        if use_redis and REDIS_AVAILABLE and get_settings().REDIS_URL:
+            self.queue = RedisStreamTaskQueue()
         else:
             self.queue = MemoryTaskQueue()
 
         self.workers: List[TaskWorker] = []
         self.task_registry: Dict[str, Callable] = {}
-
-    def register_task(self, name: str = None):
-        """Decorator to register a task function"""
+        self.cpu_bound_tasks: set = set()
+        self.cpu_pool = cpu_pool
+        self._worker_tasks: Dict[str, asyncio.Task] = {}
+        self._worker_ids = itertools.count(1)
+        # (monotonic time, queue wait seconds) per started task, for the autoscaler
+        self.wait_samples: deque = deque(maxlen=WAIT_SAMPLES)
+        self.autoscaler = None
+
+    def register_task(self, name: str = None, cpu_bound: bool = False):
+        """
+        Decorator to register a task function.
+
+        cpu_bound tasks run in the CPU process pool (so they must be
+        picklable top-level functions); others run on the event loop, or in
+        a thread if synchronous.
+        """
         def decorator(func: Callable) -> Callable:
             task_name = name or func.__name__
             self.task_registry[task_name] = func
+            if cpu_bound:
+                self.cpu_bound_tasks.add(task_name)
 
             # Register with all workers
             for worker in self.workers:
-                worker.register_task(task_name, func)
+                worker.register_task(task_name, func, cpu_bound)
 
             logger.info(f"Registered task: {task_name}")
             return func
@@ -500,10 +1153,26 @@ class TaskManager:
         *args,
         priority: TaskPriority = TaskPriority.NORMAL,
         max_retries: int = 3,
+        retry_delay: float = 1.0,
         timeout: float = None,
+        delay: float = None,
+        run_at: datetime = None,
         **kwargs
     ) -> str:
-        """Enqueue a task for processing"""
+        """
+        Enqueue a task for processing.
+
+        delay (seconds from now) or run_at (naive UTC, or timezone-aware)
+        postpones the first attempt. Failed attempts are retried up to
+        max_retries times with exponential backoff from retry_delay.
+        """
+        if delay is not None and run_at is not None:
+            raise ValueError("Pass either delay or run_at, not both")
+        if delay is not None:
+            run_at = datetime.utcnow() + timedelta(seconds=delay)
+        elif run_at is not None and run_at.tzinfo is not None:
+            run_at = run_at.astimezone(timezone.utc).replace(tzinfo=None)
+
         task_id = str(uuid.uuid4())
         task = TaskDefinition(
             task_id=task_id,
@@ -512,11 +1181,16 @@ class TaskManager:
             kwargs=kwargs,
             priority=priority,
             max_retries=max_retries,
-            timeout=timeout
+            retry_delay=retry_delay,
+            timeout=timeout,
+            run_at=run_at
         )
 
         await self.queue.enqueue(task)
-        logger.info(f"Enqueued task {func_name} with ID {task_id}")
+        if run_at is not None:
+            logger.info(f"Scheduled task {func_name} with ID {task_id} for {run_at.isoformat()}")
+        else:
+            logger.info(f"Enqueued task {func_name} with ID {task_id}")
         return task_id
 
     async def get_task_result(self, task_id: str, timeout: float = None) -> Optional[TaskResult]:
@@ -534,28 +1208,91 @@ class TaskManager:
 
         return None
 
-    async def start_workers(self, num_workers: int = 2):
-        """Start worker processes"""
-        for i in range(num_workers):
-            worker = TaskWorker(self.queue, f"worker-{i+1}")
+    async def run_cpu(self, func: Callable, *args, timeout: float = None, **kwargs) -> Any:
+        """Run a CPU-bound call in the process pool and await its result (no queueing)"""
+        return await self.cpu_pool.run(func, *args, timeout=timeout, **kwargs)
+
+    def add_worker(self) -> TaskWorker:
+        """Start one more worker"""
+        worker = TaskWorker(
+            self.queue, f"worker-{next(self._worker_ids)}", cpu_pool=self.cpu_pool, wait_samples=self.wait_samples
+        )
+
+        # Register all tasks with worker
+        for name, func in self.task_registry.items():
+            worker.register_task(name, func, name in self.cpu_bound_tasks)
 
-            # Register all tasks with worker
-            for name, func in self.task_registry.items():
-                worker.register_task(name, func)
+        self.workers.append(worker)
 
-            self.workers.append(worker)
+        # Start worker in background
+        self._worker_tasks[worker.worker_id] = asyncio.create_task(worker.start())
+        return worker
 
-            # Start worker in background
-            asyncio.create_task(worker.start())
+    def detach_worker(self) -> Optional[TaskWorker]:
+        """Take one worker out of the pool, preferring an idle one; it takes no new tasks"""
+        if not self.workers:
+            return None
+        idle = [w for w in self.workers if w.current_task is None]
+        worker = idle[-1] if idle else self.workers[-1]
+        self.workers.remove(worker)
+        worker.running = False
+        return worker
+
+    async def drain_worker(self, worker: TaskWorker, drain_timeout: float = 60.0) -> bool:
+        """
+        Wait for a detached worker to finish its current task.
+
+        Returns False if the worker had to be cancelled after drain_timeout.
+        """
+        await worker.stop()
+        task = self._worker_tasks.pop(worker.worker_id, None)
+        if task is None:
+            return True
+        try:
+            await asyncio.wait_for(asyncio.shield(task), drain_timeout)
+            return True
+        except asyncio.TimeoutError:
+            logger.warning(f"Worker {worker.worker_id} did not drain within {drain_timeout}s; cancelling")
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+            return False
+
+    async def remove_worker(self, drain_timeout: float = 60.0) -> bool:
+        """Stop one worker, preferring an idle one, after it finishes its current task"""
+        worker = self.detach_worker()
+        if worker is None:
+            return True
+        return await self.drain_worker(worker, drain_timeout)
+
+    async def start_workers(self, num_workers: int = 2):
+        """Start worker processes"""
+        for _ in range(num_workers):
+            self.add_worker()
 
         logger.info(f"Started {num_workers} task workers")
 
+    def start_autoscaler(self, **kwargs) -> asyncio.Task:
+        """Run a WorkerAutoscaler for this manager (kwargs override its settings defaults)"""
+        from app.services.worker_autoscaler import WorkerAutoscaler
+
+        self.autoscaler = WorkerAutoscaler(self, **kwargs)
+        return self.autoscaler.start()
+
     async def stop_workers(self):
-        """Stop all workers"""
+        """Stop all workers (and the autoscaler first, so it does not start new ones)"""
+        if self.autoscaler is not None:
+            await self.autoscaler.stop()
         for worker in self.workers:
             await worker.stop()
 
+        # Interrupted tasks are released back to the queue (see TaskWorker._process_next_task)
+        tasks = list(self._worker_tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
         self.workers.clear()
+        self._worker_tasks.clear()
         logger.info("Stopped all task workers")
 
     async def get_status(self) -> Dict[str, Any]:
@@ -566,6 +1303,8 @@ class TaskManager:
         return {
             "queue": queue_info,
             "workers": worker_stats,
+            "cpu_pool": self.cpu_pool.get_stats(),
+            "autoscaler": self.autoscaler.get_stats() if self.autoscaler else None,
             "registered_tasks": list(self.task_registry.keys()),
             "total_workers": len(self.workers)
         }
@@ -575,17 +1314,46 @@ class TaskManager:
 task_manager = TaskManager()
 
 
+def _call_background_task(ref: str, *args, **kwargs) -> Any:
+    """
+    Run a @background_task function by "module:qualname" reference.
+
+    The decorator replaces the module attribute with its enqueueing wrapper,
+    so the original function cannot be pickled for the CPU pool; the pool
+    gets this resolver instead, which finds the wrapper in the pool process
+    and calls the function behind it.
+    """
+    module_name, qualname = ref.split(":")
+    target: Any = importlib.import_module(module_name)
+    for attr in qualname.split("."):
+        target = getattr(target, attr)
+    return getattr(target, "_original_func", target)(*args, **kwargs)
+
+
 def background_task(
     name: str = None,
     priority: TaskPriority = TaskPriority.NORMAL,
     max_retries: int = 3,
-    timeout: float = None
+    timeout: float = None,
+    cpu_bound: bool = False
 ):
-    """Decorator to mark a function as a background task"""
+    """
+    Decorator to mark a function as a background task.
+
+    cpu_bound functions must be defined at module top level: the CPU pool
+    looks them up by module and qualified name.
+    """
     def decorator(func: Callable) -> Callable:
         # Register the task
         task_name = name or func.__name__
-        task_manager.register_task(task_name)(func)
+        if cpu_bound:
+            if "<locals>" in func.__qualname__ or asyncio.iscoroutinefunction(func):
+                raise ValueError(f"cpu_bound background task {task_name} must be a top-level sync function")
+            task_manager.register_task(task_name, cpu_bound=True)(
+                partial(_call_background_task, f"{func.__module__}:{func.__qualname__}")
+            )
+        else:
+            task_manager.register_task(task_name)(func)
 
         # Create an async wrapper that enqueues the task
         @wraps(func)
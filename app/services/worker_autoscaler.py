@@ -0,0 +1,187 @@
+# app/services/worker_autoscaler.py
+"""
+Autoscaling supervisor for TaskManager workers.
+
+A fixed worker count either lets bursts (broadcast fan-out, bulk exports)
+queue up or leaves workers idle the rest of the time. WorkerAutoscaler
+re-evaluates every interval from two signals:
+
+- queue depth: ready tasks (get_queue_info()["pending_tasks"]; delayed
+  tasks are not counted until due)
+- p95 queue wait: how long tasks that started in the last WAIT_WINDOW
+  seconds waited after becoming due (recorded by the workers)
+
+It scales up as soon as the backlog per worker, or the p95 wait while
+tasks are queued, is above target (sized to the backlog, capped at
+max_workers), and scales down one worker at a time only
+after idle_intervals consecutive quiet evaluations (hysteresis, so a
+short lull does not drop capacity just before the next burst). Removed
+workers leave the pool at once but finish their current task first
+(TaskManager.detach_worker / drain_worker); stop() waits for those drains.
+
+Every decision is kept in get_stats() for the status endpoint.
+"""
+import asyncio
+import math
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, Deque, Dict, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Seconds of wait samples considered for the p95
+WAIT_WINDOW = 60.0
+# Recent decisions kept for get_stats()
+DECISION_HISTORY = 50
+
+
+class WorkerAutoscaler:
+    """
+    Keeps a TaskManager's worker count between min_workers and max_workers.
+
+    Args:
+        manager: TaskManager whose workers are scaled
+        min_workers / max_workers: bounds
+        interval: seconds between evaluations in run()
+        target_wait: p95 queue wait (seconds) to stay under
+        backlog_per_worker: ready tasks per worker above which to add workers
+        idle_intervals: quiet evaluations in a row before removing a worker
+        drain_timeout: seconds a removed worker may take to finish its task
+    """
+
+    def __init__(
+        self,
+        manager,
+        min_workers: Optional[int] = None,
+        max_workers: Optional[int] = None,
+        interval: Optional[float] = None,
+        target_wait: Optional[float] = None,
+        backlog_per_worker: Optional[int] = None,
+        idle_intervals: Optional[int] = None,
+        drain_timeout: Optional[float] = None,
+    ):
+        from app.core.config import get_settings
+        settings = get_settings()
+        self.manager = manager
+        self.min_workers = settings.TASK_WORKERS_MIN if min_workers is None else min_workers
+        self.max_workers = max(max_workers or settings.TASK_WORKERS_MAX, self.min_workers)
+        self.interval = interval or settings.TASK_AUTOSCALE_INTERVAL
+        self.target_wait = target_wait or settings.TASK_AUTOSCALE_TARGET_WAIT
+        self.backlog_per_worker = backlog_per_worker or settings.TASK_AUTOSCALE_BACKLOG_PER_WORKER
+        self.idle_intervals = idle_intervals or settings.TASK_AUTOSCALE_IDLE_INTERVALS
+        self.drain_timeout = drain_timeout or settings.TASK_WORKER_DRAIN_TIMEOUT
+
+        self._quiet = 0
+        self._draining: set = set()
+        self._task: Optional[asyncio.Task] = None
+        self.decisions: Deque[Dict[str, Any]] = deque(maxlen=DECISION_HISTORY)
+        self.stats = {'evaluations': 0, 'scale_ups': 0, 'scale_downs': 0, 'drain_timeouts': 0}
+        self.last: Dict[str, Any] = {}
+
+    def wait_p95(self) -> float:
+        """p95 queue wait of tasks started within WAIT_WINDOW (0 without samples)"""
+        cutoff = time.monotonic() - WAIT_WINDOW
+        waits = sorted(wait for at, wait in self.manager.wait_samples if at >= cutoff)
+        if not waits:
+            return 0.0
+        return waits[min(len(waits) - 1, int(len(waits) * 0.95))]
+
+    async def evaluate(self) -> Dict[str, Any]:
+        """Take one scaling decision and apply it"""
+        self.stats['evaluations'] += 1
+        info = await self.manager.queue.get_queue_info()
+        depth = int(info.get("pending_tasks") or 0)
+        p95 = self.wait_p95()
+        current = len(self.manager.workers)
+        busy = sum(1 for worker in self.manager.workers if worker.current_task is not None)
+
+        quiet = depth == 0 and p95 <= self.target_wait / 2 and busy < current
+        self._quiet = self._quiet + 1 if quiet else 0
+
+        target, reason = current, "within targets"
+        if current < self.min_workers:
+            target, reason = self.min_workers, "below minimum"
+        elif current > self.max_workers:
+            target, reason = self.max_workers, "above maximum"
+        elif depth > current * self.backlog_per_worker or (depth and p95 > self.target_wait):
+            # Enough workers for the running tasks plus the backlog, at least one more
+            wanted = busy + math.ceil(depth / self.backlog_per_worker)
+            target = min(self.max_workers, max(current + 1, wanted))
+            reason = (f"backlog {depth} > {current * self.backlog_per_worker}"
+                      if depth > current * self.backlog_per_worker
+                      else f"p95 wait {p95:.2f}s > {self.target_wait:.2f}s")
+        elif self._quiet >= self.idle_intervals and current > self.min_workers:
+            target, reason = current - 1, f"idle for {self._quiet} evaluations"
+            self._quiet = 0
+
+        decision = {
+            'at': datetime.utcnow().isoformat(),
+            'action': 'up' if target > current else 'down' if target < current else 'hold',
+            'from': current,
+            'to': target,
+            'reason': reason,
+            'queue_depth': depth,
+            'wait_p95': round(p95, 3),
+            'busy': busy,
+        }
+        self.last = decision
+        if target != current:
+            self.decisions.append(decision)
+            logger.info(f"Task workers {current} -> {target}: {reason}")
+
+        for _ in range(target - current):
+            self.manager.add_worker()
+            self.stats['scale_ups'] += 1
+        for _ in range(current - target):
+            worker = self.manager.detach_worker()
+            self.stats['scale_downs'] += 1
+            drain = asyncio.create_task(self._drain(worker))
+            self._draining.add(drain)
+            drain.add_done_callback(self._draining.discard)
+        return decision
+
+    async def _drain(self, worker) -> None:
+        if not await self.manager.drain_worker(worker, self.drain_timeout):
+            self.stats['drain_timeouts'] += 1
+
+    async def run(self, interval: Optional[float] = None) -> None:
+        """Supervisor loop: start min_workers, then evaluate every interval"""
+        interval = interval or self.interval
+        while len(self.manager.workers) < self.min_workers:
+            self.manager.add_worker()
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.evaluate()
+            except Exception as e:
+                logger.error(f"Worker autoscaling failed: {e}")
+
+    def start(self) -> asyncio.Task:
+        """Run the supervisor loop in the background"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run())
+        return self._task
+
+    async def stop(self) -> None:
+        """Cancel the supervisor loop and wait for removed workers to finish draining"""
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        # Drains cancel their worker after drain_timeout, so this wait is bounded
+        await asyncio.gather(*self._draining, return_exceptions=True)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Bounds, current state and recent scaling decisions"""
+        return {
+            **self.stats,
+            'workers': len(self.manager.workers),
+            'draining': len(self._draining),
+            'min_workers': self.min_workers,
+            'max_workers': self.max_workers,
+            'target_wait': self.target_wait,
+            'last': self.last,
+            'decisions': list(self.decisions),
+        }
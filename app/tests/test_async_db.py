@@ -0,0 +1,131 @@
+# app/tests/test_async_db.py
+"""
+Tests for the async SQLAlchemy engine and session dependency.
+
+These don't need a live database: they check that the async engine keeps the
+pgbouncer Transaction mode guarantees and that get_async_db manages the
+transaction the same way the sync get_db does.
+"""
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from sqlalchemy.pool import NullPool
+
+from app.core import db as db_module
+
+
+class TestAsyncEngineConfiguration:
+    """The async engine must stay compatible with pgbouncer Transaction mode"""
+
+    def test_uses_psycopg_async_dialect(self):
+        assert db_module.async_engine.dialect.driver == "psycopg"
+        assert db_module.async_engine.dialect.is_async
+
+    def test_uses_null_pool(self):
+        assert isinstance(db_module.async_engine.pool, NullPool)
+
+    def test_prepared_statements_disabled(self):
+        connect_args = db_module._pgbouncer_connect_args("test")
+        assert connect_args["prepare_threshold"] is None
+        assert connect_args["autocommit"] is True
+
+
+def _mock_session_factory(session):
+    factory = MagicMock()
+    factory.return_value.__aenter__ = AsyncMock(return_value=session)
+    factory.return_value.__aexit__ = AsyncMock(return_value=False)
+    return factory
+
+
+class TestGetAsyncDb:
+    """get_async_db commits on success and rolls back on error"""
+
+    @pytest.mark.asyncio
+    async def test_commits_on_success(self):
+        session = AsyncMock()
+        with patch.object(db_module, "AsyncSessionLocal", _mock_session_factory(session)):
+            gen = db_module.get_async_db()
+            assert await gen.__anext__() is session
+            with pytest.raises(StopAsyncIteration):
+                await gen.__anext__()
+
+        session.commit.assert_awaited_once()
+        session.rollback.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_rolls_back_on_error(self):
+        session = AsyncMock()
+        with patch.object(db_module, "AsyncSessionLocal", _mock_session_factory(session)):
+            gen = db_module.get_async_db()
+            await gen.__anext__()
+            with pytest.raises(ValueError):
+                await gen.athrow(ValueError("boom"))
+
+        session.rollback.assert_awaited_once()
+        session.commit.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_context_manager_commits(self):
+        session = AsyncMock()
+        with patch.object(db_module, "AsyncSessionLocal", _mock_session_factory(session)):
+            async with db_module.get_async_db_session() as db:
+                assert db is session
+
+        session.commit.assert_awaited_once()
+
+
+class TestQueuePoolInstrumentation:
+    """Queue mode pool keeps health counters and discards idle connections"""
+
+    def _make_engine(self, tmp_path):
+        from sqlalchemy import create_engine
+        from sqlalchemy.pool import QueuePool
+
+        return create_engine(
+            f"sqlite:///{tmp_path / 'pool.db'}",
+            poolclass=QueuePool,
+            pool_size=2,
+            max_overflow=0,
+        )
+
+    def test_counts_checkouts_and_checkins(self, tmp_path):
+        from sqlalchemy import text
+
+        test_engine = self._make_engine(tmp_path)
+        metrics = db_module.PoolMetrics("test")
+        db_module._instrument_pool(test_engine, metrics)
+
+        for _ in range(3):
+            with test_engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+
+        stats = metrics.to_dict()
+        assert stats["connections_created"] == 1  # connection reused, not reopened
+        assert stats["checkouts"] == 3
+        assert stats["checkins"] == 3
+        test_engine.dispose()
+
+    def test_discards_idle_connections(self, tmp_path):
+        from sqlalchemy import text
+
+        test_engine = self._make_engine(tmp_path)
+        metrics = db_module.PoolMetrics("test")
+        with patch.object(db_module._settings, "DB_POOL_IDLE_TIMEOUT", 60):
+            db_module._instrument_pool(test_engine, metrics)
+
+        with test_engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+
+        real_monotonic = db_module.time.monotonic
+        with patch.object(db_module.time, "monotonic", lambda: real_monotonic() + 120):
+            with test_engine.connect() as conn:
+                assert conn.execute(text("SELECT 1")).scalar() == 1
+
+        stats = metrics.to_dict()
+        assert stats["idle_discarded"] == 1
+        assert stats["connections_created"] == 2
+        test_engine.dispose()
+
+    def test_pool_status_in_null_mode(self):
+        status = db_module.get_pool_status()
+        assert status["pool_type"] == "NullPool"
+        assert status["pool_mode"] == "null"
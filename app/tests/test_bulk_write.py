@@ -0,0 +1,190 @@
+# app/tests/test_bulk_write.py
+"""Tests for the set-based bulk write engine."""
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import Column, DateTime, String, UniqueConstraint, Uuid, create_engine, event
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Session, declarative_base
+
+from app.repositories.bulk_write import BulkWriter
+from app.repositories.customer import CustomerRepository
+from app.repositories.optimized_base import OptimizedBaseRepository
+
+TestBase = declarative_base()
+
+
+class Contact(TestBase):
+    __tablename__ = "contact"
+    __table_args__ = (UniqueConstraint("tenant_id", "phone"),)
+    id = Column(Uuid, primary_key=True, default=uuid.uuid4)
+    tenant_id = Column(Uuid, nullable=False)
+    name = Column(String(50), nullable=False)
+    phone = Column(String(20), nullable=False)
+    last_login = Column(DateTime, nullable=True)
+
+
+class ContactRepository(OptimizedBaseRepository[Contact]):
+    def __init__(self, db: Session):
+        super().__init__(db, Contact)
+
+
+TENANT = uuid.uuid4()
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'bulk.db'}")
+    TestBase.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def statements(engine):
+    executed = []
+
+    def _count(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+
+    event.listen(engine, "before_cursor_execute", _count)
+    yield executed
+    event.remove(engine, "before_cursor_execute", _count)
+
+
+@pytest.fixture
+def db(engine):
+    session = Session(engine)
+    yield session
+    session.close()
+
+
+def _contacts(count, prefix="c"):
+    return [
+        {"id": uuid.uuid4(), "tenant_id": TENANT, "name": f"{prefix}-{i}", "phone": f"+855{i:06d}"}
+        for i in range(count)
+    ]
+
+
+class TestBulkInsert:
+
+    def test_batches_rows_into_multi_row_inserts(self, db):
+        writer = BulkWriter(db, Contact, batch_size=100)
+        rows = writer.insert(_contacts(250), returning=["id", "name"])
+
+        assert writer.round_trips == 3
+        assert len(rows) == 250
+        assert db.query(Contact).count() == 250
+
+    def test_batch_size_respects_bind_parameter_limit(self, db):
+        writer = BulkWriter(db, Contact, batch_size=100_000)
+        batches = list(writer._batches(_contacts(30_000), columns_per_row=4))
+
+        assert max(len(batch) for batch in batches) <= 65535 // 4
+
+    def test_conflict_skips_duplicates(self, db):
+        writer = BulkWriter(db, Contact)
+        writer.insert(_contacts(5))
+        rows = writer.insert(_contacts(8, prefix="again"), returning=["name"], conflict_columns=["tenant_id", "phone"])
+
+        assert [row.name for row in rows] == ["again-5", "again-6", "again-7"]
+        assert db.query(Contact).count() == 8
+
+    def test_conflict_upserts_update_columns(self, db):
+        writer = BulkWriter(db, Contact)
+        writer.insert(_contacts(5))
+        writer.insert(
+            _contacts(5, prefix="renamed"),
+            conflict_columns=["tenant_id", "phone"],
+            update_columns=["name"],
+        )
+
+        assert sorted(c.name for c in db.query(Contact)) == [f"renamed-{i}" for i in range(5)]
+
+    def test_copy_requires_postgresql(self, db):
+        with pytest.raises(NotImplementedError):
+            BulkWriter(db, Contact).copy(_contacts(1))
+
+
+class TestBulkUpdate:
+
+    def test_update_applies_per_row_values(self, db):
+        writer = BulkWriter(db, Contact)
+        created = writer.insert(_contacts(20), returning=["id"])
+        base = datetime(2026, 1, 1)
+
+        updated = writer.update([
+            {"id": row.id, "last_login": base + timedelta(minutes=i)} for i, row in enumerate(created)
+        ])
+
+        assert updated == 20
+        logins = sorted(c.last_login for c in db.query(Contact))
+        assert logins == [base + timedelta(minutes=i) for i in range(20)]
+
+    def test_postgresql_uses_update_from_values(self):
+        engine = create_engine("postgresql+psycopg://user@localhost/db")
+        session = Session(engine)
+        writer = BulkWriter(session, Contact)
+        captured = []
+        session.execute = lambda stmt, *args: captured.append(stmt) or type("R", (), {"rowcount": 2})()
+
+        assert writer.update([
+            {"id": uuid.uuid4(), "name": "a"},
+            {"id": uuid.uuid4(), "name": "b"},
+        ]) == 2
+
+        sql = str(captured[0].compile(dialect=postgresql.psycopg.dialect()))
+        assert "FROM (VALUES" in sql
+        assert "contact.id = v.id" in sql
+        assert writer.round_trips == 1
+
+
+class TestRepositoryBulkOperations:
+
+    def test_bulk_create_has_no_per_row_refresh(self, db, statements):
+        repo = ContactRepository(db)
+        created = repo.bulk_create([{k: v for k, v in row.items() if k != "id"} for row in _contacts(50)])
+
+        assert len(created) == 50
+        assert all(contact.id for contact in created)
+        assert not any(s.lstrip().upper().startswith("SELECT") for s in statements)
+
+    def test_bulk_update_groups_by_field_set(self, db, statements):
+        repo = ContactRepository(db)
+        created = repo.bulk_create(_contacts(10))
+        statements.clear()
+
+        updates = [{"id": c.id, "name": f"n-{i}"} for i, c in enumerate(created[:6])]
+        updates += [{"id": c.id, "phone": f"+1{i}"} for i, c in enumerate(created[6:])]
+        assert repo.bulk_update(updates) == 10
+
+        assert len([s for s in statements if s.lstrip().upper().startswith("UPDATE")]) == 2
+
+
+class TestCustomerBulkCreate:
+
+    def test_inserts_and_returns_customer_dicts(self, tmp_path):
+        engine = create_engine(f"sqlite:///{tmp_path / 'customers.db'}")
+        event.listen(
+            engine, "connect",
+            lambda dbapi_conn, _: dbapi_conn.execute(f"ATTACH DATABASE '{tmp_path / 'invoice.db'}' AS invoice"),
+        )
+        with engine.begin() as conn:
+            conn.exec_driver_sql(
+                "CREATE TABLE invoice.customer (id INTEGER PRIMARY KEY, tenant_id TEXT, merchant_id TEXT, "
+                "name TEXT, email TEXT, phone TEXT, address TEXT, telegram_chat_id TEXT, "
+                "telegram_username TEXT, telegram_linked_at TIMESTAMP, created_at TIMESTAMP, updated_at TIMESTAMP)"
+            )
+
+        session = Session(engine)
+        customers = CustomerRepository.bulk_create(
+            session, TENANT, uuid.uuid4(), [{"name": f"customer-{i}", "phone": str(i)} for i in range(3)]
+        )
+        session.close()
+        engine.dispose()
+
+        assert [c["name"] for c in customers] == ["customer-0", "customer-1", "customer-2"]
+        assert customers[0]["tenant_id"] == str(TENANT)
+        assert customers[0]["telegram_linked_at"] is None
+        assert customers[0]["created_at"]
@@ -0,0 +1,302 @@
+# app/tests/test_cache.py
+"""Tests for the in-memory TTL cache and the two-tier (L1/Redis) cache."""
+import asyncio
+import json
+import threading
+import time
+from unittest.mock import patch
+
+import fakeredis
+import pytest
+from sqlalchemy.util import greenlet_spawn
+
+import app.core.cache as cache_module
+from app.core.cache import (
+    CacheEntry, CacheInvalidationBus, TieredCache, TTLCache, cached, estimate_size, flush_l2_writes,
+)
+
+
+class TestLRUEviction:
+
+    def test_evicts_least_recently_used(self):
+        cache = TTLCache(default_ttl=60, max_size=3)
+        for key in ("a", "b", "c"):
+            cache.set(key, key)
+        cache.get("a")  # a becomes most recently used
+        cache.set("d", "d")
+
+        assert cache.get("b") is None
+        assert cache.get("a") == "a"
+        assert cache.stats()["evictions"] == 1
+
+    def test_overwrite_does_not_evict(self):
+        cache = TTLCache(default_ttl=60, max_size=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.set("a", 3)
+
+        assert cache.get("a") == 3
+        assert cache.get("b") == 2
+        assert cache.stats()["evictions"] == 0
+
+    def test_entries_use_slots(self):
+        assert not hasattr(CacheEntry(value=1, expires_at=0, created_at=0), "__dict__")
+
+
+class TestExpiry:
+
+    def test_cleanup_removes_only_expired(self):
+        cache = TTLCache(default_ttl=60, max_size=100)
+        with patch("app.core.cache.time.time", return_value=1000.0):
+            cache.set("short", 1, ttl=5)
+            cache.set("long", 2, ttl=500)
+            cache.set("short", 3, ttl=50)  # overwrite leaves a stale heap item
+
+        with patch("app.core.cache.time.time", return_value=1010.0):
+            assert cache.cleanup_expired() == 0
+            assert cache.get("short") == 3
+
+        with patch("app.core.cache.time.time", return_value=1100.0):
+            assert cache.cleanup_expired() == 1
+            assert cache.get("long") == 2
+            assert cache.stats()["size"] == 1
+
+    def test_expiry_heap_is_compacted(self):
+        cache = TTLCache(default_ttl=60, max_size=10)
+        for i in range(1000):
+            cache.set("same", i)
+
+        assert len(cache._expiry) <= 2 * len(cache._cache) + 65
+
+
+class TestByteAccounting:
+
+    def test_tracks_bytes_on_set_overwrite_and_delete(self):
+        cache = TTLCache(default_ttl=60, max_size=100)
+        cache.set("k", "x" * 1000)
+        first = cache.stats()["memory_bytes"]
+        assert first >= 1000
+
+        cache.set("k", "x" * 10)
+        assert cache.stats()["memory_bytes"] < first
+
+        cache.delete("k")
+        assert cache.stats()["memory_bytes"] == 0
+
+    def test_byte_limit_evicts_lru(self):
+        cache = TTLCache(default_ttl=60, max_size=100, max_bytes=5000)
+        for i in range(10):
+            cache.set(f"k{i}", "x" * 1000)
+
+        stats = cache.stats()
+        assert stats["memory_bytes"] <= 5000
+        assert stats["evictions"] > 0
+        assert cache.get("k9") is not None
+        assert cache.get("k0") is None
+
+    def test_oversized_value_is_not_cached(self):
+        cache = TTLCache(default_ttl=60, max_size=100, max_bytes=500)
+        cache.set("big", "x" * 1000)
+
+        assert cache.get("big") is None
+        assert cache.stats()["memory_bytes"] == 0
+
+    def test_estimate_size_walks_containers(self):
+        assert estimate_size({"rows": ["x" * 500, "y" * 500]}) > 1000
+
+
+def _worker(server, namespace="user"):
+    """One worker process: its own L1, a Redis client and an invalidation bus"""
+    client = fakeredis.FakeRedis(server=server)
+    bus = CacheInvalidationBus(client)
+    tier = TieredCache(namespace, TTLCache(default_ttl=60, max_size=100), default_ttl=900)
+    tier.attach(client, bus, l1_max_ttl=30)
+    return tier, bus
+
+
+def _wait_for(predicate, timeout=3.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+class TestTieredCache:
+
+    def test_l1_only_without_redis(self):
+        tier = TieredCache("app", TTLCache(default_ttl=60, max_size=10))
+        tier.set("k", "v")
+
+        assert tier.get("k") == "v"
+        assert tier.get("missing") is None
+        stats = tier.stats()
+        assert stats["l1"]["hits"] == 1
+        assert stats["l2"]["enabled"] is False
+
+    def test_l2_hit_is_promoted_to_l1(self):
+        server = fakeredis.FakeServer()
+        writer, _ = _worker(server)
+        reader, _ = _worker(server)
+
+        writer.set("user:1", {"name": "Dara"})
+        assert reader.get("user:1") == {"name": "Dara"}
+        assert reader.get("user:1") == {"name": "Dara"}
+
+        stats = reader.stats()
+        assert stats["l2"]["hits"] == 1
+        assert stats["l1"]["hits"] == 1
+
+    def test_namespace_ttl_applies_to_l2_and_caps_l1(self):
+        server = fakeredis.FakeServer()
+        tier, _ = _worker(server)
+        tier.set("k", "v")
+
+        assert 890 <= tier.redis.ttl("cache:user:k") <= 900
+        assert tier.l1._cache["k"].expires_at - time.time() <= 30
+
+    def test_delete_broadcasts_to_other_workers(self):
+        server = fakeredis.FakeServer()
+        first, first_bus = _worker(server)
+        second, second_bus = _worker(server)
+        first.set("tenant:t1:user:1", "stale")
+        assert second.get("tenant:t1:user:1") == "stale"  # now in second's L1
+
+        second_bus.start()
+        try:
+            first.delete_matching("tenant:t1")
+            assert _wait_for(lambda: "tenant:t1:user:1" not in second.l1._cache)
+        finally:
+            second_bus.stop()
+
+        assert second.get("tenant:t1:user:1") is None
+        assert second_bus.stats()["received"] == 1
+
+    def test_own_messages_are_ignored(self):
+        server = fakeredis.FakeServer()
+        tier, bus = _worker(server)
+        tier.set("k", "v")
+        bus.handle_message({"data": json.dumps({"origin": bus.node_id, "ns": "user", "op": "clear", "value": None})})
+
+        assert tier.l1.get("k") == "v"
+
+    def test_redis_errors_degrade_to_l1(self):
+        class BrokenRedis:
+            def get(self, *args):
+                raise ConnectionError("down")
+
+            setex = get
+
+        tier = TieredCache("app", TTLCache(default_ttl=60, max_size=10))
+        tier.attach(BrokenRedis())
+        tier.set("k", "v")
+
+        assert tier.get("k") == "v"
+        assert tier.get("other") is None
+        assert tier.stats()["l2"]["errors"] == 2
+
+
+class _ThreadRecordingRedis(fakeredis.FakeRedis):
+    """Fake Redis that records which threads issued GET/SETEX"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.threads = []
+
+    def get(self, name):
+        self.threads.append(threading.get_ident())
+        return super().get(name)
+
+    def setex(self, name, time, value):
+        self.threads.append(threading.get_ident())
+        return super().setex(name, time, value)
+
+    def unlink(self, *names):
+        self.threads.append(threading.get_ident())
+        return super().unlink(*names)
+
+
+class TestTieredCacheAsync:
+
+    @pytest.mark.asyncio
+    async def test_l2_round_trips_run_off_the_event_loop(self):
+        server = fakeredis.FakeServer()
+        writer = TieredCache("app", TTLCache(default_ttl=60, max_size=10))
+        writer.attach(_ThreadRecordingRedis(server=server))
+        reader = TieredCache("app", TTLCache(default_ttl=60, max_size=10))
+        reader.attach(_ThreadRecordingRedis(server=server))
+
+        await writer.aset("k", {"v": 1})
+        assert await reader.aget("k") == {"v": 1}
+        assert await reader.aget("missing") is None
+
+        loop_thread = threading.get_ident()
+        assert writer.redis.threads and reader.redis.threads
+        assert loop_thread not in writer.redis.threads + reader.redis.threads
+        assert reader.stats()["l2"]["hits"] == 1
+
+    @pytest.mark.asyncio
+    async def test_cached_coroutine_coalesces_and_shares_through_l2(self):
+        server = fakeredis.FakeServer()
+        tier = TieredCache("app", TTLCache(default_ttl=60, max_size=10))
+        tier.attach(_ThreadRecordingRedis(server=server))
+        calls = 0
+
+        @cached(ttl=60, cache_instance=tier, include_tenant=False)
+        async def load_report(report_id: int):
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return {"id": report_id}
+
+        results = await asyncio.gather(*(load_report(7) for _ in range(5)))
+        assert results == [{"id": 7}] * 5
+        assert calls == 1
+
+        other = TieredCache("app", TTLCache(default_ttl=60, max_size=10))
+        other.attach(fakeredis.FakeRedis(server=server))
+        assert await other.aget("load_report:7") == {"id": 7}
+
+
+class TestTieredCacheOnEventLoop:
+    """Sync repository calls run on the loop thread (AsyncSession.run_sync)"""
+
+    @pytest.mark.asyncio
+    async def test_sync_calls_keep_redis_off_the_loop(self):
+        tier = TieredCache("tenant", TTLCache(default_ttl=60, max_size=10))
+        tier.attach(_ThreadRecordingRedis(server=fakeredis.FakeServer()))
+        tier.set("tenant:t1:a", {"v": 1})
+        flush_l2_writes()
+        tier.l1.clear()
+
+        # A plain sync call cannot wait for Redis; inside run_sync it can
+        assert tier.get("tenant:t1:a") is None
+        assert await greenlet_spawn(tier.get, "tenant:t1:a") == {"v": 1}
+
+        await greenlet_spawn(tier.delete_matching, "t1")
+        flush_l2_writes()
+
+        assert not tier.redis.exists("cache:tenant:tenant:t1:a")
+        assert tier.redis.threads and threading.get_ident() not in tier.redis.threads
+        assert tier.stats()["l2"]["bypassed"] == 1
+
+    @pytest.mark.asyncio
+    async def test_l2_is_not_read_while_an_invalidation_is_queued(self):
+        tier = TieredCache("tenant", TTLCache(default_ttl=60, max_size=10))
+        tier.attach(fakeredis.FakeRedis())
+        tier.set("k", "old")
+        flush_l2_writes()
+
+        gate = threading.Event()
+        cache_module._l2_writer.submit(gate.wait, 5)
+        try:
+            tier.delete("k")
+            assert tier.redis.exists("cache:tenant:k")
+            assert await greenlet_spawn(tier.get, "k") is None
+        finally:
+            gate.set()
+        flush_l2_writes()
+
+        assert not tier.redis.exists("cache:tenant:k")
+        assert tier.stats()["l2"]["pending_invalidations"] == 0
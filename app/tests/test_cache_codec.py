@@ -0,0 +1,101 @@
+# app/tests/test_cache_codec.py
+"""Tests for the Redis cache value codecs."""
+import pickle
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from uuid import uuid4
+
+import pytest
+
+from app.core.cache_codec import (
+    CODEC_JSON, COMPRESS_NONE, CacheSerializer, CodecError, MSGPACK_AVAILABLE,
+)
+from app.core.single_flight import Stamped
+
+PAYLOAD = {
+    "generated_at": datetime(2026, 3, 1, 12, 30, tzinfo=timezone.utc),
+    "day": date(2026, 3, 1),
+    "revenue": Decimal("1234.50"),
+    "tags": {"vip", "new"},
+    "rows": [{"id": i, "name": f"pattern-{i}", "score": i / 3} for i in range(5)],
+}
+
+
+class TestJsonCodec:
+
+    def test_round_trips_typed_values(self):
+        serializer = CacheSerializer("json", compress_min_bytes=0)
+        decoded = serializer.loads(serializer.dumps(PAYLOAD))
+
+        assert decoded == PAYLOAD
+        assert isinstance(decoded["revenue"], Decimal)
+
+    def test_uuid_round_trips(self):
+        serializer = CacheSerializer("json")
+        value = {"id": uuid4(), "rows": [{"owner": uuid4()}], "members": {uuid4()},
+                 "stamped": Stamped(uuid4(), 1.0, 0.1)}
+
+        decoded = serializer.loads(serializer.dumps(value))
+
+        assert {k: decoded[k] for k in ("id", "rows", "members")} == {k: value[k] for k in ("id", "rows", "members")}
+        assert decoded["stamped"].value == value["stamped"].value
+
+    def test_stamped_envelope_round_trips(self):
+        serializer = CacheSerializer("json")
+        decoded = serializer.loads(serializer.dumps(Stamped({"n": 1}, 100.0, 0.25)))
+
+        assert isinstance(decoded, Stamped)
+        assert (decoded.value, decoded.fresh_until, decoded.compute_time) == ({"n": 1}, 100.0, 0.25)
+
+    def test_unsupported_type_raises_codec_error(self):
+        with pytest.raises(CodecError):
+            CacheSerializer("json").dumps({"obj": object()})
+
+
+class TestCompression:
+
+    def test_small_payloads_are_not_compressed(self):
+        data = CacheSerializer("json", compress_min_bytes=1024).dumps({"a": 1})
+        assert data[0] == CODEC_JSON | COMPRESS_NONE
+
+    def test_large_payloads_are_compressed(self):
+        serializer = CacheSerializer("json", compress_min_bytes=256)
+        rows = [{"name": "pattern", "value": i} for i in range(500)]
+        data = serializer.dumps(rows)
+
+        assert data[0] & 0xF0 != COMPRESS_NONE
+        assert len(data) < len(CacheSerializer("json", compress_min_bytes=0).dumps(rows))
+        assert serializer.loads(data) == rows
+
+
+class TestPickleSafety:
+
+    def test_refuses_legacy_pickle_by_default(self):
+        with pytest.raises(CodecError):
+            CacheSerializer("json").loads(pickle.dumps({"a": 1}))
+
+    def test_allow_pickle_reads_legacy_values(self):
+        assert CacheSerializer("json", allow_pickle=True).loads(pickle.dumps({"a": 1})) == {"a": 1}
+
+    def test_refuses_tagged_pickle_by_default(self):
+        data = CacheSerializer("pickle").dumps({"a": 1})
+        with pytest.raises(CodecError):
+            CacheSerializer("json").loads(data)
+
+    def test_corrupt_payload_raises_codec_error(self):
+        with pytest.raises(CodecError):
+            CacheSerializer("json").loads(bytes((CODEC_JSON,)) + b"{not json")
+
+
+@pytest.mark.skipif(not MSGPACK_AVAILABLE, reason="msgpack not installed")
+class TestMsgpackCodec:
+
+    def test_round_trips_typed_values_including_uuid(self):
+        serializer = CacheSerializer("msgpack", compress_min_bytes=0)
+        value = {**PAYLOAD, "id": uuid4()}
+
+        assert serializer.loads(serializer.dumps(value)) == value
+
+    def test_json_reader_accepts_msgpack_values(self):
+        data = CacheSerializer("msgpack").dumps({"a": 1})
+        assert CacheSerializer("json").loads(data) == {"a": 1}
@@ -0,0 +1,199 @@
+# app/tests/test_cache_service.py
+"""Tests for the async Redis service cache backend."""
+import asyncio
+
+import fakeredis
+import pytest
+
+from app.core.cache import CacheInvalidationBus, flush_l2_writes
+from app.services.cache_service import RedisBackend, ServiceCache
+
+
+@pytest.fixture
+def redis_client():
+    return fakeredis.FakeAsyncRedis()
+
+
+@pytest.fixture
+def backend(redis_client):
+    return RedisBackend(redis_client=redis_client, version_ttl=0)
+
+
+class CountingRedis:
+    """Wraps a client and counts commands that reach the server"""
+
+    def __init__(self, client):
+        self._client = client
+        self.calls = []
+
+    def __getattr__(self, name):
+        attr = getattr(self._client, name)
+        if name in ("get", "mget", "set", "incr", "unlink", "keys", "scan"):
+            async def counted(*args, **kwargs):
+                self.calls.append(name)
+                return await attr(*args, **kwargs)
+            return counted
+        return attr
+
+
+class TestRedisBackend:
+
+    @pytest.mark.asyncio
+    async def test_roundtrip_and_versioned_keys(self, backend, redis_client):
+        assert await backend.set("OCRService:scan:abc", {"ok": True}, ttl=60)
+        assert await backend.get("OCRService:scan:abc") == {"ok": True}
+        assert await redis_client.exists("OCRService:v0:scan:abc")
+        assert 0 < await redis_client.ttl("OCRService:v0:scan:abc") <= 60
+
+    @pytest.mark.asyncio
+    async def test_mget_and_set_many(self, backend):
+        await backend.set_many({"Svc:a": 1, "Svc:b": 2}, ttl=60)
+
+        assert await backend.mget(["Svc:a", "Svc:missing", "Svc:b"]) == [1, None, 2]
+
+    @pytest.mark.asyncio
+    async def test_mget_is_one_round_trip_with_cached_versions(self, redis_client):
+        counting = CountingRedis(redis_client)
+        backend = RedisBackend(redis_client=counting, version_ttl=60)
+        await backend.set_many({f"Svc:{i}": i for i in range(20)}, ttl=60)
+        counting.calls.clear()
+
+        assert await backend.mget([f"Svc:{i}" for i in range(20)]) == list(range(20))
+        assert counting.calls == ["mget"]
+
+    @pytest.mark.asyncio
+    async def test_invalidate_tag_is_constant_time(self, redis_client):
+        counting = CountingRedis(redis_client)
+        backend = RedisBackend(redis_client=counting, version_ttl=0)
+        await backend.set_many({f"TenantService:{i}": i for i in range(50)}, ttl=60)
+        await backend.set("OtherService:x", "keep", ttl=60)
+        counting.calls.clear()
+
+        await backend.invalidate_tag("TenantService")
+
+        assert counting.calls == ["incr"]
+        assert await backend.get("TenantService:1") is None
+        assert await backend.get("OtherService:x") == "keep"
+
+    @pytest.mark.asyncio
+    async def test_other_worker_sees_invalidation_after_version_ttl(self, redis_client):
+        first = RedisBackend(redis_client=redis_client, version_ttl=0)
+        second = RedisBackend(redis_client=redis_client, version_ttl=0)
+        await first.set("Svc:k", "v", ttl=60)
+        assert await second.get("Svc:k") == "v"
+
+        await first.invalidate_tag("Svc")
+
+        assert await second.get("Svc:k") is None
+
+    @pytest.mark.asyncio
+    async def test_clear_pattern_uses_scan_not_keys(self, redis_client):
+        counting = CountingRedis(redis_client)
+        backend = RedisBackend(redis_client=counting, version_ttl=0)
+        await backend.set_many({f"Svc:{i}": i for i in range(10)}, ttl=60)
+
+        assert await backend.clear_pattern("Svc:*") == 10
+        assert "keys" not in counting.calls
+
+    @pytest.mark.asyncio
+    async def test_errors_mark_backend_unhealthy(self):
+        class DownRedis:
+            async def mget(self, keys):
+                raise ConnectionError("down")
+
+        backend = RedisBackend(redis_client=DownRedis(), version_ttl=0)
+        assert backend.is_healthy()
+        assert await backend.get("Svc:k") is None
+        assert not backend.is_healthy()
+
+
+class TestServiceCache:
+
+    @pytest.mark.asyncio
+    async def test_clear_service_cache_and_batch_calls(self, backend):
+        cache = ServiceCache("TenantService")
+        cache.primary_backend = backend
+
+        await cache.set_many({"TenantService:a": 1, "TenantService:b": 2})
+        assert await cache.get_many(["TenantService:a", "TenantService:b", "TenantService:c"]) == {
+            "TenantService:a": 1, "TenantService:b": 2,
+        }
+
+        await cache.clear_service_cache()
+        assert await cache.get_many(["TenantService:a", "TenantService:b"]) == {}
+
+    def test_keys_are_stable_and_skip_the_service_instance(self):
+        class TenantService:
+            pass
+
+        cache = ServiceCache("TenantService")
+        first = cache._make_key("lookup", TenantService(), "t1", limit=5)
+        second = cache._make_key("lookup", TenantService(), "t1", limit=5)
+
+        assert first == second
+        assert first.startswith("TenantService:lookup:")
+
+    @pytest.mark.asyncio
+    async def test_invalidation_on_one_worker_is_seen_by_another(self, redis_client):
+        def worker():
+            cache = ServiceCache("TenantService")
+            cache.primary_backend = RedisBackend(redis_client=redis_client, version_ttl=0)
+            return cache
+
+        first, second = worker(), worker()
+        await second.set("TenantService:a", "old")
+        assert await first.get("TenantService:a") == "old"
+
+        await first.clear_service_cache()
+
+        assert await second.get("TenantService:a") is None
+        assert await second.get_many(["TenantService:a"]) == {}
+
+    @pytest.mark.asyncio
+    async def test_fallback_only_used_while_primary_is_down(self, redis_client):
+        class DownRedis:
+            async def mget(self, keys):
+                raise ConnectionError("down")
+
+        cache = ServiceCache("TenantService")
+        cache.primary_backend = RedisBackend(redis_client=DownRedis(), version_ttl=0)
+
+        # First call fails over; the value lands in the in-process L1
+        assert await cache.set("TenantService:a", "v")
+        assert await cache.get("TenantService:a") == "v"
+
+        cache.primary_backend = RedisBackend(redis_client=redis_client, version_ttl=0)
+        assert await cache.set("TenantService:a", "fresh")
+        assert cache.local.l1.get("TenantService:a") is None
+        assert await cache.get("TenantService:a") == "fresh"
+
+    @pytest.mark.asyncio
+    async def test_l1_is_dropped_on_other_workers_through_the_bus(self, redis_client):
+        server = fakeredis.FakeServer()
+
+        def worker():
+            cache = ServiceCache("TenantService")
+            cache.primary_backend = RedisBackend(redis_client=redis_client, version_ttl=0)
+            bus = CacheInvalidationBus(fakeredis.FakeRedis(server=server))
+            cache.local.attach(None, bus, l1_max_ttl=30)
+            return cache, bus
+
+        first, _ = worker()
+        second, second_bus = worker()
+        await first.set("TenantService:a", "old")
+        assert await second.get("TenantService:a") == "old"
+        assert second.local.l1.get("TenantService:a") == "old"
+
+        second_bus.start()
+        try:
+            await first.clear_service_cache()
+            flush_l2_writes()
+            for _ in range(150):
+                if second.local.l1.get("TenantService:a") is None:
+                    break
+                await asyncio.sleep(0.02)
+        finally:
+            second_bus.stop()
+
+        assert await second.get("TenantService:a") is None
+        assert second.get_cache_stats()["l1"]["shared_invalidation"]
@@ -0,0 +1,147 @@
+# app/tests/test_cpu_pool.py
+"""Tests for the CPU process pool and the invoice documents rendered in it."""
+import asyncio
+import os
+import time
+from io import BytesIO
+
+import pytest
+
+from app.core.cpu_pool import CPUPool, CPUTaskTimeout
+from app.core.exceptions import ServiceUnavailableError
+from app.core.invoice_documents import build_invoices_xlsx, generate_pdf_from_invoice
+from app.services.task_queue import (
+    MemoryTaskQueue, TaskDefinition, TaskStatus, TaskWorker, background_task, task_manager,
+)
+
+
+# Pool processes import this module to find these, so they stay top-level
+def getpid_after(seconds: float = 0.0) -> int:
+    time.sleep(seconds)
+    return os.getpid()
+
+
+def add(a: int, b: int = 0) -> int:
+    return a + b
+
+
+@background_task(name="test_cpu_square", cpu_bound=True)
+def square(n: int) -> tuple:
+    return n * n, os.getpid()
+
+
+@pytest.fixture
+def pool():
+    pool = CPUPool(max_workers=2, max_queue=10, default_timeout=30, max_tasks_per_child=100)
+    yield pool
+    pool.shutdown()
+
+
+class TestCPUPool:
+
+    @pytest.mark.asyncio
+    async def test_runs_in_another_process(self, pool):
+        assert await pool.run(add, 2, b=3) == 5
+        assert await pool.run(getpid_after) != os.getpid()
+        assert pool.get_stats()['completed'] == 2
+
+    @pytest.mark.asyncio
+    async def test_timeout_terminates_and_pool_recovers(self, pool):
+        slow = asyncio.create_task(pool.run(getpid_after, 60, timeout=1.0))
+        innocent = asyncio.create_task(pool.run(getpid_after, 1.5))
+
+        with pytest.raises(CPUTaskTimeout):
+            await slow
+        # Killed with the pool, then retried on a fresh one
+        assert isinstance(await innocent, int)
+        assert await pool.run(add, 1, 1) == 2
+
+        stats = pool.get_stats()
+        assert stats['timeouts'] == 1 and stats['pool_restarts'] >= 1 and stats['retried'] == 1
+
+    @pytest.mark.asyncio
+    async def test_processes_are_recycled(self):
+        pool = CPUPool(max_workers=1, max_queue=10, default_timeout=30, max_tasks_per_child=2)
+        try:
+            pids = [await pool.run(getpid_after) for _ in range(4)]
+        finally:
+            pool.shutdown()
+
+        assert len(set(pids)) >= 2
+
+    @pytest.mark.asyncio
+    async def test_queue_is_bounded(self):
+        pool = CPUPool(max_workers=0, max_queue=1, default_timeout=5, max_tasks_per_child=1)
+        running = asyncio.create_task(pool.run(time.sleep, 0.2))
+        await asyncio.sleep(0.01)
+        queued = asyncio.create_task(pool.run(time.sleep, 0.01))
+        await asyncio.sleep(0.01)
+
+        assert pool.get_stats()['queued'] == 1 and pool.get_stats()['running'] == 1
+        with pytest.raises(ServiceUnavailableError):
+            await pool.run(time.sleep, 0)
+
+        await asyncio.gather(running, queued)
+        stats = pool.get_stats()
+        assert stats['rejected'] == 1 and stats['completed'] == 2
+        assert stats['wait_p95_ms'] >= 100
+
+    @pytest.mark.asyncio
+    async def test_thread_mode_timeout(self):
+        pool = CPUPool(max_workers=0, max_queue=1, default_timeout=5, max_tasks_per_child=1)
+
+        with pytest.raises(CPUTaskTimeout):
+            await pool.run(time.sleep, 0.3, timeout=0.05)
+
+    @pytest.mark.asyncio
+    async def test_cpu_bound_task_runs_through_worker(self):
+        queue = MemoryTaskQueue()
+        worker = TaskWorker(queue, cpu_pool=CPUPool(max_workers=0, max_queue=5, default_timeout=5, max_tasks_per_child=1))
+        worker.register_task("add", add, cpu_bound=True)
+        await queue.enqueue(TaskDefinition("t1", "add", (2,), {"b": 5}))
+
+        await worker._process_next_task()
+
+        result = await queue.get_task_result("t1")
+        assert result.status == TaskStatus.COMPLETED and result.result == 7
+        assert worker.cpu_pool.get_stats()['completed'] == 1
+
+
+    @pytest.mark.asyncio
+    async def test_decorated_cpu_bound_task_runs_in_pool(self, pool):
+        func = task_manager.task_registry["test_cpu_square"]
+
+        value, pid = await pool.run(func, 7)
+
+        assert value == 49 and pid != os.getpid()
+        assert square._original_func(3)[0] == 9
+
+    def test_nested_cpu_bound_task_is_rejected(self):
+        with pytest.raises(ValueError):
+            @background_task(name="test_cpu_nested", cpu_bound=True)
+            def nested(n):
+                return n
+
+
+class TestInvoiceDocuments:
+
+    def test_xlsx_export(self):
+        openpyxl = pytest.importorskip("openpyxl")
+        headers = ["Invoice Number", "Customer"]
+
+        content = build_invoices_xlsx(headers, [["INV-1", "A very long customer name indeed"], ["INV-2", ""]])
+
+        ws = openpyxl.load_workbook(BytesIO(content)).active
+        assert [c.value for c in ws[1]] == headers
+        assert ws["A2"].value == "INV-1" and ws.freeze_panes == "A2"
+        assert ws.column_dimensions["B"].width == len("A very long customer name indeed") + 3
+
+    @pytest.mark.asyncio
+    async def test_pdf_renders_in_pool(self, pool):
+        pytest.importorskip("fpdf")
+        invoice = {"invoice_number": "INV-9", "customer_name": "Dara", "amount": 12.5, "currency": "USD",
+                   "items": [{"description": "Widget", "quantity": 2, "unit_price": 6.25}]}
+
+        pdf = await pool.run(generate_pdf_from_invoice, invoice)
+
+        assert pdf.startswith(b"%PDF") and len(pdf) > 1000
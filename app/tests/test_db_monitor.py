@@ -0,0 +1,251 @@
+# app/tests/test_db_monitor.py
+"""Tests for statement fingerprinting and per-statement latency histograms."""
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+
+from app.core.db_monitor import (
+    LatencyHistogram, db_monitor, fingerprint_sql, _current_endpoint,
+)
+from app.core import db_monitor as db_monitor_module
+from app.core.config import get_settings
+from app.core.dependencies import get_current_user
+from app.core.models import User, UserRole
+from app.middleware.query_attribution import QueryAttributionMiddleware
+from app.routes.db_health import router as db_health_router
+
+
+class TestFingerprint:
+    """Literals and bind parameters collapse to one fingerprint per query shape"""
+
+    def test_strips_literals(self):
+        a = fingerprint_sql("SELECT * FROM invoice.invoice WHERE id = 42 AND status = 'paid'")
+        b = fingerprint_sql("SELECT *  FROM invoice.invoice\n WHERE id = 7 AND status = 'sent'")
+        assert a == b == "SELECT * FROM invoice.invoice WHERE id = ? AND status = ?"
+
+    def test_normalizes_bind_styles(self):
+        assert fingerprint_sql("SELECT 1 FROM t WHERE a = %(tenant_id)s") == \
+            fingerprint_sql("SELECT 1 FROM t WHERE a = :tenant_id")
+
+    def test_keeps_casts_and_identifiers(self):
+        fp = fingerprint_sql("SELECT (meta->>'confidence')::float FROM t1 WHERE x = 3")
+        assert "::float" in fp
+        assert "t1" in fp
+
+    def test_collapses_in_lists_and_values(self):
+        assert fingerprint_sql("SELECT * FROM t WHERE id IN (1, 2, 3)") == \
+            fingerprint_sql("SELECT * FROM t WHERE id IN (9)")
+        assert fingerprint_sql("INSERT INTO t (a, b) VALUES (1, 'x'), (2, 'y')") == \
+            "INSERT INTO t (a, b) VALUES (?, ?), ..."
+
+    def test_drops_comments(self):
+        assert fingerprint_sql("SELECT 1 -- note\nFROM t /* hint */") == "SELECT ? FROM t"
+
+
+class TestLatencyHistogram:
+
+    def test_percentiles_within_bucket_error(self):
+        hist = LatencyHistogram()
+        for ms in range(1, 101):
+            hist.record(float(ms))
+        assert 50 <= hist.percentile(50) <= 50 * 1.2
+        assert 95 <= hist.percentile(95) <= 95 * 1.2
+        assert hist.count == 100
+
+    def test_empty(self):
+        assert LatencyHistogram().percentile(99) == 0.0
+
+
+class TestStatementStats:
+
+    def test_top_statements_ranked_by_total_time(self):
+        db_monitor.reset_stats()
+        for _ in range(10):
+            db_monitor.record_statement("SELECT * FROM a WHERE id = 1", 5.0, rows=1, endpoint="GET /a")
+        db_monitor.record_statement("SELECT * FROM b WHERE id = 1", 20.0, rows=3, endpoint="GET /b")
+
+        top = db_monitor.get_top_statements(limit=2)
+        assert top[0]["fingerprint"] == "SELECT * FROM a WHERE id = ?"
+        assert top[0]["calls"] == 10
+        assert top[0]["total_time_ms"] == 50.0
+        assert top[0]["rows"] == 10
+        assert top[0]["top_endpoints"][0]["key"] == "GET /a"
+        assert top[1]["rows"] == 3
+
+        by_p95 = db_monitor.get_top_statements(limit=1, order_by="p95_ms")
+        assert by_p95[0]["fingerprint"] == "SELECT * FROM b WHERE id = ?"
+
+        endpoints = db_monitor.get_top_endpoints()
+        assert [e["endpoint"] for e in endpoints] == ["GET /a", "GET /b"]
+        db_monitor.reset_stats()
+
+    def test_fingerprint_table_is_bounded(self, monkeypatch):
+        from app.core import db_monitor as module
+        monkeypatch.setattr(module, "_MAX_FINGERPRINTS", 3)
+        db_monitor.reset_stats()
+        for i in range(6):
+            db_monitor.record_statement(f"SELECT * FROM t{i}", 1.0)
+        fingerprints = {row["fingerprint"] for row in db_monitor.get_top_statements(limit=10)}
+        assert len(fingerprints) == 4
+        assert "<other>" in fingerprints
+        db_monitor.reset_stats()
+
+
+class TestEndpointAttribution:
+    """Queries run inside a request are attributed to its route template"""
+
+    def test_engine_events_tag_route_template(self, tmp_path):
+        engine = create_engine(f"sqlite:///{tmp_path / 'monitor.db'}")
+        app = FastAPI()
+        app.add_middleware(QueryAttributionMiddleware)
+
+        @app.get("/items/{item_id}")
+        def read_item(item_id: int):
+            with engine.connect() as conn:
+                return {"value": conn.execute(text("SELECT :v"), {"v": item_id}).scalar()}
+
+        db_monitor.reset_stats()
+        client = TestClient(app)
+        assert client.get("/items/1").json() == {"value": 1}
+        assert client.get("/items/2").json() == {"value": 2}
+
+        endpoints = {row["endpoint"]: row for row in db_monitor.get_top_endpoints()}
+        assert endpoints["GET /items/{item_id}"]["calls"] == 2
+        assert _current_endpoint.get() is None
+        db_monitor.reset_stats()
+        engine.dispose()
+
+
+SCREENSHOT_JOIN_PLAN = {
+    "Node Type": "Hash Join",
+    "Hash Cond": "((s.meta ->> 'invoice_id'::text) = (i.id)::text)",
+    "Plans": [
+        {"Node Type": "Seq Scan", "Relation Name": "screenshot", "Schema": "scriptclient",
+         "Alias": "s", "Plan Rows": 250000},
+        {"Node Type": "Hash", "Plans": [
+            {"Node Type": "Index Scan", "Relation Name": "invoice", "Schema": "invoice", "Alias": "i"},
+        ]},
+    ],
+}
+
+PRODUCT_SEARCH_PLAN = {
+    "Node Type": "Seq Scan", "Relation Name": "products", "Schema": "inventory", "Alias": "products",
+    "Plan Rows": 12,
+    "Filter": "((tenant_id = 'a6c2'::uuid) AND ((name)::text ~~* '%shirt%'::text))",
+}
+
+
+class TestIndexAdvisor:
+    """EXPLAIN plans of sampled slow queries become ranked CREATE INDEX proposals"""
+
+    def test_json_join_gets_expression_index(self):
+        findings = db_monitor_module.find_seq_scans(SCREENSHOT_JOIN_PLAN, lambda t: 250000, 10000)
+        assert len(findings) == 1
+        assert findings[0]["table"] == "scriptclient.screenshot"
+        assert findings[0]["index"]["ddl"] == (
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_screenshot_meta_invoice_id "
+            "ON scriptclient.screenshot ((meta->>'invoice_id'))"
+        )
+
+    def test_ilike_search_gets_trigram_index(self):
+        findings = db_monitor_module.find_seq_scans(PRODUCT_SEARCH_PLAN, lambda t: 50000, 10000)
+        index = findings[0]["index"]
+        assert index["kind"] == "trigram"
+        assert "USING gin (name gin_trgm_ops)" in index["ddl"]
+        assert index["requires"] == "CREATE EXTENSION IF NOT EXISTS pg_trgm"
+
+    def test_equality_and_range_get_btree(self):
+        index = db_monitor_module.propose_index(
+            "invoice", "invoice", "invoice",
+            ["((tenant_id = 'x'::uuid) AND (created_at >= '2026-01-01'::date) AND (status = 'paid'::text))"],
+        )
+        assert index["columns"] == ["tenant_id", "status", "created_at"]
+        assert index["ddl"].endswith("ON invoice.invoice (tenant_id, status, created_at)")
+
+    def test_small_tables_ignored(self):
+        assert db_monitor_module.find_seq_scans(PRODUCT_SEARCH_PLAN, lambda t: 500, 10000) == []
+
+    def test_report_ranked_by_statement_time(self):
+        db_monitor.reset_stats()
+        join_sql = "SELECT * FROM scriptclient.screenshot s JOIN invoice.invoice i ON s.meta->>'invoice_id' = i.id::text"
+        search_sql = "SELECT * FROM inventory.products WHERE name ILIKE %(q)s"
+        plans = {join_sql: SCREENSHOT_JOIN_PLAN, "SELECT * FROM inventory.products WHERE name ILIKE $1": PRODUCT_SEARCH_PLAN}
+
+        db_monitor._sample_slow_query(join_sql, {}, 900.0)
+        db_monitor.record_statement(join_sql, 900.0)
+        for _ in range(5):
+            db_monitor._sample_slow_query(search_sql, {"q": "%shirt%"}, 400.0)
+            db_monitor.record_statement(search_sql, 400.0)
+        db_monitor._sample_slow_query("UPDATE t SET a = 1", {}, 500.0)  # writes are never EXPLAINed
+
+        report = db_monitor.build_index_report(
+            explain=lambda statement, param_count: plans[statement],
+            table_rows=lambda table: 100000,
+        )
+        assert [entry["rank"] for entry in report] == [1, 2]
+        assert report[0]["table"] == "inventory.products"
+        assert report[0]["impact_ms"] == 2000.0
+        assert report[1]["index"]["kind"] == "expression"
+        assert report[0]["conditions"] == ["((tenant_id = ?::uuid) AND ((name)::text ~~* ?::text))"]
+
+        recommendations = db_monitor.get_optimization_recommendations()
+        index_recs = [rec for rec in recommendations if rec["type"] == "index"]
+        assert index_recs[0]["recommendation"] == report[0]["index"]["ddl"]
+        assert index_recs[0]["priority"] == "high"
+        db_monitor.reset_stats()
+
+    def test_samples_keep_no_parameter_values(self):
+        db_monitor.reset_stats()
+        sql = ("SELECT * FROM public.user WHERE email = %(email)s AND tenant_id = %(tenant_id)s "
+               "AND (email = %(email)s OR name LIKE 'a%%')")
+        db_monitor._sample_slow_query(sql, {"email": "victim@example.com", "tenant_id": "a6c2"}, 300.0)
+
+        sample = next(iter(db_monitor._slow_samples.values()))
+        assert sample.statement == (
+            "SELECT * FROM public.user WHERE email = $1 AND tenant_id = $2 "
+            "AND (email = $1 OR name LIKE 'a%')"
+        )
+        assert sample.param_count == 2
+        assert "victim@example.com" not in repr(sample)
+        db_monitor.reset_stats()
+
+    def test_conditions_are_redacted(self):
+        assert db_monitor_module.redact_condition(
+            "((email)::text = 'victim@example.com'::text) AND (id > 42) AND ((meta ->> 'invoice_id'::text) = $1)"
+        ) == "((email)::text = ?::text) AND (id > ?) AND ((meta ->> 'invoice_id'::text) = ?)"
+
+    def test_generic_plan_like_gets_trigram_index(self):
+        index = db_monitor_module.propose_index(
+            "inventory", "products", "products", ["((name)::text ~~ $2)"],
+        )
+        assert index["kind"] == "trigram"
+
+
+class TestDbHealthAccess:
+    """The /db router is fleet-wide and only open to platform administrators"""
+
+    def _client(self, user):
+        app = FastAPI()
+        app.include_router(db_health_router)
+        app.dependency_overrides[get_current_user] = lambda: user
+        return TestClient(app)
+
+    def test_tenant_owner_is_rejected(self, monkeypatch):
+        monkeypatch.setattr(get_settings(), "PLATFORM_ADMIN_EMAILS", "ops@example.com")
+        owner = User(role=UserRole.admin, email="owner@tenant.com", email_verified=True)
+        client = self._client(owner)
+
+        assert client.get("/db/health").status_code == 403
+        assert client.get("/db/cache/stats").status_code == 403
+        assert client.post("/db/cache/clear").status_code == 403
+        assert client.post("/db/monitoring/reset").status_code == 403
+
+    def test_unverified_listed_email_is_rejected(self, monkeypatch):
+        monkeypatch.setattr(get_settings(), "PLATFORM_ADMIN_EMAILS", "ops@example.com")
+        user = User(role=UserRole.admin, email="ops@example.com", email_verified=False)
+        assert self._client(user).get("/db/cache/stats").status_code == 403
+
+    def test_platform_admin_is_allowed(self, monkeypatch):
+        monkeypatch.setattr(get_settings(), "PLATFORM_ADMIN_EMAILS", " Ops@Example.com ,other@example.com")
+        admin = User(role=UserRole.admin, email="ops@example.com", email_verified=True)
+        assert self._client(admin).get("/db/cache/stats").status_code == 200
@@ -0,0 +1,62 @@
+# app/tests/test_db_replica.py
+"""Tests for read-replica routing and primary fallback."""
+import pytest
+from unittest.mock import patch
+
+from app.core import db as db_module
+from app.core.db import ReplicaRouter
+
+
+class TestReplicaRouter:
+    """Routing decisions based on replica health and lag"""
+
+    def test_primary_until_first_successful_check(self):
+        router = ReplicaRouter(max_lag_seconds=5, check_interval=10)
+        assert router.choose_replica() is False
+        assert router.primary_fallbacks == 1
+
+    def test_routes_to_replica_within_lag_budget(self):
+        router = ReplicaRouter(max_lag_seconds=5, check_interval=10)
+        router.record_lag(1.5)
+        assert router.choose_replica() is True
+        assert router.status()["routing_to"] == "replica"
+        assert router.status()["lag_seconds"] == 1.5
+
+    def test_falls_back_when_lagging(self):
+        router = ReplicaRouter(max_lag_seconds=5, check_interval=10)
+        router.record_lag(12.0)
+        assert router.choose_replica() is False
+        assert router.status()["routing_to"] == "primary"
+
+    def test_falls_back_when_down(self):
+        router = ReplicaRouter(max_lag_seconds=5, check_interval=10)
+        router.record_lag(0.0)
+        router.record_failure(ConnectionError("connection refused"))
+        assert router.choose_replica() is False
+        assert router.status()["healthy"] is False
+        assert "connection refused" in router.status()["last_error"]
+
+    def test_check_claimed_once_per_interval(self):
+        router = ReplicaRouter(max_lag_seconds=5, check_interval=10)
+        assert router.claim_check() is True
+        assert router.claim_check() is False
+
+
+class TestReadSessionRouting:
+    """Read dependencies without a replica configured"""
+
+    def test_status_when_unconfigured(self):
+        with patch.object(db_module, "replica_router", None):
+            assert db_module.get_replica_status() == {"configured": False, "routing_to": "primary"}
+
+    def test_dependency_factory(self):
+        assert db_module.db_dependency(read_only=True) is db_module.get_read_db
+        assert db_module.db_dependency() is db_module.get_db
+        assert db_module.async_db_dependency(read_only=True) is db_module.get_async_read_db
+        assert db_module.async_db_dependency() is db_module.get_async_db
+
+    @pytest.mark.asyncio
+    async def test_unconfigured_replica_uses_primary(self):
+        with patch.object(db_module, "replica_router", None):
+            assert db_module._use_replica() is False
+            assert await db_module._use_replica_async() is False
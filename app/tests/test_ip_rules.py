@@ -0,0 +1,241 @@
+# app/tests/test_ip_rules.py
+"""Tests for the in-memory IP access rule snapshot used by RateLimitMiddleware."""
+import threading
+import time
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock, patch
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.ip_rules import NEVER, CIDRTrie, IPRuleSnapshot, IPRuleStore, parse_rule_target
+from app.core.models import IPAccessRule, IPRuleType
+from app.repositories.ip_access import IPAccessRepository
+
+
+def future(hours=1):
+    return datetime.utcnow() + timedelta(hours=hours)
+
+
+class TestCIDRTrie:
+
+    def test_longest_lasting_prefix_wins(self):
+        trie = CIDRTrie(32)
+        trie.insert(parse_rule_target("10.0.0.0/8"), 100.0)
+        trie.insert(parse_rule_target("10.1.0.0/16"), 50.0)
+
+        assert trie.lookup(int(parse_rule_target("10.1.2.3"))) == 100.0
+        assert trie.lookup(int(parse_rule_target("11.0.0.1"))) is None
+
+
+class TestIPRuleSnapshot:
+
+    def test_exact_match_and_precedence(self):
+        snapshot = IPRuleSnapshot([
+            ("1.2.3.4", IPRuleType.blacklist, None),
+            ("1.2.3.4", IPRuleType.whitelist, None),
+            ("5.6.7.8", IPRuleType.auto_banned, future()),
+        ])
+
+        assert snapshot.match("1.2.3.4")[0] == IPRuleType.whitelist
+        assert snapshot.match("5.6.7.8")[0] == IPRuleType.auto_banned
+        assert snapshot.match("9.9.9.9") == (None, None)
+
+    def test_expired_rules_lapse_without_reload(self):
+        snapshot = IPRuleSnapshot([("5.6.7.8", IPRuleType.auto_banned, future(hours=1))])
+
+        assert snapshot.match("5.6.7.8")[0] == IPRuleType.auto_banned
+        assert snapshot.match("5.6.7.8", now=time.time() + 7200) == (None, None)
+
+    def test_cidr_blocks_ipv4_and_ipv6(self):
+        snapshot = IPRuleSnapshot([
+            ("203.0.113.0/24", IPRuleType.blacklist, None),
+            ("2001:db8::/32", IPRuleType.blacklist, None),
+            ("203.0.113.7", IPRuleType.whitelist, None),
+        ])
+
+        assert snapshot.match("203.0.113.99") == (IPRuleType.blacklist, NEVER)
+        assert snapshot.match("203.0.113.7")[0] == IPRuleType.whitelist
+        assert snapshot.match("2001:db8:0:0::1")[0] == IPRuleType.blacklist
+        assert snapshot.match("203.0.114.1") == (None, None)
+
+    def test_ipv6_spelling_is_normalized(self):
+        snapshot = IPRuleSnapshot([("2001:db8::1", IPRuleType.blacklist, None)])
+
+        assert snapshot.match("2001:0db8:0000:0000:0000:0000:0000:0001")[0] == IPRuleType.blacklist
+
+    def test_invalid_rows_are_skipped(self):
+        snapshot = IPRuleSnapshot([("not-an-ip", IPRuleType.blacklist, None), ("1.1.1.1", IPRuleType.blacklist, None)])
+
+        assert snapshot.rule_count == 1
+        assert snapshot.match("unknown") == (None, None)
+
+    def test_with_rule_copies(self):
+        snapshot = IPRuleSnapshot([("10.0.0.0/8", IPRuleType.blacklist, None)])
+        updated = snapshot.with_rule("8.8.8.8", IPRuleType.auto_banned, future())
+
+        assert snapshot.match("8.8.8.8") == (None, None)
+        assert updated.match("8.8.8.8")[0] == IPRuleType.auto_banned
+        assert updated.match("10.2.3.4")[0] == IPRuleType.blacklist
+
+    def test_with_rule_copies_only_what_it_touches(self):
+        snapshot = IPRuleSnapshot([("10.0.0.0/8", IPRuleType.blacklist, None), ("1.1.1.1", IPRuleType.auto_banned, None)])
+        updated = snapshot.with_rule("10.1.0.0/16", IPRuleType.whitelist, None).with_rule("10.2.0.0/16", IPRuleType.blacklist, None)
+
+        assert updated._rules[IPRuleType.auto_banned] is snapshot._rules[IPRuleType.auto_banned]
+        assert snapshot.match("10.2.3.4")[0] == IPRuleType.blacklist
+        assert snapshot.match("10.1.2.3")[0] == IPRuleType.blacklist
+        assert updated.match("10.1.2.3")[0] == IPRuleType.whitelist
+        assert updated.rule_count == 4 and snapshot.rule_count == 2
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'ip_rules.db'}")
+    IPAccessRule.__table__.create(engine)
+    yield sessionmaker(bind=engine)
+    engine.dispose()
+
+
+class TestIPRuleStore:
+
+    def test_reloads_only_when_version_changes(self, session_factory):
+        store = IPRuleStore(session_factory)
+        assert store.refresh()
+        assert not store.refresh()
+
+        with session_factory() as session:
+            IPAccessRepository(session).add_ip_rule("198.51.100.0/24", IPRuleType.blacklist)
+
+        assert store.refresh()
+        assert store.match("198.51.100.20")[0] == IPRuleType.blacklist
+
+        with session_factory() as session:
+            IPAccessRepository(session).remove_ip_rule("198.51.100.0/24", IPRuleType.blacklist)
+
+        assert store.refresh()
+        assert store.match("198.51.100.20") == (None, None)
+
+    def test_failed_load_keeps_previous_snapshot(self, session_factory):
+        store = IPRuleStore(session_factory)
+        store.add_local("1.2.3.4", IPRuleType.blacklist)
+        store._session_factory = MagicMock(side_effect=ConnectionError("db down"))
+
+        assert not store.refresh()
+        assert store.match("1.2.3.4")[0] == IPRuleType.blacklist
+        assert store.stats['errors'] == 1
+
+    def test_add_local_does_not_wait_for_a_reload(self, session_factory):
+        store = IPRuleStore(session_factory)
+        loading, release = threading.Event(), threading.Event()
+
+        def slow_session():
+            loading.set()
+            release.wait(5)
+            return session_factory()
+
+        store._session_factory = slow_session
+        reload = threading.Thread(target=store.refresh)
+        reload.start()
+        try:
+            assert loading.wait(5)
+            started = time.monotonic()
+            store.add_local("8.8.8.8", IPRuleType.auto_banned, future())
+            assert time.monotonic() - started < 0.5
+        finally:
+            release.set()
+            reload.join(5)
+
+        # The reload read no ban (auto-bans reach the DB in batches) but keeps the local one
+        assert store.match("8.8.8.8")[0] == IPRuleType.auto_banned
+
+    def test_local_rule_is_dropped_once_the_db_has_it(self, session_factory):
+        store = IPRuleStore(session_factory)
+        banned_until = future()
+        store.add_local("8.8.8.8", IPRuleType.auto_banned, banned_until)
+
+        with session_factory() as session:
+            IPAccessRepository(session).add_ip_rule("8.8.8.8", IPRuleType.auto_banned, expires_at=banned_until)
+        assert store.refresh()
+
+        assert store._local_rules == []
+        assert store.match("8.8.8.8")[0] == IPRuleType.auto_banned
+
+
+class TestRateLimitMiddleware:
+
+    @pytest.fixture
+    def client(self):
+        from app.middleware.rate_limit import RateLimitMiddleware
+
+        store = IPRuleStore()
+        store.loaded = True
+        store.add_local("6.6.6.6", IPRuleType.blacklist)
+        store.add_local("7.7.7.7", IPRuleType.auto_banned, future(hours=2))
+
+        api = FastAPI()
+        api.add_middleware(RateLimitMiddleware)
+
+        @api.get("/ping")
+        def ping():
+            return {"ok": True}
+
+        with patch("app.middleware.rate_limit.ip_rule_store", store), \
+                patch("app.core.db.SessionLocal") as session_local:
+            yield TestClient(api), session_local
+
+    def test_hot_path_does_no_database_io(self, client):
+        test_client, session_local = client
+
+        assert test_client.get("/ping", headers={"X-Forwarded-For": "9.9.9.9"}).status_code == 200
+        assert test_client.get("/ping", headers={"X-Forwarded-For": "6.6.6.6"}).status_code == 403
+
+        banned = test_client.get("/ping", headers={"X-Forwarded-For": "7.7.7.7"})
+        assert banned.status_code == 429
+        assert 7000 < int(banned.headers["Retry-After"]) <= 7200
+
+        session_local.assert_not_called()
+
+
+class TestCreateIPRuleScope:
+    """IP rules are global, so CIDR blocks need a platform admin and a bounded prefix"""
+
+    @pytest.fixture
+    def make_client(self, session_factory, monkeypatch):
+        from app.core.config import get_settings
+        from app.core.dependencies import get_current_user
+        from app.core.models import User, UserRole
+        from app.routes.ip_management import router
+
+        monkeypatch.setattr(get_settings(), "PLATFORM_ADMIN_EMAILS", "ops@example.com")
+
+        def make(email):
+            api = FastAPI()
+            api.include_router(router)
+            user = User(role=UserRole.admin, email=email, email_verified=True, username=email)
+            api.dependency_overrides[get_current_user] = lambda: user
+            return TestClient(api)
+
+        with patch("app.routes.ip_management.SessionLocal", session_factory), \
+                patch("app.routes.ip_management.ip_rule_store"):
+            yield make
+
+    def test_tenant_owner_can_add_single_ip_but_not_cidr(self, make_client):
+        client = make_client("owner@tenant.com")
+
+        assert client.post("/api/admin/ip/rules", json={"ip_address": "203.0.113.7", "rule_type": "blacklist"}).status_code == 200
+        for block in ("0.0.0.0/0", "203.0.113.0/24", "2001:db8::/64"):
+            response = client.post("/api/admin/ip/rules", json={"ip_address": block, "rule_type": "whitelist"})
+            assert response.status_code == 403
+
+    def test_platform_admin_limited_to_min_prefix(self, make_client):
+        client = make_client("ops@example.com")
+
+        for block in ("0.0.0.0/0", "10.0.0.0/8", "2001:db8::/32"):
+            response = client.post("/api/admin/ip/rules", json={"ip_address": block, "rule_type": "blacklist"})
+            assert response.status_code == 400
+        assert client.post("/api/admin/ip/rules", json={"ip_address": "198.51.100.0/24", "rule_type": "blacklist"}).status_code == 200
+        assert client.post("/api/admin/ip/rules", json={"ip_address": "2001:db8:1::/48", "rule_type": "blacklist"}).status_code == 200
@@ -0,0 +1,134 @@
+# app/tests/test_keyset_pagination.py
+"""Tests for keyset (cursor) pagination."""
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import Boolean, Column, DateTime, String, Uuid, create_engine
+from sqlalchemy.orm import Session, declarative_base
+
+from app.repositories.optimized_base import (
+    InvalidCursor, OptimizedBaseRepository, decode_cursor, keyset_paginate,
+)
+
+TestBase = declarative_base()
+
+
+class Item(TestBase):
+    __tablename__ = "item"
+    id = Column(Uuid, primary_key=True, default=uuid.uuid4)
+    tenant_id = Column(Uuid, nullable=False)
+    name = Column(String(50), nullable=False)
+    is_active = Column(Boolean, default=True, nullable=False)
+    created_at = Column(DateTime(timezone=True), nullable=False)
+
+
+class ItemRepository(OptimizedBaseRepository[Item]):
+    def __init__(self, db: Session):
+        super().__init__(db, Item)
+
+
+TENANT = uuid.uuid4()
+OTHER_TENANT = uuid.uuid4()
+
+
+@pytest.fixture
+def db(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'keyset.db'}")
+    TestBase.metadata.create_all(engine)
+    session = Session(engine)
+    base = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    for i in range(25):
+        # Groups of three rows share a timestamp so the id tiebreaker matters
+        session.add(Item(tenant_id=TENANT, name=f"item-{i:02d}", created_at=base + timedelta(minutes=i // 3),
+                         is_active=i % 5 != 0))
+    session.add(Item(tenant_id=OTHER_TENANT, name="other", created_at=base))
+    session.commit()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+def _walk(fetch):
+    seen, cursor, pages = [], None, 0
+    while True:
+        page = fetch(cursor)
+        seen.extend(page.items)
+        pages += 1
+        if not page.has_more:
+            return seen, pages
+        cursor = page.next_cursor
+
+
+class TestKeysetPaginate:
+
+    def test_walks_every_row_once_in_order(self, db):
+        query = db.query(Item).filter(Item.tenant_id == TENANT)
+        keys = (Item.created_at, Item.id)
+        rows, pages = _walk(lambda cursor: keyset_paginate(query, keys, limit=4, cursor=cursor))
+
+        assert pages == 7
+        assert len(rows) == 25
+        assert len({row.id for row in rows}) == 25
+        ordered = sorted(rows, key=lambda row: (row.created_at, str(row.id)), reverse=True)
+        assert [row.id for row in rows] == [row.id for row in ordered]
+
+    def test_ascending_keys(self, db):
+        query = db.query(Item).filter(Item.tenant_id == TENANT)
+        rows, _ = _walk(lambda cursor: keyset_paginate(
+            query, (Item.name, Item.id), limit=10, cursor=cursor, descending=False
+        ))
+        assert [row.name for row in rows] == sorted(f"item-{i:02d}" for i in range(25))
+
+    def test_last_page_has_no_cursor(self, db):
+        page = keyset_paginate(db.query(Item).filter(Item.tenant_id == TENANT), (Item.created_at, Item.id), limit=25)
+        assert len(page.items) == 25
+        assert page.next_cursor is None
+
+    def test_rejects_tampered_or_foreign_cursor(self, db):
+        query = db.query(Item).filter(Item.tenant_id == TENANT)
+        page = keyset_paginate(query, (Item.created_at, Item.id), limit=2)
+
+        with pytest.raises(InvalidCursor):
+            decode_cursor("not-a-cursor", (Item.created_at, Item.id))
+        with pytest.raises(InvalidCursor):
+            keyset_paginate(query, (Item.name, Item.id), limit=2, cursor=page.next_cursor)
+
+    def test_cursor_round_trips_types(self, db):
+        query = db.query(Item).filter(Item.tenant_id == TENANT)
+        page = keyset_paginate(query, (Item.created_at, Item.id), limit=1)
+        created_at, item_id = decode_cursor(page.next_cursor, (Item.created_at, Item.id))
+        assert created_at == page.items[0].created_at.replace(tzinfo=created_at.tzinfo)
+        assert item_id == page.items[0].id
+
+    def test_totals(self, db):
+        query = db.query(Item).filter(Item.tenant_id == TENANT)
+        exact = keyset_paginate(query, (Item.created_at, Item.id), limit=5, total="exact")
+        assert exact.total == 25 and not exact.total_is_estimate
+
+        # The planner estimate is PostgreSQL-only; elsewhere it falls back to an exact count
+        estimate = keyset_paginate(query, (Item.created_at, Item.id), limit=5, total="estimate")
+        assert estimate.total == 25
+
+
+class TestRepositoryKeysetPage:
+
+    def test_tenant_and_active_filters(self, db):
+        repo = ItemRepository(db)
+        rows, _ = _walk(lambda cursor: repo.get_keyset_page(tenant_id=TENANT, cursor=cursor, limit=6))
+        assert len(rows) == 20
+        assert all(row.tenant_id == TENANT and row.is_active for row in rows)
+
+        everything, _ = _walk(lambda cursor: repo.get_keyset_page(
+            tenant_id=TENANT, cursor=cursor, limit=6, active_only=False
+        ))
+        assert len(everything) == 25
+
+
+def test_cors_exposes_next_cursor_header():
+    from fastapi.testclient import TestClient
+    from app.main import allowed_origins, app
+
+    response = TestClient(app).get("/", headers={"Origin": allowed_origins[0]})
+
+    assert "x-next-cursor" in response.headers["access-control-expose-headers"].lower()
@@ -0,0 +1,128 @@
+# app/tests/test_middleware.py
+"""Tests for the plain ASGI middleware stack and precompiled path matchers."""
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+from fastapi import BackgroundTasks, FastAPI, Request
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.core.ip_rules import IPRuleStore
+from app.middleware.email_verification import EmailVerificationMiddleware, requires_email_verification
+from app.middleware.path_matcher import PathMatcher
+from app.middleware.rate_limit import _is_exempt_path, _is_suspicious_path
+from app.middleware.security_headers import SecurityHeadersMiddleware
+
+
+class TestPathMatcher:
+
+    def test_exact_prefix_and_contains(self):
+        matcher = PathMatcher(exact=["/health"], prefixes=["/policies/"], contains=[".env"])
+
+        assert matcher("/health")
+        assert not matcher("/healthz")
+        assert matcher("/policies/privacy")
+        assert matcher("/static/.env.local")
+        assert not matcher("/api/tenants")
+
+    def test_regex_metacharacters_are_literal(self):
+        matcher = PathMatcher(contains=[".php"])
+
+        assert matcher("/index.php")
+        assert not matcher("/indexXphp")
+
+    def test_rate_limit_matchers(self):
+        assert _is_suspicious_path("/WP-Admin/setup")
+        assert not _is_suspicious_path("/api/dashboard")
+        assert _is_exempt_path("/openapi.json")
+        assert not _is_exempt_path("/policies")
+
+    def test_email_verification_paths(self):
+        assert requires_email_verification("/inventory/items?page=2")
+        assert requires_email_verification("/auth/facebook/authorize")
+        assert not requires_email_verification("/api/tenants")
+        assert not requires_email_verification("/auth/login")
+
+
+@pytest.fixture
+def rate_limited_app():
+    from app.middleware.rate_limit import RateLimitMiddleware
+
+    store = IPRuleStore()
+    store.loaded = True
+    api = FastAPI()
+    api.add_middleware(RateLimitMiddleware)
+    api.add_middleware(SecurityHeadersMiddleware)
+    api.state.tasks = []
+
+    @api.get("/stream")
+    def stream():
+        return StreamingResponse(iter([b"a", b"b", b"c"]), media_type="text/plain")
+
+    @api.get("/background")
+    def background(tasks: BackgroundTasks):
+        tasks.add_task(api.state.tasks.append, "done")
+        return {"ok": True}
+
+    with patch("app.middleware.rate_limit.ip_rule_store", store):
+        yield api
+
+
+class TestAsgiChain:
+
+    def test_streaming_response_passes_through_with_headers(self, rate_limited_app):
+        response = TestClient(rate_limited_app).get("/stream", headers={"X-Forwarded-For": "192.0.2.1"})
+
+        assert response.text == "abc"
+        assert response.headers["X-Frame-Options"] == "DENY"
+        assert int(response.headers["X-RateLimit-Remaining"]) >= 0
+        assert "X-RateLimit-Reset" in response.headers
+
+    def test_background_tasks_run(self, rate_limited_app):
+        TestClient(rate_limited_app).get("/background", headers={"X-Forwarded-For": "192.0.2.2"})
+
+        assert rate_limited_app.state.tasks == ["done"]
+
+    def test_scanner_paths_rejected(self, rate_limited_app):
+        response = TestClient(rate_limited_app).get("/.env")
+
+        assert response.status_code == 404
+        assert response.headers["X-Content-Type-Options"] == "nosniff"
+
+
+class TestEmailVerificationMiddleware:
+
+    @staticmethod
+    def build(user):
+        api = FastAPI()
+
+        class SetUser:
+            def __init__(self, app):
+                self.app = app
+
+            async def __call__(self, scope, receive, send):
+                scope.setdefault("state", {})["current_user"] = user
+                await self.app(scope, receive, send)
+
+        api.add_middleware(EmailVerificationMiddleware)
+        api.add_middleware(SetUser)
+
+        @api.get("/inventory/items")
+        def items(request: Request):
+            return {"ok": True}
+
+        return TestClient(api)
+
+    def test_unverified_user_blocked(self):
+        user = SimpleNamespace(id=1, email="a@example.com", email_verified=False)
+
+        response = self.build(user).get("/inventory/items")
+
+        assert response.status_code == 403
+        assert response.json()["verification_required"] is True
+
+    def test_verified_user_passes(self):
+        user = SimpleNamespace(id=1, email="a@example.com", email_verified=True)
+
+        assert self.build(user).get("/inventory/items").status_code == 200
@@ -0,0 +1,180 @@
+# app/tests/test_platform_rate_limit.py
+"""Tests for the shared Facebook/TikTok API rate limiters."""
+import json
+import threading
+import time
+from unittest.mock import patch
+
+import fakeredis
+import httpx
+import pytest
+
+from app.core.platform_rate_limit import (
+    PlatformRateLimited, PlatformRateLimiter, parse_usage_headers, token_key,
+)
+from app.core.rate_limit_store import RateLimitStore
+
+
+def redis_store(server):
+    with patch("redis.from_url", return_value=fakeredis.FakeRedis(server=server, decode_responses=True)):
+        return RateLimitStore(redis_url="redis://fake")
+
+
+@pytest.fixture
+def workers():
+    """Two limiters on separate stores sharing one Redis server"""
+    pytest.importorskip("lupa")
+    server = fakeredis.FakeServer()
+    return (
+        PlatformRateLimiter("facebook", 100, 60, burst_size=3, store=redis_store(server)),
+        PlatformRateLimiter("facebook", 100, 60, burst_size=3, store=redis_store(server)),
+    )
+
+
+class TestParseUsageHeaders:
+
+    def test_app_and_business_use_case_usage(self):
+        headers = {
+            "x-app-usage": json.dumps({"call_count": 12, "total_cputime": 40, "total_time": 8}),
+            "x-business-use-case-usage": json.dumps({
+                "123": [{"type": "ads_insights", "call_count": 81, "total_cputime": 5,
+                         "total_time": 5, "estimated_time_to_regain_access": 0}],
+            }),
+        }
+
+        assert parse_usage_headers(headers) == (81.0, 0.0)
+
+    def test_regain_time_in_seconds(self):
+        headers = {"x-business-use-case-usage": json.dumps({
+            "1": [{"call_count": 100, "estimated_time_to_regain_access": 7}],
+        })}
+
+        assert parse_usage_headers(headers) == (100.0, 420.0)
+
+    def test_missing_or_garbled_headers(self):
+        assert parse_usage_headers({"x-app-usage": "not json"}) == (0.0, 0.0)
+        assert parse_usage_headers({}) == (0.0, 0.0)
+
+
+class TestSharedLimiter:
+
+    def test_quota_is_shared_between_workers(self, workers):
+        first, second = workers
+
+        allowed = [first.try_acquire("tok:a").allowed, second.try_acquire("tok:a").allowed,
+                   first.try_acquire("tok:a").allowed, second.try_acquire("tok:a").allowed]
+
+        assert allowed == [True, True, True, False]
+        assert second.try_acquire("tok:b").allowed
+
+    def test_429_pauses_every_worker(self, workers):
+        first, second = workers
+
+        first.observe("tok:a", 429, {"retry-after": "30"})
+
+        result = second.try_acquire("tok:a")
+        assert not result.allowed
+        assert 29 < result.retry_after <= 30
+
+    def test_high_usage_raises_cost(self, workers):
+        first, second = workers
+
+        first.observe("tok:a", 200, {"x-app-usage": json.dumps({"call_count": 80})})
+
+        assert second.try_acquire("tok:a").allowed
+        # Burst of 3 units, each call now costs 2
+        assert not second.try_acquire("tok:a").allowed
+
+    def test_usage_at_pause_threshold_pauses(self, workers):
+        first, second = workers
+
+        first.observe("tok:a", 200, {"x-app-usage": json.dumps({"call_count": 99})})
+
+        assert not second.try_acquire("tok:a").allowed
+
+
+class TestWaiting:
+
+    @pytest.mark.asyncio
+    async def test_wait_gets_a_slot(self):
+        limiter = PlatformRateLimiter("tiktok", 50, 1, burst_size=1, store=RateLimitStore())
+
+        start = time.monotonic()
+        for _ in range(3):
+            await limiter.wait("tok:a")
+
+        assert time.monotonic() - start >= 0.03
+        assert limiter.stats['waits'] >= 1
+
+    @pytest.mark.asyncio
+    async def test_wait_timeout_raises(self):
+        limiter = PlatformRateLimiter("tiktok", 1, 60, store=RateLimitStore())
+        await limiter.wait("tok:a")
+
+        with pytest.raises(PlatformRateLimited) as exc:
+            await limiter.wait("tok:a", timeout=0.1)
+        assert exc.value.retry_after > 50
+
+    def test_wait_sync_with_memory_backoff(self):
+        limiter = PlatformRateLimiter("facebook", 100, 60, store=RateLimitStore())
+        limiter.pause("tok:a", 0.05)
+
+        start = time.monotonic()
+        limiter.wait_sync("tok:a")
+
+        assert time.monotonic() - start >= 0.04
+
+    @pytest.mark.asyncio
+    async def test_wait_sync_on_event_loop_raises_instead_of_sleeping(self):
+        limiter = PlatformRateLimiter("facebook", 100, 60, store=RateLimitStore())
+        limiter.pause("tok:a", 5)
+
+        start = time.monotonic()
+        with pytest.raises(PlatformRateLimited):
+            limiter.wait_sync("tok:a", timeout=30)
+        assert time.monotonic() - start < 0.5
+
+    @pytest.mark.asyncio
+    async def test_async_paths_run_redis_off_the_loop(self, workers):
+        limiter, _ = workers
+        client = limiter.store.redis_client
+        threads = []
+        original = client.get
+
+        def recording_get(*args, **kwargs):
+            threads.append(threading.get_ident())
+            return original(*args, **kwargs)
+
+        client.get = recording_get
+        await limiter.aobserve("tok:a", 200, {"x-app-usage": json.dumps({"call_count": 80})})
+        limiter._backoff_cache.clear()
+        await limiter.wait("tok:a")
+
+        assert threads
+        assert threading.get_ident() not in threads
+        assert limiter._get_backoff("tok:a")[1] == 2
+
+
+class TestFacebookClient:
+
+    def test_client_feeds_usage_headers_back(self):
+        pytest.importorskip("loguru")
+        from app.integrations.facebook import FacebookAPIClient
+
+        def handler(request):
+            return httpx.Response(
+                200, json={"data": []},
+                headers={"x-business-use-case-usage": json.dumps({"9": [{"call_count": 100,
+                                                                         "estimated_time_to_regain_access": 2}]})},
+            )
+
+        limiter = PlatformRateLimiter("facebook", 200, 3600, burst_size=10, store=RateLimitStore())
+        with patch("app.integrations.facebook.get_platform_limiter", return_value=limiter):
+            client = FacebookAPIClient("secret-token")
+        client.client = httpx.Client(transport=httpx.MockTransport(handler))
+
+        client._make_request("/act_42/insights")
+
+        paused = limiter.try_acquire(token_key("secret-token"))
+        assert not paused.allowed and paused.retry_after > 100
+        assert not limiter.try_acquire("act_42").allowed
@@ -0,0 +1,89 @@
+# app/tests/test_query_budget.py
+"""Tests for per-request query budgets and N+1 detection."""
+from contextlib import nullcontext
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+
+from app.core.query_budget import (
+    QueryBudgetExceeded, get_recent_violations, job_query_budget, query_budget,
+)
+from app.middleware.query_budget import QueryBudgetMiddleware
+
+
+@pytest.fixture
+def engine(tmp_path):
+    test_engine = create_engine(f"sqlite:///{tmp_path / 'budget.db'}")
+    with test_engine.begin() as conn:
+        conn.execute(text("CREATE TABLE chat (id INTEGER PRIMARY KEY, title TEXT)"))
+        conn.execute(text("INSERT INTO chat (id, title) VALUES (1, 'a'), (2, 'b'), (3, 'c')"))
+    yield test_engine
+    test_engine.dispose()
+
+
+def _load_one_by_one(engine, ids):
+    with engine.connect() as conn:
+        return [conn.execute(text("SELECT title FROM chat WHERE id = :id"), {"id": i}).scalar() for i in ids]
+
+
+class TestQueryBudget:
+
+    def test_counts_statements_and_fingerprints(self, engine):
+        with query_budget("load chats", max_statements=10, max_repeats=5) as budget:
+            _load_one_by_one(engine, [1, 2, 3])
+        assert budget.statements == 3
+        assert not budget.exceeded
+
+    def test_detects_n_plus_one(self, engine):
+        with pytest.raises(QueryBudgetExceeded) as exc:
+            with query_budget("load chats", max_statements=50, max_repeats=2, raise_on_violation=True):
+                _load_one_by_one(engine, [1, 2, 3])
+
+        report = exc.value.report
+        assert report["repeated"] == [
+            {"fingerprint": "SELECT title FROM chat WHERE id = ?", "count": 3}
+        ]
+        assert get_recent_violations(limit=1)[0]["name"] == "load chats"
+
+    def test_statement_budget(self, engine):
+        with pytest.raises(QueryBudgetExceeded):
+            with query_budget("bulk", max_statements=2, max_repeats=10, raise_on_violation=True):
+                _load_one_by_one(engine, [1, 2, 3])
+
+    def test_logs_instead_of_raising(self, engine, caplog):
+        with query_budget("load chats", max_statements=50, max_repeats=1, raise_on_violation=False):
+            _load_one_by_one(engine, [1, 2])
+        assert "N+1 suspect x2" in caplog.text
+
+    def test_statements_outside_scope_not_counted(self, engine):
+        with query_budget("outer", max_statements=10, max_repeats=10) as budget:
+            pass
+        _load_one_by_one(engine, [1])
+        assert budget.statements == 0
+
+    def test_job_budget_disabled_by_default(self):
+        assert isinstance(job_query_budget("job"), nullcontext)
+
+
+class TestQueryBudgetMiddleware:
+
+    def test_request_over_budget_is_reported_with_route_template(self, engine, monkeypatch):
+        from app.core import query_budget as module
+        settings = module.get_settings()
+        monkeypatch.setattr(settings, "QUERY_BUDGET_MAX_REPEATS", 2)
+        monkeypatch.setattr(settings, "QUERY_BUDGET_RAISE", True)
+
+        app = FastAPI()
+        app.add_middleware(QueryBudgetMiddleware)
+
+        @app.get("/chats/{count}")
+        def list_chats(count: int):
+            return _load_one_by_one(engine, range(1, count + 1))
+
+        client = TestClient(app)
+        assert client.get("/chats/2").json() == ["a", "b"]
+        with pytest.raises(QueryBudgetExceeded) as exc:
+            client.get("/chats/3")
+        assert exc.value.report["name"] == "GET /chats/{count}"
@@ -0,0 +1,120 @@
+# app/tests/test_rate_limit_store.py
+"""Tests for the GCRA limiter in RateLimitStore (Lua script and in-memory twin)."""
+from unittest.mock import patch
+
+import fakeredis
+import pytest
+
+from app.core.rate_limit_store import US, RateLimitStore, gcra_step
+
+
+def at(seconds):
+    """Patch the in-memory limiter clock"""
+    return patch("app.core.rate_limit_store.time.time_ns", return_value=int(seconds * 1e9))
+
+
+class TestGcraStep:
+
+    def test_burst_then_deny(self):
+        emission, tolerance = US, 3 * US
+        tat = None
+        results = []
+        for _ in range(4):
+            allowed, remaining, retry, reset, new_tat = gcra_step(tat, 0, emission, tolerance)
+            results.append((allowed, remaining))
+            tat = new_tat if new_tat is not None else tat
+
+        assert results == [(True, 2), (True, 1), (True, 0), (False, 0)]
+        assert gcra_step(tat, 0, emission, tolerance)[2] == US
+
+
+class TestMemoryGcra:
+
+    def test_no_double_burst_across_boundary(self):
+        store = RateLimitStore()
+        with at(1000.0):
+            assert all(store.hit("ip:a", 60, 60).allowed for _ in range(60))
+        # A fixed window would reset here and admit another 60
+        with at(1000.5):
+            assert not store.hit("ip:a", 60, 60).allowed
+        with at(1001.0):
+            assert store.hit("ip:a", 60, 60).allowed
+
+    def test_remaining_and_reset(self):
+        store = RateLimitStore()
+        with at(1000.0):
+            first = store.hit("ip:a", 10, 60)
+            second = store.hit("ip:a", 10, 60)
+
+        assert (first.remaining, second.remaining) == (9, 8)
+        assert first.reset_after == pytest.approx(6.0)
+        assert second.reset_after == pytest.approx(12.0)
+
+        with at(1000.0):
+            for _ in range(8):
+                store.hit("ip:a", 10, 60)
+            denied = store.hit("ip:a", 10, 60)
+        assert not denied.allowed
+        assert denied.retry_after == pytest.approx(6.0)
+
+    def test_idle_keys_expire_without_sweep(self):
+        store = RateLimitStore()
+        with at(1000.0):
+            for i in range(100):
+                store.hit(f"ip:{i}", 60, 60)
+        with at(1002.0):
+            store.hit("ip:new", 60, 60)
+
+        assert list(store._gcra_tat) == ["ip:new"]
+
+    def test_reset_clears_limiter(self):
+        store = RateLimitStore()
+        with at(1000.0):
+            store.hit("ip:a", 1, 60)
+            store.reset("ip:a")
+            assert store.hit("ip:a", 1, 60).allowed
+
+
+class TestRedisGcra:
+
+    @pytest.fixture
+    def store(self):
+        pytest.importorskip("lupa")
+        server = fakeredis.FakeServer()
+        store = self.worker(server)
+        store.server = server
+        return store
+
+    @staticmethod
+    def worker(server):
+        with patch("redis.from_url", return_value=fakeredis.FakeRedis(server=server, decode_responses=True)), \
+                patch("redis.asyncio.from_url", return_value=fakeredis.FakeAsyncRedis(server=server, decode_responses=True)):
+            return RateLimitStore(redis_url="redis://fake")
+
+    def test_lua_matches_memory_twin(self, store):
+        memory = RateLimitStore()
+        redis_results = [store.hit("ip:a", 5, 60) for _ in range(7)]
+        with at(1000.0):
+            memory_results = [memory.hit("ip:a", 5, 60) for _ in range(7)]
+
+        assert [r.allowed for r in redis_results] == [r.allowed for r in memory_results]
+        assert [r.remaining for r in redis_results] == [r.remaining for r in memory_results]
+        assert redis_results[-1].retry_after > 0
+        assert 0 < store.redis_client.pttl("rate_limit:gcra:ip:a") <= 60_000
+
+    def test_workers_share_state(self, store):
+        other_worker = self.worker(store.server)
+
+        assert store.hit("ip:a", 2, 60).remaining == 1
+        assert other_worker.hit("ip:a", 2, 60).remaining == 0
+        assert not store.hit("ip:a", 2, 60).allowed
+
+    @pytest.mark.asyncio
+    async def test_ahit_runs_the_script_on_the_async_client(self, store):
+        with patch.object(store, "_gcra_script", side_effect=AssertionError("sync EVALSHA on the loop")):
+            results = [await store.ahit("ip:a", 3, 60) for _ in range(4)]
+
+        assert [(r.allowed, r.remaining) for r in results] == [(True, 2), (True, 1), (True, 0), (False, 0)]
+        # Same key and script as hit(), so sync callers see the async hits
+        assert not store.hit("ip:a", 3, 60).allowed
+        assert store._gcra_tat == {}
@@ -0,0 +1,217 @@
+# app/tests/test_single_flight.py
+"""Tests for cache stampede protection (single-flight, SWR, early refresh)."""
+import asyncio
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+
+from app.core.cache import TTLCache, cached
+from app.core.single_flight import AsyncSingleFlight, SingleFlight, Stamped, should_refresh_early
+from app.services.cache_service import CacheManager, ServiceCache, cached_method
+
+
+class TestSingleFlight:
+
+    def test_concurrent_threads_share_one_call(self):
+        flight = SingleFlight()
+        calls = []
+        gate = threading.Event()
+
+        def load():
+            calls.append(1)
+            gate.wait(1)
+            return "value"
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(flight.do("k", load))) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        time.sleep(0.05)
+        gate.set()
+        for thread in threads:
+            thread.join()
+
+        assert len(calls) == 1
+        assert [value for value, _ in results] == ["value"] * 8
+        assert sum(leader for _, leader in results) == 1
+        assert flight.stats["coalesced"] == 7
+
+    def test_leader_error_reaches_followers(self):
+        flight = SingleFlight()
+        gate = threading.Event()
+        errors = []
+
+        def load():
+            gate.wait(1)
+            raise ValueError("boom")
+
+        def call():
+            try:
+                flight.do("k", load)
+            except ValueError as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=call) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        time.sleep(0.05)
+        gate.set()
+        for thread in threads:
+            thread.join()
+
+        assert len(errors) == 3
+        assert not flight.in_flight("k")
+
+    @pytest.mark.asyncio
+    async def test_async_coroutines_share_one_call(self):
+        flight = AsyncSingleFlight()
+        calls = []
+
+        async def load():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return 42
+
+        results = await asyncio.gather(*(flight.do("k", load) for _ in range(10)))
+
+        assert len(calls) == 1
+        assert {value for value, _ in results} == {42}
+
+    @pytest.mark.asyncio
+    async def test_cancelled_leader_lets_follower_compute(self):
+        flight = AsyncSingleFlight()
+
+        async def slow():
+            await asyncio.sleep(10)
+
+        async def fast():
+            return "own"
+
+        leader = asyncio.create_task(flight.do("k", slow))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(flight.do("k", fast))
+        await asyncio.sleep(0)
+        leader.cancel()
+
+        assert (await follower) == ("own", False)
+
+
+class TestEarlyRefresh:
+
+    def test_disabled_with_zero_beta(self):
+        assert should_refresh_early(Stamped("v", fresh_until=100.0, compute_time=50.0), 0, now=99.9) is False
+
+    def test_more_likely_near_expiry(self):
+        entry = Stamped("v", fresh_until=100.0, compute_time=1.0)
+        near = sum(should_refresh_early(entry, 1.0, now=99.5) for _ in range(2000))
+        far = sum(should_refresh_early(entry, 1.0, now=90.0) for _ in range(2000))
+
+        assert near > far
+
+
+class TestCachedDecorator:
+
+    def test_concurrent_misses_compute_once(self):
+        calls = []
+
+        @cached(ttl=60, cache_instance=TTLCache(default_ttl=60), key_prefix="stampede", include_tenant=False)
+        def load(key):
+            calls.append(key)
+            time.sleep(0.05)
+            return {"key": key}
+
+        threads = [threading.Thread(target=load, args=("hot",)) for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert calls == ["hot"]
+
+    def test_stale_value_served_while_refreshing(self):
+        calls = []
+
+        @cached(ttl=10, cache_instance=TTLCache(default_ttl=10), key_prefix="swr", include_tenant=False, stale_ttl=60)
+        def load():
+            calls.append(1)
+            return len(calls)
+
+        with patch("app.core.cache.time.time", return_value=1000.0):
+            assert load() == 1
+        with patch("app.core.cache.time.time", return_value=1005.0):
+            assert load() == 1
+        assert len(calls) == 1
+
+        # Past ttl but within stale_ttl: the caller refreshes
+        with patch("app.core.cache.time.time", return_value=1020.0):
+            assert load() == 2
+
+    def test_stale_value_served_when_refresh_fails(self):
+        state = {"fail": False}
+
+        @cached(ttl=10, cache_instance=TTLCache(default_ttl=10), key_prefix="swr_fail", include_tenant=False,
+                stale_ttl=60)
+        def load():
+            if state["fail"]:
+                raise ConnectionError("db down")
+            return "good"
+
+        with patch("app.core.cache.time.time", return_value=1000.0):
+            load()
+        state["fail"] = True
+        with patch("app.core.cache.time.time", return_value=1020.0):
+            assert load() == "good"
+
+
+class TestServiceCacheCachedCall:
+
+    @pytest.mark.asyncio
+    async def test_concurrent_calls_coalesce(self):
+        cache = ServiceCache("StampedeTestService")
+        calls = []
+
+        async def fetch(tenant):
+            calls.append(tenant)
+            await asyncio.sleep(0.05)
+            return {"tenant": tenant}
+
+        results = await asyncio.gather(*(cache.cached_call(fetch, "fetch", 60, False, "t1") for _ in range(5)))
+
+        assert len(calls) == 1
+        assert all(result == {"tenant": "t1"} for result in results)
+        assert cache.get_cache_stats()["single_flight"]["coalesced"] == 4
+
+    @pytest.mark.asyncio
+    async def test_stale_while_revalidate(self):
+        cache = ServiceCache("SWRTestService")
+        calls = []
+
+        async def fetch():
+            calls.append(1)
+            return len(calls)
+
+        with patch("app.services.cache_service.time.time", return_value=1000.0):
+            assert await cache.cached_call(fetch, "fetch", 10, stale_ttl=600) == 1
+        with patch("app.services.cache_service.time.time", return_value=1030.0):
+            assert await cache.cached_call(fetch, "fetch", 10, stale_ttl=600) == 2
+
+    @pytest.mark.asyncio
+    async def test_service_instances_share_one_load(self):
+        calls = []
+
+        class PerRequestTestService:
+            @cached_method(ttl=60)
+            async def fetch(self, tenant):
+                calls.append(tenant)
+                await asyncio.sleep(0.05)
+                return {"tenant": tenant}
+
+        # A fresh service instance per request, as the route dependencies build them
+        results = await asyncio.gather(*(PerRequestTestService().fetch("t1") for _ in range(5)))
+
+        assert len(calls) == 1
+        assert all(result == {"tenant": "t1"} for result in results)
+        stats = CacheManager.get_service_cache("PerRequestTestService").get_cache_stats()
+        assert stats["single_flight"]["coalesced"] == 4
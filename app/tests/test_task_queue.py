@@ -0,0 +1,445 @@
+# app/tests/test_task_queue.py
+"""Tests for the background task queues."""
+import asyncio
+import json
+import time
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+import fakeredis
+import pytest
+
+from app.core.exceptions import ServiceError
+from app.services.task_queue import (
+    RESULT_INDEX_KEY, MemoryTaskQueue, RedisStreamTaskQueue, RedisTaskQueue, TaskDefinition, TaskPriority,
+    TaskManager, TaskResult, TaskStatus, TaskWorker, retry_backoff,
+)
+
+
+def make_task(task_id: str, priority: TaskPriority = TaskPriority.NORMAL) -> TaskDefinition:
+    return TaskDefinition(task_id, "noop", (), {}, priority=priority)
+
+
+def make_result(task_id: str, status: TaskStatus = TaskStatus.COMPLETED) -> TaskResult:
+    return TaskResult(task_id, status, result={"rows": [1, 2, 3]})
+
+
+def redis_queue(server=None, **kwargs) -> RedisTaskQueue:
+    client = fakeredis.FakeRedis(server=server or fakeredis.FakeServer(), decode_responses=True)
+    with patch("redis.from_url", return_value=client):
+        return RedisTaskQueue(redis_url="redis://fake", **kwargs)
+
+
+class TestMemoryTaskQueue:
+
+    @pytest.mark.asyncio
+    async def test_priority_then_fifo_order(self):
+        queue = MemoryTaskQueue()
+        for task_id, priority in [("low", TaskPriority.LOW), ("n1", TaskPriority.NORMAL),
+                                  ("urgent", TaskPriority.URGENT), ("n2", TaskPriority.NORMAL),
+                                  ("high", TaskPriority.HIGH), ("n3", TaskPriority.NORMAL)]:
+            await queue.enqueue(make_task(task_id, priority))
+
+        assert [t.task_id for t in queue.pending_tasks] == ["urgent", "high", "n1", "n2", "n3", "low"]
+        order = [(await queue.dequeue()).task_id for _ in range(6)]
+
+        assert order == ["urgent", "high", "n1", "n2", "n3", "low"]
+        assert len(queue.running_tasks) == 6
+
+    @pytest.mark.asyncio
+    async def test_idle_consumer_wakes_on_enqueue(self):
+        queue = MemoryTaskQueue()
+        consumer = asyncio.create_task(queue.dequeue(timeout=5.0))
+        await asyncio.sleep(0.05)
+
+        start = time.monotonic()
+        await queue.enqueue(make_task("t1"))
+        task = await consumer
+
+        assert task.task_id == "t1"
+        assert time.monotonic() - start < 0.05
+
+    @pytest.mark.asyncio
+    async def test_each_task_goes_to_one_consumer(self):
+        queue = MemoryTaskQueue()
+        consumers = [asyncio.create_task(queue.dequeue(timeout=1.0)) for _ in range(3)]
+        await asyncio.sleep(0.01)
+
+        await queue.enqueue(make_task("a"))
+        await queue.enqueue(make_task("b"))
+        results = await asyncio.gather(*consumers)
+
+        assert sorted(t.task_id for t in results if t) == ["a", "b"]
+        assert results.count(None) == 1
+
+    @pytest.mark.asyncio
+    async def test_dequeue_timeout_returns_none(self):
+        queue = MemoryTaskQueue()
+
+        start = time.monotonic()
+        assert await queue.dequeue(timeout=0.1) is None
+        assert 0.09 <= time.monotonic() - start < 1.0
+
+        # The lock is released after a timeout
+        await queue.enqueue(make_task("t1"))
+        assert (await queue.dequeue(timeout=0.1)).task_id == "t1"
+
+    @pytest.mark.asyncio
+    async def test_full_queue_rejects(self):
+        queue = MemoryTaskQueue(max_size=2)
+        await queue.enqueue(make_task("a"))
+        await queue.enqueue(make_task("b"))
+
+        with pytest.raises(ServiceError):
+            await queue.enqueue(make_task("c"))
+
+        info = await queue.get_queue_info()
+        assert info["pending_tasks"] == 2
+
+
+class TestResultRetention:
+
+    @pytest.mark.asyncio
+    async def test_memory_results_expire(self):
+        queue = MemoryTaskQueue(result_ttl=60)
+        await queue.set_task_result(make_result("t1"))
+        assert (await queue.get_task_result("t1")).status == TaskStatus.COMPLETED
+
+        with patch("app.core.cache.time.time", return_value=time.time() + 61):
+            assert await queue.get_task_result("t1") is None
+            assert (await queue.get_queue_info())["retained_results"] == 0
+
+    @pytest.mark.asyncio
+    async def test_memory_evicts_least_recently_polled(self):
+        queue = MemoryTaskQueue(max_results=3)
+        for task_id in ("a", "b", "c"):
+            await queue.set_task_result(make_result(task_id))
+        await queue.get_task_result("a")
+
+        await queue.set_task_result(make_result("d"))
+
+        assert await queue.get_task_result("b") is None
+        assert await queue.get_task_result("a") is not None
+        info = await queue.get_queue_info()
+        assert info["retained_results"] == 3
+        assert info["evicted_results"] == 1
+        assert info["completed_tasks"] == 4
+        assert info["retained_result_bytes"] > 0
+
+    @pytest.mark.asyncio
+    async def test_redis_trims_oldest_beyond_max(self):
+        queue = redis_queue(max_results=2, result_cache_size=0)
+        for task_id in ("a", "b", "c"):
+            await queue.set_task_result(make_result(task_id))
+
+        assert await queue.get_task_result("a") is None
+        assert (await queue.get_task_result("c")).result == {"rows": [1, 2, 3]}
+        info = await queue.get_queue_info()
+        assert info["retained_results"] == 2
+        assert info["evicted_results"] == 1
+        assert info["retained_result_bytes"] > 0
+
+    @pytest.mark.asyncio
+    async def test_redis_results_expire_and_leave_the_index(self):
+        queue = redis_queue(result_ttl=60, result_cache_size=0)
+        await queue.set_task_result(make_result("old"))
+        assert queue.redis_client.ttl("result:old") == 60
+
+        with patch("app.services.task_queue.time.time", return_value=time.time() + 61):
+            await queue.set_task_result(make_result("new"))
+
+        assert queue.redis_client.zrange(RESULT_INDEX_KEY, 0, -1) == ["new"]
+        assert (await queue.get_queue_info())["retained_results"] == 1
+
+    @pytest.mark.asyncio
+    async def test_finished_results_are_polled_from_local_cache(self):
+        server = fakeredis.FakeServer()
+        worker, api = redis_queue(server), redis_queue(server, result_cache_size=10)
+        await worker.set_task_result(make_result("running", TaskStatus.RUNNING))
+        await worker.set_task_result(make_result("done"))
+
+        assert (await api.get_task_result("done")).status == TaskStatus.COMPLETED
+        assert (await api.get_task_result("running")).status == TaskStatus.RUNNING
+        api.redis_client.delete("result:done", "result:running")
+
+        assert (await api.get_task_result("done")).status == TaskStatus.COMPLETED
+        assert await api.get_task_result("running") is None
+
+
+def stream_queue(server, **kwargs) -> RedisStreamTaskQueue:
+    """Stream queue whose sync and async clients share one fake Redis server"""
+    with patch("redis.from_url", return_value=fakeredis.FakeRedis(server=server, decode_responses=True)), \
+            patch("redis.asyncio.from_url", return_value=fakeredis.FakeAsyncRedis(server=server, decode_responses=True)):
+        return RedisStreamTaskQueue(redis_url="redis://fake", **kwargs)
+
+
+@pytest.fixture
+def server():
+    pytest.importorskip("lupa")
+    return fakeredis.FakeServer()
+
+
+class TestRedisStreamTaskQueue:
+
+    @pytest.mark.asyncio
+    async def test_priority_order_and_ack(self, server):
+        queue = stream_queue(server)
+        await queue.enqueue(make_task("low", TaskPriority.LOW))
+        await queue.enqueue(make_task("urgent", TaskPriority.URGENT))
+        await queue.enqueue(make_task("normal"))
+
+        tasks = [await queue.dequeue(timeout=0.1) for _ in range(3)]
+        assert [t.task_id for t in tasks] == ["urgent", "normal", "low"]
+        assert (await queue.get_queue_info())["running_tasks"] == 3
+
+        for task in tasks:
+            await queue.ack(task)
+        info = await queue.get_queue_info()
+        assert info["running_tasks"] == 0 and info["pending_tasks"] == 0
+        assert await queue.dequeue(timeout=0.05) is None
+
+    @pytest.mark.asyncio
+    async def test_task_of_crashed_worker_is_redelivered(self, server):
+        crashed = stream_queue(server, visibility_timeout=0.05)
+        survivor = stream_queue(server, visibility_timeout=0.05)
+        await crashed.enqueue(make_task("t1"))
+        assert (await crashed.dequeue(timeout=0.1)).task_id == "t1"
+
+        # Not yet idle long enough
+        assert await survivor.dequeue(timeout=0.01) is None
+        await asyncio.sleep(0.1)
+        survivor._next_claim = 0
+
+        task = await survivor.dequeue(timeout=0.1)
+        assert task.task_id == "t1"
+        assert survivor.stats["redelivered"] == 1
+        await survivor.ack(task)
+        assert (await survivor.get_queue_info())["running_tasks"] == 0
+
+    @pytest.mark.asyncio
+    async def test_poison_task_goes_to_dead_letter_stream(self, server):
+        queue = stream_queue(server, visibility_timeout=0.02, max_deliveries=2)
+        await queue.enqueue(make_task("poison"))
+
+        assert await queue.dequeue(timeout=0.1) is not None
+        await asyncio.sleep(0.05)
+        queue._next_claim = 0
+        assert await queue.dequeue(timeout=0.1) is not None
+        await asyncio.sleep(0.05)
+        queue._next_claim = 0
+        assert await queue.dequeue(timeout=0.05) is None
+
+        [(_, entry)] = await queue.stream_client.xrange(queue.dead_letter_stream)
+        assert json.loads(entry["task"])["task_id"] == "poison"
+        assert "delivered 3 times" in entry["reason"]
+        result = await queue.get_task_result("poison")
+        assert result.status == TaskStatus.FAILED
+        info = await queue.get_queue_info()
+        assert info["dead_letter_tasks"] == 1 and info["running_tasks"] == 0
+
+    @pytest.mark.asyncio
+    async def test_retry_is_delayed(self, server):
+        queue = stream_queue(server)
+        await queue.enqueue(make_task("t1"))
+        task = await queue.dequeue(timeout=0.1)
+        task.attempts += 1
+
+        await queue.retry(task, 0.2)
+
+        assert (await queue.get_queue_info())["delayed_tasks"] == 1
+        assert await queue.dequeue(timeout=0.05) is None
+        retried = await queue.dequeue(timeout=1.0)
+        assert retried.task_id == "t1" and retried.attempts == 1
+        assert (await queue.get_queue_info())["delayed_tasks"] == 0
+
+    @pytest.mark.asyncio
+    async def test_worker_retries_with_backoff_then_dead_letters(self, server):
+        queue = stream_queue(server)
+        worker = TaskWorker(queue)
+        calls = []
+
+        async def flaky():
+            calls.append(time.monotonic())
+            raise RuntimeError("boom")
+
+        worker.register_task("flaky", flaky)
+        await queue.enqueue(TaskDefinition("t1", "flaky", (), {}, max_retries=2, retry_delay=0.05))
+
+        for _ in range(3):
+            task = await queue.dequeue(timeout=2.0)
+            assert task is not None
+            queue._ready.appendleft(task)
+            with patch("app.services.task_queue.random.random", return_value=0.0):
+                await worker._process_next_task()
+            status = (await queue.get_task_result("t1")).status
+            assert status == (TaskStatus.FAILED if len(calls) == 3 else TaskStatus.RETRYING)
+
+        assert calls[2] - calls[1] >= calls[1] - calls[0] >= 0.05
+        assert worker.stats["tasks_retried"] == 2 and worker.stats["tasks_failed"] == 1
+        info = await queue.get_queue_info()
+        assert info["dead_letter_tasks"] == 1 and info["running_tasks"] == 0 and info["delayed_tasks"] == 0
+
+    @pytest.mark.asyncio
+    async def test_results_use_the_async_client(self, server):
+        queue = stream_queue(server, max_results=2, result_cache_size=0)
+        # Anything still going through the sync client would now be a no-op
+        queue.redis_client = None
+
+        for task_id in ("a", "b", "c"):
+            await queue.set_task_result(TaskResult(task_id=task_id, status=TaskStatus.COMPLETED, result={"id": task_id}))
+
+        assert await queue.get_task_result("a") is None
+        assert (await queue.get_task_result("c")).result == {"id": "c"}
+        info = await queue.get_queue_info()
+        assert info["retained_results"] == 2 and info["evicted_results"] == 1
+        assert info["retained_result_bytes"] > 0 and info["redis_available"]
+
+
+class TestWorkerCancellation:
+
+    @staticmethod
+    async def cancel_mid_task(queue, worker):
+        started = asyncio.Event()
+
+        async def slow():
+            started.set()
+            await asyncio.sleep(10)
+
+        worker.register_task("slow", slow)
+        await queue.enqueue(TaskDefinition("t1", "slow", (), {}))
+        run = asyncio.create_task(worker._process_next_task())
+        await started.wait()
+        run.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await run
+
+    @pytest.mark.asyncio
+    async def test_memory_task_is_requeued(self):
+        queue = MemoryTaskQueue()
+        worker = TaskWorker(queue)
+
+        await self.cancel_mid_task(queue, worker)
+
+        assert await queue.get_task_result("t1") is None
+        assert worker.current_task is None
+        info = await queue.get_queue_info()
+        assert info["pending_tasks"] == 1 and info["running_tasks"] == 0
+        assert (await queue.dequeue(timeout=0.1)).task_id == "t1"
+
+    @pytest.mark.asyncio
+    async def test_stream_task_stays_pending_for_reclaim(self, server):
+        queue = stream_queue(server, visibility_timeout=0.05)
+        worker = TaskWorker(queue)
+
+        await self.cancel_mid_task(queue, worker)
+
+        assert await queue.get_task_result("t1") is None
+        assert (await queue.get_queue_info())["running_tasks"] == 1
+        await asyncio.sleep(0.1)
+        queue._next_claim = 0
+        task = await queue.dequeue(timeout=0.1)
+        assert task.task_id == "t1" and queue.stats["redelivered"] == 1
+
+
+class TestScheduledTasks:
+
+    @pytest.mark.asyncio
+    async def test_memory_task_waits_for_its_delay(self):
+        queue = MemoryTaskQueue()
+        task = make_task("later")
+        task.run_at = datetime.utcnow() + timedelta(seconds=0.2)
+        await queue.enqueue(task)
+        await queue.enqueue(make_task("now", TaskPriority.LOW))
+
+        assert (await queue.dequeue(timeout=0.01)).task_id == "now"
+        assert await queue.dequeue(timeout=0.05) is None
+        assert (await queue.get_queue_info())["delayed_tasks"] == 1
+
+        start = time.monotonic()
+        assert (await queue.dequeue(timeout=2.0)).task_id == "later"
+        assert 0.05 < time.monotonic() - start < 1.0
+
+    @pytest.mark.asyncio
+    async def test_idle_consumer_wakes_for_earlier_delayed_task(self):
+        queue = MemoryTaskQueue()
+        consumer = asyncio.create_task(queue.dequeue(timeout=5.0))
+        await asyncio.sleep(0.02)
+
+        start = time.monotonic()
+        task = make_task("soon")
+        task.run_at = datetime.utcnow() + timedelta(seconds=0.1)
+        await queue.enqueue(task)
+
+        assert (await consumer).task_id == "soon"
+        assert time.monotonic() - start < 1.0
+
+    @pytest.mark.asyncio
+    async def test_due_tasks_keep_priority_order(self):
+        queue = MemoryTaskQueue()
+        past = datetime.utcnow() - timedelta(seconds=1)
+        for task_id, priority in [("low", TaskPriority.LOW), ("high", TaskPriority.HIGH)]:
+            task = make_task(task_id, priority)
+            task.run_at = past
+            await queue.enqueue(task)
+
+        assert [(await queue.dequeue()).task_id for _ in range(2)] == ["high", "low"]
+
+    @pytest.mark.asyncio
+    async def test_manager_delay_and_run_at(self):
+        manager = TaskManager(use_redis=False)
+
+        task_id = await manager.enqueue_task("noop", 1, delay=60)
+        aware = datetime.now(timezone.utc) + timedelta(hours=1)
+        await manager.enqueue_task("noop", run_at=aware)
+
+        info = await manager.queue.get_queue_info()
+        assert info["delayed_tasks"] == 2 and info["pending_tasks"] == 0
+        scheduled = sorted(manager.queue._delayed)[0][2]
+        assert scheduled.task_id == task_id and scheduled.args == (1,) and scheduled.kwargs == {}
+        with pytest.raises(ValueError):
+            await manager.enqueue_task("noop", delay=1, run_at=aware)
+
+    @pytest.mark.asyncio
+    async def test_stream_task_is_scheduled(self, server):
+        queue = stream_queue(server)
+        task = make_task("later")
+        task.run_at = datetime.utcnow() + timedelta(seconds=0.2)
+        await queue.enqueue(task)
+
+        assert (await queue.get_queue_info())["delayed_tasks"] == 1
+        assert await queue.dequeue(timeout=0.05) is None
+        assert (await queue.dequeue(timeout=1.0)).task_id == "later"
+
+
+class TestRetryBackoff:
+
+    def test_exponential_with_jitter_and_cap(self):
+        for attempt in range(4):
+            delays = [retry_backoff(attempt, 1.0) for _ in range(50)]
+            assert all(2 ** attempt * 0.5 <= d <= 2 ** attempt for d in delays)
+            assert len(set(delays)) > 1
+        assert retry_backoff(30, 1.0) <= 3600
+
+    @pytest.mark.asyncio
+    async def test_memory_worker_backs_off_between_attempts(self):
+        queue = MemoryTaskQueue()
+        worker = TaskWorker(queue)
+        calls = []
+
+        def flaky():
+            calls.append(time.monotonic())
+            if len(calls) < 3:
+                raise ConnectionError("gateway down")
+            return "ok"
+
+        worker.register_task("flaky", flaky)
+        await queue.enqueue(TaskDefinition("t1", "flaky", (), {}, max_retries=3, retry_delay=0.05))
+
+        while len(calls) < 3:
+            await worker._process_next_task()
+
+        assert calls[1] - calls[0] >= 0.025
+        assert calls[2] - calls[1] >= 0.05
+        result = await queue.get_task_result("t1")
+        assert result.status == TaskStatus.COMPLETED and result.result == "ok"
+        assert worker.stats["tasks_retried"] == 2
@@ -0,0 +1,124 @@
+# app/tests/test_violation_buffer.py
+"""Tests for write-behind batching of rate limit violations and auto-bans."""
+from unittest.mock import MagicMock, patch
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event, select
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import get_settings
+from app.core.ip_rules import IPRuleStore
+from app.core.models import IPAccessRule, IPRuleType, RateLimitViolation
+from app.core.violation_buffer import ViolationBuffer
+from app.middleware.rate_limit import RateLimitMiddleware
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'violations.db'}")
+    IPAccessRule.__table__.create(engine)
+    RateLimitViolation.__table__.create(engine)
+    yield sessionmaker(bind=engine)
+    engine.dispose()
+
+
+class TestViolationBuffer:
+
+    def test_record_does_no_io_and_bans_at_threshold(self):
+        factory = MagicMock()
+        buffer = ViolationBuffer(factory)
+
+        results = [buffer.record("203.0.113.9", "/api/x", threshold=3, ban_duration=3600) for _ in range(4)]
+
+        assert [count for count, _ in results[:3]] == [1, 2, 3]
+        assert results[0][1] is None and results[1][1] is None
+        assert results[2][1] is not None
+        # Already banned: no second ban from the same flood
+        assert results[3][1] is None
+        factory.assert_not_called()
+
+    def test_flush_aggregates_into_few_statements(self, session_factory):
+        buffer = ViolationBuffer(session_factory)
+        for _ in range(500):
+            buffer.record("198.51.100.1", "/api/a", threshold=10_000, ban_duration=3600)
+        for _ in range(5):
+            buffer.record("198.51.100.2", "/api/b", threshold=10_000, ban_duration=3600)
+
+        statements = []
+        engine = session_factory.kw["bind"]
+        event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+        assert buffer.flush() == 2
+        assert len(statements) <= 4
+
+        with session_factory() as session:
+            rows = {v.ip_address: v.violation_count for v in session.execute(select(RateLimitViolation)).scalars()}
+        assert rows == {"198.51.100.1": 500, "198.51.100.2": 5}
+
+        # Second flush adds to the existing row
+        buffer.record("198.51.100.1", "/api/a", threshold=10_000, ban_duration=3600)
+        buffer.flush()
+        with session_factory() as session:
+            row = session.execute(
+                select(RateLimitViolation).where(RateLimitViolation.ip_address == "198.51.100.1")
+            ).scalar_one()
+        assert row.violation_count == 501
+
+    def test_flush_persists_bans(self, session_factory):
+        buffer = ViolationBuffer(session_factory)
+        for _ in range(3):
+            buffer.record("192.0.2.50", "/api/a", threshold=3, ban_duration=3600)
+
+        buffer.flush()
+
+        with session_factory() as session:
+            rule = session.execute(select(IPAccessRule)).scalar_one()
+            violation = session.execute(select(RateLimitViolation)).scalar_one()
+        assert rule.rule_type == IPRuleType.auto_banned
+        assert violation.auto_banned is True
+
+    def test_failed_flush_is_retried(self, session_factory):
+        buffer = ViolationBuffer(MagicMock(side_effect=ConnectionError("db down")))
+        buffer.record("192.0.2.60", "/api/a", threshold=2, ban_duration=3600)
+        buffer.record("192.0.2.60", "/api/a", threshold=2, ban_duration=3600)
+
+        assert buffer.flush() == 0
+        assert buffer.stats['flush_errors'] == 1
+        assert buffer.pending() == 2
+
+        buffer._session_factory = session_factory
+        assert buffer.flush() == 2
+        assert buffer.pending() == 0
+
+
+class TestMiddlewareFlood:
+
+    def test_flood_bans_without_touching_the_database(self):
+        settings = get_settings()
+        store = IPRuleStore()
+        store.loaded = True
+        factory = MagicMock()
+        buffer = ViolationBuffer(factory)
+
+        api = FastAPI()
+        api.add_middleware(RateLimitMiddleware)
+
+        @api.get("/ping")
+        def ping():
+            return {"ok": True}
+
+        with patch("app.middleware.rate_limit.ip_rule_store", store), \
+                patch("app.middleware.rate_limit.violation_buffer", buffer):
+            client = TestClient(api)
+            flood = settings.RATE_LIMIT_PER_MINUTE + settings.RATE_LIMIT_VIOLATION_THRESHOLD + 5
+            statuses = [
+                client.get("/ping", headers={"X-Forwarded-For": "203.0.113.77"}).status_code
+                for _ in range(flood)
+            ]
+
+        assert statuses.count(200) == settings.RATE_LIMIT_PER_MINUTE
+        assert store.match("203.0.113.77")[0] == IPRuleType.auto_banned
+        assert buffer.stats['bans'] == 1
+        factory.assert_not_called()
@@ -0,0 +1,180 @@
+# app/tests/test_worker_autoscaler.py
+"""Tests for autoscaling TaskManager workers from queue depth and wait time."""
+import asyncio
+import time
+
+import pytest
+
+from app.services.task_queue import TaskManager, TaskStatus
+from app.services.worker_autoscaler import WorkerAutoscaler
+
+
+def make_manager():
+    manager = TaskManager(use_redis=False)
+
+    @manager.register_task("slow")
+    async def slow(seconds):
+        await asyncio.sleep(seconds)
+        return seconds
+
+    return manager
+
+
+def make_autoscaler(manager, **overrides):
+    options = dict(min_workers=1, max_workers=4, interval=0.05, target_wait=1.0,
+                   backlog_per_worker=2, idle_intervals=3, drain_timeout=2.0)
+    options.update(overrides)
+    return WorkerAutoscaler(manager, **options)
+
+
+class TestScaling:
+
+    @pytest.mark.asyncio
+    async def test_backlog_scales_up_to_max(self):
+        manager = make_manager()
+        autoscaler = make_autoscaler(manager)
+        manager.add_worker()
+        for _ in range(20):
+            await manager.enqueue_task("slow", 0.5)
+
+        decision = await autoscaler.evaluate()
+
+        assert decision['action'] == 'up' and decision['to'] == 4
+        assert decision['queue_depth'] >= 18
+        assert len(manager.workers) == 4
+        assert autoscaler.get_stats()['decisions'] == [decision]
+        await manager.stop_workers()
+
+    @pytest.mark.asyncio
+    async def test_high_wait_scales_up_while_tasks_are_queued(self):
+        manager = make_manager()
+        autoscaler = make_autoscaler(manager, backlog_per_worker=50)
+        manager.add_worker()
+        now = time.monotonic()
+        manager.wait_samples.extend((now, 5.0) for _ in range(10))
+
+        # Slow starts but nothing queued any more: no point adding workers
+        assert (await autoscaler.evaluate())['action'] == 'hold'
+
+        await manager.enqueue_task("slow", 0.5)
+        await manager.enqueue_task("slow", 0.5)
+        decision = await autoscaler.evaluate()
+
+        assert decision['action'] == 'up' and decision['to'] == 2
+        assert decision['wait_p95'] == 5.0
+        await manager.stop_workers()
+
+    @pytest.mark.asyncio
+    async def test_old_wait_samples_are_ignored(self):
+        manager = make_manager()
+        autoscaler = make_autoscaler(manager)
+        manager.wait_samples.extend((time.monotonic() - 3600, 30.0) for _ in range(10))
+
+        assert autoscaler.wait_p95() == 0.0
+
+    @pytest.mark.asyncio
+    async def test_scales_down_only_after_idle_intervals_and_not_below_min(self):
+        manager = make_manager()
+        autoscaler = make_autoscaler(manager, min_workers=2, idle_intervals=3)
+        for _ in range(3):
+            manager.add_worker()
+        for worker in manager.workers:
+            worker.dequeue_timeout = 0.05
+
+        actions = [(await autoscaler.evaluate())['action'] for _ in range(7)]
+        await asyncio.sleep(0.2)
+
+        assert actions == ['hold', 'hold', 'down', 'hold', 'hold', 'hold', 'hold']
+        assert len(manager.workers) == 2
+        assert autoscaler.get_stats()['scale_downs'] == 1
+        assert autoscaler.get_stats()['draining'] == 0
+        await manager.stop_workers()
+
+    @pytest.mark.asyncio
+    async def test_run_starts_min_workers(self):
+        manager = make_manager()
+        task = manager.start_autoscaler(min_workers=2, max_workers=3, interval=0.05)
+        await asyncio.sleep(0.12)
+
+        status = await manager.get_status()
+
+        assert status['total_workers'] == 2
+        assert status['autoscaler']['evaluations'] >= 1
+        await manager.stop_workers()
+        await asyncio.sleep(0)
+        assert task.cancelled()
+
+    @pytest.mark.asyncio
+    async def test_stop_leaves_no_tasks_behind(self):
+        manager = make_manager()
+        manager.start_autoscaler(min_workers=0, max_workers=2, interval=10, idle_intervals=1, drain_timeout=2.0)
+        for _ in range(2):
+            manager.add_worker().dequeue_timeout = 0.05
+        await manager.enqueue_task("slow", 0.2)
+        while not any(worker.current_task for worker in manager.workers):
+            await asyncio.sleep(0.01)
+
+        assert (await manager.autoscaler.evaluate())['action'] == 'down'
+        assert manager.autoscaler.get_stats()['draining'] == 1
+        await manager.stop_workers()
+
+        assert manager.autoscaler.get_stats()['draining'] == 0
+        assert all(task.done() for task in asyncio.all_tasks() if task is not asyncio.current_task())
+
+
+class TestDrain:
+
+    @pytest.mark.asyncio
+    async def test_removed_worker_finishes_its_task(self):
+        manager = make_manager()
+        worker = manager.add_worker()
+        worker.dequeue_timeout = 0.05
+        task_id = await manager.enqueue_task("slow", 0.2)
+        while worker.current_task is None:
+            await asyncio.sleep(0.01)
+
+        assert await manager.remove_worker(drain_timeout=2.0)
+
+        result = await manager.get_task_result(task_id)
+        assert result.status == TaskStatus.COMPLETED and result.result == 0.2
+        assert manager.workers == []
+
+    @pytest.mark.asyncio
+    async def test_idle_worker_is_removed_first(self):
+        manager = make_manager()
+        for _ in range(2):
+            manager.add_worker().dequeue_timeout = 0.05
+        await manager.enqueue_task("slow", 0.3)
+        while not any(worker.current_task for worker in manager.workers):
+            await asyncio.sleep(0.01)
+        busy = next(worker for worker in manager.workers if worker.current_task)
+
+        assert await manager.remove_worker(drain_timeout=1.0)
+
+        assert manager.workers == [busy]
+        await manager.stop_workers()
+
+    @pytest.mark.asyncio
+    async def test_drain_timeout_cancels_the_worker(self):
+        manager = make_manager()
+        worker = manager.add_worker()
+        worker.dequeue_timeout = 0.05
+        await manager.enqueue_task("slow", 5)
+        while worker.current_task is None:
+            await asyncio.sleep(0.01)
+
+        assert not await manager.remove_worker(drain_timeout=0.1)
+        assert manager.workers == []
+
+    @pytest.mark.asyncio
+    async def test_workers_record_wait_samples(self):
+        manager = make_manager()
+        worker = manager.add_worker()
+        worker.dequeue_timeout = 0.05
+        await manager.enqueue_task("slow", 0)
+        while not manager.wait_samples:
+            await asyncio.sleep(0.01)
+
+        assert len(manager.wait_samples) == 1
+        assert 0 <= manager.wait_samples[0][1] < 1
+        await manager.stop_workers()
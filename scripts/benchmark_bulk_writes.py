@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Benchmark round-trips per 10k rows: legacy per-row writes vs the bulk write engine.
+
+Scenarios:
+- customer import: one INSERT ... RETURNING per customer vs CustomerRepository.bulk_create
+- batch client import: bulk_create with flush + refresh per row vs multi-row INSERT ... RETURNING
+- bulk_update: one UPDATE per record vs UPDATE ... FROM (VALUES ...)
+- bulk_update_last_login with per-user timestamps: one UPDATE per user vs one per batch
+
+Runs against a throwaway SQLite database by default. Set BENCH_DATABASE_URL to a
+scratch PostgreSQL database to measure the PostgreSQL paths (tables are created
+and dropped in a bench_bulk schema).
+
+Usage:
+    python scripts/benchmark_bulk_writes.py [--rows 10000]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import Column, DateTime, MetaData, String, Uuid, create_engine, event, func, text  # noqa: E402
+from sqlalchemy.orm import Session, declarative_base  # noqa: E402
+
+from app.repositories.bulk_write import BulkWriter  # noqa: E402
+from app.repositories.optimized_base import OptimizedBaseRepository  # noqa: E402
+
+SCHEMA = "bench_bulk"
+
+
+def build_models(schema):
+    Base = declarative_base(metadata=MetaData(schema=schema))
+
+    class Client(Base):
+        __tablename__ = "client"
+        id = Column(Uuid, primary_key=True, default=uuid.uuid4)
+        tenant_id = Column(Uuid, nullable=False)
+        name = Column(String(100), nullable=False)
+        phone = Column(String(30))
+        last_login = Column(DateTime)
+        created_at = Column(DateTime, server_default=func.now())
+
+    return Base, Client
+
+
+class StatementCounter:
+    def __init__(self, engine):
+        self.count = 0
+        event.listen(engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, *args):
+        self.count += 1
+
+    def measure(self, fn):
+        self.count = 0
+        started = time.perf_counter()
+        fn()
+        return self.count, time.perf_counter() - started
+
+
+def legacy_bulk_create(db, model, rows, batch_size=100):
+    # Previous OptimizedBaseRepository.bulk_create: flush, then refresh every instance
+    for i in range(0, len(rows), batch_size):
+        instances = [model(**row) for row in rows[i:i + batch_size]]
+        db.add_all(instances)
+        db.flush()
+        for instance in instances:
+            db.refresh(instance)
+
+
+def legacy_bulk_update(db, model, updates):
+    # Previous OptimizedBaseRepository.bulk_update: one UPDATE per record
+    for update_data in updates:
+        record_id = update_data["id"]
+        fields = {k: v for k, v in update_data.items() if k != "id"}
+        db.query(model).filter(model.id == record_id).update(fields)
+    db.flush()
+
+
+def legacy_customer_import(db, table, rows):
+    # Previous import path: CustomerRepository.create per customer
+    for row in rows:
+        db.execute(table.insert().values(**row).returning(table.c.id))
+
+
+def run(url, rows):
+    engine = create_engine(url)
+    schema = SCHEMA if engine.dialect.name == "postgresql" else None
+    if schema:
+        with engine.begin() as conn:
+            conn.execute(text(f"CREATE SCHEMA IF NOT EXISTS {schema}"))
+    Base, Client = build_models(schema)
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+
+    class ClientRepository(OptimizedBaseRepository[Client]):
+        def __init__(self, db):
+            super().__init__(db, Client)
+
+    counter = StatementCounter(engine)
+    tenant_id = uuid.uuid4()
+    now = datetime(2026, 1, 1)
+
+    def make_rows(prefix):
+        return [{"tenant_id": tenant_id, "name": f"{prefix}-{i}", "phone": f"+855{i:08d}"} for i in range(rows)]
+
+    results = []
+
+    def scenario(name, legacy, bulk):
+        with Session(engine) as db:
+            legacy_trips, legacy_secs = counter.measure(lambda: legacy(db))
+            db.rollback()
+        with Session(engine) as db:
+            bulk_trips, bulk_secs = counter.measure(lambda: bulk(db))
+            db.rollback()
+        results.append((name, legacy_trips, legacy_secs, bulk_trips, bulk_secs))
+
+    table = Client.__table__
+    scenario(
+        "customer import",
+        lambda db: legacy_customer_import(db, table, make_rows("customer")),
+        lambda db: BulkWriter(db, table).insert(make_rows("customer"), returning=["id"]),
+    )
+    scenario(
+        "batch client import",
+        lambda db: legacy_bulk_create(db, Client, make_rows("client")),
+        lambda db: ClientRepository(db).bulk_create(make_rows("client")),
+    )
+
+    # Seed committed rows for the update scenarios
+    with Session(engine) as db:
+        ids = [row.id for row in BulkWriter(db, table).insert(
+            [{"id": uuid.uuid4(), **row} for row in make_rows("seed")], returning=["id"])]
+        db.commit()
+
+    scenario(
+        "bulk_update",
+        lambda db: legacy_bulk_update(db, Client, [{"id": i, "name": f"renamed-{n}"} for n, i in enumerate(ids)]),
+        lambda db: ClientRepository(db).bulk_update([{"id": i, "name": f"renamed-{n}"} for n, i in enumerate(ids)]),
+    )
+    logins = {i: now + timedelta(seconds=n) for n, i in enumerate(ids)}
+    scenario(
+        "bulk_update_last_login",
+        lambda db: legacy_bulk_update(db, Client, [{"id": i, "last_login": at} for i, at in logins.items()]),
+        lambda db: BulkWriter(db, Client).update([{"id": i, "last_login": at} for i, at in logins.items()]),
+    )
+
+    Base.metadata.drop_all(engine)
+    engine.dispose()
+    return engine.dialect.name, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10_000)
+    args = parser.parse_args()
+
+    url = os.environ.get("BENCH_DATABASE_URL")
+    with tempfile.TemporaryDirectory() as tmp:
+        dialect, results = run(url or f"sqlite:///{tmp}/bench.db", args.rows)
+
+    print(f"Round-trips for {args.rows} rows ({dialect})")
+    print(f"{'scenario':<26}{'legacy':>10}{'bulk':>10}{'legacy s':>12}{'bulk s':>10}")
+    for name, legacy_trips, legacy_secs, bulk_trips, bulk_secs in results:
+        print(f"{name:<26}{legacy_trips:>10}{bulk_trips:>10}{legacy_secs:>12.2f}{bulk_secs:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: cache value codecs vs the previous pickle path.
+
+Encodes/decodes representative cached payloads (dashboard stats, a pattern
+list) with every available codec, with and without compression, and prints
+time per operation and stored bytes. msgpack/zstd rows appear only when
+those packages are installed.
+
+Usage:
+    python scripts/benchmark_cache_codecs.py [--iterations 200]
+"""
+
+import argparse
+import pickle
+import sys
+import timeit
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.core.cache_codec import (  # noqa: E402
+    MSGPACK_AVAILABLE, ORJSON_AVAILABLE, ZSTD_AVAILABLE, CacheSerializer,
+)
+
+
+def dashboard_stats():
+    start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    return {
+        "generated_at": start,
+        "totals": {"revenue": Decimal("152340.75"), "orders": 4812, "customers": 1290},
+        "daily": [
+            {"day": start + timedelta(days=i), "revenue": Decimal(f"{1000 + i * 13}.50"), "orders": 40 + i}
+            for i in range(90)
+        ],
+        "top_products": [{"name": f"Product {i}", "sold": 500 - i, "share": (500 - i) / 5000} for i in range(50)],
+    }
+
+
+def pattern_list():
+    return [
+        {
+            "bank": f"bank-{i % 12}",
+            "pattern": r"(?P<amount>\d+[.,]\d{2})\s*(?P<currency>USD|KHR)",
+            "confidence": 0.5 + (i % 50) / 100,
+            "fields": ["amount", "currency", "reference", "date"],
+            "samples": i * 3,
+        }
+        for i in range(5000)
+    ]
+
+
+class PickleOnly:
+    """The previous RedisBackend path"""
+
+    def dumps(self, value):
+        return pickle.dumps(value)
+
+    def loads(self, data):
+        return pickle.loads(data)
+
+
+def serializers():
+    yield "pickle (previous)", PickleOnly()
+    json_name = "json/orjson" if ORJSON_AVAILABLE else "json/stdlib"
+    compressor = "zstd" if ZSTD_AVAILABLE else "zlib"
+    yield json_name, CacheSerializer("json", compress_min_bytes=0)
+    yield f"{json_name} + {compressor}", CacheSerializer("json", compress_min_bytes=1)
+    if MSGPACK_AVAILABLE:
+        yield "msgpack", CacheSerializer("msgpack", compress_min_bytes=0)
+        yield f"msgpack + {compressor}", CacheSerializer("msgpack", compress_min_bytes=1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    for payload_name, payload in (("dashboard stats", dashboard_stats()), ("pattern list (5k)", pattern_list())):
+        print(f"\n{payload_name}")
+        print(f"{'codec':<24}{'encode us':>12}{'decode us':>12}{'bytes':>10}")
+        for name, serializer in serializers():
+            data = serializer.dumps(payload)
+            encode = timeit.timeit(lambda: serializer.dumps(payload), number=args.iterations)
+            decode = timeit.timeit(lambda: serializer.loads(data), number=args.iterations)
+            print(f"{name:<24}{encode / args.iterations * 1e6:>12.1f}"
+                  f"{decode / args.iterations * 1e6:>12.1f}{len(data):>10}")
+
+
+if __name__ == "__main__":
+    main()